@@ -24,7 +24,6 @@ import Loader from '../components/Loader';
 import PageHeader from '../components/PageHeader';
 import StockAlertNotification from '../components/StockAlertNotification';
 import { formatCurrency } from '../utils/formatCurrency';
-import { API_BASE_URL } from '../config';
 
 const StatCard = ({ title, value, icon: Icon, color, subtitle, trend, trendValue }) => {
   const colorConfigs = {
@@ -678,15 +677,9 @@ const DashboardAdmin = () => {
                   </td>
                   <td className="table-cell">
                     <div className="w-12 h-12 rounded-lg overflow-hidden bg-slate-100 flex items-center justify-center">
-                      {product.photo ? (
+                      {product.thumbnail_url ? (
                         <img
-                          src={
-                            product.photo.startsWith('http')
-                              ? product.photo
-                              : product.photo.startsWith('/media')
-                              ? `${API_BASE_URL}${product.photo}`
-                              : `${API_BASE_URL}/media/products/${product.photo}`
-                          }
+                          src={product.thumbnail_url}
                           alt={product.name}
                           className="w-full h-full object-cover"
                           onError={(e) => {
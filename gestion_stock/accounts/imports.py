@@ -0,0 +1,208 @@
+"""
+Import Excel des clients et prospects, ligne à ligne sans charger la feuille en mémoire.
+
+- les lignes sont lues au fil de l'eau (openpyxl read_only, iter_rows) ;
+- la position de chaque colonne est résolue une fois depuis l'en-tête (noms acceptés par champ) ;
+- les emails et téléphones existants sont chargés une fois dans des ensembles : doublons
+  (base ou fichier) écartés sans requête par ligne ;
+- les lignes valides sont insérées par bulk_create par lots de IMPORT_BATCH_SIZE, dans une
+  transaction (tout ou rien en cas d'erreur base) ;
+- rapport : créés, doublons écartés, et une erreur « Ligne N: ... » par ligne rejetée ;
+- dans une tâche d'arrière-plan (?async=1), l'avancement est mis à jour à chaque lot.
+"""
+import openpyxl
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import Client, Prospect
+
+IMPORT_BATCH_SIZE = 500
+# Erreurs renvoyées dans la réponse (le nombre total est toujours donné)
+MAX_REPORTED_ERRORS = 500
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+
+    def _report(self, line, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Ligne {line}: {message}')
+
+    def error(self, line, message):
+        self.error_count += 1
+        self._report(line, message)
+
+    def skip(self, line, message):
+        self.skipped += 1
+        self._report(line, message)
+
+    def as_dict(self, message):
+        return {
+            'created': self.created,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'message': message,
+            'errors': self.errors,
+        }
+
+
+def read_sheet(file):
+    """(classeur, en-tête, itérateur des lignes suivantes) de la feuille active, en lecture seule."""
+    wb = openpyxl.load_workbook(filename=file, read_only=True, data_only=True)
+    rows = wb.active.iter_rows(values_only=True)
+    return wb, next(rows, None), rows
+
+
+def column_positions(header, aliases):
+    """{champ: index} depuis l'en-tête, pour le premier nom accepté présent (aliases : {champ: [noms]})."""
+    names = [str(cell).strip().lower() if cell else '' for cell in header]
+    positions = {}
+    for field, accepted in aliases.items():
+        for name in accepted:
+            if name in names:
+                positions[field] = names.index(name)
+                break
+    return positions
+
+
+def normalize_email(email):
+    return email.strip().lower() if email else None
+
+
+def normalize_phone(phone):
+    """Téléphone au format E.164 (même règle que l'envoi de SMS) : 77 123 45 67 = +221771234567."""
+    from gestion_stock.sms_backend import normalize_phone as to_e164
+
+    if not phone:
+        return None
+    return to_e164(''.join(ch for ch in phone if ch.isdigit() or ch == '+'))
+
+
+def existing_contacts(queryset):
+    """Ensembles (emails, téléphones) normalisés déjà en base, lus en une requête."""
+    emails, phones = set(), set()
+    for email, phone in queryset.values_list('email', 'phone').iterator(chunk_size=5000):
+        if email:
+            emails.add(normalize_email(email))
+        if phone:
+            phones.add(normalize_phone(phone))
+    phones.discard(None)
+    return emails, phones
+
+
+def _row_values(row, positions):
+    values = {}
+    for field, index in positions.items():
+        value = row[index] if index < len(row) else None
+        values[field] = (str(value).strip() or None) if value is not None else None
+    return values
+
+
+def bulk_import(model, header, rows, aliases, build, existing, batch_size=IMPORT_BATCH_SIZE, total=None):
+    """
+    Importe rows (lignes après l'en-tête header) : build(valeurs) reçoit {champ: texte ou None}
+    selon aliases et renvoie l'instance à créer, ou lève ValueError (ligne rejetée).
+    existing : (emails, téléphones) déjà présents ; total : nombre de lignes de la feuille
+    (en-tête compris) s'il est connu, pour l'avancement.
+    Retourne un ImportReport.
+    """
+    from jobs.background import report_progress
+
+    positions = column_positions(header, aliases)
+    emails, phones = existing
+    report = ImportReport()
+    batch = []
+    with transaction.atomic():
+        for line, row in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in row):
+                continue
+            values = _row_values(row, positions)
+            try:
+                instance = build(values)
+                if instance.email:
+                    try:
+                        validate_email(instance.email)
+                    except ValidationError:
+                        raise ValueError(f'email invalide ({instance.email})')
+                if instance.phone and len(instance.phone) > 20:
+                    raise ValueError(f'téléphone trop long ({instance.phone})')
+            except ValueError as e:
+                report.error(line, str(e))
+                continue
+            email_key = normalize_email(instance.email)
+            phone_key = normalize_phone(instance.phone)
+            if (email_key and email_key in emails) or (phone_key and phone_key in phones):
+                report.skip(line, f'doublon ({instance.email or instance.phone}), ligne ignorée')
+                continue
+            if email_key:
+                emails.add(email_key)
+            if phone_key:
+                phones.add(phone_key)
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                report.created += len(batch)
+                batch = []
+                report_progress(line * 99 // total if total else None, f'{line - 1} lignes lues')
+        if batch:
+            model.objects.bulk_create(batch)
+            report.created += len(batch)
+    return report
+
+
+PROSPECT_COLUMNS = {
+    'name': ['nom', 'name', 'nom complet'],
+    'email': ['email', 'mail'],
+    'phone': ['telephone', 'phone', 'téléphone', 'tel'],
+    'company': ['entreprise', 'company', 'societe'],
+    'status': ['statut', 'status'],
+}
+
+PROSPECT_STATUSES = {
+    Prospect.STATUS_NEW: Prospect.STATUS_NEW, 'nouveau': Prospect.STATUS_NEW,
+    Prospect.STATUS_CONTACTED: Prospect.STATUS_CONTACTED,
+    'contacte': Prospect.STATUS_CONTACTED, 'contacté': Prospect.STATUS_CONTACTED,
+    Prospect.STATUS_CONVERTED: Prospect.STATUS_CONVERTED, 'converti': Prospect.STATUS_CONVERTED,
+    Prospect.STATUS_LOST: Prospect.STATUS_LOST, 'perdu': Prospect.STATUS_LOST,
+}
+
+CLIENT_COLUMNS = {
+    'name': ['nom', 'name', 'nom complet'],
+    'phone': ['telephone', 'phone', 'téléphone', 'tel'],
+    'email': ['email', 'mail'],
+    'address': ['adresse', 'address'],
+    'company': ['entreprise', 'company', 'societe'],
+    'client_type': ['type', 'client_type'],
+    'observation': ['observation', 'observations', 'notes', 'note'],
+}
+
+
+def build_prospect(values):
+    return Prospect(
+        name=(values.get('name') or 'Prospect importé')[:200],
+        email=values.get('email'),
+        phone=values.get('phone'),
+        company=values.get('company'),
+        status=PROSPECT_STATUSES.get((values.get('status') or '').lower(), Prospect.STATUS_NEW),
+    )
+
+
+def build_client(values):
+    name = values.get('name')
+    if not name:
+        raise ValueError('nom manquant')
+    client_type = (values.get('client_type') or '').upper()
+    return Client(
+        name=name[:200],
+        phone=values.get('phone'),
+        email=values.get('email'),
+        address=values.get('address'),
+        company=values.get('company'),
+        client_type=Client.TYPE_CLIENT if client_type in ('CLIENT', 'CLIENTE') else Client.TYPE_PROSPECT,
+        observation=values.get('observation'),
+    )
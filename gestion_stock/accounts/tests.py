@@ -0,0 +1,97 @@
+import csv
+import io
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Client, Prospect
+
+CONTACTS = [
+    ('Awa Diop', '+221771234567', 'awa@example.com', Client.TYPE_CLIENT),
+    ('Moussa Fall', '+221781112233', 'moussa@example.com', Client.TYPE_CLIENT),
+    ('Fatou Ndiaye', '+221701234567', None, Client.TYPE_PROSPECT),
+]
+COMPARED = ['Nom', 'Téléphone', 'Email', 'Type']
+
+
+def _xlsx(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+class ClientExportImportTests(TestCase):
+    """Aller-retour export (CSV, XLSX) puis import Excel des contacts."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        for name, phone, email, client_type in CONTACTS:
+            Client.objects.create(name=name, phone=phone, email=email, client_type=client_type)
+
+    def _stored(self):
+        return sorted(Client.objects.values_list('name', 'phone', 'email', 'client_type'))
+
+    def _export(self, kind):
+        response = self.client.get(f'/api/auth/clients/export-{kind}/', {'all': 1})
+        self.assertEqual(response.status_code, 200)
+        # Lecture complète : le client de test ferme alors la réponse
+        return b''.join(response.streaming_content)
+
+    def _import(self, content):
+        response = self.client.post('/api/auth/clients/import-excel/', {
+            'file': SimpleUploadedFile('clients.xlsx', content),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_csv_and_xlsx_exports_match(self):
+        sheet = openpyxl.load_workbook(io.BytesIO(self._export('excel')), read_only=True).active
+        xlsx_rows = [['' if value is None else str(value) for value in row] for row in sheet.iter_rows(values_only=True)]
+        csv_rows = list(csv.reader(io.StringIO(self._export('csv').decode('utf-8-sig')), delimiter=';'))
+        self.assertEqual(xlsx_rows[0], csv_rows[0])
+        columns = [xlsx_rows[0].index(name) for name in COMPARED]
+        self.assertEqual(
+            sorted([row[i] for i in columns] for row in xlsx_rows[1:]),
+            sorted([row[i] for i in columns] for row in csv_rows[1:]),
+        )
+        self.assertEqual(len(csv_rows), len(CONTACTS) + 1)
+
+    def test_xlsx_round_trip(self):
+        expected = self._stored()
+        content = self._export('excel')
+        Client.objects.all().delete()
+        self.assertEqual(self._import(content)['created'], len(CONTACTS))
+        self.assertEqual(self._stored(), expected)
+        # Nouvel import du même fichier : tous les contacts sont des doublons
+        report = self._import(content)
+        self.assertEqual((report['created'], report['skipped']), (0, len(CONTACTS)))
+
+
+class ProspectImportTests(TestCase):
+    """Import Excel des prospects : statuts reconnus en français ou en anglais."""
+
+    def test_statuses(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        content = _xlsx([
+            ['Nom', 'Email', 'Statut'],
+            ['Prospect A', 'a@example.com', 'Contacté'],
+            ['Prospect B', 'b@example.com', 'perdu'],
+            ['Prospect C', 'c@example.com', 'converted'],
+            ['Prospect D', 'd@example.com', 'inconnu'],
+        ])
+        response = client.post('/api/auth/prospects/import-excel/', {
+            'file': SimpleUploadedFile('prospects.xlsx', content),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Prospect.objects.order_by('name').values_list('status', flat=True)),
+            [Prospect.STATUS_CONTACTED, Prospect.STATUS_LOST, Prospect.STATUS_CONVERTED, Prospect.STATUS_NEW],
+        )
@@ -199,11 +199,14 @@ from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.http import HttpResponse
 from .models import Client, Prospect
 from .serializers import ClientSerializer, ProspectSerializer, UserSerializer
-import openpyxl
-from io import BytesIO
+from .imports import (
+    CLIENT_COLUMNS, PROSPECT_COLUMNS, build_client, build_prospect, bulk_import, existing_contacts, read_sheet,
+)
+from gestion_stock.exports import ExportMixin
+from jobs.background import enqueue_request, wants_background
+from gestion_stock.pagination import SparseFieldsMixin
 
 
 @api_view(['GET'])
@@ -265,7 +268,7 @@ def check_installation(request):
     }, status=status.HTTP_200_OK)
 
 
-class ProspectViewSet(viewsets.ModelViewSet):
+class ProspectViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des prospects (avant conversion en client).
     """
@@ -373,74 +376,30 @@ class ProspectViewSet(viewsets.ModelViewSet):
                 {'error': 'Format non supporté. Utilisez un fichier .xlsx.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if wants_background(request):
+            return enqueue_request(request, 'import_prospects')
 
         try:
-            wb = openpyxl.load_workbook(filename=file, read_only=True, data_only=True)
-            ws = wb.active
-            rows = list(ws.iter_rows(values_only=True))
+            wb, header, rows = read_sheet(file)
         except Exception as e:
             return Response(
                 {'error': f'Fichier Excel invalide: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if not rows:
-            return Response(
-                {'error': 'Le fichier est vide.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        header = [str(c).strip().lower() if c else '' for c in rows[0]]
-        created = 0
-        errors = []
-
-        def col(row, name_aliases):
-            for na in name_aliases:
-                try:
-                    idx = header.index(na)
-                    if idx < len(row) and row[idx] is not None:
-                        return str(row[idx]).strip() or None
-                except ValueError:
-                    continue
-            return None
-
-        for i, row in enumerate(rows[1:], start=2):
-            if not any(v for v in row):
-                continue
-
-            name = col(row, ['nom', 'name', 'nom complet']) or ''
-
-            email = col(row, ['email', 'mail'])
-            phone = col(row, ['telephone', 'phone', 'téléphone', 'tel'])
-            company = col(row, ['entreprise', 'company', 'societe'])
-            status_str = (col(row, ['statut', 'status']) or '').lower()
-
-            if status_str in ['new', 'nouveau']:
-                status_value = Prospect.STATUS_NEW
-            elif status_str in ['contacted', 'contacte', 'contacté']:
-                status_value = Prospect.STATUS_CONTACTED
-            elif status_str in ['converted', 'converti']:
-                status_value = Prospect.STATUS_CONVERTED
-            elif status_str in ['lost', 'perdu']:
-                status_value = Prospect.STATUS_LOST
-            else:
-                status_value = Prospect.STATUS_NEW
-
-            Prospect.objects.create(
-                name=(name or 'Prospect importé')[:200],
-                email=email or None,
-                phone=phone or None,
-                company=company or None,
-                status=status_value,
+        try:
+            if header is None:
+                return Response(
+                    {'error': 'Le fichier est vide.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            report = bulk_import(
+                Prospect, header, rows, PROSPECT_COLUMNS, build_prospect,
+                existing_contacts(Prospect.objects.all()), total=wb.active.max_row,
             )
-            created += 1
-
-        wb.close()
+        finally:
+            wb.close()
         return Response(
-            {
-                'created': created,
-                'message': f'{created} prospect(s) importé(s).',
-                'errors': errors[:50],
-            },
+            report.as_dict(f'{report.created} prospect(s) importé(s).'),
             status=status.HTTP_200_OK,
         )
 
@@ -507,11 +466,11 @@ def setup_admin(request):
         )
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des clients et prospects.
     Filtres: client_type (PROSPECT, CLIENT), is_blacklisted.
-    Actions: convert_to_client, blacklist, export_excel, import_excel.
+    Actions: convert_to_client, blacklist, export_excel, export_csv, import_excel.
     """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
@@ -521,6 +480,16 @@ class ClientViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'email', 'phone', 'company']
     ordering_fields = ['name', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    export_filename = 'clients'
+    export_sheet_title = 'Clients'
+    export_columns = [
+        ('ID', 'id'), ('Nom', 'name'), ('Prénom', 'first_name'), ('Nom (famille)', 'last_name'),
+        ('Téléphone', 'phone'), ('Email', 'email'), ('Adresse', 'address'), ('Entreprise', 'company'),
+        ('Type', 'client_type'), ('Blacklisté', 'is_blacklisted'),
+        ('Observation', 'observation', lambda value: (value or '')[:500]),
+        ('RCCM', 'rccm_number'), ('N° Immatriculation', 'registration_number'), ('NINEA', 'ninea_number'),
+        ('Créé le', 'created_at'), ('Modifié le', 'updated_at'),
+    ]
 
     def get_queryset(self):
         """
@@ -558,38 +527,6 @@ class ClientViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(client)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'], url_path='export-excel')
-    def export_excel(self, request):
-        """Exporte la liste des clients/prospects en fichier Excel (filtres appliqués)."""
-        queryset = self.filter_queryset(self.get_queryset())
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = 'Clients'
-        headers = [
-            'ID', 'Nom', 'Prénom', 'Nom (famille)', 'Téléphone', 'Email', 'Adresse',
-            'Entreprise', 'Type', 'Blacklisté', 'Observation',
-            'RCCM', 'N° Immatriculation', 'NINEA', 'Créé le', 'Modifié le'
-        ]
-        ws.append(headers)
-        for c in queryset:
-            ws.append([
-                c.id, c.name or '', c.first_name or '', c.last_name or '', c.phone or '', c.email or '',
-                c.address or '', c.company or '', c.get_client_type_display() or c.client_type,
-                'Oui' if c.is_blacklisted else 'Non', (c.observation or '')[:500],
-                c.rccm_number or '', c.registration_number or '', c.ninea_number or '',
-                c.created_at.strftime('%Y-%m-%d %H:%M') if c.created_at else '',
-                c.updated_at.strftime('%Y-%m-%d %H:%M') if c.updated_at else '',
-            ])
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="clients.xlsx"'
-        return response
-
     @action(detail=False, methods=['post'], url_path='import-excel', parser_classes=[MultiPartParser, FormParser])
     def import_excel(self, request):
         """Importe des prospects/clients depuis un fichier Excel (.xlsx)."""
@@ -604,68 +541,29 @@ class ClientViewSet(viewsets.ModelViewSet):
                 {'error': 'Format non supporté. Utilisez un fichier .xlsx.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if wants_background(request):
+            return enqueue_request(request, 'import_clients')
         try:
-            wb = openpyxl.load_workbook(filename=file, read_only=True, data_only=True)
-            ws = wb.active
-            rows = list(ws.iter_rows(values_only=True))
+            wb, header, rows = read_sheet(file)
         except Exception as e:
             return Response(
                 {'error': f'Fichier Excel invalide: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if not rows:
-            return Response(
-                {'error': 'Le fichier est vide.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        # Première ligne = en-têtes (on accepte des noms flexibles)
-        header = [str(c).strip().lower() if c else '' for c in rows[0]]
-        created = 0
-        errors = []
-        for i, row in enumerate(rows[1:], start=2):
-            if not any(v for v in row):
-                continue
-            def col(name_aliases):
-                for na in name_aliases:
-                    try:
-                        idx = header.index(na)
-                        if idx < len(row) and row[idx] is not None:
-                            return str(row[idx]).strip() or None
-                    except ValueError:
-                        continue
-                return None
-            name = col(['nom', 'name', 'nom complet', 'nom complet'])
-            if not name:
-                errors.append(f'Ligne {i}: nom manquant')
-                continue
-            phone = col(['telephone', 'phone', 'téléphone', 'tel'])
-            email = col(['email', 'mail'])
-            address = col(['adresse', 'address'])
-            company = col(['entreprise', 'company', 'societe'])
-            client_type = col(['type', 'client_type'])
-            if client_type and client_type.upper() in ('CLIENT', 'CLIENTE'):
-                client_type = Client.TYPE_CLIENT
-            else:
-                client_type = Client.TYPE_PROSPECT
-            observation = col(['observation', 'observations', 'notes', 'note'])
-            if email and Client.objects.filter(email=email).exists():
-                continue  # évite doublon par email
-            Client.objects.create(
-                name=name[:200],
-                phone=phone or None,
-                email=email or None,
-                address=address or None,
-                company=company or None,
-                client_type=client_type,
-                observation=observation or None,
+        try:
+            if header is None:
+                return Response(
+                    {'error': 'Le fichier est vide.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Doublons (email ou téléphone) vérifiés sur tous les contacts, clients et prospects
+            report = bulk_import(
+                Client, header, rows, CLIENT_COLUMNS, build_client,
+                existing_contacts(Client.objects.all()), total=wb.active.max_row,
             )
-            created += 1
-        wb.close()
-        return Response({
-            'created': created,
-            'message': f'{created} contact(s) importé(s).',
-            'errors': errors[:50],
-        })
+        finally:
+            wb.close()
+        return Response(report.as_dict(f'{report.created} contact(s) importé(s).'))
 
 
 class UserViewSet(viewsets.ModelViewSet):
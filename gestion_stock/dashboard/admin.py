@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import DashboardCounter, DashboardSnapshot
+
+
+@admin.register(DashboardSnapshot)
+class DashboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['section', 'computed_at']
+    readonly_fields = ['section', 'data', 'computed_at']
+
+
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ['name', 'value', 'updated_at']
+    readonly_fields = ['name', 'value', 'updated_at']
@@ -0,0 +1,28 @@
+"""
+Commande : reconstruit entièrement les instantanés du tableau de bord.
+Usage :
+  python manage.py rebuild_dashboard_snapshot
+  python manage.py rebuild_dashboard_snapshot --section products
+"""
+from django.core.management.base import BaseCommand
+
+from dashboard.snapshot import SECTIONS, refresh_section
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques précalculées du tableau de bord (toutes les sections par défaut)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            choices=SECTIONS,
+            action='append',
+            help='Section à recalculer (peut être répétée).',
+        )
+
+    def handle(self, *args, **options):
+        sections = options.get('section') or SECTIONS
+        for section in sections:
+            refresh_section(section)
+            self.stdout.write(f'Section « {section} » recalculée.')
+        self.stdout.write(self.style.SUCCESS('Instantanés du tableau de bord à jour.'))
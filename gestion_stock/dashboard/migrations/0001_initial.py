@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:18
+
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(choices=[('products', 'Produits et stock'), ('invoices', 'Factures'), ('technicians', 'Classement des techniciens')], max_length=30, unique=True, verbose_name='Section')),
+                ('data', models.JSONField(default=dict, encoder=rest_framework.utils.encoders.JSONEncoder, verbose_name='Données')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Calculé le')),
+            ],
+            options={
+                'verbose_name': 'Instantané du tableau de bord',
+                'verbose_name_plural': 'Instantanés du tableau de bord',
+                'ordering': ['section'],
+            },
+        ),
+    ]
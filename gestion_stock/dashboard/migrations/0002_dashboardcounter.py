@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Compteur')),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Valeur')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+            ],
+            options={
+                'verbose_name': 'Compteur du tableau de bord',
+                'verbose_name_plural': 'Compteurs du tableau de bord',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Listes précalculées du tableau de bord (stock faible, dernières factures, classements),
+    une ligne par section. Une liste n'est recalculée que si une écriture peut la modifier
+    (voir dashboard/signals.py) ; reconstruction complète par `manage.py rebuild_dashboard_snapshot`.
+    """
+    SECTION_CHOICES = [
+        ('products', 'Produits et stock'),
+        ('invoices', 'Factures'),
+        ('technicians', 'Classement des techniciens'),
+    ]
+
+    section = models.CharField(
+        max_length=30,
+        choices=SECTION_CHOICES,
+        unique=True,
+        verbose_name="Section"
+    )
+    data = models.JSONField(default=dict, encoder=JSONEncoder, verbose_name="Données")
+    computed_at = models.DateTimeField(auto_now=True, verbose_name="Calculé le")
+
+    class Meta:
+        verbose_name = "Instantané du tableau de bord"
+        verbose_name_plural = "Instantanés du tableau de bord"
+        ordering = ['section']
+
+    def __str__(self):
+        return f"{self.get_section_display()} ({self.computed_at:%d/%m/%Y %H:%M})"
+
+
+class DashboardCounter(models.Model):
+    """
+    Compteurs et sommes du tableau de bord (nombre de produits, valeur du stock, chiffre d'affaires...),
+    tenus par des variations en F() à chaque écriture et recalculés par `manage.py rebuild_dashboard_snapshot`.
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name="Compteur")
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Valeur")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+
+    class Meta:
+        verbose_name = "Compteur du tableau de bord"
+        verbose_name_plural = "Compteurs du tableau de bord"
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,110 @@
+"""
+Signaux qui maintiennent le tableau de bord à jour.
+Compteurs : variations appliquées dans la transaction de l'écriture.
+Listes : recalculées après le commit, seulement si l'écriture change ce qu'elles classent.
+"""
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+from installations.models import Installation
+from interventions.models import Intervention
+from invoices.models import InvoiceItem
+from invoices.signals import invoice_state_changed
+from payments.models import Payment
+from products.signals import product_state_changed
+from stock.signals import stock_level_changed
+
+from .snapshot import (
+    apply_invoice_change,
+    apply_product_change,
+    apply_stock_levels,
+    invoice_listed,
+    schedule_refresh,
+)
+
+# Statut compté dans les classements des techniciens
+RANKED_STATUS = {Installation: 'TERMINEE', Intervention: 'TERMINE'}
+
+
+@receiver(product_state_changed)
+def on_product_changed(sender, old, new, **kwargs):
+    apply_product_change(old, new)
+
+
+@receiver(stock_level_changed)
+def on_stock_changed(sender, deltas=None, **kwargs):
+    if deltas:
+        apply_stock_levels(deltas)
+
+
+@receiver(invoice_state_changed)
+def on_invoice_changed(sender, invoice_id, old, new, **kwargs):
+    apply_invoice_change(invoice_id, old, new)
+
+
+@receiver([post_save, post_delete], sender=InvoiceItem)
+@receiver(post_save, sender=Payment)
+def on_listed_invoice_changed(sender, instance, **kwargs):
+    # Lignes et paiements ne changent que l'affichage d'une facture déjà listée
+    if instance.invoice_id and invoice_listed(instance.invoice_id):
+        schedule_refresh('invoices')
+
+
+def _ranked_key(model, status, deleted_at, technician_id):
+    """(comptée dans le classement, technicien compté) d'une installation ou intervention."""
+    counted = status == RANKED_STATUS[model] and not deleted_at
+    return counted, technician_id if counted else None
+
+
+@receiver(pre_save, sender=Installation)
+@receiver(pre_save, sender=Intervention)
+def remember_ranked_state(sender, instance, **kwargs):
+    row = None
+    if instance.pk:
+        row = sender.objects.filter(pk=instance.pk).values_list('status', 'deleted_at', 'technician_id').first()
+    instance._ranked_key = _ranked_key(sender, *row) if row else (False, None)
+
+
+@receiver(post_save, sender=Installation)
+@receiver(post_save, sender=Intervention)
+def on_ranked_activity_saved(sender, instance, **kwargs):
+    new_key = _ranked_key(sender, instance.status, instance.deleted_at, instance.technician_id)
+    if new_key != getattr(instance, '_ranked_key', None):
+        schedule_refresh('technicians')
+    instance._ranked_key = new_key
+
+
+@receiver(post_delete, sender=Installation)
+@receiver(post_delete, sender=Intervention)
+def on_ranked_activity_deleted(sender, instance, **kwargs):
+    if _ranked_key(sender, instance.status, instance.deleted_at, instance.technician_id)[0]:
+        schedule_refresh('technicians')
+
+
+@receiver(m2m_changed, sender=Installation.technicians.through)
+def on_installation_technicians_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse or _ranked_key(Installation, instance.status, instance.deleted_at, instance.technician_id)[0]:
+        schedule_refresh('technicians')
+
+
+@receiver(pre_save, sender=UserProfile)
+def remember_role(sender, instance, **kwargs):
+    instance._stored_role = (
+        sender.objects.filter(pk=instance.pk).values_list('role', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+def on_role_saved(sender, instance, **kwargs):
+    if (getattr(instance, '_stored_role', None) == 'technicien') != (instance.role == 'technicien'):
+        schedule_refresh('technicians')
+    instance._stored_role = instance.role
+
+
+@receiver(post_delete, sender=UserProfile)
+def on_profile_deleted(sender, instance, **kwargs):
+    if instance.role == 'technicien':
+        schedule_refresh('technicians')
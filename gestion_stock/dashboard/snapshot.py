@@ -0,0 +1,318 @@
+"""
+Calcul et lecture des données du tableau de bord.
+
+- Compteurs (DashboardCounter) : nombre de produits, stock faible, valeur du stock, nombre de factures
+  et chiffre d'affaires. Chaque écriture y applique sa variation en F() dans sa propre transaction
+  (apply_product_change, apply_stock_levels, apply_invoice_change), comme le cumul RevenueMonthly.
+- Listes (DashboardSnapshot) : stock faible, dernières factures et classements des techniciens.
+  Une liste n'est recalculée que si l'écriture peut la modifier, une seule fois après le commit.
+- refresh_section / rebuild_all : recalcul complet, réservé à rebuild_dashboard_snapshot
+  et aux sections jamais calculées.
+"""
+import logging
+import threading
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DashboardCounter, DashboardSnapshot
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = [choice[0] for choice in DashboardSnapshot.SECTION_CHOICES]
+
+# Compteurs tenus par variations, avec leur section et leur type dans la réponse
+COUNTERS = {
+    'total_products': ('products', int),
+    'low_stock_products': ('products', int),
+    'stock_value': ('products', float),
+    'total_invoices': ('invoices', int),
+    'revenue': ('invoices', float),
+}
+
+RECENT_INVOICES = 5
+
+# Listes à recalculer au prochain commit (par thread)
+_pending = threading.local()
+
+
+def _low_stock_list():
+    from products.models import Product
+
+    low_stock_qs = Product.objects.filter(
+        deleted_at__isnull=True, is_active=True, quantity__lte=F('alert_threshold'),
+    )
+    return {
+        'low_stock_list': [
+            {'id': p['id'], 'name': p['name'], 'quantity': p['quantity'], 'alert_threshold': p['alert_threshold']}
+            for p in low_stock_qs.order_by('quantity').values('id', 'name', 'quantity', 'alert_threshold')[:50]
+        ],
+    }
+
+
+def _product_counters():
+    from products.models import Product
+
+    active = Product.objects.filter(deleted_at__isnull=True, is_active=True)
+    totals = active.aggregate(
+        total_products=Count('id'),
+        low_stock_products=Count('id', filter=Q(quantity__lte=F('alert_threshold'))),
+        stock_value=Sum(F('quantity') * F('purchase_price')),
+    )
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def _recent_invoices():
+    from invoices.models import Invoice
+    from invoices.serializers import InvoiceSerializer
+
+    recent = (
+        Invoice.objects.filter(deleted_at__isnull=True)
+        .select_related('client').prefetch_related('invoice_items__product')
+        .order_by('-date')[:RECENT_INVOICES]
+    )
+    return {'recent_invoices': InvoiceSerializer(recent, many=True).data}
+
+
+def _invoice_counters():
+    from invoices.models import Invoice
+
+    totals = Invoice.objects.filter(deleted_at__isnull=True).aggregate(
+        total_invoices=Count('id'),
+        revenue=Sum('total_ttc', filter=Q(is_cancelled=False)),
+    )
+    return {name: value or 0 for name, value in totals.items()}
+
+
+def _ranking(users, count_field):
+    rows = []
+    for rank, tech in enumerate(users, start=1):
+        full_name = f"{tech.first_name or ''} {tech.last_name or ''}".strip() or tech.username
+        total = getattr(tech, count_field, None)
+        try:
+            total = int(total) if total is not None else 0
+        except (TypeError, ValueError):
+            total = 0
+        rows.append({
+            'id': tech.id,
+            'username': tech.username,
+            'full_name': full_name,
+            count_field: total,
+            'rank': rank,
+        })
+    return rows
+
+
+def _compute_technicians():
+    """Classements des techniciens par installations et interventions terminées."""
+    # Compte : technicien assigné (FK) + techniciens (M2M) pour chaque installation terminée
+    filter_terminée = Q(
+        installations__status='TERMINEE',
+        installations__deleted_at__isnull=True,
+    )
+    filter_terminée_m2m = Q(
+        installations_as_technician__status='TERMINEE',
+        installations_as_technician__deleted_at__isnull=True,
+    )
+    top_installations = (
+        User.objects.filter(profile__role='technicien')
+        .annotate(
+            _count_fk=Count('installations', filter=filter_terminée, distinct=True),
+            _count_m2m=Count('installations_as_technician', filter=filter_terminée_m2m, distinct=True),
+        )
+        .annotate(total_installations=F('_count_fk') + F('_count_m2m'))
+        .order_by('-total_installations', 'username')[:5]
+    )
+    top_interventions = (
+        User.objects.filter(profile__role='technicien')
+        .annotate(
+            total_interventions=Count(
+                'interventions',
+                filter=Q(interventions__status='TERMINE', interventions__deleted_at__isnull=True),
+            )
+        )
+        .order_by('-total_interventions', 'username')[:5]
+    )
+    return {
+        'top_technicians_installations': _ranking(top_installations, 'total_installations'),
+        'top_technicians_interventions': _ranking(top_interventions, 'total_interventions'),
+    }
+
+
+# Par section : (liste enregistrée dans DashboardSnapshot, compteurs recalculés en entier)
+_COMPUTERS = {
+    'products': (_low_stock_list, _product_counters),
+    'invoices': (_recent_invoices, _invoice_counters),
+    'technicians': (_compute_technicians, None),
+}
+
+
+def _refresh_list(section):
+    data = _COMPUTERS[section][0]()
+    DashboardSnapshot.objects.update_or_create(section=section, defaults={'data': data})
+    return data
+
+
+def refresh_section(section):
+    """
+    Recalcul complet d'une section (liste et compteurs absolus) et enregistrement.
+    Retourne les données de la section, compteurs compris.
+    """
+    compute_counters = _COMPUTERS[section][1]
+    with transaction.atomic():
+        data = dict(_refresh_list(section))
+        if compute_counters:
+            for name, value in compute_counters().items():
+                DashboardCounter.objects.update_or_create(name=name, defaults={'value': value})
+                data[name] = COUNTERS[name][1](value)
+    return data
+
+
+def rebuild_all():
+    """Recalcule toutes les sections."""
+    for section in SECTIONS:
+        refresh_section(section)
+
+
+def add_to_counters(deltas):
+    """
+    Ajoute les variations {compteur: delta} en F(). Un compteur absent (jamais calculé) n'est pas créé :
+    get_dashboard_stats le construit par un recalcul complet de sa section.
+    """
+    now = timezone.now()
+    for name, delta in sorted(deltas.items()):
+        if delta:
+            DashboardCounter.objects.filter(name=name).update(value=F('value') + delta, updated_at=now)
+
+
+def _diff(old, new):
+    return {name: new.get(name, 0) - old.get(name, 0) for name in set(old) | set(new)}
+
+
+def product_contribution(state):
+    """Contribution d'un produit ({champ: valeur} de STATE_FIELDS ou None) aux compteurs."""
+    if not state or state['deleted_at'] or not state['is_active']:
+        return {}
+    return {
+        'total_products': 1,
+        'low_stock_products': 1 if state['quantity'] <= state['alert_threshold'] else 0,
+        'stock_value': state['quantity'] * Decimal(str(state['purchase_price'] or 0)),
+    }
+
+
+def invoice_contribution(state):
+    """Contribution d'une facture ({champ: valeur} de REVENUE_FIELDS ou None) aux compteurs."""
+    if not state or state['deleted_at']:
+        return {}
+    return {
+        'total_invoices': 1,
+        'revenue': Decimal(0) if state['is_cancelled'] else Decimal(str(state['total_ttc'] or 0)),
+    }
+
+
+def apply_product_change(old, new):
+    """Passage d'un produit de old à new : variations des compteurs, liste de stock faible si concernée."""
+    before, after = product_contribution(old), product_contribution(new)
+    add_to_counters(_diff(before, after))
+    if old != new and (before.get('low_stock_products') or after.get('low_stock_products')):
+        schedule_refresh('products')
+
+
+def apply_stock_levels(deltas):
+    """
+    Variations de quantité {product_id: delta} appliquées par stock.ledger : l'ancien état de chaque produit
+    est déduit du solde relu (solde - delta), sans recalcul de la section.
+    """
+    from products.models import Product, STATE_FIELDS
+
+    totals = {}
+    low_stock_touched = False
+    for row in Product.objects.filter(pk__in=list(deltas)).values('pk', *STATE_FIELDS):
+        new = {name: row[name] for name in STATE_FIELDS}
+        old = dict(new, quantity=new['quantity'] - deltas[row['pk']])
+        before, after = product_contribution(old), product_contribution(new)
+        for name, delta in _diff(before, after).items():
+            totals[name] = totals.get(name, 0) + delta
+        low_stock_touched = low_stock_touched or before.get('low_stock_products') or after.get('low_stock_products')
+    add_to_counters(totals)
+    if low_stock_touched:
+        schedule_refresh('products')
+
+
+def _recent_invoices_snapshot():
+    data = DashboardSnapshot.objects.filter(section='invoices').values_list('data', flat=True).first()
+    return None if data is None else data.get('recent_invoices', [])
+
+
+def invoice_listed(invoice_id):
+    """Vrai si la facture figure dans la liste des dernières factures enregistrée."""
+    return any(invoice['id'] == invoice_id for invoice in _recent_invoices_snapshot() or [])
+
+
+def apply_invoice_change(invoice_id, old, new):
+    """
+    Passage d'une facture de old à new : variations des compteurs ; liste des dernières factures
+    recalculée seulement si la facture y figure ou doit y entrer.
+    """
+    add_to_counters(_diff(invoice_contribution(old), invoice_contribution(new)))
+    recent = _recent_invoices_snapshot()
+    if recent is None:
+        return
+    if any(invoice['id'] == invoice_id for invoice in recent):
+        schedule_refresh('invoices')
+    elif new and not new['deleted_at']:
+        oldest = parse_datetime(recent[-1]['date']) if len(recent) >= RECENT_INVOICES else None
+        if oldest is None or new['date'] >= oldest:
+            schedule_refresh('invoices')
+
+
+def _flush_pending():
+    sections = getattr(_pending, 'sections', None)
+    if not sections:
+        return
+    _pending.sections = set()
+    for section in sorted(sections):
+        try:
+            _refresh_list(section)
+        except Exception as e:
+            # Un échec ne doit jamais bloquer l'écriture d'origine : la liste sera
+            # recalculée à la prochaine écriture qui la concerne ou par rebuild_dashboard_snapshot.
+            logger.exception("Recalcul liste dashboard (%s) échoué: %s", section, e)
+
+
+def schedule_refresh(*sections):
+    """
+    Demande le recalcul des listes des sections après le commit de la transaction en cours
+    (immédiatement hors transaction). Plusieurs demandes dans la même transaction
+    ne déclenchent qu'un recalcul par section.
+    """
+    if not hasattr(_pending, 'sections'):
+        _pending.sections = set()
+    _pending.sections.update(sections)
+    transaction.on_commit(_flush_pending)
+
+
+def get_dashboard_stats():
+    """
+    Retourne les statistiques du tableau de bord à partir des listes et compteurs enregistrés (deux requêtes).
+    Les sections jamais calculées (liste ou compteur manquant) sont construites à la volée.
+    """
+    stats = {}
+    found = set()
+    for snapshot in DashboardSnapshot.objects.all():
+        stats.update(snapshot.data)
+        found.add(snapshot.section)
+    counters = dict(DashboardCounter.objects.values_list('name', 'value'))
+    for name, (section, cast) in COUNTERS.items():
+        if name in counters:
+            stats[name] = cast(counters[name])
+        else:
+            found.discard(section)
+    for section in SECTIONS:
+        if section not in found:
+            stats.update(refresh_section(section))
+    return stats
@@ -0,0 +1,67 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from invoices.models import Invoice
+from products.models import Product
+from stock.ledger import apply_stock_delta, apply_stock_deltas
+
+from .snapshot import COUNTERS, _invoice_counters, _product_counters, get_dashboard_stats, rebuild_all
+
+
+class IncrementalDashboardTests(TestCase):
+    """Compteurs tenus par variations en F() : identiques à un recalcul complet, listes recalculées au besoin."""
+
+    def setUp(self):
+        rebuild_all()
+
+    def assertCountersMatchRecompute(self):
+        stats = get_dashboard_stats()
+        expected = {**_product_counters(), **_invoice_counters()}
+        for name, (_, cast) in COUNTERS.items():
+            self.assertEqual(stats[name], cast(expected[name]), name)
+
+    def test_product_writes(self):
+        router = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=12, alert_threshold=5)
+        cable = Product.objects.create(name='Câble', purchase_price=2, sale_price=3, quantity=3, alert_threshold=5)
+        apply_stock_delta(router.pk, -8)
+        apply_stock_deltas({router.pk: 10, cable.pk: -1})
+        stale = Product.objects.get(pk=cable.pk)
+        stale.purchase_price = Decimal('2.50')
+        stale.save()
+        Product.objects.get(pk=router.pk).soft_delete()
+        self.assertCountersMatchRecompute()
+        Product.objects.get(pk=router.pk).restore()
+        Product.objects.get(pk=cable.pk).delete()
+        self.assertCountersMatchRecompute()
+        self.assertEqual(get_dashboard_stats()['total_products'], 1)
+
+    def test_invoice_writes(self):
+        first = Invoice.objects.create(client_name='Client', total_ht=Decimal('100'), total_ttc=Decimal('118'))
+        second = Invoice.objects.create(client_name='Client', total_ht=Decimal('50'), total_ttc=Decimal('59'))
+        Invoice.objects.get(pk=first.pk).cancel()
+        second.total_ht, second.total_ttc = Decimal('60'), Decimal('70.80')
+        second.save(update_fields=['total_ht', 'total_ttc', 'updated_at'])
+        self.assertCountersMatchRecompute()
+        Invoice.objects.get(pk=second.pk).soft_delete()
+        Invoice.objects.get(pk=first.pk).delete()
+        self.assertCountersMatchRecompute()
+        self.assertEqual(get_dashboard_stats()['revenue'], 0)
+
+    def test_low_stock_list_refreshed_only_when_concerned(self):
+        product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=50, alert_threshold=5)
+        with mock.patch('dashboard.snapshot._refresh_list') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_stock_delta(product.pk, -10)
+            self.assertNotIn(mock.call('products'), refresh.call_args_list)
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_stock_delta(product.pk, -36)
+            self.assertEqual(refresh.call_args_list.count(mock.call('products')), 1)
+        self.assertEqual(
+            [row['id'] for row in get_dashboard_stats()['low_stock_list']], [],
+            "liste non recalculée sous mock",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_stock_delta(product.pk, -1)
+        self.assertEqual([row['id'] for row in get_dashboard_stats()['low_stock_list']], [product.pk])
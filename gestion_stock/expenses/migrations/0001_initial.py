@@ -25,7 +25,6 @@ class Migration(migrations.Migration):
                 ('status', models.CharField(choices=[('PAYE', 'Payé'), ('NON_PAYE', 'Non payé')], default='NON_PAYE', max_length=10, verbose_name='Statut')),
                 ('supplier', models.CharField(blank=True, max_length=200, null=True, verbose_name='Fournisseur')),
                 ('receipt_number', models.CharField(blank=True, max_length=100, null=True, verbose_name='Numéro de reçu')),
-                ('justification_image', models.ImageField(blank=True, null=True, upload_to='expenses/', verbose_name='Image de justification')),
                 ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
                 ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
                 ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de suppression')),
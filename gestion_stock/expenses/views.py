@@ -10,11 +10,13 @@ from django.utils import timezone
 from .models import Expense
 from .serializers import ExpenseSerializer, ExpenseCreateSerializer
 from products.permissions import IsAdminUser as IsAdminUserPermission
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
 
 logger = logging.getLogger(__name__)
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des dépenses
     """
@@ -26,6 +28,13 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     filterset_fields = ['category', 'status', 'site']
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date', '-created_at']
+    export_filename = 'depenses'
+    export_sheet_title = 'Dépenses'
+    export_columns = [
+        ('ID', 'id'), ('Date', 'date'), ('Titre', 'title'), ('Catégorie', 'category'), ('Site', 'site'),
+        ('Montant', 'amount'), ('Statut', 'status'), ('Fournisseur', 'supplier'),
+        ('N° reçu', 'receipt_number'), ('Description', 'description'),
+    ]
     
     def get_serializer_context(self):
         """Ajoute la requête au contexte du serializer pour les URLs d'images"""
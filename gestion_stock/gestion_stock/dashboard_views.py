@@ -1,155 +1,26 @@
-from rest_framework import views, status
+from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from products.models import Product
-from invoices.models import Invoice
-from stock.models import StockMovement
-from products.permissions import IsAdminUser
-from django.db.models import Sum, Count, Q, F, Value, DecimalField
-from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models import Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
-from django.contrib.auth.models import User
-from installations.models import Installation
-from interventions.models import Intervention
+from dashboard.snapshot import get_dashboard_stats
+from invoices.models import RevenueMonthly
+from invoices.revenue import month_start
+from stock.sales import top_sellers
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])  # Changé de IsAdminUser à IsAuthenticated
 def dashboard_stats(request):
     """
-    Retourne les statistiques du tableau de bord
+    Retourne les statistiques du tableau de bord, lues depuis les listes et compteurs
+    précalculés (dashboard.DashboardSnapshot, dashboard.DashboardCounter) en deux requêtes.
     """
     try:
-        # Nombre total de produits actifs
-        total_products = Product.objects.filter(
-            deleted_at__isnull=True,
-            is_active=True
-        ).count()
-
-        # Produits en rupture / stock faible
-        low_stock_qs = Product.objects.filter(
-            deleted_at__isnull=True,
-            is_active=True,
-            quantity__lte=F('alert_threshold')
-        )
-        low_stock_products = low_stock_qs.count()
-        low_stock_list = [
-            {'id': p.id, 'name': p.name, 'quantity': p.quantity, 'alert_threshold': p.alert_threshold}
-            for p in low_stock_qs.order_by('quantity')[:50]
-        ]
-
-        # Valeur totale du stock (quantité * prix d'achat)
-        stock_value = Product.objects.filter(
-            deleted_at__isnull=True,
-            is_active=True
-        ).aggregate(
-            total_value=Sum(F('quantity') * F('purchase_price'))
-        )['total_value'] or 0
-
-        # Nombre de factures
-        total_invoices = Invoice.objects.filter(
-            deleted_at__isnull=True
-        ).count()
-
-        # Chiffre d'affaires (total TTC des factures)
-        revenue = Invoice.objects.filter(
-            deleted_at__isnull=True,
-            is_cancelled=False
-        ).aggregate(
-            total=Sum('total_ttc')
-        )['total'] or 0
-
-        # Dernières factures (5 dernières)
-        recent_invoices = Invoice.objects.filter(
-            deleted_at__isnull=True
-        ).order_by('-date')[:5]
-
-        from invoices.serializers import InvoiceSerializer
-        invoices_serializer = InvoiceSerializer(recent_invoices, many=True)
-
-        # Classement des techniciens (rôle=technicien) par nombre d'installations terminées
-        # Compte : technicien assigné (FK) + techniciens (M2M) pour chaque installation terminée
-        filter_terminée = Q(
-            installations__status='TERMINEE',
-            installations__deleted_at__isnull=True,
-        )
-        filter_terminée_m2m = Q(
-            installations_as_technician__status='TERMINEE',
-            installations_as_technician__deleted_at__isnull=True,
-        )
-        top_technicians_qs = (
-            User.objects.filter(profile__role='technicien')
-            .annotate(
-                _count_fk=Count('installations', filter=filter_terminée, distinct=True),
-                _count_m2m=Count('installations_as_technician', filter=filter_terminée_m2m, distinct=True),
-            )
-            .annotate(
-                total_installations=F('_count_fk') + F('_count_m2m'),
-            )
-            .order_by('-total_installations', 'username')[:5]
-        )
-
-        top_technicians = []
-        for rank, tech in enumerate(top_technicians_qs, start=1):
-            full_name = f"{tech.first_name or ''} {tech.last_name or ''}".strip() or tech.username
-            total = getattr(tech, 'total_installations', None)
-            try:
-                total = int(total) if total is not None else 0
-            except (TypeError, ValueError):
-                total = 0
-            top_technicians.append(
-                {
-                    'id': tech.id,
-                    'username': tech.username,
-                    'full_name': full_name,
-                    'total_installations': total,
-                    'rank': rank,
-                }
-            )
-
-        # Classement des techniciens par nombre d'interventions terminées
-        top_technicians_interventions_qs = (
-            User.objects.filter(profile__role='technicien')
-            .annotate(
-                total_interventions=Count(
-                    'interventions',
-                    filter=Q(
-                        interventions__status='TERMINE',
-                        interventions__deleted_at__isnull=True,
-                    ),
-                )
-            )
-            .order_by('-total_interventions', 'username')[:5]
-        )
-        top_technicians_interventions = []
-        for rank, tech in enumerate(top_technicians_interventions_qs, start=1):
-            full_name = f"{tech.first_name or ''} {tech.last_name or ''}".strip() or tech.username
-            total = getattr(tech, 'total_interventions', None)
-            try:
-                total = int(total) if total is not None else 0
-            except (TypeError, ValueError):
-                total = 0
-            top_technicians_interventions.append({
-                'id': tech.id,
-                'username': tech.username,
-                'full_name': full_name,
-                'total_interventions': total,
-                'rank': rank,
-            })
-
-        return Response({
-            'total_products': total_products,
-            'low_stock_products': low_stock_products,
-            'low_stock_list': low_stock_list,
-            'stock_value': float(stock_value),
-            'total_invoices': total_invoices,
-            'revenue': float(revenue),
-            'recent_invoices': invoices_serializer.data,
-            'top_technicians_installations': top_technicians,
-            'top_technicians_interventions': top_technicians_interventions,
-        })
+        return Response(get_dashboard_stats())
     except Exception as e:
         import logging
         logging.getLogger(__name__).exception('dashboard_stats error: %s', e)
@@ -163,38 +34,44 @@ def dashboard_stats(request):
 @permission_classes([IsAuthenticated])  # Changé de IsAdminUser à IsAuthenticated
 def dashboard_charts(request):
     """
-    Retourne les données pour les graphiques
+    Retourne les données pour les graphiques.
+    Paramètres : months (6 par défaut, 36 au maximum), company (NETSYSTEME / SSE, toutes par défaut),
+    period (30 ou 90 jours pour les meilleures ventes, depuis toujours par défaut).
     """
-    # Chiffre d'affaires par mois (6 derniers mois)
-    six_months_ago = timezone.now() - timedelta(days=180)
-    monthly_revenue = Invoice.objects.filter(
-        deleted_at__isnull=True,
-        is_cancelled=False,
-        date__gte=six_months_ago
-    ).annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        total=Coalesce(Sum('total_ttc'), Value(0, output_field=DecimalField()))
+    # Chiffre d'affaires par mois, lu depuis le cumul RevenueMonthly
+    try:
+        months = int(request.query_params.get('months', 6))
+    except (TypeError, ValueError):
+        months = 6
+    months = max(1, min(months, 36))
+    current_month = month_start(timezone.now())
+    first_month = current_month
+    for _ in range(months - 1):
+        first_month = (first_month - timedelta(days=1)).replace(day=1)
+
+    revenue_qs = RevenueMonthly.objects.filter(month__gte=first_month, count__gt=0)
+    company = request.query_params.get('company')
+    if company:
+        revenue_qs = revenue_qs.filter(company=company.upper())
+    monthly_revenue = revenue_qs.values('month').annotate(
+        total=Coalesce(Sum('total_ttc'), Value(0, output_field=DecimalField())),
+        count=Sum('count'),
     ).order_by('month')
-    
+
     # Convertir les dates en chaînes YYYY-MM pour le frontend
     monthly_revenue_list = []
     for entry in monthly_revenue:
         if entry['month']:
             monthly_revenue_list.append({
                 'month': entry['month'].strftime('%Y-%m'),
-                'total': float(entry['total'])
+                'total': float(entry['total']),
+                'count': entry['count'],
             })
     
-    top_products = Product.objects.filter(
-        deleted_at__isnull=True,
-        is_active=True
-    ).annotate(
-        total_sold=Coalesce(Sum(
-            'stock_movements__quantity',
-            filter=Q(stock_movements__movement_type='SORTIE', stock_movements__deleted_at__isnull=True)
-        ), 0)
-    ).order_by('-total_sold')[:5]
+    # Meilleures ventes : compteur Product.total_sold (indexé) ou journal ProductSalesDay (30/90 jours)
+    period = request.query_params.get('period')
+    days = int(period) if period in ('30', '90') else None
+    top_products = top_sellers(limit=5, days=days)
     
     from products.serializers import ProductListSerializer
     products_serializer = ProductListSerializer(top_products, many=True, context={'request': request})
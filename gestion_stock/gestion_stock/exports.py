@@ -0,0 +1,180 @@
+"""
+Exports CSV et Excel des listes de l'API, sans charger la liste entière en mémoire.
+
+ExportMixin (ViewSet) ajoute deux actions qui appliquent les mêmes filtres, recherche et tri
+que la liste (filter_queryset) :
+- GET .../export-csv/   : CSV (séparateur « ; », UTF-8 avec BOM pour Excel) envoyé au fil de
+  l'eau par StreamingHttpResponse ;
+- GET .../export-excel/ : XLSX écrit en mode write_only dans un fichier temporaire, puis renvoyé
+  par FileResponse (lecture par blocs, fichier supprimé à la fermeture).
+Les lignes sont lues par values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE) : ni instances
+de modèle ni serializer, une requête par bloc côté serveur.
+
+Avec ?async=1 (ou Prefer: respond-async), l'export est confié au worker de tâches
+(jobs.background) : réponse 202 avec l'id de la tâche, fichier à télécharger une fois prêt.
+
+Colonnes (attribut export_columns) : (en-tête, lookup) ou (en-tête, lookup, formateur), où lookup
+est un chemin de champ (« client__name ») ou une annotation de get_export_queryset. Les champs à
+choix sont exportés avec leur libellé.
+"""
+import csv
+import tempfile
+from datetime import date, datetime
+from itertools import islice
+
+import openpyxl
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+
+EXPORT_CHUNK_SIZE = 2000
+# Lignes CSV regroupées par envoi (évite un envoi réseau par ligne)
+CSV_ROWS_PER_WRITE = 500
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne formatée au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def _choices_for(model, lookup):
+    """Libellés des choix du champ désigné par lookup (None si pas de choix ou annotation)."""
+    field = None
+    try:
+        for name in lookup.split('__'):
+            field = model._meta.get_field(name)
+            model = field.related_model
+    except (FieldDoesNotExist, AttributeError):
+        return None
+    return dict(field.flatchoices) if field is not None and field.choices else None
+
+
+def _cell(value):
+    """Valeur exportable : booléens en Oui/Non, dates sans fuseau (heure locale), vide pour None."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Oui' if value else 'Non'
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.replace(tzinfo=None, microsecond=0)
+    return value
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def export_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Itère les lignes (listes de cellules) de queryset selon columns, par blocs de chunk_size."""
+    lookups = [column[1] for column in columns]
+    converters = []
+    for column in columns:
+        formatter = column[2] if len(column) > 2 else None
+        choices = _choices_for(queryset.model, column[1]) if formatter is None else None
+        if choices is not None:
+            formatter = lambda value, choices=choices: choices.get(value, value)
+        converters.append(formatter)
+    from jobs.background import in_background_job, report_progress
+
+    queryset = queryset.prefetch_related(None)
+    # Dans une tâche d'arrière-plan : une requête de comptage pour suivre l'avancement
+    total = queryset.count() if in_background_job() else None
+    rows = queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+    for index, row in enumerate(rows, start=1):
+        if total and index % chunk_size == 0:
+            report_progress(index * 99 // total, f'{index} / {total} lignes exportées')
+        yield [
+            _cell(converter(value) if converter else value)
+            for converter, value in zip(converters, row)
+        ]
+
+
+def csv_response(rows, headers, filename):
+    """Réponse CSV envoyée au fil de l'eau."""
+    writer = csv.writer(_Echo(), delimiter=';')
+
+    def stream():
+        yield '\ufeff' + writer.writerow(headers)
+        while True:
+            chunk = list(islice(rows, CSV_ROWS_PER_WRITE))
+            if not chunk:
+                break
+            yield ''.join(writer.writerow([_csv_cell(value) for value in row]) for row in chunk)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(rows, headers, filename, sheet_title='Export'):
+    """Réponse XLSX : classeur write_only écrit dans un fichier temporaire, renvoyé par blocs."""
+    return xlsx_sheets_response([(sheet_title, headers, rows)], filename)
+
+
+def xlsx_sheets_response(sheets, filename):
+    """Comme xlsx_response, pour plusieurs feuilles : sheets = [(titre, en-têtes, lignes), ...]."""
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet_title, headers, rows in sheets:
+        ws = wb.create_sheet(title=sheet_title[:31])
+        ws.append(headers)
+        for row in rows:
+            ws.append(row)
+    output = tempfile.TemporaryFile()
+    try:
+        wb.save(output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+class ExportMixin:
+    """
+    Mixin de ViewSet : actions export-csv et export-excel sur la liste filtrée.
+    À définir : export_columns ; facultatifs : export_filename, export_sheet_title.
+    """
+    export_columns = ()
+    export_filename = 'export'
+    export_sheet_title = 'Export'
+
+    def get_export_queryset(self):
+        """Liste à exporter : mêmes filtres que la liste (surcharger pour alléger ou annoter)."""
+        return self.filter_queryset(self.get_queryset())
+
+    def _export_rows(self):
+        return export_rows(self.get_export_queryset(), self.export_columns)
+
+    def _export_headers(self):
+        return [column[0] for column in self.export_columns]
+
+    @action(detail=False, methods=['get'], url_path='export-csv')
+    def export_csv(self, request):
+        """Exporte la liste (filtres appliqués) en CSV."""
+        from jobs.background import enqueue_request, wants_background
+
+        if wants_background(request):
+            return enqueue_request(request, 'export')
+        return csv_response(self._export_rows(), self._export_headers(), f"{self.export_filename}.csv")
+
+    @action(detail=False, methods=['get'], url_path='export-excel')
+    def export_excel(self, request):
+        """Exporte la liste (filtres appliqués) en fichier Excel."""
+        from jobs.background import enqueue_request, wants_background
+
+        if wants_background(request):
+            return enqueue_request(request, 'export')
+        return xlsx_response(
+            self._export_rows(), self._export_headers(),
+            f"{self.export_filename}.xlsx", self.export_sheet_title,
+        )
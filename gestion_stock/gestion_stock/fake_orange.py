@@ -0,0 +1,214 @@
+"""
+Serveur simulé de l'API SMS Orange, pour les essais et mesures sans appeler api.orange.com.
+
+Implémente :
+- POST /oauth/v3/token                                  (client_credentials, authentification Basic)
+- POST /smsmessaging/v1/outbound/<expéditeur>/requests  (authentification Bearer)
+
+Comportements configurables : latence (+ gigue), taux d'erreurs 503, expiration des tokens
+(durée ou nombre d'utilisations → 401 « Expired credentials ») et limite de débit (429).
+
+Utilisation :
+- en ligne de commande : python manage.py run_fake_orange --port 8099 --latency 0.05
+  puis ORANGE_API_BASE_URL=http://127.0.0.1:8099
+- dans le code / les tests :
+      with fake_orange_server(latency=0.05) as server:
+          send_sms('+221771234567', 'test')
+          server.stats['sms']
+"""
+import base64
+import json
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeOrange/1.0'
+    # En-têtes et corps écrits en un seul envoi (évite l'attente d'ACK retardé du client)
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code, message):
+        self._json(status, {'code': code, 'message': message, 'description': message})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        server = self.server
+        server.simulate_latency()
+        if self.path == '/oauth/v3/token':
+            return self._token()
+        if self.path.startswith('/smsmessaging/v1/outbound/') and self.path.endswith('/requests'):
+            return self._sms(raw)
+        self._error(404, 404, 'Resource not found')
+
+    def _token(self):
+        server = self.server
+        auth = self.headers.get('Authorization', '')
+        try:
+            client_id, _, secret = base64.b64decode(auth[6:]).decode().partition(':')
+        except (ValueError, UnicodeDecodeError):
+            client_id = secret = ''
+        if not auth.startswith('Basic ') or not (client_id and secret):
+            return self._error(401, 42, 'Invalid credentials')
+        server.count('token')
+        token = server.issue_token()
+        self._json(200, {'token_type': 'Bearer', 'access_token': token, 'expires_in': int(server.token_ttl)})
+
+    def _sms(self, raw):
+        server = self.server
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer ') or not server.use_token(auth[7:]):
+            server.count('expired')
+            return self._error(401, 42, 'Expired credentials')
+        if not server.allow_rate():
+            server.count('rate_limited')
+            return self._error(429, 53, 'Too many requests')
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('errors')
+            return self._error(503, 5, 'Service unavailable')
+        try:
+            request = json.loads(raw or b'{}')['outboundSMSMessageRequest']
+            address = request['address']
+            message = request['outboundSMSTextMessage']['message']
+        except (ValueError, KeyError, TypeError):
+            return self._error(400, 21, 'Invalid body')
+        message_id = server.record(address, message)
+        request['resourceURL'] = f"{self.path}/{message_id}"
+        self._json(201, {'outboundSMSMessageRequest': request})
+
+
+class FakeOrangeServer(ThreadingHTTPServer):
+    """
+    Serveur Orange simulé.
+    latency / jitter : secondes ajoutées à chaque requête (jitter : aléa uniforme supplémentaire).
+    error_rate : proportion de SMS refusés en 503.
+    token_ttl : durée de validité annoncée et appliquée (s) ; expire_after : nombre d'envois par token.
+    rate_limit : SMS acceptés par seconde (0 = illimité), au-delà 429.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 token_ttl=3600, expire_after=0, rate_limit=0, verbose=False):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.expire_after = expire_after
+        self.rate_limit = rate_limit
+        self.verbose = verbose
+        self.messages = []
+        self.stats = {'token': 0, 'sms': 0, 'expired': 0, 'rate_limited': 0, 'errors': 0}
+        self._tokens = {}
+        self._ids = count(1)
+        self._window = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def simulate_latency(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def issue_token(self):
+        token = f"fake-{next(self._ids)}-{random.getrandbits(32):08x}"
+        with self._lock:
+            self._tokens[token] = [time.time() + self.token_ttl, 0]
+        return token
+
+    def expire_tokens(self):
+        """Invalide tous les tokens émis (simule une expiration côté Orange)."""
+        with self._lock:
+            self._tokens.clear()
+
+    def use_token(self, token):
+        with self._lock:
+            state = self._tokens.get(token)
+            if state is None or state[0] < time.time():
+                return False
+            if self.expire_after and state[1] >= self.expire_after:
+                del self._tokens[token]
+                return False
+            state[1] += 1
+            return True
+
+    def allow_rate(self):
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 1:
+                self._window.popleft()
+            if len(self._window) >= self.rate_limit:
+                return False
+            self._window.append(now)
+            return True
+
+    def record(self, address, message):
+        with self._lock:
+            self.stats['sms'] += 1
+            message_id = len(self.messages) + 1
+            self.messages.append({'id': message_id, 'address': address, 'message': message})
+            return message_id
+
+    def start(self):
+        """Démarre le serveur dans un thread d'arrière-plan."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@contextmanager
+def fake_orange_server(configure_settings=True, **options):
+    """
+    Démarre un FakeOrangeServer pour la durée du bloc. Avec configure_settings, les réglages
+    Orange (URL et identifiants des deux sociétés) pointent vers lui pendant le bloc.
+    """
+    from django.test.utils import override_settings
+
+    server = FakeOrangeServer(**options).start()
+    try:
+        if configure_settings:
+            with override_settings(
+                ORANGE_API_BASE_URL=server.url,
+                ORANGE_CLIENT_ID='fake-client',
+                ORANGE_CLIENT_SECRET='fake-secret',
+                ORANGE_CLIENT_ID_SSE='fake-client-sse',
+                ORANGE_CLIENT_SECRET_SSE='fake-secret-sse',
+            ):
+                yield server
+        else:
+            yield server
+    finally:
+        server.stop()
@@ -0,0 +1,161 @@
+"""
+Listes de l'API : pagination par clé (keyset) et champs à la demande.
+
+KeysetPagination (facultative, pour ne pas casser les clients qui attendent un tableau) :
+- activée dès que ?page_size= ou ?cursor= est fourni ; sinon la liste complète est renvoyée ;
+- page suivante par position sur (created_at, id) par défaut (attribut de vue keyset_ordering),
+  sans OFFSET ni COUNT : coût constant quelle que soit la profondeur ;
+- réponse : {"next": url ou null, "page_size": n, "results": [...]} ;
+  page_size limité à max_page_size (200), 50 par défaut ;
+- ?ordering= est refusé (400) avec une page : l'ordre des pages est toujours celui de la clé.
+
+SparseFieldsMixin : ?fields=id,name,... ne sérialise que les champs demandés (listes et détail).
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    default_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Curseur invalide.'
+    ordering_conflict_message = (
+        "?ordering= n'est pas disponible avec ?page_size= ou ?cursor= : "
+        "les pages suivent l'ordre {ordering}."
+    )
+
+    def get_ordering(self, view, model):
+        ordering = getattr(view, 'keyset_ordering', None)
+        if ordering:
+            return tuple(ordering)
+        names = {field.name for field in model._meta.concrete_fields}
+        if all(name.lstrip('-') in names for name in self.default_ordering):
+            return self.default_ordering
+        # Modèle sans created_at : ordre par clé primaire seule
+        return ('-pk',)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def is_enabled(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_enabled(request):
+            return None
+        self.request = request
+        self.ordering = self.get_ordering(view, queryset.model)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            # Un autre tri casserait la position du curseur : refus explicite plutôt qu'ignoré
+            raise ParseError(self.ordering_conflict_message.format(ordering=','.join(self.ordering)))
+        self.page_size_value = self.get_page_size(request)
+        fields = [name.lstrip('-') for name in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model, fields)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_position = [getattr(rows[-1], name) for name in fields] if self.has_next else None
+        return rows
+
+    def _after(self, position):
+        """Condition « strictement après position » dans l'ordre (comparaison lexicographique)."""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': position[index]})
+            for previous_name, previous_value in zip(self.ordering[:index], position[:index]):
+                step &= Q(**{previous_name.lstrip('-'): previous_value})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _field(model, name):
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def encode_cursor(self, values):
+        raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [self._field(model, name).to_python(value) for name, value in zip(fields, values)]
+        except (TypeError, ValueError, UnicodeDecodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size_value)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('page_size', self.page_size_value),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class SparseFieldsMixin:
+    """
+    Mixin de ViewSet : ?fields=a,b,c restreint la représentation aux champs listés
+    (les noms inconnus sont ignorés ; sans champ valide, la représentation complète est renvoyée).
+    """
+    fields_query_param = 'fields'
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return serializer
+        requested = request.query_params.get(self.fields_query_param)
+        if not requested:
+            return serializer
+        wanted = {name.strip() for name in requested.split(',') if name.strip()}
+        target = getattr(serializer, 'child', serializer)
+        if wanted & set(target.fields):
+            for name in list(target.fields):
+                if name not in wanted:
+                    target.fields.pop(name)
+        return serializer
@@ -2,22 +2,40 @@
 Backend SMS centralisé : API Orange (Sénégal).
 Utilise OAuth 2.0 v3 pour l'authentification.
 Supporte NETSYSTEME et SSE avec des identifiants distincts.
+
+OrangeSmsClient (un par société, partagé via get_client) :
+- connexions HTTP réutilisées (requests.Session avec pool) ;
+- token OAuth mis en cache en mémoire et dans le cache Django « sms_tokens »
+  (fichiers, partagé entre les processus gunicorn), rafraîchi une seule fois sur 401 ;
+- débit limité par un seau à jetons (ORANGE_SMS_RATE_PER_SECOND, par processus) ;
+- send_many : envoi concurrent borné (ORANGE_SMS_MAX_WORKERS), un SmsResult par message.
+L'URL de l'API (ORANGE_API_BASE_URL) est configurable, par exemple vers un serveur Orange simulé.
 """
 import logging
+import threading
 import time
-import base64
-from django.conf import settings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
 # Sénégal : country_sender_number selon documentation Orange
 ORANGE_SENDER_NUMBER = '2210000'
-ORANGE_TOKEN_URL = 'https://api.orange.com/oauth/v3/token'
-ORANGE_SMS_BASE = 'https://api.orange.com/smsmessaging/v1'
+ORANGE_API_BASE_URL = 'https://api.orange.com'
+ORANGE_TOKEN_PATH = '/oauth/v3/token'
+ORANGE_SMS_PATH = '/smsmessaging/v1'
+
+# Marge avant expiration au-delà de laquelle un token est renouvelé
+TOKEN_MARGIN_SECONDS = 60
 
-# Cache des tokens par société (expire après 1h)
-_token_cache = {}
+# Résultat d'un envoi : ok, code HTTP (None si pas de réponse), erreur éventuelle,
+# durée en secondes (attente du limiteur de débit comprise)
+SmsResult = namedtuple('SmsResult', ['to', 'ok', 'status_code', 'error', 'elapsed'], defaults=[0.0])
 
 
 def _get_credentials(company):
@@ -37,46 +55,200 @@ def _get_credentials(company):
     )
 
 
-def _get_orange_token(company='NETSYSTEME'):
-    """
-    Récupère un token OAuth Orange pour la société (ou le cache si encore valide).
-    Retourne le token ou None en cas d'erreur.
-    """
-    client_id, client_secret, _ = _get_credentials(company)
-    if not (client_id and client_secret):
-        return None
+def _token_cache():
+    """Cache partagé des tokens (alias « sms_tokens », sinon cache par défaut)."""
+    try:
+        return caches['sms_tokens']
+    except InvalidCacheBackendError:
+        return caches['default']
 
-    key = company or 'NETSYSTEME'
-    now = time.time()
-    if key not in _token_cache:
-        _token_cache[key] = {'token': None, 'expires_at': 0}
-    cache = _token_cache[key]
-    if cache['token'] and cache['expires_at'] > now + 60:
-        return cache['token']
-
-    auth_str = f"{client_id}:{client_secret}"
-    auth_b64 = base64.b64encode(auth_str.encode()).decode()
-    headers = {
-        'Authorization': f'Basic {auth_b64}',
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Accept': 'application/json',
-    }
-    data = {'grant_type': 'client_credentials'}
 
-    try:
-        r = requests.post(ORANGE_TOKEN_URL, headers=headers, data=data, timeout=15)
-        r.raise_for_status()
-        json_res = r.json()
-        token = json_res.get('access_token')
-        expires_in = int(json_res.get('expires_in', 3600))
-        if token:
-            cache['token'] = token
-            cache['expires_at'] = now + expires_in
-        return token
-    except requests.RequestException as e:
-        logger.exception("Erreur récupération token Orange (%s): %s", company, e)
-        cache['token'] = None
-        return None
+class RateLimiter:
+    """Seau à jetons thread-safe : au plus `rate` acquisitions par seconde (rafales jusqu'à `burst`)."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OrangeSmsClient:
+    """Client de l'API SMS Orange pour une société (thread-safe)."""
+
+    def __init__(self, company='NETSYSTEME', base_url=None, rate_per_second=None, max_workers=None, timeout=15):
+        self.company = company or 'NETSYSTEME'
+        self.client_id, self.client_secret, self.sender_name = _get_credentials(self.company)
+        self.base_url = (
+            base_url or getattr(settings, 'ORANGE_API_BASE_URL', '') or ORANGE_API_BASE_URL
+        ).rstrip('/')
+        self.timeout = timeout
+        self.max_workers = max(1, int(max_workers or getattr(settings, 'ORANGE_SMS_MAX_WORKERS', 4)))
+        if rate_per_second is None:
+            rate_per_second = getattr(settings, 'ORANGE_SMS_RATE_PER_SECOND', 5)
+        self.rate_limiter = RateLimiter(rate_per_second)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._token = None
+        self._expires_at = 0
+        self._token_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.client_id and self.client_secret)
+
+    @property
+    def token_url(self):
+        return self.base_url + ORANGE_TOKEN_PATH
+
+    @property
+    def sms_url(self):
+        # URL encodée : tel:+2210000 -> tel%3A%2B2210000
+        return f"{self.base_url}{ORANGE_SMS_PATH}/outbound/tel%3A%2B{ORANGE_SENDER_NUMBER}/requests"
+
+    @property
+    def _cache_key(self):
+        return f"orange_token:{self.company}:{self.client_id}"
+
+    def get_token(self, expired=None):
+        """
+        Retourne un token valide (mémoire, puis cache partagé, puis API Orange).
+        expired : token refusé par l'API ; il n'est renouvelé que si aucun autre
+        thread ou processus ne l'a déjà fait. Retourne None en cas d'erreur.
+        """
+        if not self.configured:
+            return None
+        cache = _token_cache()
+        with self._token_lock:
+            now = time.time()
+            if self._token and self._token != expired and self._expires_at > now + TOKEN_MARGIN_SECONDS:
+                return self._token
+            cached = cache.get(self._cache_key)
+            if cached and cached[0] != expired and cached[1] > now + TOKEN_MARGIN_SECONDS:
+                self._token, self._expires_at = cached
+                return self._token
+
+            try:
+                r = self.session.post(
+                    self.token_url,
+                    auth=(self.client_id, self.client_secret),
+                    data={'grant_type': 'client_credentials'},
+                    headers={'Accept': 'application/json'},
+                    timeout=self.timeout,
+                )
+                r.raise_for_status()
+                json_res = r.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.exception("Erreur récupération token Orange (%s): %s", self.company, e)
+                self._token = None
+                return None
+            token = json_res.get('access_token')
+            if not token:
+                logger.error("Token Orange absent de la réponse (%s)", self.company)
+                return None
+            expires_in = int(json_res.get('expires_in', 3600))
+            self._token, self._expires_at = token, now + expires_in
+            cache.set(self._cache_key, (token, self._expires_at), timeout=max(1, expires_in - TOKEN_MARGIN_SECONDS))
+            return token
+
+    def _payload(self, to_phone, body):
+        address = to_phone if to_phone.startswith('tel:') else f"tel:{to_phone}"
+        payload = {
+            "outboundSMSMessageRequest": {
+                "address": address,
+                "senderAddress": f"tel:+{ORANGE_SENDER_NUMBER}",
+                "outboundSMSTextMessage": {"message": body},
+            }
+        }
+        if self.sender_name:
+            payload["outboundSMSMessageRequest"]["senderName"] = str(self.sender_name)[:11]
+        return payload
+
+    def send(self, to_phone, body):
+        """Envoie un SMS. Retourne un SmsResult ; un 401 provoque un seul renouvellement du token."""
+        start = time.monotonic()
+        result = self._send(to_phone, body)
+        return result._replace(elapsed=time.monotonic() - start)
+
+    def _send(self, to_phone, body):
+        if not self.configured:
+            logger.info("SMS Orange non configuré (%s) – destinataire: %s", self.company, to_phone)
+            return SmsResult(to_phone, False, None, 'non configuré')
+
+        payload = self._payload(to_phone, body)
+        token = self.get_token()
+        for attempt in range(2):
+            if not token:
+                return SmsResult(to_phone, False, None, 'token indisponible')
+            self.rate_limiter.acquire()
+            try:
+                r = self.session.post(
+                    self.sms_url,
+                    json=payload,
+                    headers={'Authorization': f'Bearer {token}'},
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                logger.warning("Erreur envoi SMS Orange à %s: %s", to_phone, e)
+                return SmsResult(to_phone, False, None, str(e))
+            if r.status_code in (200, 201):
+                logger.info("SMS Orange (%s) envoyé à %s", self.company, to_phone)
+                return SmsResult(to_phone, True, r.status_code, None)
+            if r.status_code == 401 and attempt == 0:
+                token = self.get_token(expired=token)
+                continue
+            logger.warning("SMS Orange échec %s: %s", r.status_code, r.text[:200])
+            return SmsResult(to_phone, False, r.status_code, r.text[:200])
+        return SmsResult(to_phone, False, 401, 'token refusé')
+
+    def send_many(self, messages):
+        """
+        Envoie plusieurs SMS en parallèle (au plus max_workers à la fois, débit limité).
+        messages : itérable de (numéro, texte). Retourne les SmsResult dans le même ordre.
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+        if len(messages) == 1 or self.max_workers == 1:
+            return [self.send(to, body) for to, body in messages]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(messages))) as executor:
+            return list(executor.map(lambda message: self.send(*message), messages))
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(company='NETSYSTEME'):
+    """Client partagé (par processus) pour la société ; recréé si la configuration change."""
+    company = company or 'NETSYSTEME'
+    client_id = _get_credentials(company)[0]
+    base_url = getattr(settings, 'ORANGE_API_BASE_URL', '') or ORANGE_API_BASE_URL
+    key = (company.upper(), client_id, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = OrangeSmsClient(company, base_url=base_url)
+        return client
 
 
 def send_sms(to_phone, body, company='NETSYSTEME'):
@@ -91,50 +263,12 @@ def send_sms(to_phone, body, company='NETSYSTEME'):
     Returns:
         True si envoyé avec succès, False sinon.
     """
-    client_id, client_secret, sender_name = _get_credentials(company)
-    if not (client_id and client_secret):
-        logger.info("SMS Orange non configuré (%s) – destinataire: %s", company, to_phone)
-        return False
-
-    token = _get_orange_token(company)
-    if not token:
-        return False
-
-    # URL encodée : tel:+2210000 -> tel%3A%2B2210000
-    sender_encoded = 'tel%3A%2B' + ORANGE_SENDER_NUMBER
-    url = f"{ORANGE_SMS_BASE}/outbound/{sender_encoded}/requests"
-
-    address = to_phone if to_phone.startswith('tel:') else f"tel:{to_phone}"
-    payload = {
-        "outboundSMSMessageRequest": {
-            "address": address,
-            "senderAddress": f"tel:+{ORANGE_SENDER_NUMBER}",
-            "outboundSMSTextMessage": {"message": body},
-        }
-    }
-    if sender_name:
-        payload["outboundSMSMessageRequest"]["senderName"] = str(sender_name)[:11]
+    return get_client(company).send(to_phone, body).ok
 
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'Content-Type': 'application/json',
-    }
 
-    try:
-        r = requests.post(url, json=payload, headers=headers, timeout=15)
-        if r.status_code in (200, 201):
-            logger.info("SMS Orange (%s) envoyé à %s", company, to_phone)
-            return True
-        logger.warning("SMS Orange échec %s: %s", r.status_code, r.text[:200])
-        if r.status_code == 401 and 'Expired' in r.text:
-            key = company or 'NETSYSTEME'
-            if key in _token_cache:
-                _token_cache[key]['token'] = None
-            return send_sms(to_phone, body, company)
-        return False
-    except requests.RequestException as e:
-        logger.exception("Erreur envoi SMS Orange à %s: %s", to_phone, e)
-        return False
+def send_sms_many(messages, company='NETSYSTEME'):
+    """Envoie plusieurs SMS [(numéro, texte)] en parallèle. Retourne la liste des SmsResult."""
+    return get_client(company).send_many(messages)
 
 
 def normalize_phone(phone):
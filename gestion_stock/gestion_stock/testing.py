@@ -0,0 +1,37 @@
+"""
+Outils communs aux tests des applications.
+"""
+import threading
+
+from django.db import connection
+
+# Caches en mémoire pour les tests (pas de jetons SMS partagés sur disque entre les tests)
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'sms_tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-sms'},
+}
+
+
+def run_concurrently(target, count):
+    """Lance target() dans count threads démarrés ensemble ; retourne leurs résultats ou exceptions."""
+    barrier = threading.Barrier(count)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        try:
+            result = target()
+        except Exception as e:
+            result = e
+        finally:
+            connection.close()
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
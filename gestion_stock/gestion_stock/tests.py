@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase, override_settings
+
+from .fake_orange import fake_orange_server
+from .sms_backend import OrangeSmsClient, send_sms
+from .testing import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FakeOrangeServerTests(SimpleTestCase):
+    """Envois SMS (sms_backend) contre le serveur Orange simulé, lancé le temps d'un bloc with."""
+
+    def test_send_sms(self):
+        with fake_orange_server() as server:
+            self.assertTrue(send_sms('+221771234567', 'Test'))
+            self.assertEqual(server.stats['token'], 1)
+            self.assertEqual(server.stats['sms'], 1)
+
+    def test_expired_token_is_renewed(self):
+        with fake_orange_server(expire_after=2) as server:
+            client = OrangeSmsClient(max_workers=1)
+            results = client.send_many([('+221771234567', f'Message {i}') for i in range(5)])
+            self.assertTrue(all(result.ok for result in results))
+            self.assertEqual(server.stats['sms'], 5)
+            self.assertGreaterEqual(server.stats['expired'], 1)
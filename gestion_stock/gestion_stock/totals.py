@@ -0,0 +1,53 @@
+"""
+Totaux des documents commerciaux (factures, devis).
+
+- lines_total_ht : total HT des lignes actives en une requête (SUM(quantity * unit_price)).
+- deferred_totals : unité de travail ; les recalculs demandés par schedule_totals pendant le bloc
+  sont regroupés et exécutés une seule fois par document à la sortie du bloc
+  (rien n'est recalculé si le bloc lève une exception).
+- schedule_totals : recalcul immédiat hors d'un bloc deferred_totals, différé sinon.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum
+from django.db.models.functions import Coalesce
+
+# TTC = HT + TVA (18%)
+VAT_MULTIPLIER = Decimal('1.18')
+
+_state = threading.local()
+
+
+def lines_total_ht(lines):
+    """Somme quantity * unit_price des lignes non supprimées du queryset `lines`."""
+    amount = DecimalField(max_digits=14, decimal_places=2)
+    return lines.filter(deleted_at__isnull=True).aggregate(
+        total=Coalesce(Sum(F('quantity') * F('unit_price'), output_field=amount), Decimal('0'), output_field=amount),
+    )['total']
+
+
+@contextmanager
+def deferred_totals():
+    """Regroupe les recalculs de totaux jusqu'à la fin du bloc (blocs imbriqués : le plus externe calcule)."""
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = {}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    for document in pending.values():
+        document.calculate_totals()
+
+
+def schedule_totals(document):
+    """Demande le recalcul des totaux de `document` (facture ou devis)."""
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        document.calculate_totals()
+    else:
+        pending[(type(document), document.pk)] = document
@@ -71,6 +71,8 @@ urlpatterns = [
     path('api/', include('installations.urls')),
     path('api/', include('zones.urls')),
     path('api/', include('pointage.urls')),
+    path('api/', include('payments.urls')),
+    path('api/', include('jobs.urls')),
     path('api/dashboard/stats/', dashboard_views.dashboard_stats, name='dashboard-stats'),
     path('api/dashboard/charts/', dashboard_views.dashboard_charts, name='dashboard-charts'),
 ]
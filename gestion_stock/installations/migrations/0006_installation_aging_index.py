@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('installations', '0005_installationpaymentreminderlog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installation',
+            index=models.Index(fields=['remaining_amount', 'first_installment_due_date'], name='installatio_remaini_320899_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
@@ -198,38 +198,28 @@ class Installation(models.Model):
             models.Index(fields=['technician']),
             models.Index(fields=['scheduled_date']),
             models.Index(fields=['installation_type']),
+            # Balance âgée / rappels : restants à payer par échéance
+            models.Index(fields=['remaining_amount', 'first_installment_due_date']),
         ]
 
     def __str__(self):
         return f"{self.installation_number} - {self.title}"
 
     def save(self, *args, **kwargs):
-        if not self.installation_number:
-            # Générer un numéro unique
-            date_str = timezone.now().strftime('%Y%m%d')
-            last_installation = Installation.objects.filter(
-                installation_number__startswith=f'INST-{date_str}'
-            ).order_by('-installation_number').first()
-            
-            if last_installation:
-                try:
-                    last_num = int(last_installation.installation_number.split('-')[-1])
-                    new_num = last_num + 1
-                except:
-                    new_num = 1
-            else:
-                new_num = 1
-            
-            self.installation_number = f'INST-{date_str}-{new_num:04d}'
-        
+        from numbering.sequences import next_number
+
         # Calculer la date de fin de garantie si période de garantie et date de fin sont définies
         if self.warranty_period and self.end_date and not self.warranty_end_date:
             from datetime import timedelta
             # Approximation: 30 jours par mois
             days = self.warranty_period * 30
             self.warranty_end_date = self.end_date.date() + timedelta(days=days)
-        
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            # Numéro séquentiel du jour (INST-AAAAMMJJ-NNNN), annulé avec l'enregistrement
+            if not self.installation_number:
+                self.installation_number = next_number('installation')
+            super().save(*args, **kwargs)
 
     def soft_delete(self):
         """Soft delete de l'installation"""
@@ -7,6 +7,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from jobs.background import enqueue_request, wants_background
+
 from .models import Installation
 from .permissions import IsAdminOrTechnicien
 from .payment_reminders import build_reminders_list, send_reminders
@@ -49,7 +51,10 @@ def payment_reminders_send(request):
     Body: { "installation_ids": [1, 2, ...], "dry_run": false }
     - installation_ids: optionnel, liste d'IDs (envoyer tous si absent)
     - dry_run: si true, simule sans envoyer
+    Avec ?async=1 : envoi par le worker de tâches, réponse 202 (suivi par /api/jobs/{id}/).
     """
+    if wants_background(request):
+        return enqueue_request(request, 'payment_reminders')
     try:
         installation_ids = request.data.get('installation_ids')
         dry_run = request.data.get('dry_run', False)
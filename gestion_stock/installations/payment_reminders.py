@@ -6,7 +6,7 @@ import logging
 from datetime import date, timedelta
 from decimal import Decimal
 
-from gestion_stock.sms_backend import send_sms, normalize_phone as _normalize_phone
+from gestion_stock.sms_backend import send_sms_many, normalize_phone as _normalize_phone
 
 logger = logging.getLogger(__name__)
 
@@ -169,15 +169,19 @@ def send_reminders(installation_ids=None, dry_run=False):
     sent = 0
     errors = []
 
+    installations = Installation.objects.select_related('client').in_bulk(
+        [r['installation_id'] for r in to_send]
+    )
+    # SMS à envoyer, regroupés par société (identifiants Orange distincts)
+    batches = {}
     for r in to_send:
-        inst = Installation.objects.filter(id=r['installation_id']).select_related('client').first()
+        inst = installations.get(r['installation_id'])
         if not inst:
             errors.append(f"Installation {r['installation_id']} introuvable")
             continue
         due = r['due_date']
         if isinstance(due, str):
             due = date.fromisoformat(due)
-        reminder_type = r.get('reminder_type', REMINDER_J0)
 
         if dry_run:
             sent += 1
@@ -195,17 +199,23 @@ def send_reminders(installation_ids=None, dry_run=False):
             r.get('tranche_label', 'Reliquat')
         )
         company = r.get('company', 'NETSYSTEME')
-        ok = send_sms(phone, body, company=company)
-        if ok:
-            InstallationPaymentReminderLog.objects.create(
-                installation=inst,
-                due_date=due,
-                reminder_type=reminder_type,
-                amount=r.get('amount'),
-                sent_at=timezone.now()
-            )
-            sent += 1
-        else:
-            errors.append(f"Échec envoi à {r['client_name']}")
+        batches.setdefault(company, []).append((r, inst, due, phone, body))
+
+    logs = []
+    for company, batch in batches.items():
+        results = send_sms_many([(phone, body) for _, _, _, phone, body in batch], company=company)
+        for (r, inst, due, _, _), result in zip(batch, results):
+            if result.ok:
+                logs.append(InstallationPaymentReminderLog(
+                    installation=inst,
+                    due_date=due,
+                    reminder_type=r.get('reminder_type', REMINDER_J0),
+                    amount=r.get('amount'),
+                    sent_at=timezone.now()
+                ))
+                sent += 1
+            else:
+                errors.append(f"Échec envoi à {r['client_name']}")
+    InstallationPaymentReminderLog.objects.bulk_create(logs)
 
     return {'sent': sent, 'errors': errors, 'dry_run': dry_run, 'count_pending': len(to_send)}
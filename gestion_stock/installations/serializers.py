@@ -1,7 +1,10 @@
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import serializers
 from .models import Installation, InstallationProduct
 from accounts.serializers import ClientSerializer
 from products.serializers import ProductSerializer
+from payments.ledger import record_initial_advance, sync_installation_remaining
 from django.contrib.auth.models import User
 
 
@@ -179,6 +182,8 @@ class InstallationCreateSerializer(serializers.ModelSerializer):
             if not validated_data.get('client_address') and client.address:
                 validated_data['client_address'] = client.address
         installation = Installation.objects.create(**validated_data)
+        request = self.context.get('request')
+        record_initial_advance(installation, user=request.user if request else None)
         if technicians:
             installation.technicians.set(technicians)
         for product_data in products_data:
@@ -231,6 +236,25 @@ class InstallationUpdateSerializer(serializers.ModelSerializer):
             'notes',
             'products',
         ]
+        # Avance et restant modifiés uniquement par le journal des paiements (payments.ledger)
+        read_only_fields = ['advance_amount', 'remaining_amount']
+
+    def validate(self, attrs):
+        """Refuse une avance modifiée : elle ne change que par un versement (record-payment)."""
+        advance = self.initial_data.get('advance_amount')
+        if self.instance is not None and advance not in (None, ''):
+            try:
+                changed = Decimal(str(advance)) != (self.instance.advance_amount or Decimal('0'))
+            except (InvalidOperation, TypeError, ValueError):
+                changed = True
+            if changed:
+                raise serializers.ValidationError({
+                    'advance_amount': (
+                        "L'avance ne se modifie pas directement : enregistrez un versement avec "
+                        f"POST /api/installations/{self.instance.pk}/record-payment/."
+                    ),
+                })
+        return attrs
 
     def update(self, instance, validated_data):
         products_data = validated_data.pop('products', None)
@@ -244,7 +268,13 @@ class InstallationUpdateSerializer(serializers.ModelSerializer):
                 validated_data['client_address'] = validated_data.get('client_address') or client.address
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        # Seuls les champs envoyés sont écrits : pas d'écrasement d'un versement concurrent
+        update_fields = [*validated_data, 'updated_at']
+        if 'end_date' in validated_data or 'warranty_period' in validated_data:
+            update_fields.append('warranty_end_date')
+        instance.save(update_fields=update_fields)
+        if 'total_amount' in validated_data:
+            sync_installation_remaining(instance)
         if technicians is not None:
             instance.technicians.set(technicians)
         if products_data is not None:
@@ -1,6 +1,7 @@
 import logging
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
@@ -15,11 +16,15 @@ from .serializers import (
 )
 from products.permissions import IsAdminUser
 from .permissions import IsAdminOrTechnicien
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
+from payments.ledger import record_installation_payment
+from payments.serializers import payment_fields
 
 logger = logging.getLogger(__name__)
 
 
-class InstallationViewSet(viewsets.ModelViewSet):
+class InstallationViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des installations techniques
     """
@@ -30,6 +35,16 @@ class InstallationViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'installation_number', 'client_name']
     ordering_fields = ['created_at', 'scheduled_date']
     ordering = ['-created_at']
+    export_filename = 'installations'
+    export_sheet_title = 'Installations'
+    export_columns = [
+        ('N° installation', 'installation_number'), ('Titre', 'title'), ('Type', 'installation_type'),
+        ('Client', 'client_name'), ('Téléphone', 'client_phone'), ('Statut', 'status'),
+        ("Date d'installation", 'installation_date'), ('Date prévue', 'scheduled_date'),
+        ('Technicien', 'technician__username'), ('Paiement', 'payment_method'),
+        ('Montant total', 'total_amount'), ('Avance', 'advance_amount'), ('Restant', 'remaining_amount'),
+        ('Échéance', 'first_installment_due_date'), ('Créée le', 'created_at'),
+    ]
 
     def get_serializer_class(self):
         """Utilise un serializer différent selon l'action"""
@@ -101,6 +116,9 @@ class InstallationViewSet(viewsets.ModelViewSet):
         """Override list pour gérer les erreurs"""
         try:
             return super().list(request, *args, **kwargs)
+        except APIException:
+            # Erreurs de requête (curseur invalide, permissions...) : réponse DRF standard
+            raise
         except Exception as e:
             logger.error(f'Erreur lors de la récupération des installations: {str(e)}', exc_info=True)
             return Response(
@@ -246,7 +264,6 @@ class InstallationViewSet(viewsets.ModelViewSet):
         """Enregistrer un nouveau versement pour une installation."""
         installation = self.get_object()
         amount_raw = request.data.get('amount')
-        payment_date = request.data.get('payment_date')
 
         if amount_raw is None or amount_raw == '':
             return Response(
@@ -266,21 +283,11 @@ class InstallationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        total = installation.total_amount or Decimal('0')
-        advance = installation.advance_amount or Decimal('0')
-        remaining = installation.remaining_amount
-        if remaining is None or (remaining == 0 and total > advance):
-            remaining = max(Decimal('0'), total - advance)
-        tolerance = Decimal('1')
-        if amount > remaining + tolerance:
-            return Response(
-                {'error': f'Le montant ne peut pas dépasser le restant à payer ({remaining} F).'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        installation.advance_amount = advance + amount
-        installation.remaining_amount = max(Decimal('0'), remaining - amount)
-        installation.save(update_fields=['advance_amount', 'remaining_amount'])
+        # Versement inscrit au journal, avance et restant mis à jour en base
+        try:
+            record_installation_payment(installation, amount, user=request.user, **payment_fields(request.data))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(installation)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth.models import User
 from accounts.models import Client
@@ -113,24 +113,12 @@ class Intervention(models.Model):
         return f"{self.intervention_number} - {self.title}"
 
     def save(self, *args, **kwargs):
-        if not self.intervention_number:
-            # Générer un numéro unique
-            date_str = timezone.now().strftime('%Y%m%d')
-            last_intervention = Intervention.objects.filter(
-                intervention_number__startswith=f'INT-{date_str}'
-            ).order_by('-intervention_number').first()
-            
-            if last_intervention:
-                try:
-                    last_num = int(last_intervention.intervention_number.split('-')[-1])
-                    new_num = last_num + 1
-                except:
-                    new_num = 1
-            else:
-                new_num = 1
-            
-            self.intervention_number = f'INT-{date_str}-{new_num:04d}'
-        super().save(*args, **kwargs)
+        from numbering.sequences import next_number
+        with transaction.atomic():
+            # Numéro séquentiel du jour (INT-AAAAMMJJ-NNNN), annulé avec l'enregistrement
+            if not self.intervention_number:
+                self.intervention_number = next_number('intervention')
+            super().save(*args, **kwargs)
 
     def soft_delete(self):
         """Soft delete de l'intervention"""
@@ -1,6 +1,7 @@
 import logging
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Intervention, InterventionProduct
@@ -12,11 +13,12 @@ from .serializers import (
 )
 from products.permissions import IsAdminUser
 from .permissions import IsAdminOrTechnicien
+from gestion_stock.pagination import SparseFieldsMixin
 
 logger = logging.getLogger(__name__)
 
 
-class InterventionViewSet(viewsets.ModelViewSet):
+class InterventionViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des interventions
     """
@@ -95,6 +97,9 @@ class InterventionViewSet(viewsets.ModelViewSet):
         """Override list pour gérer les erreurs"""
         try:
             return super().list(request, *args, **kwargs)
+        except APIException:
+            # Erreurs de requête (curseur invalide, permissions...) : réponse DRF standard
+            raise
         except Exception as e:
             logger.error(f'Erreur lors de la récupération des interventions: {str(e)}', exc_info=True)
             return Response(
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Invoice, InvoiceItem
+from .models import Invoice, InvoiceItem, RevenueMonthly
 
 
 class InvoiceItemInline(admin.TabularInline):
@@ -17,6 +17,13 @@ class InvoiceAdmin(admin.ModelAdmin):
     inlines = [InvoiceItemInline]
     date_hierarchy = 'date'
 
+    def save_related(self, request, form, formsets, change):
+        """Lignes enregistrées puis totaux recalculés une seule fois (suppressions de lignes comprises)"""
+        from gestion_stock.totals import deferred_totals, schedule_totals
+        with deferred_totals():
+            super().save_related(request, form, formsets, change)
+            schedule_totals(form.instance)
+
 
 @admin.register(InvoiceItem)
 class InvoiceItemAdmin(admin.ModelAdmin):
@@ -24,3 +31,10 @@ class InvoiceItemAdmin(admin.ModelAdmin):
     list_filter = ['invoice__date']
     search_fields = ['invoice__invoice_number', 'product__name']
     readonly_fields = ['subtotal']
+
+
+@admin.register(RevenueMonthly)
+class RevenueMonthlyAdmin(admin.ModelAdmin):
+    list_display = ['month', 'company', 'total_ht', 'total_ttc', 'count', 'updated_at']
+    list_filter = ['company']
+    readonly_fields = ['company', 'month', 'total_ht', 'total_ttc', 'count', 'updated_at']
@@ -0,0 +1,160 @@
+"""
+Balance âgée des créances clients (factures et installations).
+
+Tout est calculé en base, en deux requêtes groupées (une par source) :
+- reste dû : ExpressionWrapper(total_ttc - amount_paid) pour les factures, remaining_amount
+  pour les installations ;
+- tranche d'ancienneté : Case/When sur la date de référence comparée à des dates limites
+  (comparaisons directes sur la colonne, pas de calcul d'âge ligne à ligne) ;
+- sommes par client, société et tranche en GROUP BY.
+Les deux sources sont ensuite fusionnées par (client, société) puis totalisées par société.
+
+Date de référence : date de la facture ; pour une installation, date d'échéance de la
+1ère tranche, à défaut date d'installation puis date de création. Un montant non encore
+échu compte dans la tranche 0–30 jours.
+Société d'une installation : celle de sa facture associée, NETSYSTEME par défaut.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, CharField, DecimalField, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+# (clé, libellé, âge maximal en jours ; None = sans limite)
+BUCKETS = [
+    ('0_30', '0-30 jours', 30),
+    ('31_60', '31-60 jours', 60),
+    ('61_90', '61-90 jours', 90),
+    ('90_plus', '+90 jours', None),
+]
+DEFAULT_COMPANY = 'NETSYSTEME'
+
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def _bucket(field, limits):
+    """Case/When : clé de tranche selon la date de référence (When évalués du plus récent au plus ancien)."""
+    whens = [
+        When(**{f'{field}__gte': limit, 'then': Value(key)})
+        for (key, _label, _days), limit in zip(BUCKETS, limits)
+        if limit is not None
+    ]
+    return Case(*whens, default=Value(BUCKETS[-1][0]), output_field=CharField())
+
+
+def _limits(as_of, as_datetime=False):
+    """Plus ancienne date de chaque tranche (début de journée pour un DateTimeField)."""
+    limits = []
+    for _key, _label, max_days in BUCKETS:
+        if max_days is None:
+            limits.append(None)
+            continue
+        day = as_of - timedelta(days=max_days)
+        limits.append(timezone.make_aware(datetime.combine(day, time.min)) if as_datetime else day)
+    return limits
+
+
+def invoice_receivables(as_of=None, company=None):
+    """Factures définitives non annulées avec un reste dû, jusqu'à as_of inclus."""
+    from .models import Invoice
+
+    as_of = as_of or timezone.localdate()
+    end = timezone.make_aware(datetime.combine(as_of + timedelta(days=1), time.min))
+    queryset = Invoice.objects.filter(
+        deleted_at__isnull=True,
+        is_cancelled=False,
+        is_proforma=False,
+        date__lt=end,
+    ).annotate(
+        outstanding=ExpressionWrapper(F('total_ttc') - F('amount_paid'), output_field=AMOUNT_FIELD),
+    ).filter(outstanding__gt=0)
+    if company:
+        queryset = queryset.filter(company=company)
+    return queryset
+
+
+def installation_receivables(as_of=None, company=None):
+    """Installations non annulées avec un restant à payer, créées jusqu'à as_of inclus."""
+    from installations.models import Installation
+
+    as_of = as_of or timezone.localdate()
+    end = timezone.make_aware(datetime.combine(as_of + timedelta(days=1), time.min))
+    queryset = Installation.objects.filter(
+        deleted_at__isnull=True,
+        remaining_amount__gt=0,
+        created_at__lt=end,
+    ).exclude(status='ANNULEE').annotate(
+        aging_date=Coalesce('first_installment_due_date', 'installation_date', TruncDate('created_at')),
+        receivable_company=Coalesce('invoice__company', Value(DEFAULT_COMPANY)),
+    )
+    if company:
+        queryset = queryset.filter(receivable_company=company)
+    return queryset
+
+
+def _grouped(queryset, company_field, date_field, limits, amount_field):
+    """Reste dû par (client, société, tranche), en une requête GROUP BY."""
+    return queryset.annotate(
+        aging_company=F(company_field),
+        aging_client_name=Coalesce('client__name', 'client_name', Value('')),
+        aging_bucket=_bucket(date_field, limits),
+    ).order_by().values(
+        'client_id', 'aging_client_name', 'aging_company', 'aging_bucket',
+    ).annotate(amount=Sum(amount_field, output_field=AMOUNT_FIELD))
+
+
+def aging_report(as_of=None, company=None):
+    """
+    Balance âgée au as_of (date, aujourd'hui par défaut), éventuellement limitée à une société.
+    Retourne {'as_of', 'buckets', 'clients': [...], 'companies': [...], 'total'} ; chaque ligne
+    porte les montants par tranche (clés de BUCKETS) et 'total'.
+    """
+    as_of = as_of or timezone.localdate()
+    keys = [key for key, _label, _days in BUCKETS]
+
+    invoice_rows = _grouped(
+        invoice_receivables(as_of, company), 'company',
+        'date', _limits(as_of, as_datetime=True), 'outstanding',
+    )
+    installation_rows = _grouped(
+        installation_receivables(as_of, company), 'receivable_company',
+        'aging_date', _limits(as_of), 'remaining_amount',
+    )
+
+    clients = {}
+    for row in list(invoice_rows) + list(installation_rows):
+        name = row['aging_client_name'] or 'Client inconnu'
+        # Clients sans fiche regroupés par nom
+        group = (row['client_id'], name if row['client_id'] is None else None, row['aging_company'])
+        line = clients.setdefault(group, {
+            'client_id': row['client_id'],
+            'client_name': name,
+            'company': row['aging_company'],
+            **{key: Decimal('0') for key in keys},
+        })
+        line[row['aging_bucket']] += (row['amount'] or Decimal('0')).quantize(CENT)
+
+    companies = {}
+    total = {key: Decimal('0') for key in keys}
+    for line in clients.values():
+        line['total'] = sum(line[key] for key in keys)
+        summary = companies.setdefault(line['company'], {
+            'company': line['company'],
+            **{key: Decimal('0') for key in keys},
+        })
+        for key in keys:
+            summary[key] += line[key]
+            total[key] += line[key]
+    for summary in companies.values():
+        summary['total'] = sum(summary[key] for key in keys)
+    total['total'] = sum(total[key] for key in keys)
+
+    return {
+        'as_of': as_of,
+        'buckets': [{'key': key, 'label': label} for key, label, _days in BUCKETS],
+        'clients': sorted(clients.values(), key=lambda line: (-line['total'], line['client_name'])),
+        'companies': sorted(companies.values(), key=lambda summary: summary['company']),
+        'total': total,
+    }
@@ -0,0 +1,16 @@
+"""
+Commande : reconstruit le cumul mensuel du chiffre d'affaires (RevenueMonthly) depuis les factures.
+Usage :
+  python manage.py backfill_revenue_monthly
+"""
+from django.core.management.base import BaseCommand
+
+from invoices.revenue import rebuild_revenue_monthly
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement le chiffre d'affaires mensuel par société à partir des factures."
+
+    def handle(self, *args, **options):
+        count = rebuild_revenue_monthly()
+        self.stdout.write(self.style.SUCCESS(f'{count} ligne(s) de chiffre d\'affaires mensuel recalculée(s).'))
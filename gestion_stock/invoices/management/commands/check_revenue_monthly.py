@@ -0,0 +1,40 @@
+"""
+Commande : vérifie que le cumul mensuel (RevenueMonthly) correspond aux factures.
+Usage :
+  python manage.py check_revenue_monthly
+  python manage.py check_revenue_monthly --fix   # reconstruit le cumul en cas d'écart
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices.revenue import check_revenue_monthly, rebuild_revenue_monthly
+
+
+class Command(BaseCommand):
+    help = "Compare le chiffre d'affaires mensuel stocké à un recalcul complet depuis les factures."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Reconstruire le cumul si des écarts sont détectés.',
+        )
+
+    def handle(self, *args, **options):
+        mismatches = check_revenue_monthly()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Chiffre d\'affaires mensuel cohérent avec les factures.'))
+            return
+
+        for m in mismatches:
+            stored_ht, stored_ttc, stored_count = m['stored']
+            exp_ht, exp_ttc, exp_count = m['expected']
+            self.stdout.write(
+                f"{m['company']} {m['month']:%Y-%m} : stocké {stored_ttc} TTC / {stored_count} facture(s), "
+                f"attendu {exp_ttc} TTC / {exp_count} facture(s)"
+            )
+
+        if options.get('fix'):
+            rebuild_revenue_monthly()
+            self.stdout.write(self.style.SUCCESS(f'{len(mismatches)} écart(s) corrigé(s).'))
+            return
+        raise CommandError(f'{len(mismatches)} écart(s) détecté(s). Relancer avec --fix pour corriger.')
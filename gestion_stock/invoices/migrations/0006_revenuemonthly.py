@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:19
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def backfill_revenue_monthly(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    RevenueMonthly = apps.get_model('invoices', 'RevenueMonthly')
+    rows = (
+        Invoice.objects.filter(deleted_at__isnull=True, is_cancelled=False)
+        .annotate(month=TruncMonth('date'))
+        .values('company', 'month')
+        .annotate(total_ht=Sum('total_ht'), total_ttc=Sum('total_ttc'), count=Count('id'))
+    )
+    RevenueMonthly.objects.bulk_create([
+        RevenueMonthly(
+            company=row['company'],
+            month=timezone.localtime(row['month']).date().replace(day=1),
+            total_ht=row['total_ht'] or 0,
+            total_ttc=row['total_ttc'] or 0,
+            count=row['count'],
+        )
+        for row in rows
+        if row['month']
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0005_invoice_amount_paid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company', models.CharField(choices=[('NETSYSTEME', 'NETSYSTEME'), ('SSE', 'SSE')], max_length=20, verbose_name='Société')),
+                ('month', models.DateField(verbose_name='Mois (1er jour)')),
+                ('total_ht', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total HT')),
+                ('total_ttc', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total TTC')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre de factures')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': "Chiffre d'affaires mensuel",
+                'verbose_name_plural': "Chiffres d'affaires mensuels",
+                'ordering': ['month', 'company'],
+                'indexes': [models.Index(fields=['month'], name='invoices_re_month_fe98c3_idx')],
+                'unique_together': {('company', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_revenue_monthly, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_revenuemonthly'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['is_cancelled', 'is_proforma', 'date'], name='invoices_in_is_canc_47d107_idx'),
+        ),
+    ]
@@ -1,10 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from products.models import Product
 from accounts.models import Client
 from decimal import Decimal
-import uuid
 
 
 class Invoice(models.Model):
@@ -76,19 +75,40 @@ class Invoice(models.Model):
         indexes = [
             models.Index(fields=['invoice_number']),
             models.Index(fields=['date']),
+            # Balance âgée : factures à recouvrer par date
+            models.Index(fields=['is_cancelled', 'is_proforma', 'date']),
         ]
 
     def __str__(self):
         client_display = self.client.name if self.client else (self.client_name or 'Client inconnu')
         return f"Facture {self.invoice_number} - {client_display}"
 
+    def revenue_contribution(self):
+        """
+        Contribution de la facture au cumul RevenueMonthly :
+        (société, mois, total HT, total TTC) ou None si annulée ou supprimée.
+        """
+        from .revenue import month_start
+        if self.deleted_at or self.is_cancelled or not self.date:
+            return None
+        return (
+            self.company,
+            month_start(self.date),
+            Decimal(self.total_ht or 0),
+            Decimal(self.total_ttc or 0),
+        )
+
+    def _locked_revenue_row(self):
+        """Champs du cumul mensuel tels qu'enregistrés, ligne verrouillée jusqu'à la fin de la transaction."""
+        if not self.pk:
+            return None
+        return Invoice.objects.select_for_update().only(*REVENUE_FIELDS).filter(pk=self.pk).first()
+
     def generate_invoice_number(self):
-        """Génère un numéro de facture unique"""
+        """Attribue le numéro suivant de la société (INV[-SOCIÉTÉ]-AAAAMMJJ-NNNN), dans la transaction de save()"""
+        from numbering.sequences import next_number
         if not self.invoice_number:
-            # Format: INV-YYYYMMDD-UUID
-            date_str = timezone.now().strftime('%Y%m%d')
-            unique_id = str(uuid.uuid4())[:8].upper()
-            self.invoice_number = f"INV-{date_str}-{unique_id}"
+            self.invoice_number = next_number('invoice', self.company)
         return self.invoice_number
 
     @property
@@ -118,56 +138,108 @@ class Invoice(models.Model):
         return 'EN_ATTENTE'
 
     def calculate_totals(self):
-        """Calcule les totaux HT et TTC à partir des items"""
-        items = self.invoice_items.filter(deleted_at__isnull=True)
-        self.total_ht = sum(item.subtotal for item in items)
-        # TTC = HT + TVA (18%)
-        self.total_ttc = self.total_ht * Decimal('1.18')
-        self.save()
+        """Calcule les totaux HT et TTC à partir des items (une agrégation, une mise à jour)"""
+        from gestion_stock.totals import VAT_MULTIPLIER, lines_total_ht
+        self.total_ht = lines_total_ht(self.invoice_items.all())
+        self.total_ttc = self.total_ht * VAT_MULTIPLIER
+        self.save(update_fields=['total_ht', 'total_ttc', 'updated_at'])
+
+    def _stock_by_product(self):
+        """Quantités des lignes actives regroupées par produit : {product_id: quantité}."""
+        quantities = {}
+        for product_id, quantity in self.invoice_items.filter(deleted_at__isnull=True).values_list('product_id', 'quantity'):
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return quantities
 
     def cancel(self):
         """
         Annule la facture et restaure le stock
         """
+        from stock.ledger import apply_stock_deltas
         if not self.is_cancelled:
-            # Restaurer le stock pour chaque item
-            for item in self.invoice_items.filter(deleted_at__isnull=True):
-                item.product.quantity += item.quantity
-                item.product.save()
-            self.is_cancelled = True
-            self.save()
+            with transaction.atomic():
+                # Restaurer le stock pour chaque produit
+                apply_stock_deltas(self._stock_by_product())
+                self.is_cancelled = True
+                self.save()
 
     def soft_delete(self):
         """Soft delete de la facture"""
-        if not self.is_cancelled:
-            self.cancel()
-        self.deleted_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            if not self.is_cancelled:
+                self.cancel()
+            self.deleted_at = timezone.now()
+            self.save()
 
     def restore(self):
         """Restaure une facture annulée"""
-        if self.is_cancelled:
-            # Vérifier le stock avant de restaurer
-            for item in self.invoice_items.filter(deleted_at__isnull=True):
-                if item.product.quantity < item.quantity:
+        from stock.ledger import InsufficientStock, apply_stock_deltas
+        with transaction.atomic():
+            if self.is_cancelled:
+                # Réappliquer les sorties de stock (tout ou rien)
+                try:
+                    apply_stock_deltas({
+                        product_id: -quantity
+                        for product_id, quantity in self._stock_by_product().items()
+                    })
+                except InsufficientStock as e:
                     raise ValueError(
                         f"Stock insuffisant pour restaurer la facture. "
-                        f"Produit: {item.product.name}, Stock disponible: {item.product.quantity}"
+                        f"Produit: {e.product_name}, Stock disponible: {e.available}"
                     )
-            # Réappliquer les sorties de stock
-            for item in self.invoice_items.filter(deleted_at__isnull=True):
-                item.product.quantity -= item.quantity
-                item.product.save()
-            self.is_cancelled = False
+                self.is_cancelled = False
+                self.save()
+            self.deleted_at = None
             self.save()
-        self.deleted_at = None
-        self.save()
 
     def save(self, *args, **kwargs):
-        """Génère le numéro de facture si nécessaire"""
-        if not self.invoice_number:
-            self.generate_invoice_number()
-        super().save(*args, **kwargs)
+        """Génère le numéro de facture si nécessaire et met à jour le cumul mensuel."""
+        from .revenue import apply_revenue_change
+        from .signals import invoice_state_changed
+        with transaction.atomic():
+            # Numéro attribué dans la transaction : annulé avec elle, sans trou dans la séquence
+            if not self.invoice_number:
+                self.generate_invoice_number()
+            # Ancien état relu en base sous verrou (pas l'instance, qui peut être périmée)
+            stored = self._locked_revenue_row()
+            old_state = stored.revenue_contribution() if stored else None
+            old_fields = _revenue_fields(stored) if stored else None
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if stored is not None and update_fields is not None:
+                # Champs non écrits : leur valeur en base reste celle qui compte
+                for name in set(update_fields) & set(REVENUE_FIELDS):
+                    setattr(stored, name, getattr(self, name))
+                current = stored
+            else:
+                current = self
+            apply_revenue_change(old_state, current.revenue_contribution())
+            invoice_state_changed.send(
+                sender=Invoice, invoice_id=self.pk, old=old_fields, new=_revenue_fields(current),
+            )
+
+    def delete(self, *args, **kwargs):
+        """Suppression définitive : retire la facture du cumul mensuel."""
+        from .revenue import apply_revenue_change
+        from .signals import invoice_state_changed
+        with transaction.atomic():
+            stored = self._locked_revenue_row()
+            invoice_id = self.pk
+            apply_revenue_change(stored.revenue_contribution() if stored else None, None)
+            result = super().delete(*args, **kwargs)
+            if stored is not None:
+                invoice_state_changed.send(
+                    sender=Invoice, invoice_id=invoice_id, old=_revenue_fields(stored), new=None,
+                )
+            return result
+
+
+# Champs qui déterminent la contribution d'une facture au chiffre d'affaires mensuel
+REVENUE_FIELDS = ('company', 'date', 'total_ht', 'total_ttc', 'is_cancelled', 'deleted_at')
+
+
+def _revenue_fields(invoice):
+    return {name: getattr(invoice, name) for name in REVENUE_FIELDS}
 
 
 class InvoiceItem(models.Model):
@@ -212,22 +284,79 @@ class InvoiceItem(models.Model):
     def __str__(self):
         return f"{self.invoice.invoice_number} - {self.product.name}"
 
+    def compute_subtotal(self):
+        self.subtotal = self.quantity * self.unit_price
+        return self.subtotal
+
     def save(self, *args, **kwargs):
         """Calcule le sous-total automatiquement"""
-        self.subtotal = self.quantity * self.unit_price
+        from gestion_stock.totals import schedule_totals
+        self.compute_subtotal()
         super().save(*args, **kwargs)
-        # Recalculer les totaux de la facture
-        if self.invoice:
-            self.invoice.calculate_totals()
+        # Recalculer les totaux de la facture (différé dans deferred_totals)
+        if self.invoice_id:
+            schedule_totals(self.invoice)
 
     def soft_delete(self):
         """Soft delete de l'item"""
         self.deleted_at = timezone.now()
         self.save()
-        if self.invoice:
-            self.invoice.calculate_totals()
+
+    @classmethod
+    def bulk_create_lines(cls, invoice, lines):
+        """
+        Crée les lignes en une requête (sous-totaux calculés ici, save() n'étant pas appelé)
+        puis recalcule les totaux de la facture une seule fois.
+        lines : dicts de champs (product, quantity, unit_price...).
+        """
+        from gestion_stock.totals import schedule_totals
+        items = [cls(invoice=invoice, **line) for line in lines]
+        for item in items:
+            item.compute_subtotal()
+        cls.objects.bulk_create(items, batch_size=500)
+        schedule_totals(invoice)
+        return items
 
     def restore(self):
         """Restaure un item supprimé"""
         self.deleted_at = None
         self.save()
+
+
+class RevenueMonthly(models.Model):
+    """
+    Cumul mensuel du chiffre d'affaires par société (factures non annulées et non supprimées).
+    Tenu à jour par Invoice.save / Invoice.delete dans la même transaction que la facture.
+    """
+    company = models.CharField(
+        max_length=20,
+        choices=Invoice.COMPANY_CHOICES,
+        verbose_name="Société"
+    )
+    month = models.DateField(verbose_name="Mois (1er jour)")
+    total_ht = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Total HT"
+    )
+    total_ttc = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Total TTC"
+    )
+    count = models.IntegerField(default=0, verbose_name="Nombre de factures")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+
+    class Meta:
+        verbose_name = "Chiffre d'affaires mensuel"
+        verbose_name_plural = "Chiffres d'affaires mensuels"
+        ordering = ['month', 'company']
+        unique_together = ['company', 'month']
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+
+    def __str__(self):
+        return f"{self.company} - {self.month:%Y-%m} : {self.total_ttc}"
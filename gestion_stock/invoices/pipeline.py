@@ -0,0 +1,53 @@
+"""
+Création d'une facture avec ses lignes et sa sortie de stock, en une transaction.
+
+create_invoice (facture, conversion de pro forma ou de devis) :
+1. crée la facture puis ses lignes en une INSERT groupée (totaux calculés une fois) ;
+2. enregistre les sorties par stock.ledger.record_movements : produits verrouillés une seule fois,
+   stock vérifié sur la quantité totale par produit (lignes en double cumulées), quantités mises à
+   jour en un UPDATE groupé, mouvements insérés en lot ;
+3. met en file une seule notification pour toute la facture.
+Une rupture lève InsufficientStock et annule tout ; les pro forma n'ont ni vérification ni sortie.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Invoice, InvoiceItem
+
+
+def record_stock_exit(invoice, items, comment=None):
+    """Sorties de stock des lignes (un mouvement par ligne) et une notification pour l'ensemble."""
+    from stock.ledger import record_movements
+    from stock.models import StockMovement
+    from stock.notifications import queue_stock_movements_batch
+
+    comment = comment or f"Sortie pour facture {invoice.invoice_number}"
+    now = timezone.now()
+    movements = [
+        StockMovement(
+            product=item.product,
+            movement_type='SORTIE',
+            quantity=item.quantity,
+            date=now,
+            comment=comment,
+        )
+        for item in items
+    ]
+    balances = record_movements(movements)
+    queue_stock_movements_batch(movements, balances)
+    return balances
+
+
+def create_invoice(lines, comment=None, **invoice_fields):
+    """
+    Crée une facture et ses lignes (dicts product, quantity, unit_price) en une transaction.
+    comment : modèle du commentaire des mouvements de stock, {number} = numéro de la facture
+    (par défaut « Sortie pour facture N° »).
+    """
+    is_proforma = invoice_fields.get('is_proforma', False)
+    with transaction.atomic():
+        invoice = Invoice.objects.create(**invoice_fields)
+        items = InvoiceItem.bulk_create_lines(invoice, lines)
+        if not is_proforma:
+            record_stock_exit(invoice, items, comment and comment.format(number=invoice.invoice_number))
+    return invoice
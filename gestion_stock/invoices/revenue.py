@@ -0,0 +1,136 @@
+"""
+Cumul mensuel du chiffre d'affaires (RevenueMonthly).
+- apply_revenue_change : appliqué par Invoice.save / Invoice.delete (deltas en F()).
+- compute_revenue_monthly / rebuild_revenue_monthly / check_revenue_monthly :
+  recalcul complet depuis les factures, utilisés par les commandes
+  backfill_revenue_monthly et check_revenue_monthly.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def month_start(value):
+    """Premier jour du mois (fuseau courant) d'une date ou d'un datetime."""
+    if hasattr(value, 'hour'):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def _add(company, month, total_ht, total_ttc, count):
+    from .models import RevenueMonthly
+
+    if not (total_ht or total_ttc or count):
+        return
+    updates = {
+        'total_ht': F('total_ht') + total_ht,
+        'total_ttc': F('total_ttc') + total_ttc,
+        'count': F('count') + count,
+        'updated_at': timezone.now(),
+    }
+    if RevenueMonthly.objects.filter(company=company, month=month).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            RevenueMonthly.objects.create(
+                company=company,
+                month=month,
+                total_ht=total_ht,
+                total_ttc=total_ttc,
+                count=count,
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre transaction
+        RevenueMonthly.objects.filter(company=company, month=month).update(**updates)
+
+
+def apply_revenue_change(old_state, new_state):
+    """
+    Applique au cumul mensuel le passage d'une facture de old_state à new_state,
+    chacun étant None ou (société, mois, total_ht, total_ttc).
+    """
+    if old_state == new_state:
+        return
+    if old_state and new_state and old_state[:2] == new_state[:2]:
+        company, month = new_state[:2]
+        _add(company, month, new_state[2] - old_state[2], new_state[3] - old_state[3], 0)
+        return
+    if old_state:
+        company, month, total_ht, total_ttc = old_state
+        _add(company, month, -total_ht, -total_ttc, -1)
+    if new_state:
+        company, month, total_ht, total_ttc = new_state
+        _add(company, month, total_ht, total_ttc, 1)
+
+
+def compute_revenue_monthly():
+    """Recalcule les cumuls depuis les factures : {(société, mois): (ht, ttc, nombre)}."""
+    from .models import Invoice
+
+    rows = (
+        Invoice.objects.filter(deleted_at__isnull=True, is_cancelled=False)
+        .annotate(month=TruncMonth('date'))
+        .values('company', 'month')
+        .annotate(total_ht=Sum('total_ht'), total_ttc=Sum('total_ttc'), count=Count('id'))
+    )
+    return {
+        (row['company'], month_start(row['month'])): (
+            Decimal(row['total_ht'] or 0),
+            Decimal(row['total_ttc'] or 0),
+            row['count'],
+        )
+        for row in rows
+        if row['month']
+    }
+
+
+@transaction.atomic
+def rebuild_revenue_monthly():
+    """Remplace tous les cumuls par un recalcul complet. Retourne le nombre de lignes créées."""
+    from .models import RevenueMonthly
+
+    expected = compute_revenue_monthly()
+    RevenueMonthly.objects.all().delete()
+    RevenueMonthly.objects.bulk_create([
+        RevenueMonthly(company=company, month=month, total_ht=ht, total_ttc=ttc, count=count)
+        for (company, month), (ht, ttc, count) in expected.items()
+    ])
+    return len(expected)
+
+
+def check_revenue_monthly(tolerance=Decimal('0.01')):
+    """
+    Compare les cumuls stockés à un recalcul complet.
+    Retourne la liste des écarts : dicts (company, month, stored, expected).
+    """
+    from .models import RevenueMonthly
+
+    expected = compute_revenue_monthly()
+    stored = {
+        (r.company, r.month): (Decimal(r.total_ht), Decimal(r.total_ttc), r.count)
+        for r in RevenueMonthly.objects.all()
+    }
+    zero = (Decimal('0'), Decimal('0'), 0)
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        exp = expected.get(key, zero)
+        got = stored.get(key, zero)
+        # Les montants peuvent différer d'un arrondi au centime par facture
+        margin = tolerance * max(exp[2], got[2], 1)
+        if (
+            exp[2] != got[2]
+            or abs(exp[0] - got[0]) > margin
+            or abs(exp[1] - got[1]) > margin
+        ):
+            mismatches.append({
+                'company': key[0],
+                'month': key[1],
+                'stored': got,
+                'expected': exp,
+            })
+    return mismatches
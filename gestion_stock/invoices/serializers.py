@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Invoice, InvoiceItem
-from products.serializers import ProductSerializer
+from products.serializers import ProductSummarySerializer
 from accounts.models import Client
+from stock.ledger import InsufficientStock
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -15,7 +16,7 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
     """
     Serializer pour le modèle InvoiceItem
     """
-    product_detail = ProductSerializer(source='product', read_only=True)
+    product_detail = ProductSummarySerializer(source='product', read_only=True)
     product_name = serializers.CharField(source='product.name', read_only=True)
 
     class Meta:
@@ -106,7 +107,7 @@ class InvoiceSerializer(serializers.ModelSerializer):
     Serializer pour le modèle Invoice
     """
     invoice_items = InvoiceItemSerializer(many=True, read_only=True)
-    items_count = serializers.IntegerField(source='invoice_items.count', read_only=True)
+    items_count = serializers.SerializerMethodField()
     client = ClientSerializer(read_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=Client.objects.all(),
@@ -121,6 +122,11 @@ class InvoiceSerializer(serializers.ModelSerializer):
     def get_remaining_amount(self, obj):
         return obj.remaining_amount
 
+    def get_items_count(self, obj):
+        # Annoté par InvoiceViewSet.get_queryset ; COUNT seulement pour une facture chargée autrement
+        count = getattr(obj, 'items_count', None)
+        return obj.invoice_items.count() if count is None else count
+
     class Meta:
         model = Invoice
         fields = [
@@ -167,11 +173,26 @@ class InvoiceSerializer(serializers.ModelSerializer):
         return representation
 
 
+def _out_of_stock_message(product_name, available, requested):
+    return (
+        f"Rupture de stock pour le produit « {product_name} ». "
+        f"Quantité disponible : {available} — Quantité demandée : {requested}. "
+        f"Veuillez réapprovisionner ou ajuster la commande."
+    )
+
+
+class InvoiceLineSerializer(serializers.Serializer):
+    """Ligne d'une facture à créer ; produit résolu par InvoiceCreateSerializer.validate_items"""
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+
 class InvoiceCreateSerializer(serializers.ModelSerializer):
     """
     Serializer pour la création de facture avec items
     """
-    items = InvoiceItemCreateSerializer(many=True, write_only=True)
+    items = InvoiceLineSerializer(many=True, write_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=Client.objects.all(),
         source='client',
@@ -189,53 +210,44 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
             'items',
         ]
 
+    def validate_items(self, items):
+        """Produits de toutes les lignes chargés en une requête"""
+        from products.models import Product
+
+        products = Product.objects.in_bulk({item['product'] for item in items})
+        errors = [{} for _ in items]
+        for index, item in enumerate(items):
+            product = products.get(item['product'])
+            if product is None:
+                errors[index] = {'product': [f"Clé primaire « {item['product']} » non valide - l'objet n'existe pas."]}
+            else:
+                item['product'] = product
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
     def create(self, validated_data):
-        """Création de la facture avec ses items. Pro forma : pas de vérification stock ni sortie stock."""
+        """
+        Création de la facture avec ses items (invoices.pipeline.create_invoice) :
+        stock vérifié sur produits verrouillés, lignes et sorties insérées en lot, une notification.
+        Pro forma : pas de vérification stock ni sortie stock.
+        """
+        from .pipeline import create_invoice
+
         items_data = validated_data.pop('items')
-        is_proforma = validated_data.get('is_proforma', False)
 
         # Extraire le client pour le définir dans client_name aussi
         client = validated_data.get('client')
         if client and 'client_name' not in validated_data:
             validated_data['client_name'] = client.name
 
-        invoice = Invoice.objects.create(**validated_data)
-
-        # Créer les items
-        for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
-
-            # Vérifier le stock uniquement pour les factures définitives (pas les pro forma)
-            if not is_proforma and product.quantity < quantity:
-                invoice.delete()
-                raise serializers.ValidationError(
-                    {
-                        'items': (
-                            f"Rupture de stock pour le produit « {product.name} ». "
-                            f"Quantité disponible : {product.quantity} — Quantité demandée : {quantity}. "
-                            f"Veuillez réapprovisionner ou ajuster la commande."
-                        )
-                    }
-                )
-
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
-
-        # Calculer les totaux
-        invoice.calculate_totals()
-
-        # Sortie de stock uniquement pour les factures définitives (pas pour les pro forma)
-        if not is_proforma:
-            from stock.models import StockMovement
-            for item in invoice.invoice_items.all():
-                StockMovement.objects.create(
-                    product=item.product,
-                    movement_type='SORTIE',
-                    quantity=item.quantity,
-                    comment=f"Sortie pour facture {invoice.invoice_number}"
-                )
-
-        return invoice
+        # Tout ou rien : une rupture de stock annule la facture, ses lignes et les sorties
+        try:
+            return create_invoice(items_data, **validated_data)
+        except InsufficientStock as e:
+            raise serializers.ValidationError(
+                {'items': _out_of_stock_message(e.product_name, e.available, e.requested)}
+            )
 
 
 class InvoiceUpdateSerializer(serializers.ModelSerializer):
@@ -259,3 +271,12 @@ class InvoiceUpdateSerializer(serializers.ModelSerializer):
             'company',
             'amount_paid',
         ]
+        # Montant payé modifié uniquement par le journal des paiements (payments.ledger)
+        read_only_fields = ['amount_paid']
+
+    def update(self, instance, validated_data):
+        # Seuls les champs envoyés sont écrits : pas d'écrasement d'un versement concurrent
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
@@ -0,0 +1,8 @@
+"""
+Signaux des factures.
+"""
+from django.dispatch import Signal
+
+# Envoyé par Invoice.save / Invoice.delete dans leur transaction (kwargs : invoice_id, old, new).
+# old / new : {champ de REVENUE_FIELDS: valeur} tels qu'enregistrés avant / après l'écriture, None si absent.
+invoice_state_changed = Signal()
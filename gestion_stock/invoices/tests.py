@@ -1,3 +1,268 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gestion_stock.totals import deferred_totals
+from products.models import Product
+
+from .aging import aging_report
+from .models import Invoice, InvoiceItem
+from .revenue import check_revenue_monthly
+
+
+class RevenueMonthlyTests(TestCase):
+    """Cumul mensuel du chiffre d'affaires tenu par Invoice.save."""
+
+    def test_stale_instances_do_not_apply_a_change_twice(self):
+        invoice = Invoice.objects.create(client_name='Client', total_ht=Decimal('100'), total_ttc=Decimal('118'))
+        first = Invoice.objects.get(pk=invoice.pk)
+        second = Invoice.objects.get(pk=invoice.pk)
+        first.is_cancelled = True
+        first.save()
+        second.is_cancelled = True
+        second.save()
+        self.assertEqual(check_revenue_monthly(), [])
+
+    def test_update_fields_keep_stored_values(self):
+        invoice = Invoice.objects.create(client_name='Client', total_ht=Decimal('100'), total_ttc=Decimal('118'))
+        stale = Invoice.objects.get(pk=invoice.pk)
+        Invoice.objects.get(pk=invoice.pk).cancel()
+        stale.total_ht, stale.total_ttc = Decimal('50'), Decimal('59')
+        stale.save(update_fields=['total_ht', 'total_ttc', 'updated_at'])
+        self.assertEqual(check_revenue_monthly(), [])
+
+
+class InvoiceQueryCountTests(TestCase):
+    """Liste et détail des factures : nombre de requêtes constant (client, lignes et produits préchargés)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        cls.products = [
+            Product.objects.create(name=f'Produit {i}', purchase_price=10, sale_price=20, quantity=100)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _create_invoices(self, count):
+        for _ in range(count):
+            invoice = Invoice.objects.create(client_name='Client')
+            InvoiceItem.bulk_create_lines(invoice, [
+                {'product': product, 'quantity': 1, 'unit_price': Decimal('20')} for product in self.products
+            ])
+
+    def test_list_queries_do_not_grow_with_invoices(self):
+        self._create_invoices(2)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/invoices/')
+        self.assertEqual(len(response.json()), 2)
+        self._create_invoices(10)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/invoices/')
+        self.assertEqual(len(response.json()), 12)
+        self.assertEqual(len(response.json()[0]['invoice_items']), 3)
+
+    def test_paginated_list_queries(self):
+        self._create_invoices(12)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/invoices/', {'page_size': 5})
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_detail_queries(self):
+        self._create_invoices(1)
+        invoice = Invoice.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/invoices/{invoice.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['invoice_items']), 3)
+
+
+class DeferredTotalsTests(TestCase):
+    """Lignes écrites dans deferred_totals : un recalcul des totaux par facture, aucun si le bloc échoue."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=100)
+
+    def _add_lines(self, invoice, count):
+        for _ in range(count):
+            InvoiceItem.objects.create(invoice=invoice, product=self.product, quantity=1, unit_price=Decimal('20'))
+
+    def test_one_recalculation_per_invoice(self):
+        first = Invoice.objects.create(client_name='Client')
+        second = Invoice.objects.create(client_name='Client')
+        with mock.patch.object(Invoice, 'calculate_totals', autospec=True,
+                               side_effect=Invoice.calculate_totals) as calculate:
+            with deferred_totals():
+                self._add_lines(first, 3)
+                self._add_lines(second, 2)
+                calculate.assert_not_called()
+        self.assertEqual(sorted(call.args[0].pk for call in calculate.call_args_list), [first.pk, second.pk])
+        first.refresh_from_db()
+        self.assertEqual(first.total_ht, Decimal('60'))
+
+    def test_no_recalculation_on_exception(self):
+        invoice = Invoice.objects.create(client_name='Client')
+        with mock.patch.object(Invoice, 'calculate_totals', autospec=True) as calculate:
+            with self.assertRaises(RuntimeError):
+                with deferred_totals():
+                    self._add_lines(invoice, 2)
+                    raise RuntimeError('échec')
+        calculate.assert_not_called()
+
+
+class InvoicePaginationTests(TestCase):
+    """Pagination par clé de /api/invoices/ : ordre (-created_at, -id), ?ordering= refusé avec une page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        for i in range(12):
+            Invoice.objects.create(client_name=f'Client {i}', total_ht=Decimal('100'), total_ttc=Decimal('118'))
+        cls.expected_ids = list(
+            Invoice.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_pages(self):
+        ids = []
+        url, params = '/api/invoices/', {'page_size': 5}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids.extend(invoice['id'] for invoice in data['results'])
+            url, params = data['next'], None
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_ordering_with_page_is_rejected(self):
+        response = self.client.get('/api/invoices/', {'page_size': 5, 'ordering': 'total_ttc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/invoices/', {'ordering': 'total_ttc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 12)
+
+
+class InvoicePipelineTests(TestCase):
+    """POST /api/invoices/ : une rupture de stock annule facture, lignes, sorties et notification."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        self.router = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=10)
+        self.cable = Product.objects.create(name='Câble', purchase_price=1, sale_price=2, quantity=3)
+
+    def _post(self, items):
+        return self.client.post('/api/invoices/', {'client_name': 'Client', 'items': [
+            {'product': product.pk, 'quantity': quantity, 'unit_price': '20.00'} for product, quantity in items
+        ]}, format='json')
+
+    def _assert_nothing_written(self):
+        from outbox.models import NotificationOutbox
+        from stock.models import StockMovement
+
+        self.router.refresh_from_db()
+        self.cable.refresh_from_db()
+        self.assertEqual((self.router.quantity, self.cable.quantity), (10, 3))
+        self.assertEqual((self.router.total_sold, self.cable.total_sold), (0, 0))
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(InvoiceItem.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(check_revenue_monthly(), [])
+
+    def test_shortage_rolls_everything_back(self):
+        response = self._post([(self.router, 2), (self.cable, 5)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Câble', str(response.json()['items']))
+        self._assert_nothing_written()
+
+    def test_duplicate_lines_are_checked_together(self):
+        response = self._post([(self.router, 6), (self.router, 6)])
+        self.assertEqual(response.status_code, 400)
+        self._assert_nothing_written()
+
+    def test_invoice_with_stock(self):
+        response = self._post([(self.router, 6), (self.router, 4), (self.cable, 3)])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.router.refresh_from_db()
+        self.cable.refresh_from_db()
+        self.assertEqual((self.router.quantity, self.cable.quantity), (0, 0))
+        invoice = Invoice.objects.get()
+        self.assertEqual(invoice.invoice_items.count(), 3)
+        self.assertEqual(invoice.total_ht, Decimal('260.00'))
+
+
+class AgingBucketTests(TestCase):
+    """Balance âgée : bornes des tranches (30, 60, 90 jours inclus) et montants non échus."""
+
+    AS_OF = date(2026, 6, 30)
+
+    def _invoice(self, days, at=time(12, 0), company='NETSYSTEME'):
+        moment = timezone.make_aware(datetime.combine(self.AS_OF - timedelta(days=days), at))
+        return Invoice.objects.create(
+            client_name=f'J-{days} {at}', company=company, date=moment,
+            total_ht=Decimal('100'), total_ttc=Decimal('100'),
+        )
+
+    def _buckets(self):
+        return {line['client_name']: line for line in aging_report(self.AS_OF)['clients']}
+
+    def test_invoice_edges(self):
+        expected = {
+            (0, time(23, 59, 59)): '0_30', (30, time(0, 0)): '0_30',
+            (31, time(23, 59, 59)): '31_60', (60, time(0, 0)): '31_60',
+            (61, time(23, 59, 59)): '61_90', (90, time(0, 0)): '61_90',
+            (91, time(23, 59, 59)): '90_plus', (400, time(12, 0)): '90_plus',
+        }
+        for days, at in expected:
+            self._invoice(days, at)
+        self._invoice(-1, time(0, 0))  # Postérieure à as_of : exclue
+
+        lines = self._buckets()
+        self.assertEqual(len(lines), len(expected))
+        for (days, at), bucket in expected.items():
+            line = lines[f'J-{days} {at}']
+            self.assertEqual(line[bucket], Decimal('100.00'), (days, at))
+            self.assertEqual(line['total'], Decimal('100.00'))
+
+        report = aging_report(self.AS_OF)
+        self.assertEqual(report['total'], {
+            '0_30': Decimal('200.00'), '31_60': Decimal('200.00'), '61_90': Decimal('200.00'),
+            '90_plus': Decimal('200.00'), 'total': Decimal('800.00'),
+        })
+
+    def test_paid_and_partial_invoices(self):
+        Invoice.objects.filter(pk=self._invoice(10).pk).update(amount_paid=Decimal('100'))
+        Invoice.objects.filter(pk=self._invoice(45).pk).update(amount_paid=Decimal('40'))
+        self.assertEqual(aging_report(self.AS_OF)['total']['31_60'], Decimal('60.00'))
+        self.assertEqual(aging_report(self.AS_OF)['total']['total'], Decimal('60.00'))
+
+    def test_installation_edges(self):
+        from installations.models import Installation
 
-# Create your tests here.
+        # Installations créées aujourd'hui : balance au jour même
+        today = timezone.localdate()
+        for name, due in (('future', 10), ('j30', -30), ('j31', -31), ('j91', -91)):
+            Installation.objects.create(
+                title=name, client_name=name, total_amount=Decimal('50'), remaining_amount=Decimal('50'),
+                first_installment_due_date=today + timedelta(days=due),
+            )
+        lines = {line['client_name']: line for line in aging_report()['clients']}
+        # Montant non encore échu : tranche 0-30 jours
+        self.assertEqual(lines['future']['0_30'], Decimal('50.00'))
+        self.assertEqual(lines['j30']['0_30'], Decimal('50.00'))
+        self.assertEqual(lines['j31']['31_60'], Decimal('50.00'))
+        self.assertEqual(lines['j91']['90_plus'], Decimal('50.00'))
+        self.assertEqual(aging_report(company='SSE')['clients'], [])
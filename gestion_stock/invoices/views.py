@@ -1,6 +1,11 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Prefetch, Value
+from django.db.models.functions import Greatest
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Invoice, InvoiceItem
 from .serializers import (
@@ -11,11 +16,24 @@ from .serializers import (
     InvoiceItemCreateSerializer
 )
 from products.permissions import IsAdminUser
-from products.models import Product
 from .permissions import IsAdminOrCommercial
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
+from stock.ledger import InsufficientStock, apply_stock_delta
+from payments.ledger import record_invoice_payment
+from payments.serializers import payment_fields
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+def with_invoice_details(queryset):
+    """Précharge ce que InvoiceSerializer lit : client, lignes avec leur produit, nombre de lignes."""
+    return queryset.select_related('client').annotate(
+        items_count=Count('invoice_items'),
+    ).prefetch_related(
+        Prefetch('invoice_items', queryset=InvoiceItem.objects.select_related('product')),
+    )
+
+
+class InvoiceViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des factures
     """
@@ -26,6 +44,13 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     search_fields = ['invoice_number', 'client_name']
     ordering_fields = ['date', 'total_ttc', 'created_at']
     ordering = ['-date', '-created_at']
+    export_filename = 'factures'
+    export_sheet_title = 'Factures'
+    export_columns = [
+        ('N° facture', 'invoice_number'), ('Date', 'date'), ('Société', 'company'), ('Client', 'client_name'),
+        ('Total HT', 'total_ht'), ('Total TTC', 'total_ttc'), ('Payé', 'amount_paid'),
+        ('Reste dû', 'export_remaining'), ('Pro forma', 'is_proforma'), ('Annulée', 'is_cancelled'),
+    ]
 
     def get_serializer_class(self):
         """Utilise un serializer différent selon l'action"""
@@ -39,16 +64,16 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         """Crée une facture et ajoute un avertissement si des produits sont en faible stock."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        invoice = serializer.save()
+        invoice = self._load_details(serializer.save())
         response_data = InvoiceSerializer(invoice).data
 
         # Pour les factures définitives : détecter les produits en faible stock après sortie
         if not invoice.is_proforma:
             seen_ids = set()
             low_stock_list = []
-            for item in invoice.invoice_items.filter(deleted_at__isnull=True).select_related('product'):
-                product = Product.objects.filter(pk=item.product_id).first()
-                if product and product.id not in seen_ids and product.quantity <= product.alert_threshold:
+            for item in invoice.invoice_items.all():
+                product = item.product
+                if item.deleted_at is None and product.id not in seen_ids and product.quantity <= product.alert_threshold:
                     seen_ids.add(product.id)
                     low_stock_list.append({
                         'name': product.name,
@@ -62,9 +87,27 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
     def get_queryset(self):
-        """Filtre les factures supprimées"""
+        """
+        Filtre les factures supprimées. Client, lignes et produits chargés en 3 requêtes
+        quel que soit le nombre de factures (nombre de lignes annoté).
+        """
         queryset = Invoice.objects.filter(deleted_at__isnull=True)
-        return queryset
+        return with_invoice_details(queryset)
+
+    def get_export_queryset(self):
+        """Factures filtrées sans préchargement des lignes, reste dû calculé en base."""
+        queryset = Invoice.objects.filter(deleted_at__isnull=True).annotate(
+            export_remaining=Greatest(
+                ExpressionWrapper(F('total_ttc') - F('amount_paid'), output_field=DecimalField()),
+                Value(Decimal('0')),
+                output_field=DecimalField(),
+            ),
+        )
+        return self.filter_queryset(queryset)
+
+    def _load_details(self, invoice):
+        """Recharge une facture (créée ou modifiée) avec ses détails préchargés, pour la réponse."""
+        return with_invoice_details(Invoice.objects.filter(pk=invoice.pk)).get()
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -72,7 +115,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         invoice = self.get_object()
         try:
             invoice.cancel()
-            serializer = self.get_serializer(invoice)
+            serializer = self.get_serializer(self._load_details(invoice))
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             return Response(
@@ -86,7 +129,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         invoice = Invoice.objects.filter(deleted_at__isnull=False).get(pk=pk)
         try:
             invoice.restore()
-            serializer = self.get_serializer(invoice)
+            serializer = self.get_serializer(self._load_details(invoice))
             return Response(serializer.data, status=status.HTTP_200_OK)
         except ValueError as e:
             return Response(
@@ -103,7 +146,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='record-payment')
     def record_payment(self, request, pk=None):
-        """Enregistre un paiement (tranche) sur la facture. amount = montant à ajouter au total payé."""
+        """
+        Enregistre un paiement (tranche) sur la facture. amount = montant à ajouter au total payé ;
+        facultatifs : payment_date (AAAA-MM-JJ), method (ESPECE, WAVE, ...), reference.
+        """
         invoice = self.get_object()
         if invoice.is_cancelled:
             return Response(
@@ -117,29 +163,85 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            from decimal import Decimal
             amount = Decimal(str(amount))
-            if amount < 0:
-                return Response(
-                    {'error': 'Le montant doit être positif.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except (TypeError, ValueError):
+        except (InvalidOperation, TypeError, ValueError):
             return Response(
                 {'error': 'Montant invalide.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        invoice.amount_paid = (invoice.amount_paid or 0) + amount
-        if invoice.amount_paid > invoice.total_ttc:
-            invoice.amount_paid = invoice.total_ttc
-        invoice.save()
-        serializer = self.get_serializer(invoice)
+        if amount <= 0:
+            return Response(
+                {'error': 'Le montant doit être strictement positif.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Versement inscrit au journal, total payé incrémenté en base (limité au reste dû)
+        try:
+            record_invoice_payment(invoice, amount, user=request.user, **payment_fields(request.data))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(self._load_details(invoice))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _aging_params(self, request):
+        """(as_of, company) de la balance âgée ; ValueError si la date ou la société est invalide."""
+        from datetime import date
+
+        as_of = request.query_params.get('as_of')
+        company = request.query_params.get('company') or None
+        if company and company not in dict(Invoice.COMPANY_CHOICES):
+            raise ValueError('Société inconnue.')
+        try:
+            as_of = date.fromisoformat(as_of) if as_of else None
+        except ValueError:
+            raise ValueError('Date invalide (format attendu : AAAA-MM-JJ).')
+        return as_of, company
+
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        """Balance âgée des créances (factures + installations) par client et par société."""
+        from .aging import aging_report
+
+        try:
+            as_of, company = self._aging_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(aging_report(as_of, company))
+
+    @action(detail=False, methods=['get'], url_path='aging/export-excel')
+    def aging_export_excel(self, request):
+        """Exporte la balance âgée en fichier Excel (feuilles Clients et Sociétés)."""
+        from gestion_stock.exports import xlsx_sheets_response
+        from .aging import aging_report
+
+        try:
+            as_of, company = self._aging_params(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        report = aging_report(as_of, company)
+        keys = [bucket['key'] for bucket in report['buckets']]
+        labels = [bucket['label'] for bucket in report['buckets']]
+
+        client_rows = [
+            [line['client_name'], line['company']] + [line[key] for key in keys] + [line['total']]
+            for line in report['clients']
+        ]
+        client_rows.append(['Total', ''] + [report['total'][key] for key in keys] + [report['total']['total']])
+        company_rows = (
+            [summary['company']] + [summary[key] for key in keys] + [summary['total']]
+            for summary in report['companies']
+        )
+        return xlsx_sheets_response(
+            [
+                ('Clients', ['Client', 'Société'] + labels + ['Total'], client_rows),
+                ('Sociétés', ['Société'] + labels + ['Total'], company_rows),
+            ],
+            f"balance_agee_{report['as_of']:%Y%m%d}.xlsx",
+        )
+
     @action(detail=True, methods=['post'])
     def convert_to_invoice(self, request, pk=None):
         """Convertit une facture pro forma en facture définitive (nouvelle facture + sortie stock)."""
-        from stock.models import StockMovement
+        from .pipeline import create_invoice
         from .serializers import InvoiceSerializer
 
         proforma = self.get_object()
@@ -148,47 +250,37 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 {'error': 'Seules les factures pro forma peuvent être converties en facture.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        items = proforma.invoice_items.filter(deleted_at__isnull=True)
-        if not items.exists():
+        items = [item for item in proforma.invoice_items.all() if item.deleted_at is None]
+        if not items:
             return Response(
                 {'error': 'Cette facture pro forma ne contient aucun article. Ajoutez des lignes avant de convertir.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        # Vérifier le stock pour tous les articles
-        for item in items:
-            if item.product.quantity < item.quantity:
-                return Response(
-                    {
-                        'error': (
-                            f"Stock insuffisant pour le produit « {item.product.name} ». "
-                            f"Disponible : {item.product.quantity}, demandé : {item.quantity}"
-                        )
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
         client_name = proforma.client_name or (proforma.client.name if proforma.client else '')
-        new_invoice = Invoice.objects.create(
-            client=proforma.client,
-            client_name=client_name or 'Client',
-            company=proforma.company,
-            is_proforma=False,
-        )
-        for item in items:
-            InvoiceItem.objects.create(
-                invoice=new_invoice,
-                product=item.product,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
+        # Stock vérifié sur la quantité totale par produit, produits verrouillés (tout ou rien)
+        try:
+            new_invoice = create_invoice(
+                [
+                    {'product': item.product, 'quantity': item.quantity, 'unit_price': item.unit_price}
+                    for item in items
+                ],
+                comment="Sortie pour facture {number} (conversion pro forma)",
+                client=proforma.client,
+                client_name=client_name or 'Client',
+                company=proforma.company,
+                is_proforma=False,
             )
-        new_invoice.calculate_totals()
-        for item in new_invoice.invoice_items.all():
-            StockMovement.objects.create(
-                product=item.product,
-                movement_type='SORTIE',
-                quantity=item.quantity,
-                comment=f"Sortie pour facture {new_invoice.invoice_number} (conversion pro forma)"
+        except InsufficientStock as e:
+            return Response(
+                {
+                    'error': (
+                        f"Stock insuffisant pour le produit « {e.product_name} ». "
+                        f"Disponible : {e.available}, demandé : {e.requested}"
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST
             )
-        serializer = InvoiceSerializer(new_invoice)
+        serializer = InvoiceSerializer(self._load_details(new_invoice))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['get', 'post', 'delete'])
@@ -197,7 +289,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         invoice = self.get_object()
         
         if request.method == 'GET':
-            items = invoice.invoice_items.filter(deleted_at__isnull=True)
+            items = [item for item in invoice.invoice_items.all() if item.deleted_at is None]
             serializer = InvoiceItemSerializer(items, many=True)
             return Response(serializer.data)
         
@@ -207,18 +299,21 @@ class InvoiceViewSet(viewsets.ModelViewSet):
                 context={'invoice': invoice, 'request': request}
             )
             if serializer.is_valid():
-                serializer.save(invoice=invoice)
-                # Recalculer les totaux
-                invoice.calculate_totals()
-                # Créer le mouvement de sortie
                 from stock.models import StockMovement
-                item = serializer.instance
-                StockMovement.objects.create(
-                    product=item.product,
-                    movement_type='SORTIE',
-                    quantity=item.quantity,
-                    comment=f"Sortie pour facture {invoice.invoice_number}"
-                )
+                try:
+                    with transaction.atomic():
+                        # Totaux recalculés par InvoiceItem.save
+                        serializer.save(invoice=invoice)
+                        # Créer le mouvement de sortie
+                        item = serializer.instance
+                        StockMovement.objects.create(
+                            product=item.product,
+                            movement_type='SORTIE',
+                            quantity=item.quantity,
+                            comment=f"Sortie pour facture {invoice.invoice_number}"
+                        )
+                except InsufficientStock as e:
+                    return Response({'quantity': str(e)}, status=status.HTTP_400_BAD_REQUEST)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -227,11 +322,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             if item_id:
                 try:
                     item = invoice.invoice_items.get(id=item_id, deleted_at__isnull=True)
-                    # Restaurer le stock avant de supprimer
-                    item.product.quantity += item.quantity
-                    item.product.save()
-                    item.soft_delete()
-                    invoice.calculate_totals()
+                    with transaction.atomic():
+                        # Restaurer le stock avant de supprimer
+                        apply_stock_delta(item.product_id, item.quantity)
+                        item.soft_delete()
                     return Response({'status': 'Item supprimé'}, status=status.HTTP_200_OK)
                 except InvoiceItem.DoesNotExist:
                     return Response(
@@ -254,7 +348,7 @@ class InvoiceItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtre les items supprimés"""
-        queryset = InvoiceItem.objects.filter(deleted_at__isnull=True)
+        queryset = InvoiceItem.objects.filter(deleted_at__isnull=True).select_related('product')
         
         # Filtre par facture si fourni
         invoice_id = self.request.query_params.get('invoice', None)
@@ -274,14 +368,17 @@ class InvoiceItemViewSet(viewsets.ModelViewSet):
         invoice_id = self.request.data.get('invoice')
         if invoice_id:
             invoice = Invoice.objects.get(id=invoice_id)
-            serializer.save(invoice=invoice)
-            invoice.calculate_totals()
-            # Créer le mouvement de sortie
-            item = serializer.instance
             from stock.models import StockMovement
-            StockMovement.objects.create(
-                product=item.product,
-                movement_type='SORTIE',
-                quantity=item.quantity,
-                comment=f"Sortie pour facture {invoice.invoice_number}"
-            )
+            try:
+                with transaction.atomic():
+                    serializer.save(invoice=invoice)
+                    # Créer le mouvement de sortie
+                    item = serializer.instance
+                    StockMovement.objects.create(
+                        product=item.product,
+                        movement_type='SORTIE',
+                        quantity=item.quantity,
+                        comment=f"Sortie pour facture {invoice.invoice_number}"
+                    )
+            except InsufficientStock as e:
+                raise ValidationError({'quantity': str(e)})
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['created_by']
+    readonly_fields = [
+        'kind', 'params', 'input_file', 'status', 'progress', 'message', 'result', 'result_file',
+        'result_name', 'result_content_type', 'status_code', 'error', 'created_by', 'created_at',
+        'started_at', 'finished_at', 'heartbeat_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False
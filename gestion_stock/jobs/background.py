@@ -0,0 +1,258 @@
+"""
+Exécution en arrière-plan des requêtes longues (imports, exports, rapports, envois).
+
+Une vue compatible commence par :
+    if wants_background(request):
+        return enqueue_request(request, 'export')
+Le client le demande par ?async=1 ou l'en-tête « Prefer: respond-async » ; sans cela la vue
+répond comme avant (synchrone). enqueue_request enregistre la requête (méthode, chemin,
+paramètres, corps, fichier envoyé) dans un Job et répond 202 Accepted avec l'id de la tâche,
+l'URL de suivi (/api/jobs/{id}/) et l'URL de téléchargement (/api/jobs/{id}/download/).
+
+Le worker (`manage.py run_jobs`) rejoue la requête sur la même vue avec l'utilisateur qui l'a
+faite (permissions vérifiées à nouveau) : aucun code métier en double. La réponse devient le
+résultat de la tâche : fichier (pièce jointe ou réponse en flux) dans result_file, sinon
+données JSON dans result. Un statut HTTP >= 400 termine la tâche en échec.
+
+report_progress(pourcentage, message) : avancement de la tâche en cours (sans effet hors tâche).
+Pendant l'exécution, un fil rafraîchit heartbeat_at toutes les HEARTBEAT_INTERVAL secondes : une tâche
+longue sans avancement n'est pas déclarée interrompue par jobs.runner.release_stale. Le résultat n'est
+enregistré que si la tâche est encore RUNNING (une tâche déclarée interrompue le reste).
+"""
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Job
+
+# Paramètre de requête et en-tête Prefer (RFC 7240) qui demandent l'exécution en arrière-plan
+ASYNC_PARAM = 'async'
+PREFER_ASYNC = 'respond-async'
+# Intervalle minimal entre deux écritures de l'avancement en base
+PROGRESS_INTERVAL = 1.0
+# Intervalle entre deux signes de vie de la tâche en cours (bien en deçà de runner.LOCK_TIMEOUT)
+HEARTBEAT_INTERVAL = 60.0
+
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+_current = threading.local()
+
+
+def wants_background(request):
+    """True si le client demande une exécution en arrière-plan (?async=1 ou Prefer: respond-async)."""
+    if request.query_params.get(ASYNC_PARAM, '').lower() in ('1', 'true', 'yes'):
+        return True
+    prefer = request.headers.get('Prefer', '')
+    return PREFER_ASYNC in [token.strip().lower() for token in prefer.split(',')]
+
+
+def _request_data(request):
+    """Corps de la requête sans les fichiers (listes de valeurs pour un formulaire)."""
+    data = request.data
+    if hasattr(data, 'getlist'):
+        return {key: data.getlist(key) for key in data.keys() if key not in request.FILES}
+    return data
+
+
+def enqueue_request(request, kind):
+    """Enregistre la requête dans un Job (fichier envoyé compris) et répond 202 Accepted."""
+    query = {
+        key: request.query_params.getlist(key)
+        for key in request.query_params.keys() if key != ASYNC_PARAM
+    }
+    params = {
+        'method': request.method,
+        'path': request.path,
+        'query': query,
+        'data': _request_data(request) if request.method not in ('GET', 'HEAD') else {},
+        'content_type': request.content_type.split(';')[0] if request.content_type else '',
+        'host': request.get_host(),
+        'secure': request.is_secure(),
+    }
+    upload_field = next(iter(request.FILES), None)
+    job = Job(kind=kind, params=params, created_by=request.user)
+    if upload_field:
+        upload = request.FILES[upload_field]
+        params['file_field'] = upload_field
+        params['file_name'] = upload.name
+        job.input_file.save(upload.name, upload, save=False)
+    job.save()
+
+    status_url = reverse('job-detail', args=[job.pk])
+    response = Response({
+        'job_id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_url': status_url,
+        'download_url': reverse('job-download', args=[job.pk]),
+    }, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = status_url
+    return response
+
+
+def report_progress(percent=None, message=None):
+    """Met à jour l'avancement de la tâche en cours (au plus une écriture par PROGRESS_INTERVAL)."""
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    now = time.monotonic()
+    if percent != 100 and now - getattr(_current, 'last_report', 0) < PROGRESS_INTERVAL:
+        return
+    _current.last_report = now
+    updates = {'heartbeat_at': timezone.now()}
+    if percent is not None:
+        updates['progress'] = max(0, min(100, int(percent)))
+    if message is not None:
+        updates['message'] = message[:255]
+    Job.objects.filter(pk=job_id, status=Job.STATUS_RUNNING).update(**updates)
+
+
+class _Heartbeat(threading.Thread):
+    """Rafraîchit heartbeat_at d'une tâche RUNNING toutes les `interval` secondes jusqu'à stop()."""
+
+    def __init__(self, job_id, interval):
+        super().__init__(name=f'job-{job_id}-heartbeat', daemon=True)
+        self.job_id = job_id
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job_id, status=Job.STATUS_RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError:
+                    # Base momentanément indisponible : nouvel essai à l'intervalle suivant
+                    pass
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def in_background_job():
+    """True pendant l'exécution d'une tâche par le worker."""
+    return getattr(_current, 'job_id', None) is not None
+
+
+def _build_request(job):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    params = job.params
+    factory = APIRequestFactory(SERVER_NAME=params.get('host') or 'localhost')
+    path = params['path']
+    query = urlencode(params.get('query') or {}, doseq=True)
+    extra = {'secure': bool(params.get('secure'))}
+    if params.get('host'):
+        extra['HTTP_HOST'] = params['host']
+    method = params.get('method', 'GET').lower()
+
+    if method == 'get':
+        request = factory.get(f"{path}?{query}" if query else path, **extra)
+    else:
+        data = params.get('data') or {}
+        if job.input_file:
+            with job.input_file.open('rb') as source:
+                data[params['file_field']] = SimpleUploadedFile(params['file_name'], source.read())
+            request_format = 'multipart'
+        else:
+            request_format = 'multipart' if params.get('content_type', '').startswith('multipart') else 'json'
+        request = getattr(factory, method)(
+            f"{path}?{query}" if query else path, data, format=request_format, **extra
+        )
+    force_authenticate(request, user=job.created_by)
+    return request
+
+
+def _attachment_name(response):
+    match = _FILENAME_RE.search(response.get('Content-Disposition', ''))
+    return match.group(1) if match else ''
+
+
+def _store_file(job, response):
+    """Enregistre le contenu de la réponse (en flux ou non) dans result_file."""
+    name = _attachment_name(response) or f'{job.kind}-{job.pk}'
+    with tempfile.TemporaryFile() as output:
+        if response.streaming:
+            for chunk in response.streaming_content:
+                output.write(chunk)
+        else:
+            output.write(response.content)
+        output.seek(0)
+        job.result_file.save(name, File(output, name=name), save=False)
+    job.result_name = os.path.basename(name)
+    job.result_content_type = response.get('Content-Type', '')
+
+
+def _error_message(data, status_code):
+    if isinstance(data, dict):
+        for key in ('error', 'detail'):
+            if data.get(key):
+                return str(data[key])
+    return f'La requête a échoué (HTTP {status_code}).'
+
+
+def execute(job_id):
+    """Rejoue la requête d'un Job réservé (statut RUNNING) et enregistre son résultat."""
+    job = Job.objects.select_related('created_by').get(pk=job_id)
+    _current.job_id = job.pk
+    _current.last_report = 0
+    heartbeat = _Heartbeat(job.pk, HEARTBEAT_INTERVAL)
+    heartbeat.start()
+    try:
+        request = _build_request(job)
+        match = resolve(job.params['path'])
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        is_file = response.streaming or 'attachment' in response.get('Content-Disposition', '')
+        data = getattr(response, 'data', None)
+        if response.status_code >= 400:
+            job.status = Job.STATUS_FAILED
+            job.error = _error_message(data, response.status_code)
+            job.result = data
+        else:
+            job.status = Job.STATUS_SUCCEEDED
+            job.progress = 100
+            if is_file:
+                _store_file(job, response)
+            else:
+                job.result = data
+        job.status_code = response.status_code
+        if hasattr(response, 'close'):
+            response.close()
+    except Exception as e:
+        job.status = Job.STATUS_FAILED
+        job.error = str(e) or e.__class__.__name__
+    finally:
+        heartbeat.stop()
+        _current.job_id = None
+    job.finished_at = timezone.now()
+    fields = [
+        'status', 'result', 'result_file', 'result_name', 'result_content_type',
+        'status_code', 'error', 'finished_at',
+    ]
+    if job.status == Job.STATUS_SUCCEEDED:
+        fields.append('progress')
+    # UPDATE conditionnel : une tâche passée en échec par release_stale entre-temps n'est pas ressuscitée
+    if not Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING).update(
+        **{name: getattr(job, name) for name in fields}
+    ):
+        if job.result_file:
+            job.result_file.delete(save=False)
+        job.refresh_from_db()
+    return job
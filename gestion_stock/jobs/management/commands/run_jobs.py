@@ -0,0 +1,120 @@
+"""
+Commande : exécute les tâches d'arrière-plan en attente (imports, exports, rapports, envois
+demandés avec ?async=1), dans un pool de processus. Aucun broker : la file est la table Job.
+Usage :
+  python manage.py run_jobs                     # boucle continue, 2 processus (Ctrl+C pour arrêter)
+  python manage.py run_jobs --workers 4
+  python manage.py run_jobs --workers 0 --once  # dans le processus courant, puis quitter
+"""
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.runner import claim, fail, purge_finished, release_stale
+from jobs.worker import init_worker, run_job
+
+# Intervalle entre deux purges des tâches anciennes (secondes)
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches d'arrière-plan (Job) en attente dans un pool de processus."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Processus exécutant les tâches en parallèle (défaut 2 ; 0 = dans ce processus).',
+        )
+        parser.add_argument('--once', action='store_true', help='Exécuter les tâches en attente puis quitter.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Pause en secondes quand aucune tâche n\'est en attente (défaut 2).',
+        )
+
+    def handle(self, *args, **options):
+        self.last_purge = 0
+        workers = max(0, options['workers'])
+        if not options['once']:
+            self.stdout.write(f"Worker tâches démarré ({workers or 'sans'} processus, Ctrl+C pour arrêter).")
+        try:
+            if workers == 0:
+                self._run_inline(options)
+            else:
+                self._run_pool(workers, options)
+        except KeyboardInterrupt:
+            self.stdout.write('Worker tâches arrêté.')
+
+    def _maintenance(self):
+        close_old_connections()
+        release_stale()
+        if time.monotonic() - self.last_purge >= PURGE_INTERVAL:
+            purge_finished()
+            self.last_purge = time.monotonic()
+
+    def _report(self, job_id, status):
+        self.stdout.write(f'Tâche #{job_id} : {status}')
+
+    def _run_inline(self, options):
+        while True:
+            self._maintenance()
+            job_id = claim()
+            if job_id is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self._report(job_id, run_job(job_id))
+
+    def _run_pool(self, workers, options):
+        # « spawn » : processus neufs (pas de connexion base héritée), identique sous Windows et Linux
+        context = multiprocessing.get_context('spawn')
+        while True:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+                try:
+                    if self._run_with(pool, workers, options):
+                        return
+                except BrokenProcessPool:
+                    # Un processus s'est arrêté brutalement : tâches en cours terminées en échec, pool recréé
+                    self.stderr.write('Pool de processus interrompu, redémarrage.')
+
+    def _run_with(self, pool, workers, options):
+        """Alimente le pool jusqu'à épuisement de la file (--once, retourne True) ou arrêt du pool."""
+        running = {}
+        try:
+            while True:
+                self._maintenance()
+                while len(running) < workers:
+                    job_id = claim()
+                    if job_id is None:
+                        break
+                    try:
+                        running[pool.submit(run_job, job_id)] = job_id
+                    except BrokenProcessPool as e:
+                        fail(job_id, e)
+                        raise
+                if not running:
+                    if options['once']:
+                        return True
+                    time.sleep(options['interval'])
+                    continue
+                done, _ = wait(running, timeout=options['interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        self._report(job_id, future.result())
+                    except Exception as e:
+                        # Processus arrêté ou erreur hors de la tâche : elle ne reste pas RUNNING
+                        fail(job_id, e)
+                        self._report(job_id, f'échec ({e})')
+        except BrokenProcessPool:
+            for job_id in running.values():
+                fail(job_id, 'Processus du pool arrêté pendant l\'exécution.')
+            raise
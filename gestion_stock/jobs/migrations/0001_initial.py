@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:01
+
+import django.db.models.deletion
+import jobs.models
+import rest_framework.utils.encoders
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Type')),
+                ('params', models.JSONField(default=dict, encoder=rest_framework.utils.encoders.JSONEncoder, verbose_name='Paramètres')),
+                ('input_file', models.FileField(blank=True, storage=jobs.models.job_storage, upload_to=jobs.models.job_input_path, verbose_name='Fichier envoyé')),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'En cours'), ('SUCCEEDED', 'Terminée'), ('FAILED', 'Échec')], default='PENDING', max_length=20, verbose_name='Statut')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Avancement (%)')),
+                ('message', models.CharField(blank=True, default='', max_length=255, verbose_name='Étape')),
+                ('result', models.JSONField(blank=True, encoder=rest_framework.utils.encoders.JSONEncoder, null=True, verbose_name='Résultat')),
+                ('result_file', models.FileField(blank=True, storage=jobs.models.job_storage, upload_to=jobs.models.job_result_path, verbose_name='Fichier résultat')),
+                ('result_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Nom du fichier')),
+                ('result_content_type', models.CharField(blank=True, default='', max_length=255, verbose_name='Type du fichier')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Code HTTP')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarrée le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernier signe de vie')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='Demandée par')),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='jobs_job_status_277b31_idx'), models.Index(fields=['created_by', 'created_at'], name='jobs_job_created_197740_idx')],
+            },
+        ),
+    ]
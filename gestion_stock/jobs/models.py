@@ -0,0 +1,97 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+# Fichiers des tâches hors de MEDIA_ROOT (servi sans authentification) : téléchargés par l'API seulement
+_job_storage = FileSystemStorage(location=settings.JOBS_FILES_ROOT)
+
+
+def job_storage():
+    """Stockage des fichiers de tâches (appelable : l'emplacement ne figure pas dans les migrations)."""
+    return _job_storage
+
+
+def _job_file_path(folder, filename):
+    _, extension = os.path.splitext(filename)
+    return f"{folder}/{timezone.now():%Y/%m}/{uuid.uuid4().hex}{extension.lower()}"
+
+
+def job_input_path(instance, filename):
+    return _job_file_path('inputs', filename)
+
+
+def job_result_path(instance, filename):
+    return _job_file_path('results', filename)
+
+
+class Job(models.Model):
+    """
+    Tâche longue (import, export, rapport, envoi) exécutée par `manage.py run_jobs`.
+    Créée par jobs.background.enqueue_request à partir d'une requête API, rejouée par le worker ;
+    le résultat est la réponse de la vue (JSON dans result, fichier dans result_file).
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCEEDED = 'SUCCEEDED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_SUCCEEDED, 'Terminée'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+
+    kind = models.CharField(max_length=50, verbose_name="Type")
+    params = models.JSONField(default=dict, encoder=JSONEncoder, verbose_name="Paramètres")
+    input_file = models.FileField(
+        upload_to=job_input_path, storage=job_storage, blank=True, verbose_name="Fichier envoyé"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Statut"
+    )
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Avancement (%)")
+    message = models.CharField(max_length=255, blank=True, default='', verbose_name="Étape")
+    result = models.JSONField(null=True, blank=True, encoder=JSONEncoder, verbose_name="Résultat")
+    result_file = models.FileField(
+        upload_to=job_result_path, storage=job_storage, blank=True, verbose_name="Fichier résultat"
+    )
+    result_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Nom du fichier")
+    result_content_type = models.CharField(max_length=255, blank=True, default='', verbose_name="Type du fichier")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Code HTTP")
+    error = models.TextField(blank=True, default='', verbose_name="Erreur")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        verbose_name="Demandée par"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Démarrée le")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminée le")
+    # Mis à jour au démarrage puis à intervalle régulier par le worker : sans signe de vie, la tâche est déclarée interrompue
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier signe de vie")
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -0,0 +1,71 @@
+"""
+Réservation et exécution des tâches (Job) par `manage.py run_jobs`.
+
+- claim : réserve la plus ancienne tâche en attente par UPDATE conditionnel
+  (plusieurs workers possibles, chaque tâche n'est exécutée qu'une fois) ;
+- release_stale : une tâche RUNNING sans signe de vie depuis LOCK_TIMEOUT (worker arrêté ; le worker
+  en vie rafraîchit heartbeat_at à intervalle régulier) passe en échec ; elle n'est pas relancée
+  (un import ou un envoi de SMS peut avoir eu lieu) ;
+- purge_finished : supprime les tâches terminées depuis plus de RETENTION, fichiers compris.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Job
+
+LOCK_TIMEOUT = timedelta(minutes=30)
+RETENTION = timedelta(days=7)
+
+
+def claim():
+    """Réserve la plus ancienne tâche en attente (statut RUNNING) et retourne son id, ou None."""
+    while True:
+        pk = Job.objects.filter(status=Job.STATUS_PENDING).order_by('created_at', 'id').values_list(
+            'id', flat=True
+        ).first()
+        if pk is None:
+            return None
+        now = timezone.now()
+        # Un autre worker a pu réserver la tâche entre-temps : on passe à la suivante
+        if Job.objects.filter(pk=pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING, started_at=now, heartbeat_at=now,
+        ):
+            return pk
+
+
+def fail(job_id, error):
+    """Termine en échec une tâche dont l'exécution n'a pas abouti (processus arrêté, etc.)."""
+    return Job.objects.filter(pk=job_id, status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_FAILED, error=str(error)[:2000] or error.__class__.__name__,
+        finished_at=timezone.now(),
+    )
+
+
+def release_stale():
+    """Passe en échec les tâches RUNNING sans signe de vie depuis LOCK_TIMEOUT."""
+    return Job.objects.filter(
+        status=Job.STATUS_RUNNING,
+        heartbeat_at__lt=timezone.now() - LOCK_TIMEOUT,
+    ).update(
+        status=Job.STATUS_FAILED,
+        error='Tâche interrompue (worker arrêté pendant l\'exécution).',
+        finished_at=timezone.now(),
+    )
+
+
+def purge_finished(retention=RETENTION):
+    """Supprime les tâches terminées avant now - retention et leurs fichiers. Retourne le nombre supprimé."""
+    old = Job.objects.filter(
+        status__in=[Job.STATUS_SUCCEEDED, Job.STATUS_FAILED],
+        created_at__lt=timezone.now() - retention,
+    )
+    count = 0
+    for job in old.iterator(chunk_size=500):
+        for field in (job.input_file, job.result_file):
+            if field:
+                field.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
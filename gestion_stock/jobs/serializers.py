@@ -0,0 +1,36 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Suivi d'une tâche d'arrière-plan (lecture seule)"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'status',
+            'status_display',
+            'progress',
+            'message',
+            'result',
+            'result_name',
+            'download_url',
+            'status_code',
+            'error',
+            'created_by',
+            'created_by_username',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        return reverse('job-download', args=[obj.pk]) if obj.result_file else None
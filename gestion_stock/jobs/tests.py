@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.http import JsonResponse
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from gestion_stock.testing import run_concurrently
+
+from . import background
+from .models import Job
+from .runner import LOCK_TIMEOUT, claim, release_stale
+
+JOBS = 8
+
+
+class JobClaimTests(TransactionTestCase):
+    """Réservation des tâches (runner.claim) et tâches sans signe de vie (release_stale)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('admin', password='x', is_staff=True)
+
+    def _job(self, **fields):
+        return Job.objects.create(
+            kind='export', params={'method': 'GET', 'path': '/api/jobs/'}, created_by=self.user, **fields
+        )
+
+    def test_claim_takes_oldest_pending(self):
+        first, second = self._job(), self._job()
+        self.assertEqual(claim(), first.pk)
+        self.assertEqual(claim(), second.pk)
+        self.assertIsNone(claim())
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.STATUS_RUNNING)
+        self.assertIsNotNone(first.heartbeat_at)
+
+    def test_concurrent_claims_take_each_job_once(self):
+        jobs = [self._job() for _ in range(JOBS)]
+        results = run_concurrently(claim, JOBS + 4)
+        self.assertEqual([result for result in results if isinstance(result, Exception)], [])
+        claimed = [result for result in results if result is not None]
+        self.assertEqual(sorted(claimed), [job.pk for job in jobs])
+
+    def test_release_stale(self):
+        now = timezone.now()
+        stale = self._job(status=Job.STATUS_RUNNING, heartbeat_at=now - LOCK_TIMEOUT - timedelta(minutes=1))
+        alive = self._job(status=Job.STATUS_RUNNING, heartbeat_at=now)
+        self.assertEqual(release_stale(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, Job.STATUS_FAILED)
+        self.assertEqual(alive.status, Job.STATUS_RUNNING)
+
+    def _execute(self, view):
+        job_id = self._job().pk
+        self.assertEqual(claim(), job_id)
+        match = mock.Mock(func=view, args=(), kwargs={})
+        with mock.patch.object(background, 'resolve', return_value=match):
+            return job_id, background.execute(job_id)
+
+    def test_long_job_keeps_heartbeat(self):
+        released = []
+
+        def view(request):
+            # Dernier signe de vie ancien : le fil de heartbeat doit le rafraîchir pendant l'exécution
+            Job.objects.filter(status=Job.STATUS_RUNNING).update(heartbeat_at=timezone.now() - LOCK_TIMEOUT)
+            time.sleep(0.3)
+            released.append(release_stale())
+            return JsonResponse({'ok': True})
+
+        with mock.patch.object(background, 'HEARTBEAT_INTERVAL', 0.05):
+            _, job = self._execute(view)
+        self.assertEqual(released, [0])
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+
+    def test_released_job_is_not_resurrected(self):
+        def view(request):
+            Job.objects.filter(status=Job.STATUS_RUNNING).update(
+                heartbeat_at=timezone.now() - LOCK_TIMEOUT - timedelta(minutes=1)
+            )
+            release_stale()
+            return JsonResponse({'ok': True})
+
+        job_id, job = self._execute(view)
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        stored = Job.objects.get(pk=job_id)
+        self.assertEqual(stored.status, Job.STATUS_FAILED)
+        self.assertEqual(stored.error, 'Tâche interrompue (worker arrêté pendant l\'exécution).')
@@ -0,0 +1,44 @@
+from django.http import FileResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .models import Job
+from .serializers import JobSerializer
+from pointage.permissions import user_is_admin
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Suivi des tâches d'arrière-plan : statut, avancement, résultat.
+    Chaque utilisateur voit ses tâches ; les admins voient toutes les tâches.
+    Le fichier produit (export, rapport) se télécharge par /api/jobs/{id}/download/.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'kind']
+
+    def get_queryset(self):
+        queryset = Job.objects.select_related('created_by').defer('params')
+        if not user_is_admin(self.request.user):
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Télécharge le fichier produit par la tâche."""
+        job = self.get_object()
+        if job.status != Job.STATUS_SUCCEEDED or not job.result_file:
+            return Response(
+                {'error': 'Aucun fichier disponible pour cette tâche.', 'status': job.status},
+                status=status.HTTP_404_NOT_FOUND if job.is_finished else status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            job.result_file.open('rb'),
+            as_attachment=True,
+            filename=job.result_name or None,
+            content_type=job.result_content_type or None,
+        )
@@ -0,0 +1,25 @@
+"""
+Points d'entrée des processus du pool de `manage.py run_jobs`.
+Aucun import de modèle au chargement : en démarrage « spawn », ce module est importé
+avant l'initialisation de Django (init_worker).
+"""
+
+
+def init_worker():
+    """Initialisation d'un processus du pool : configuration de Django."""
+    import django
+
+    django.setup()
+
+
+def run_job(job_id):
+    """Exécute une tâche réservée (dans un processus du pool ou dans le worker). Retourne son statut."""
+    from django.db import close_old_connections
+
+    from .background import execute
+
+    close_old_connections()
+    try:
+        return execute(job_id).status
+    finally:
+        close_old_connections()
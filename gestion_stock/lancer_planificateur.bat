@@ -0,0 +1,11 @@
+@echo off
+REM Planificateur intégré (rapports pointage, rappels stock et paiement, notifications en file) — remplace les tâches .bat à heure fixe
+REM À lancer une seule fois, au démarrage (Planificateur de tâches : déclencheur « Au démarrage »)
+cd /d "%~dp0"
+
+if not exist "logs" mkdir "logs"
+
+echo ----- %date% %time% ----- >> logs\planificateur_log.txt
+"..\venv\Scripts\python.exe" manage.py run_scheduler >> logs\planificateur_log.txt 2>&1
+
+exit /b 0
\ No newline at end of file
@@ -0,0 +1,11 @@
+@echo off
+REM Worker des notifications (SMS / email mis en file) — envoie les notifications en attente en continu
+REM À lancer une seule fois, au démarrage (Planificateur de tâches : déclencheur « Au démarrage »)
+cd /d "%~dp0"
+
+if not exist "logs" mkdir "logs"
+
+echo ----- %date% %time% ----- >> logs\notifications_log.txt
+"..\venv\Scripts\python.exe" manage.py run_notification_worker >> logs\notifications_log.txt 2>&1
+
+exit /b 0
\ No newline at end of file
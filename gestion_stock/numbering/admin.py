@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import DocumentSequence
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ['doc_type', 'company', 'period', 'last_value', 'updated_at']
+    list_filter = ['doc_type', 'company']
+    search_fields = ['period']
+    readonly_fields = ['company', 'doc_type', 'period', 'last_value', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,75 @@
+"""
+Commande : vérifie la numérotation sous concurrence. Plusieurs threads (une connexion chacun)
+tirent des numéros d'un même compteur de test ; les valeurs doivent être uniques et sans trou.
+Le compteur de test est supprimé à la fin ; aucun document n'est créé.
+Usage :
+  python manage.py check_document_sequences
+  python manage.py check_document_sequences --threads 16 --per-thread 100
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from numbering.models import DocumentSequence
+from numbering.sequences import next_value
+
+CHECK_DOC_TYPE = '_check'
+
+
+class Command(BaseCommand):
+    help = "Tire des numéros depuis plusieurs threads et vérifie qu'ils sont uniques et consécutifs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--per-thread', type=int, default=50)
+
+    def handle(self, *args, **options):
+        threads, per_thread = options['threads'], options['per_thread']
+        period = f"{int(time.time()) % 10 ** 8:08d}"
+        values, errors = [], []
+        lock = threading.Lock()
+
+        def worker():
+            drawn = []
+            try:
+                for _ in range(per_thread):
+                    drawn.append(self._draw(period))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+            with lock:
+                values.extend(drawn)
+
+        start = time.perf_counter()
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        DocumentSequence.objects.filter(doc_type=CHECK_DOC_TYPE, period=period).delete()
+
+        if errors:
+            raise CommandError(f"{len(errors)} thread(s) en erreur : {errors[0]}")
+        expected = list(range(1, threads * per_thread + 1))
+        if sorted(values) != expected:
+            duplicates = len(values) - len(set(values))
+            missing = len(set(expected) - set(values))
+            raise CommandError(f"Numérotation incorrecte : {duplicates} doublon(s), {missing} trou(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(values)} numéros uniques et consécutifs ({threads} threads) en {elapsed:.2f} s."
+        ))
+
+    def _draw(self, period, retries=20):
+        """Un numéro par transaction ; SQLite peut refuser une écriture concurrente (réessai)."""
+        for attempt in range(retries):
+            try:
+                with transaction.atomic():
+                    return next_value(CHECK_DOC_TYPE, period=period)
+            except OperationalError:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.01 * (attempt + 1))
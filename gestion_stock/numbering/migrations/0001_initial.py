@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company', models.CharField(blank=True, default='', max_length=20, verbose_name='Société')),
+                ('doc_type', models.CharField(max_length=20, verbose_name='Type de document')),
+                ('period', models.CharField(max_length=8, verbose_name='Période')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': 'Séquence de numérotation',
+                'verbose_name_plural': 'Séquences de numérotation',
+                'constraints': [models.UniqueConstraint(fields=('company', 'doc_type', 'period'), name='unique_document_sequence')],
+            },
+        ),
+    ]
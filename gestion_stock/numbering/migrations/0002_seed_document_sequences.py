@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:10
+
+from django.db import migrations
+
+
+def seed_sequences(apps, schema_editor):
+    """
+    Reprend les numéros existants au format PRÉFIXE-AAAAMMJJ-NNNN (installations, interventions)
+    pour que la séquence de chaque jour continue après le dernier numéro attribué.
+    Les anciens numéros de factures et devis (suffixe aléatoire) ne peuvent pas entrer en collision.
+    """
+    DocumentSequence = apps.get_model('numbering', 'DocumentSequence')
+    sources = [
+        ('installation', apps.get_model('installations', 'Installation'), 'installation_number'),
+        ('intervention', apps.get_model('interventions', 'Intervention'), 'intervention_number'),
+    ]
+    counters = {}
+    for doc_type, model, field in sources:
+        for number in model.objects.values_list(field, flat=True).iterator():
+            parts = (number or '').split('-')
+            if len(parts) != 3 or len(parts[1]) != 8 or not parts[1].isdigit() or not parts[2].isdigit():
+                continue
+            key = (doc_type, parts[1])
+            counters[key] = max(counters.get(key, 0), int(parts[2]))
+    DocumentSequence.objects.bulk_create([
+        DocumentSequence(company='', doc_type=doc_type, period=period, last_value=value)
+        for (doc_type, period), value in counters.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('numbering', '0001_initial'),
+        ('installations', '0005_installationpaymentreminderlog'),
+        ('interventions', '0003_intervention_description_optional'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
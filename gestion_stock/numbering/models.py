@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class DocumentSequence(models.Model):
+    """
+    Compteur de numérotation d'un type de document, par société et par période (jour AAAAMMJJ).
+    Incrémenté uniquement par numbering.sequences.next_value, dans la transaction du document.
+    """
+    company = models.CharField(max_length=20, blank=True, default='', verbose_name="Société")
+    doc_type = models.CharField(max_length=20, verbose_name="Type de document")
+    period = models.CharField(max_length=8, verbose_name="Période")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Dernier numéro attribué")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+
+    class Meta:
+        verbose_name = "Séquence de numérotation"
+        verbose_name_plural = "Séquences de numérotation"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'doc_type', 'period'], name='unique_document_sequence'),
+        ]
+
+    def __str__(self):
+        company = f"{self.company} " if self.company else ''
+        return f"{company}{self.doc_type} {self.period} : {self.last_value}"
@@ -0,0 +1,61 @@
+"""
+Numérotation séquentielle des documents (factures, devis, installations, interventions).
+
+next_value incrémente le compteur DocumentSequence(company, doc_type, période) par un
+UPDATE ... SET last_value = last_value + 1 : la ligne reste verrouillée jusqu'à la fin de la
+transaction (PostgreSQL : verrou de ligne ; SQLite : verrou d'écriture), deux documents ne peuvent
+donc pas recevoir le même numéro. Appelé dans la transaction qui crée le document, un échec
+annule aussi l'incrément : pas de trou dans la numérotation. Coût constant (clé unique).
+
+Format : PRÉFIXE[-SOCIÉTÉ]-AAAAMMJJ-NNNN, la société n'apparaissant que hors NETSYSTEME
+(ex. INV-20260301-0001, INV-SSE-20260301-0001, INST-20260301-0012).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+PREFIXES = {
+    'invoice': 'INV',
+    'quote': 'DEV',
+    'installation': 'INST',
+    'intervention': 'INT',
+}
+DEFAULT_COMPANY = 'NETSYSTEME'
+
+
+def period_for(when=None):
+    """Période (jour AAAAMMJJ) d'un numéro attribué à `when` (maintenant par défaut)."""
+    return (when or timezone.now()).strftime('%Y%m%d')
+
+
+def next_value(doc_type, company='', period=None):
+    """Incrémente et retourne le compteur (1 pour le premier document de la période)."""
+    period = period or period_for()
+    counter = DocumentSequence.objects.filter(company=company, doc_type=doc_type, period=period)
+    with transaction.atomic():
+        if not counter.update(last_value=F('last_value') + 1, updated_at=timezone.now()):
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(
+                        company=company, doc_type=doc_type, period=period, last_value=1,
+                    )
+                return 1
+            except IntegrityError:
+                # Compteur créé entre-temps par une autre transaction
+                counter.update(last_value=F('last_value') + 1, updated_at=timezone.now())
+        return counter.values_list('last_value', flat=True).get()
+
+
+def next_number(doc_type, company=None, when=None):
+    """Numéro suivant d'un document, ex. next_number('invoice', 'SSE') -> 'INV-SSE-20260301-0004'."""
+    if doc_type not in PREFIXES:
+        raise ValueError(f"Type de document inconnu: {doc_type}")
+    company = (company or '').upper()
+    period = period_for(when)
+    value = next_value(doc_type, company, period)
+    parts = [PREFIXES[doc_type]]
+    if company and company != DEFAULT_COMPANY:
+        parts.append(company)
+    return '-'.join(parts + [period, f'{value:04d}'])
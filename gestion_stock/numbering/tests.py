@@ -0,0 +1,42 @@
+from django.test import TransactionTestCase
+
+from gestion_stock.testing import run_concurrently
+from installations.models import Installation
+from invoices.models import Invoice
+from quotes.models import Quote
+
+THREADS = 12
+
+
+class ConcurrentNumberingTests(TransactionTestCase):
+    """Documents créés en parallèle : numéros uniques et sans trou."""
+
+    def assertSequential(self, numbers):
+        self.assertEqual(len(numbers), THREADS)
+        self.assertEqual(len(set(numbers)), THREADS)
+        values = sorted(int(number.rsplit('-', 1)[1]) for number in numbers)
+        self.assertEqual(values, list(range(1, THREADS + 1)))
+
+    def _create_concurrently(self, create):
+        results = run_concurrently(create, THREADS)
+        errors = [result for result in results if isinstance(result, Exception)]
+        self.assertEqual(errors, [])
+        return results
+
+    def test_invoice_numbers(self):
+        invoices = self._create_concurrently(lambda: Invoice.objects.create(client_name='Client', company='SSE'))
+        self.assertSequential([invoice.invoice_number for invoice in invoices])
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('invoice_number', flat=True)),
+            sorted(invoice.invoice_number for invoice in invoices),
+        )
+
+    def test_quote_numbers(self):
+        quotes = self._create_concurrently(lambda: Quote.objects.create(client_name='Client'))
+        self.assertSequential([quote.quote_number for quote in quotes])
+
+    def test_installation_numbers(self):
+        installations = self._create_concurrently(
+            lambda: Installation.objects.create(title='Installation', client_name='Client')
+        )
+        self.assertSequential([installation.installation_number for installation in installations])
@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = [
+        'kind', 'payload', 'attempts', 'locked_at', 'sent_to', 'last_error', 'created_at', 'sent_at',
+    ]
+    actions = ['requeue']
+
+    @admin.action(description="Remettre en file d'envoi")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=NotificationOutbox.STATUS_SENT).update(
+            status=NotificationOutbox.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            locked_at=None,
+        )
+        self.message_user(request, f"{count} notification(s) remise(s) en file d'envoi.")
@@ -0,0 +1,198 @@
+"""
+File d'envoi des notifications (outbox).
+
+- enqueue : appelé dans la transaction de l'événement, une seule INSERT ; la notification
+  n'existe que si la transaction est validée.
+- run_once : utilisé par `manage.py run_notification_worker`. Réserve les lignes dues par
+  UPDATE conditionnel (plusieurs workers possibles), appelle le gestionnaire du type,
+  replanifie avec un délai exponentiel en cas d'échec, puis passe en FAILED après max_attempts.
+
+Un gestionnaire reçoit la ligne NotificationOutbox, ajoute à entry.sent_to chaque destinataire
+servi et lève DeliveryError si au moins un envoi a échoué (seuls les autres seront retentés).
+
+Types regroupés (GROUPED_HANDLERS) : toutes les lignes dues d'un même type sont envoyées en un
+seul appel gestionnaire(entries, sent_to) et partagent le même résultat. En les planifiant à la
+même échéance (enqueue(..., send_at=...)), on obtient un seul message par fenêtre.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+# Type de notification -> gestionnaire (chemin pointé, importé à la demande)
+HANDLERS = {
+    'stock_movement': 'stock.notifications.deliver_stock_movement',
+    'stock_movements_batch': 'stock.notifications.deliver_stock_movements_batch',
+}
+
+# Types envoyés en groupe -> gestionnaire(entries, sent_to)
+GROUPED_HANDLERS = {
+    'stock_movement_digest': 'stock.notifications.deliver_stock_movement_digest',
+}
+# Nombre maximum de lignes regroupées en un envoi
+GROUP_LIMIT = 1000
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# Une ligne réservée depuis plus longtemps est considérée abandonnée (worker arrêté) et reprise
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+class DeliveryError(Exception):
+    """Échec (au moins partiel) de l'envoi d'une notification : elle sera retentée."""
+
+
+def _check_kind(kind):
+    if kind not in HANDLERS and kind not in GROUPED_HANDLERS:
+        raise ValueError(f"Type de notification inconnu: {kind}")
+
+
+def enqueue(kind, payload, send_at=None):
+    """Ajoute une notification à la file (envoi dès que possible ou à send_at). Retourne la ligne créée."""
+    _check_kind(kind)
+    return NotificationOutbox.objects.create(
+        kind=kind,
+        payload=payload,
+        next_attempt_at=send_at or timezone.now(),
+    )
+
+
+def enqueue_many(kind, payloads, send_at=None):
+    """Ajoute plusieurs notifications du même type en une requête (bulk_create)."""
+    _check_kind(kind)
+    send_at = send_at or timezone.now()
+    return NotificationOutbox.objects.bulk_create([
+        NotificationOutbox(kind=kind, payload=payload, next_attempt_at=send_at)
+        for payload in payloads
+    ])
+
+
+def backoff_delay(attempts):
+    """Délai avant la tentative suivante : exponentiel, plafonné, avec une légère gigue."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.9, 1.1))
+
+
+def release_stale():
+    """Remet en attente les lignes réservées par un worker qui n'a pas terminé."""
+    return NotificationOutbox.objects.filter(
+        status=NotificationOutbox.STATUS_PROCESSING,
+        locked_at__lt=timezone.now() - LOCK_TIMEOUT,
+    ).update(status=NotificationOutbox.STATUS_PENDING, locked_at=None)
+
+
+def claim(limit=50, kinds=None, exclude_kinds=None):
+    """Réserve jusqu'à `limit` notifications dues et les retourne (attempts déjà incrémenté)."""
+    now = timezone.now()
+    due = NotificationOutbox.objects.filter(
+        status=NotificationOutbox.STATUS_PENDING,
+        next_attempt_at__lte=now,
+    )
+    if kinds is not None:
+        due = due.filter(kind__in=kinds)
+    if exclude_kinds:
+        due = due.exclude(kind__in=exclude_kinds)
+    candidates = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+    claimed = []
+    for pk in candidates:
+        # Un autre worker a pu réserver la ligne entre-temps
+        if NotificationOutbox.objects.filter(pk=pk, status=NotificationOutbox.STATUS_PENDING).update(
+            status=NotificationOutbox.STATUS_PROCESSING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        ):
+            claimed.append(pk)
+    return list(NotificationOutbox.objects.filter(pk__in=claimed).order_by('next_attempt_at', 'id'))
+
+
+def _record_failure(entries, error, sent_to):
+    """Replanifie les lignes (même échéance pour tout le groupe) ou les passe en FAILED."""
+    last_error = str(error)[:2000] or error.__class__.__name__
+    attempts = max(entry.attempts for entry in entries)
+    max_attempts = min(entry.max_attempts for entry in entries)
+    updates = {'locked_at': None, 'sent_to': sent_to, 'last_error': last_error}
+    if attempts >= max_attempts:
+        updates['status'] = NotificationOutbox.STATUS_FAILED
+    else:
+        updates['status'] = NotificationOutbox.STATUS_PENDING
+        updates['next_attempt_at'] = timezone.now() + backoff_delay(attempts)
+    NotificationOutbox.objects.filter(pk__in=[entry.pk for entry in entries]).update(**updates)
+
+    kind = entries[0].kind
+    ids = ', '.join(f"#{entry.pk}" for entry in entries[:10])
+    if attempts >= max_attempts:
+        logger.error(
+            "Notification %s %s abandonnée après %d tentative(s): %s", kind, ids, attempts, last_error,
+        )
+    else:
+        logger.warning(
+            "Notification %s %s en échec (tentative %d/%d): %s", kind, ids, attempts, max_attempts, last_error,
+        )
+
+
+def _record_success(entries, sent_to):
+    NotificationOutbox.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+        status=NotificationOutbox.STATUS_SENT,
+        sent_at=timezone.now(),
+        locked_at=None,
+        sent_to=sent_to,
+    )
+
+
+def deliver(entry):
+    """Envoie une notification réservée et enregistre le résultat. Retourne True si envoyée."""
+    try:
+        handler = import_string(HANDLERS[entry.kind])
+        handler(entry)
+    except Exception as e:
+        _record_failure([entry], e, entry.sent_to)
+        return False
+    _record_success([entry], entry.sent_to)
+    return True
+
+
+def deliver_group(kind, entries):
+    """Envoie en un seul appel des notifications réservées d'un type regroupé. Retourne True si envoyées."""
+    sent_to = []
+    for entry in entries:
+        for key in entry.sent_to:
+            if key not in sent_to:
+                sent_to.append(key)
+    try:
+        handler = import_string(GROUPED_HANDLERS[kind])
+        handler(entries, sent_to)
+    except Exception as e:
+        _record_failure(entries, e, sent_to)
+        return False
+    _record_success(entries, sent_to)
+    return True
+
+
+def run_once(limit=50):
+    """
+    Traite les notifications dues : chaque type regroupé en un envoi, puis un lot
+    d'au plus `limit` notifications individuelles. Retourne (envoyées, en échec).
+    """
+    release_stale()
+    sent = failed = 0
+    for kind in GROUPED_HANDLERS:
+        entries = claim(GROUP_LIMIT, kinds=[kind])
+        if not entries:
+            continue
+        if deliver_group(kind, entries):
+            sent += len(entries)
+        else:
+            failed += len(entries)
+    for entry in claim(limit, exclude_kinds=list(GROUPED_HANDLERS)):
+        if deliver(entry):
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
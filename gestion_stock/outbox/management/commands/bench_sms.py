@@ -0,0 +1,136 @@
+"""
+Commande : mesure le débit et la latence (p50/p95/p99) des envois SMS contre le serveur
+Orange simulé, pour 10, 100 et 1000 destinataires.
+Modes mesurés :
+  - sequentiel : OrangeSmsClient, un envoi à la fois ;
+  - parallele  : OrangeSmsClient.send_many (--workers envois simultanés) ;
+  - stock      : notification complète d'un mouvement de stock (deliver_stock_movement)
+                 vers N responsables, SMS + email (backend email en mémoire), sans écriture en base.
+Usage :
+  python manage.py bench_sms
+  python manage.py bench_sms --sizes 10 100 --latency 0.1 --workers 8 --rate 0
+  python manage.py bench_sms --error-rate 0.05 --expire-after 200
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from gestion_stock.fake_orange import fake_orange_server
+from gestion_stock.sms_backend import OrangeSmsClient
+
+MODES = ['sequentiel', 'parallele', 'stock']
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = "Débit et latence des notifications SMS contre le serveur Orange simulé."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Nombres de destinataires.')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+        parser.add_argument('--latency', type=float, default=0.05, help='Latence simulée par requête (s, défaut 0.05).')
+        parser.add_argument('--jitter', type=float, default=0.02, help='Latence aléatoire supplémentaire (s).')
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion d'envois en erreur 503.")
+        parser.add_argument('--expire-after', type=int, default=0, help='Envois acceptés par token (0 = illimité).')
+        parser.add_argument('--workers', type=int, default=8, help='Envois simultanés (défaut 8).')
+        parser.add_argument('--rate', type=float, default=0, help='Limite SMS/seconde du client (0 = aucune).')
+
+    def handle(self, *args, **options):
+        server_options = {
+            'latency': options['latency'],
+            'jitter': options['jitter'],
+            'error_rate': options['error_rate'],
+            'expire_after': options['expire_after'],
+        }
+        client_settings = {
+            'ORANGE_SMS_MAX_WORKERS': options['workers'],
+            'ORANGE_SMS_RATE_PER_SECOND': options['rate'],
+            'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+        }
+        self.stdout.write(
+            f"Serveur simulé : latence {options['latency']}s (+{options['jitter']}s), "
+            f"erreurs {options['error_rate']:.0%}, {options['workers']} envoi(s) simultané(s)"
+        )
+        self.stdout.write(f"{'mode':<12}{'dest.':>7}{'durée s':>10}{'SMS/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'échecs':>8}")
+        with fake_orange_server(**server_options) as server, override_settings(**client_settings):
+            for size in options['sizes']:
+                for mode in options['modes']:
+                    elapsed, latencies, failures = getattr(self, f'_run_{mode}')(size, options)
+                    if latencies:
+                        percentiles = ''.join(
+                            f"{_percentile(latencies, pct) * 1000:>9.0f}" for pct in (50, 95, 99)
+                        )
+                    else:
+                        percentiles = f"{'-':>9}" * 3
+                    self.stdout.write(
+                        f"{mode:<12}{size:>7}{elapsed:>10.2f}{size / elapsed:>9.1f}{percentiles}{failures:>8}"
+                    )
+            self.stdout.write(f"Statistiques serveur : {server.stats}")
+
+    def _messages(self, size):
+        return [(f"+22177{i:07d}", f"Bench SMS {i}") for i in range(size)]
+
+    def _client(self, options, workers):
+        return OrangeSmsClient(rate_per_second=options['rate'], max_workers=workers)
+
+    def _run_sequentiel(self, size, options):
+        client = self._client(options, 1)
+        start = time.perf_counter()
+        results = [client.send(to, body) for to, body in self._messages(size)]
+        return time.perf_counter() - start, [r.elapsed for r in results], sum(not r.ok for r in results)
+
+    def _run_parallele(self, size, options):
+        client = self._client(options, options['workers'])
+        start = time.perf_counter()
+        results = client.send_many(self._messages(size))
+        return time.perf_counter() - start, [r.elapsed for r in results], sum(not r.ok for r in results)
+
+    def _run_stock(self, size, options):
+        """Notification d'un mouvement vers `size` responsables, dans une transaction annulée."""
+        from outbox.dispatch import DeliveryError
+        from outbox.models import NotificationOutbox
+        from stock.models import StockNotificationRecipient
+        from stock.notifications import deliver_stock_movement
+
+        entry = NotificationOutbox(kind='stock_movement', payload={
+            'movement_id': None,
+            'movement_type': 'SORTIE',
+            'product_id': 0,
+            'product_name': 'Produit bench',
+            'quantity': 1,
+            'stock_after': 10,
+            'comment': 'Bench SMS',
+            'date': None,
+        })
+        failures = 0
+        try:
+            with transaction.atomic():
+                StockNotificationRecipient.objects.update(is_active=False)
+                StockNotificationRecipient.objects.bulk_create([
+                    StockNotificationRecipient(name=f'Bench {i}', phone=phone, email=f'bench{i}@example.com')
+                    for i, (phone, _) in enumerate(self._messages(size))
+                ])
+                start = time.perf_counter()
+                try:
+                    deliver_stock_movement(entry)
+                except DeliveryError as e:
+                    failures = str(e).count('SMS ')
+                elapsed = time.perf_counter() - start
+                raise _Rollback
+        except _Rollback:
+            pass
+        # Latence par destinataire non exposée par ce chemin : débit seulement
+        return elapsed, None, failures
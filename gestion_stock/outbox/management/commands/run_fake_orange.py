@@ -0,0 +1,54 @@
+"""
+Commande : lance un serveur simulé de l'API SMS Orange (jeton OAuth + envoi de SMS),
+pour tester les notifications sans appeler api.orange.com.
+Pointer l'application vers lui avec ORANGE_API_BASE_URL=http://127.0.0.1:<port>
+(les identifiants Orange doivent être renseignés, n'importe quelle valeur est acceptée).
+Usage :
+  python manage.py run_fake_orange
+  python manage.py run_fake_orange --port 8099 --latency 0.05 --jitter 0.1 --error-rate 0.02
+  python manage.py run_fake_orange --expire-after 100 --rate-limit 10
+"""
+from django.core.management.base import BaseCommand
+
+from gestion_stock.fake_orange import FakeOrangeServer
+
+
+class Command(BaseCommand):
+    help = "Serveur Orange SMS simulé (latence, erreurs, expiration de token, limite de débit configurables)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--latency', type=float, default=0.0, help='Latence fixe par requête (s).')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Latence aléatoire supplémentaire (s).')
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion d'envois refusés en 503 (0-1).")
+        parser.add_argument('--token-ttl', type=int, default=3600, help='Durée de validité des tokens (s).')
+        parser.add_argument(
+            '--expire-after',
+            type=int,
+            default=0,
+            help='Envois acceptés par token avant 401 « Expired credentials » (0 = illimité).',
+        )
+        parser.add_argument('--rate-limit', type=int, default=0, help='SMS acceptés par seconde (0 = illimité).')
+        parser.add_argument('--verbose', action='store_true', help='Journaliser chaque requête.')
+
+    def handle(self, *args, **options):
+        server = FakeOrangeServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            token_ttl=options['token_ttl'],
+            expire_after=options['expire_after'],
+            rate_limit=options['rate_limit'],
+            verbose=options['verbose'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Serveur Orange simulé sur {server.url} (Ctrl+C pour arrêter).'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Arrêt. Statistiques : {server.stats}")
@@ -0,0 +1,55 @@
+"""
+Commande : envoie les notifications en attente dans la file (NotificationOutbox),
+avec nouvelles tentatives espacées et abandon après le nombre maximum d'essais.
+Usage :
+  python manage.py run_notification_worker            # boucle continue (Ctrl+C pour arrêter)
+  python manage.py run_notification_worker --once     # un passage (cron / planificateur)
+  python manage.py run_notification_worker --batch 100 --interval 2
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox.dispatch import run_once
+
+
+class Command(BaseCommand):
+    help = "Envoie les notifications SMS/email en file d'attente (retries, backoff, échecs définitifs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Traiter les notifications dues puis quitter.')
+        parser.add_argument('--batch', type=int, default=50, help='Notifications réservées par passage (défaut 50).')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Pause en secondes quand la file est vide (défaut 5).',
+        )
+
+    def handle(self, *args, **options):
+        batch = max(1, options['batch'])
+        if options['once']:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = run_once(batch)
+                total_sent += sent
+                total_failed += failed
+                if sent + failed < batch:
+                    break
+            self.stdout.write(
+                self.style.SUCCESS(f'{total_sent} notification(s) envoyée(s), {total_failed} en échec.')
+            )
+            return
+
+        self.stdout.write("Worker notifications démarré (Ctrl+C pour arrêter).")
+        try:
+            while True:
+                close_old_connections()
+                sent, failed = run_once(batch)
+                if sent or failed:
+                    self.stdout.write(f'{sent} notification(s) envoyée(s), {failed} en échec.')
+                if sent + failed < batch:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker notifications arrêté.')
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:27
+
+import django.utils.timezone
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Type')),
+                ('payload', models.JSONField(default=dict, encoder=rest_framework.utils.encoders.JSONEncoder, verbose_name='Contenu')),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('PROCESSING', 'En cours'), ('SENT', 'Envoyée'), ('FAILED', 'Échec définitif')], default='PENDING', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Tentatives maximum')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Prise en charge le')),
+                ('sent_to', models.JSONField(blank=True, default=list, verbose_name='Déjà envoyée à')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Envoyée le')),
+            ],
+            options={
+                'verbose_name': "Notification en file d'envoi",
+                'verbose_name_plural': "File d'envoi des notifications",
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_noti_status_365200_idx')],
+            },
+        ),
+    ]
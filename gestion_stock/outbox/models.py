@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NotificationOutbox(models.Model):
+    """
+    Notification à envoyer (SMS / email), écrite dans la même transaction que l'événement
+    qui la déclenche et envoyée par `manage.py run_notification_worker`.
+    Après max_attempts échecs, la ligne passe en FAILED (file des échecs définitifs).
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_PROCESSING = 'PROCESSING'
+    STATUS_SENT = 'SENT'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_PROCESSING, 'En cours'),
+        (STATUS_SENT, 'Envoyée'),
+        (STATUS_FAILED, 'Échec définitif'),
+    ]
+
+    kind = models.CharField(max_length=50, verbose_name="Type")
+    payload = models.JSONField(default=dict, encoder=JSONEncoder, verbose_name="Contenu")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Statut"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Tentatives maximum")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Prise en charge le")
+    # Destinataires déjà servis ('sms:+221...', 'email:...') : non renvoyés lors des nouvelles tentatives
+    sent_to = models.JSONField(default=list, blank=True, verbose_name="Déjà envoyée à")
+    last_error = models.TextField(blank=True, default="", verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Envoyée le")
+
+    class Meta:
+        verbose_name = "Notification en file d'envoi"
+        verbose_name_plural = "File d'envoi des notifications"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import dispatch
+from .models import NotificationOutbox
+
+TEST_HANDLERS = dict(dispatch.HANDLERS, test='outbox.tests.deliver_test')
+
+# Résultat du gestionnaire de test : destinataires servis puis erreur éventuelle
+delivery = {'recipients': [], 'error': None}
+
+
+def deliver_test(entry):
+    for recipient in delivery['recipients']:
+        if recipient not in entry.sent_to:
+            entry.sent_to.append(recipient)
+    if delivery['error']:
+        raise dispatch.DeliveryError(delivery['error'])
+
+
+@mock.patch.dict(dispatch.HANDLERS, TEST_HANDLERS)
+class OutboxDispatchTests(TestCase):
+    """Réservation, nouvelles tentatives avec délai exponentiel et échec définitif."""
+
+    def setUp(self):
+        delivery.update(recipients=['sms:+221771234567'], error=None)
+
+    def test_claim_reserves_each_entry_once(self):
+        entries = [dispatch.enqueue('test', {'n': i}) for i in range(3)]
+        later = dispatch.enqueue('test', {'n': 3}, send_at=timezone.now() + timedelta(hours=1))
+
+        claimed = dispatch.claim(limit=2)
+        self.assertEqual([entry.pk for entry in claimed], [entries[0].pk, entries[1].pk])
+        self.assertTrue(all(entry.attempts == 1 for entry in claimed))
+        self.assertEqual([entry.pk for entry in dispatch.claim()], [entries[2].pk])
+        self.assertEqual(dispatch.claim(), [])
+        self.assertEqual(NotificationOutbox.objects.get(pk=later.pk).status, NotificationOutbox.STATUS_PENDING)
+
+    def test_stale_claim_is_released(self):
+        entry = dispatch.enqueue('test', {})
+        dispatch.claim()
+        NotificationOutbox.objects.filter(pk=entry.pk).update(
+            locked_at=timezone.now() - dispatch.LOCK_TIMEOUT - timedelta(seconds=1),
+        )
+        self.assertEqual(dispatch.release_stale(), 1)
+        self.assertEqual([claimed.pk for claimed in dispatch.claim()], [entry.pk])
+
+    def test_success(self):
+        entry = dispatch.enqueue('test', {})
+        self.assertEqual(dispatch.run_once(), (1, 0))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.STATUS_SENT)
+        self.assertEqual(entry.sent_to, ['sms:+221771234567'])
+        self.assertIsNotNone(entry.sent_at)
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        entry = dispatch.enqueue('test', {})
+        NotificationOutbox.objects.filter(pk=entry.pk).update(max_attempts=3)
+        delivery['error'] = 'email a@example.com: refusé'
+
+        delays = []
+        with self.assertLogs('outbox.dispatch', level='WARNING') as logs:
+            for attempt in range(1, 4):
+                before = timezone.now()
+                self.assertEqual(dispatch.run_once(), (0, 1))
+                entry.refresh_from_db()
+                self.assertEqual(entry.attempts, attempt)
+                self.assertEqual(entry.last_error, 'email a@example.com: refusé')
+                # Destinataire déjà servi : conservé pour ne pas être resservi
+                self.assertEqual(entry.sent_to, ['sms:+221771234567'])
+                if attempt < 3:
+                    self.assertEqual(entry.status, NotificationOutbox.STATUS_PENDING)
+                    delay = (entry.next_attempt_at - before).total_seconds()
+                    expected = dispatch.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)
+                    self.assertGreaterEqual(delay, expected * 0.9 - 1)
+                    self.assertLessEqual(delay, expected * 1.1 + 1)
+                    delays.append(delay)
+                    self.assertEqual(dispatch.run_once(), (0, 0))
+                    NotificationOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(entry.status, NotificationOutbox.STATUS_FAILED)
+        self.assertEqual(len(logs.records), 3)
+        self.assertLess(delays[0], delays[1])
+
+    def test_backoff_is_capped(self):
+        delay = dispatch.backoff_delay(50).total_seconds()
+        self.assertLessEqual(delay, dispatch.BACKOFF_MAX_SECONDS * 1.1)
+        self.assertGreaterEqual(delay, dispatch.BACKOFF_MAX_SECONDS * 0.9)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            dispatch.enqueue('inconnu', {})
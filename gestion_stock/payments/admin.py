@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from .models import Payment
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ['date', 'amount', 'method', 'invoice', 'installation', 'reference', 'created_by']
+    list_filter = ['method', 'date']
+    search_fields = ['reference', 'invoice__invoice_number', 'installation__installation_number']
+    date_hierarchy = 'date'
+    list_select_related = ['invoice', 'installation', 'created_by']
+    readonly_fields = [
+        'invoice', 'installation', 'amount', 'date', 'method', 'reference', 'created_by', 'created_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
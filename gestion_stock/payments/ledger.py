@@ -0,0 +1,190 @@
+"""
+Enregistrement des paiements : une ligne Payment et la mise à jour du solde du document,
+dans une même transaction.
+
+Le solde est modifié par un UPDATE conditionnel unique avec F()
+(UPDATE ... SET amount_paid = amount_paid + n WHERE id = ... AND amount_paid <= total_ttc - n),
+sans lecture-modification-écriture en Python (de même pour l'avance et le restant d'une
+installation) : deux versements concurrents s'additionnent,
+et un versement qui dépasserait le reste dû est refusé au lieu d'écraser l'autre.
+Les soldes, l'historique et les encaissements se relisent ensuite depuis le journal
+(index couvrants sur (document, date, montant) et (date, moyen, montant)).
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Payment
+
+AMOUNT_FIELD = DecimalField(max_digits=12, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=AMOUNT_FIELD)
+# Écart toléré (arrondis) au-delà du restant à payer d'une installation
+INSTALLATION_TOLERANCE = Decimal('1')
+
+
+class PaymentRejected(ValueError):
+    """Paiement refusé (document annulé ou supprimé, déjà soldé ou montant supérieur au reste dû)."""
+
+
+def record_invoice_payment(invoice, amount, date=None, method='ESPECE', reference='', user=None):
+    """
+    Ajoute un versement sur une facture, limité au reste dû (comme avant le journal).
+    Retourne le Payment ; la facture passée est rechargée (amount_paid à jour).
+    """
+    from invoices.models import Invoice
+
+    with transaction.atomic():
+        row = Invoice.objects.filter(pk=invoice.pk).values('total_ttc', 'amount_paid', 'is_cancelled').first()
+        if row is None or row['is_cancelled']:
+            raise PaymentRejected("Impossible d'enregistrer un paiement sur une facture annulée.")
+        remaining = max(Decimal('0'), row['total_ttc'] - (row['amount_paid'] or Decimal('0')))
+        applied = min(amount, remaining)
+        if applied <= 0:
+            raise PaymentRejected('La facture est déjà entièrement payée.')
+        updated = Invoice.objects.filter(
+            pk=invoice.pk,
+            is_cancelled=False,
+            amount_paid__lte=F('total_ttc') - applied,
+        ).update(amount_paid=F('amount_paid') + applied, updated_at=timezone.now())
+        if not updated:
+            raise PaymentRejected('Le reste dû a changé pendant l\'enregistrement, réessayez.')
+        payment = Payment.objects.create(
+            invoice=invoice, amount=applied, date=date or timezone.localdate(),
+            method=method, reference=reference or '', created_by=user,
+        )
+    invoice.refresh_from_db(fields=['amount_paid', 'updated_at'])
+    return payment
+
+
+def record_installation_payment(installation, amount, date=None, method='ESPECE', reference='', user=None):
+    """
+    Ajoute un versement sur une installation (avance augmentée, restant diminué).
+    Refusé au-delà du restant à payer (tolérance INSTALLATION_TOLERANCE). Retourne le Payment.
+    """
+    from installations.models import Installation
+
+    with transaction.atomic():
+        row = Installation.objects.filter(pk=installation.pk).values(
+            'total_amount', 'advance_amount', 'remaining_amount',
+        ).first()
+        if row is None:
+            raise PaymentRejected("Impossible d'enregistrer un paiement : installation introuvable (supprimée).")
+        total = row['total_amount'] or Decimal('0')
+        advance = row['advance_amount'] or Decimal('0')
+        remaining = row['remaining_amount']
+        if remaining is None or (remaining == 0 and total > advance):
+            # Restant non renseigné (anciennes fiches) : recalculé en base depuis total et avance
+            Installation.objects.filter(pk=installation.pk).filter(
+                Q(remaining_amount__isnull=True) | Q(remaining_amount=0)
+            ).update(remaining_amount=Greatest(F('total_amount') - F('advance_amount'), ZERO))
+            remaining = max(Decimal('0'), total - advance)
+        if amount > remaining + INSTALLATION_TOLERANCE:
+            raise PaymentRejected(f'Le montant ne peut pas dépasser le restant à payer ({remaining} F).')
+        # Versements concurrents additionnés en base ; refusé seulement si le restant est devenu insuffisant
+        updated = Installation.objects.filter(
+            pk=installation.pk,
+            remaining_amount__gte=amount - INSTALLATION_TOLERANCE,
+        ).update(
+            advance_amount=F('advance_amount') + amount,
+            remaining_amount=Greatest(F('remaining_amount') - amount, ZERO),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            raise PaymentRejected('Le restant à payer a changé pendant l\'enregistrement, réessayez.')
+        payment = Payment.objects.create(
+            installation=installation, amount=amount, date=date or timezone.localdate(),
+            method=method, reference=reference or '', created_by=user,
+        )
+    installation.refresh_from_db(fields=['advance_amount', 'remaining_amount', 'updated_at'])
+    return payment
+
+
+def record_initial_advance(installation, user=None):
+    """Inscrit au journal l'avance saisie à la création d'une installation (solde déjà à jour)."""
+    if not installation.advance_amount or installation.advance_amount <= 0:
+        return None
+    return Payment.objects.create(
+        installation=installation, amount=installation.advance_amount,
+        date=installation.installation_date or timezone.localdate(), created_by=user,
+    )
+
+
+def sync_installation_remaining(installation):
+    """
+    Recalcule en base le restant à payer après un changement du montant total
+    (restant = total - avance, sans lire l'avance en Python : un versement concurrent est conservé).
+    """
+    from installations.models import Installation
+
+    Installation.objects.filter(pk=installation.pk).update(
+        remaining_amount=Greatest(F('total_amount') - F('advance_amount'), ZERO),
+    )
+    installation.refresh_from_db(fields=['advance_amount', 'remaining_amount'])
+
+
+def paid_total(**document):
+    """Total versé d'après le journal pour un document (invoice=... ou installation=...)."""
+    return Payment.objects.filter(**document).aggregate(total=Coalesce(Sum('amount'), ZERO))['total']
+
+
+def _ledger_sum(document_field):
+    return Coalesce(
+        Subquery(
+            Payment.objects.filter(**{document_field: OuterRef('pk')})
+            .order_by().values(document_field)
+            .annotate(total=Sum('amount')).values('total')[:1],
+            output_field=AMOUNT_FIELD,
+        ),
+        ZERO,
+    )
+
+
+def reconciliation():
+    """
+    Documents dont le solde enregistré diffère du journal : factures (amount_paid) et
+    installations (advance_amount). Une sous-requête agrégée par document (index couvrant).
+    """
+    from invoices.models import Invoice
+    from installations.models import Installation
+
+    invoices = Invoice.objects.filter(deleted_at__isnull=True).annotate(
+        ledger_total=_ledger_sum('invoice'),
+    ).filter(~Q(amount_paid=F('ledger_total'))).values('id', 'invoice_number', 'amount_paid', 'ledger_total')
+    installations = Installation.objects.filter(deleted_at__isnull=True).annotate(
+        ledger_total=_ledger_sum('installation'),
+    ).filter(~Q(advance_amount=F('ledger_total'))).values(
+        'id', 'installation_number', 'advance_amount', 'ledger_total',
+    )
+    return {
+        'invoices': [
+            {
+                'id': row['id'], 'number': row['invoice_number'],
+                'recorded': row['amount_paid'], 'ledger': row['ledger_total'],
+                'difference': row['amount_paid'] - row['ledger_total'],
+            }
+            for row in invoices
+        ],
+        'installations': [
+            {
+                'id': row['id'], 'number': row['installation_number'],
+                'recorded': row['advance_amount'], 'ledger': row['ledger_total'],
+                'difference': row['advance_amount'] - row['ledger_total'],
+            }
+            for row in installations
+        ],
+    }
+
+
+def daily_totals(date_from=None, date_to=None):
+    """Encaissements par jour et moyen de paiement (GROUP BY sur l'index (date, moyen, montant))."""
+    queryset = Payment.objects.all()
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return list(
+        queryset.order_by().values('date', 'method').annotate(total=Sum('amount')).order_by('-date', 'method')
+    )
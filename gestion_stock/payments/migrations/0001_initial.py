@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('installations', '0006_installation_aging_index'),
+        ('invoices', '0007_invoice_aging_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant (F)')),
+                ('date', models.DateField(default=django.utils.timezone.localdate, verbose_name='Date du paiement')),
+                ('method', models.CharField(choices=[('ESPECE', 'Espèce'), ('WAVE', 'Wave'), ('ORANGE_MONEY', 'Orange Money'), ('VIREMENT', 'Virement'), ('CHEQUE', 'Chèque'), ('AUTRE', 'Autre'), ('REPRISE', 'Reprise du solde existant')], default='ESPECE', max_length=20, verbose_name='Moyen de paiement')),
+                ('reference', models.CharField(blank=True, default='', max_length=100, verbose_name='Référence')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name="Date d'enregistrement")),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments_recorded', to=settings.AUTH_USER_MODEL, verbose_name='Enregistré par')),
+                ('installation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='installations.installation', verbose_name='Installation')),
+                ('invoice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='invoices.invoice', verbose_name='Facture')),
+            ],
+            options={
+                'verbose_name': 'Paiement',
+                'verbose_name_plural': 'Paiements',
+                'ordering': ['-date', '-id'],
+                'indexes': [models.Index(fields=['invoice', 'date', 'amount'], name='payments_pa_invoice_1206e6_idx'), models.Index(fields=['installation', 'date', 'amount'], name='payments_pa_install_d43e6e_idx'), models.Index(fields=['date', 'method', 'amount'], name='payments_pa_date_2c2e55_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('amount__gt', Decimal('0'))), name='payment_amount_positive'), models.CheckConstraint(condition=models.Q(models.Q(('installation__isnull', True), ('invoice__isnull', False)), models.Q(('installation__isnull', False), ('invoice__isnull', True)), _connector='OR'), name='payment_single_document')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:05
+
+import datetime
+
+from django.db import migrations
+
+
+def seed_opening_balances(apps, schema_editor):
+    """
+    Reprend les montants déjà payés (factures) et avances (installations) en un paiement
+    « Reprise du solde existant » par document, pour que le journal parte des soldes actuels.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Invoice = apps.get_model('invoices', 'Invoice')
+    Installation = apps.get_model('installations', 'Installation')
+    payments = []
+    for pk, amount, date in Invoice.objects.filter(amount_paid__gt=0).values_list('pk', 'amount_paid', 'date').iterator():
+        payments.append(Payment(invoice_id=pk, amount=amount, date=date.date(), method='REPRISE'))
+    rows = Installation.objects.filter(advance_amount__gt=0).values_list(
+        'pk', 'advance_amount', 'installation_date', 'created_at',
+    )
+    for pk, amount, installation_date, created_at in rows.iterator():
+        date = installation_date or (created_at.date() if created_at else datetime.date.today())
+        payments.append(Payment(installation_id=pk, amount=amount, date=date, method='REPRISE'))
+    Payment.objects.bulk_create(payments, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.contrib.auth.models import User
+from decimal import Decimal
+
+
+class Payment(models.Model):
+    """
+    Journal des paiements clients, en ajout seul : une ligne par versement, rattachée à une
+    facture ou à une installation. Écrit uniquement par payments.ledger, qui met à jour le
+    solde du document dans la même transaction ; un enregistrement n'est jamais modifié.
+    """
+    METHOD_CHOICES = [
+        ('ESPECE', 'Espèce'),
+        ('WAVE', 'Wave'),
+        ('ORANGE_MONEY', 'Orange Money'),
+        ('VIREMENT', 'Virement'),
+        ('CHEQUE', 'Chèque'),
+        ('AUTRE', 'Autre'),
+        ('REPRISE', 'Reprise du solde existant'),
+    ]
+
+    invoice = models.ForeignKey(
+        'invoices.Invoice',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='payments',
+        verbose_name="Facture"
+    )
+    installation = models.ForeignKey(
+        'installations.Installation',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='payments',
+        verbose_name="Installation"
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Montant (F)")
+    date = models.DateField(default=timezone.localdate, verbose_name="Date du paiement")
+    method = models.CharField(
+        max_length=20,
+        choices=METHOD_CHOICES,
+        default='ESPECE',
+        verbose_name="Moyen de paiement"
+    )
+    reference = models.CharField(max_length=100, blank=True, default='', verbose_name="Référence")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payments_recorded',
+        verbose_name="Enregistré par"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date d'enregistrement")
+
+    class Meta:
+        verbose_name = "Paiement"
+        verbose_name_plural = "Paiements"
+        ordering = ['-date', '-id']
+        constraints = [
+            models.CheckConstraint(condition=Q(amount__gt=Decimal('0')), name='payment_amount_positive'),
+            models.CheckConstraint(
+                condition=(
+                    Q(invoice__isnull=False, installation__isnull=True)
+                    | Q(invoice__isnull=True, installation__isnull=False)
+                ),
+                name='payment_single_document',
+            ),
+        ]
+        indexes = [
+            # Index couvrants : historique et solde d'un document lus sans accès à la table
+            models.Index(fields=['invoice', 'date', 'amount']),
+            models.Index(fields=['installation', 'date', 'amount']),
+            # Encaissements du jour par moyen de paiement
+            models.Index(fields=['date', 'method', 'amount']),
+        ]
+
+    def __str__(self):
+        document = self.invoice or self.installation
+        return f"{self.date} - {self.amount} F ({self.get_method_display()}) - {document}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Un paiement enregistré ne peut pas être modifié.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Un paiement enregistré ne peut pas être supprimé.")
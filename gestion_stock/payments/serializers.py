@@ -0,0 +1,50 @@
+from rest_framework import serializers
+
+from .models import Payment
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    """Serializer en lecture du journal des paiements"""
+    method_display = serializers.CharField(source='get_method_display', read_only=True)
+    invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True, default=None)
+    installation_number = serializers.CharField(
+        source='installation.installation_number', read_only=True, default=None
+    )
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = Payment
+        fields = [
+            'id',
+            'invoice',
+            'invoice_number',
+            'installation',
+            'installation_number',
+            'amount',
+            'date',
+            'method',
+            'method_display',
+            'reference',
+            'created_by',
+            'created_by_username',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+def payment_fields(data):
+    """
+    Lit date, moyen et référence d'un versement dans les données de la requête
+    (payment_date ou date au format AAAA-MM-JJ). Lève ValueError si une valeur est invalide.
+    """
+    from datetime import date
+
+    raw_date = data.get('payment_date') or data.get('date')
+    try:
+        payment_date = date.fromisoformat(str(raw_date)[:10]) if raw_date else None
+    except ValueError:
+        raise ValueError('Date de paiement invalide (format attendu : AAAA-MM-JJ).')
+    method = data.get('method') or 'ESPECE'
+    if method not in dict(Payment.METHOD_CHOICES):
+        raise ValueError('Moyen de paiement inconnu.')
+    return {'date': payment_date, 'method': method, 'reference': str(data.get('reference') or '')[:100]}
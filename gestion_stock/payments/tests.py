@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from gestion_stock.testing import run_concurrently
+from installations.models import Installation
+
+from .ledger import PaymentRejected, paid_total, record_installation_payment
+
+THREADS = 10
+
+
+def _installation(total='100000', advance='0'):
+    return Installation.objects.create(
+        title='Installation', client_name='Client',
+        total_amount=Decimal(total), advance_amount=Decimal(advance),
+        remaining_amount=Decimal(total) - Decimal(advance),
+    )
+
+
+class InstallationBalanceTests(TestCase):
+    """Avance et restant d'une installation : modifiés uniquement par le journal des paiements."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        self.installation = _installation(advance='10000')
+
+    def test_advance_edit_is_rejected(self):
+        response = self.client.patch(
+            f'/api/installations/{self.installation.pk}/', {'advance_amount': '50000'}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('record-payment', str(response.json()['advance_amount']))
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.advance_amount, Decimal('10000'))
+
+    def test_unchanged_advance_is_accepted(self):
+        response = self.client.patch(
+            f'/api/installations/{self.installation.pk}/',
+            {'advance_amount': '10000.00', 'title': 'Installation modifiée'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.installation.refresh_from_db()
+        self.assertEqual(self.installation.title, 'Installation modifiée')
+
+    def test_payment_on_deleted_installation(self):
+        stale = Installation.objects.get(pk=self.installation.pk)
+        Installation.objects.filter(pk=self.installation.pk).delete()
+        with self.assertRaisesMessage(PaymentRejected, 'introuvable'):
+            record_installation_payment(stale, Decimal('1000'))
+
+
+class ConcurrentInstallationPaymentTests(TransactionTestCase):
+    """Versements concurrents sur une installation : aucun montant perdu."""
+
+    def test_concurrent_payments_add_up(self):
+        installation = _installation()
+
+        results = run_concurrently(
+            lambda: record_installation_payment(installation, Decimal('5000')), THREADS,
+        )
+
+        self.assertEqual([result for result in results if isinstance(result, Exception)], [])
+        installation.refresh_from_db()
+        self.assertEqual(installation.advance_amount, Decimal('5000') * THREADS)
+        self.assertEqual(installation.remaining_amount, Decimal('100000') - Decimal('5000') * THREADS)
+        self.assertEqual(paid_total(installation=installation), installation.advance_amount)
@@ -0,0 +1,74 @@
+from datetime import date
+
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .ledger import daily_totals, paid_total, reconciliation
+from .models import Payment
+from .serializers import PaymentSerializer
+from gestion_stock.pagination import SparseFieldsMixin
+from invoices.permissions import IsAdminOrCommercial
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+class PaymentViewSet(SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Journal des paiements (lecture seule) : les versements s'enregistrent par
+    /api/invoices/{id}/record-payment/ et /api/installations/{id}/record-payment/.
+    """
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [IsAdminOrCommercial]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['invoice', 'installation', 'method', 'date']
+    ordering_fields = ['date', 'amount', 'created_at']
+    ordering = ['-date', '-id']
+    keyset_ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        queryset = Payment.objects.select_related('invoice', 'installation', 'created_by')
+        try:
+            date_from = _parse_date(self.request.query_params.get('date_from'))
+            date_to = _parse_date(self.request.query_params.get('date_to'))
+        except ValueError:
+            return queryset.none()
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def balance(self, request):
+        """Total versé d'après le journal pour ?invoice=ID ou ?installation=ID."""
+        field = 'invoice' if 'invoice' in request.query_params else 'installation'
+        value = request.query_params.get(field, '')
+        if not value.isdigit():
+            return Response(
+                {'error': 'Paramètre "invoice" ou "installation" (identifiant) requis.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({field: int(value), 'paid': paid_total(**{field: int(value)})})
+
+    @action(detail=False, methods=['get'], url_path='daily-totals')
+    def daily_totals(self, request):
+        """Encaissements par jour et moyen de paiement (?date_from=&date_to= au format AAAA-MM-JJ)."""
+        try:
+            date_from = _parse_date(request.query_params.get('date_from'))
+            date_to = _parse_date(request.query_params.get('date_to'))
+        except ValueError:
+            return Response(
+                {'error': 'Date invalide (format attendu : AAAA-MM-JJ).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(daily_totals(date_from, date_to))
+
+    @action(detail=False, methods=['get'])
+    def reconciliation(self, request):
+        """Factures et installations dont le montant payé enregistré diffère du journal."""
+        return Response(reconciliation())
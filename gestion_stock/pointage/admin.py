@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CheckIn
+from .models import AttendanceDay, CheckIn
 
 
 @admin.register(CheckIn)
@@ -8,3 +8,12 @@ class CheckInAdmin(admin.ModelAdmin):
     list_filter = ('check_type', 'timestamp')
     search_fields = ('user__username', 'note')
     readonly_fields = ('timestamp',)
+
+
+@admin.register(AttendanceDay)
+class AttendanceDayAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'status', 'first_in', 'last_out', 'worked_minutes', 'zone')
+    list_filter = ('status', 'date')
+    search_fields = ('user__username',)
+    date_hierarchy = 'date'
+    readonly_fields = ('updated_at',)
@@ -5,3 +5,6 @@ class PointageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pointage'
     verbose_name = 'Pointage'
+
+    def ready(self):
+        import pointage.signals  # noqa: F401
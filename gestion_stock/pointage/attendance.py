@@ -0,0 +1,138 @@
+"""
+Présences journalières (AttendanceDay) : une ligne par utilisateur et par jour pointé.
+
+- première entrée, dernière sortie, minutes travaillées (entre les deux), statut (retard si
+  la première entrée est à HEURE_LIMITE_RETARD ou après), zone et note de la première entrée ;
+- tenues à jour à chaque pointage : le jour concerné est recalculé depuis les pointages de
+  l'utilisateur ce jour-là (signaux de CheckIn ; refresh_days pour un lot hors ligne) ;
+- rebuild(début, fin) reconstruit une période (`manage.py rebuild_attendance`) ;
+- les rapports lisent ces lignes (index user+date et date+statut) au lieu des pointages.
+Le jour d'un pointage est sa date locale (TIME_ZONE).
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AttendanceDay, CheckIn
+from .report_email import HEURE_LIMITE_RETARD
+
+REPORT_VERSION_KEY = 'pointage:attendance:version:{date}'
+# Nombre de jours lus à la fois par rebuild
+REBUILD_CHUNK_DAYS = 7
+UPDATE_FIELDS = ['first_in', 'last_out', 'worked_minutes', 'status', 'zone', 'note', 'updated_at']
+
+
+def day_bounds(day):
+    """(début, fin exclue) du jour local, en datetimes aware."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _checkin_rows(queryset):
+    return queryset.order_by('timestamp', 'id').values_list(
+        'user_id', 'timestamp', 'check_type', 'work_zone_id', 'note',
+    )
+
+
+def summarize(rows):
+    """
+    {(user_id, date): AttendanceDay non enregistré} depuis des tuples
+    (user_id, timestamp, check_type, work_zone_id, note) triés par heure.
+    """
+    limit = time(*HEURE_LIMITE_RETARD)
+    days = {}
+    for user_id, timestamp, check_type, zone_id, note in rows:
+        day_key = (user_id, timezone.localdate(timestamp))
+        day = days.get(day_key)
+        if day is None:
+            day = days[day_key] = AttendanceDay(user_id=user_id, date=day_key[1])
+        if check_type == 'entree':
+            if day.first_in is None:
+                day.first_in = timestamp
+                day.zone_id = zone_id
+                day.note = note
+        else:
+            day.last_out = timestamp
+            if day.first_in is None:
+                day.zone_id = zone_id
+                day.note = note
+    for day in days.values():
+        if day.first_in is None:
+            day.status = AttendanceDay.STATUS_SANS_ENTREE
+        elif timezone.localtime(day.first_in).time() >= limit:
+            day.status = AttendanceDay.STATUS_RETARD
+        else:
+            day.status = AttendanceDay.STATUS_PRESENT
+        if day.first_in and day.last_out and day.last_out > day.first_in:
+            day.worked_minutes = int((day.last_out - day.first_in).total_seconds() // 60)
+    return days
+
+
+def _save(days):
+    AttendanceDay.objects.bulk_create(
+        days, update_conflicts=True, unique_fields=['user', 'date'], update_fields=UPDATE_FIELDS,
+    )
+
+
+def _bump(dates):
+    for day in dates:
+        key = REPORT_VERSION_KEY.format(date=day.isoformat())
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def report_version(day):
+    """Version des présences du jour (change à chaque mise à jour) pour le cache des rapports."""
+    return cache.get(REPORT_VERSION_KEY.format(date=day.isoformat()), 0)
+
+
+def refresh_days(pairs):
+    """Recalcule les présences des couples (user_id, date) depuis leurs pointages."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    dates = {day for _, day in pairs}
+    start, _ = day_bounds(min(dates))
+    _, end = day_bounds(max(dates))
+    rows = _checkin_rows(CheckIn.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs}, timestamp__gte=start, timestamp__lt=end,
+    ))
+    days = {key: day for key, day in summarize(rows).items() if key in pairs}
+    with transaction.atomic():
+        if days:
+            _save(days.values())
+        for user_id, day in pairs - set(days):
+            AttendanceDay.objects.filter(user_id=user_id, date=day).delete()
+    _bump(dates)
+
+
+def record_checkin(checkin):
+    """Met à jour la présence du jour du pointage (après création ou suppression)."""
+    refresh_days([(checkin.user_id, timezone.localdate(checkin.timestamp))])
+
+
+def rebuild(start_date, end_date, chunk_days=REBUILD_CHUNK_DAYS):
+    """
+    Reconstruit les présences du start_date au end_date inclus, par tranches de chunk_days :
+    lignes de la tranche supprimées puis recréées depuis les pointages. Retourne le nombre de lignes.
+    """
+    total = 0
+    day = start_date
+    while day <= end_date:
+        last = min(end_date, day + timedelta(days=chunk_days - 1))
+        start, _ = day_bounds(day)
+        _, end = day_bounds(last)
+        days = summarize(_checkin_rows(
+            CheckIn.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        ).iterator(chunk_size=5000))
+        with transaction.atomic():
+            AttendanceDay.objects.filter(date__gte=day, date__lte=last).delete()
+            AttendanceDay.objects.bulk_create(days.values(), batch_size=1000)
+        _bump(day + timedelta(days=offset) for offset in range((last - day).days + 1))
+        total += len(days)
+        day = last + timedelta(days=1)
+    return total
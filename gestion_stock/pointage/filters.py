@@ -1,5 +1,7 @@
 import django_filters
-from .models import CheckIn
+
+from .attendance import day_bounds
+from .models import AttendanceDay, CheckIn
 
 
 class CheckInFilter(django_filters.FilterSet):
@@ -8,9 +10,31 @@ class CheckInFilter(django_filters.FilterSet):
     username = django_filters.CharFilter(field_name='user__username', lookup_expr='icontains')
     work_zone = django_filters.NumberFilter(field_name='work_zone__id', lookup_expr='exact')
     check_type = django_filters.ChoiceFilter(choices=CheckIn.TYPE_CHOICES)
-    date_after = django_filters.DateFilter(field_name='timestamp', lookup_expr='date__gte')
-    date_before = django_filters.DateFilter(field_name='timestamp', lookup_expr='date__lte')
+    # Jours inclus, filtrés en plage [début du jour, début du lendemain) sur timestamp :
+    # pas de fonction sur la colonne, l'index (check_type, timestamp) ou (user, timestamp) sert
+    date_after = django_filters.DateFilter(method='filter_date_after')
+    date_before = django_filters.DateFilter(method='filter_date_before')
 
     class Meta:
         model = CheckIn
         fields = ['user', 'work_zone', 'check_type']
+
+    def filter_date_after(self, queryset, name, value):
+        return queryset.filter(timestamp__gte=day_bounds(value)[0])
+
+    def filter_date_before(self, queryset, name, value):
+        return queryset.filter(timestamp__lt=day_bounds(value)[1])
+
+
+class AttendanceDayFilter(django_filters.FilterSet):
+    """Filtres des présences journalières (période incluse : date_after, date_before)."""
+    user = django_filters.NumberFilter(field_name='user_id', lookup_expr='exact')
+    username = django_filters.CharFilter(field_name='user__username', lookup_expr='icontains')
+    zone = django_filters.NumberFilter(field_name='zone_id', lookup_expr='exact')
+    status = django_filters.ChoiceFilter(choices=AttendanceDay.STATUS_CHOICES)
+    date_after = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_before = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = AttendanceDay
+        fields = ['user', 'zone', 'status']
@@ -0,0 +1,222 @@
+"""
+Recherche de la zone de travail d'une position (pointage) sans parcourir toutes les zones.
+
+Les zones avec coordonnées et rayon sont chargées une fois en mémoire (floats, radians
+précalculés) dans une grille régulière de CELL_SIZE_M :
+- chaque zone est inscrite dans les cases couvertes par son cercle : la zone contenant un
+  point est cherchée parmi les seules zones de la case du point ;
+- le centre de chaque zone est aussi inscrit dans sa case : la zone la plus proche est
+  cherchée par anneaux de cases autour du point, en s'arrêtant dès qu'aucune case plus
+  éloignée ne peut contenir un centre plus proche.
+Avec peu de zones (LINEAR_MAX_ZONES), un seul parcours de toutes les zones remplace la grille.
+Une seule recherche (locate) donne la zone contenant le point ou, à défaut, la plus proche,
+avec les mêmes résultats que le parcours complet : première zone par id si plusieurs
+contiennent le point.
+
+L'index est reconstruit après modification ou suppression d'une zone (signaux, voir
+pointage/signals.py). La version est partagée par le cache Django (immédiat entre processus
+avec un cache partagé) ; avec le cache mémoire local, les autres processus reconstruisent
+leur index au plus tard après INDEX_TTL.
+"""
+import math
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+EARTH_RADIUS_M = 6371000
+# Mètres par degré de latitude (sphère de rayon EARTH_RADIUS_M)
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+CELL_SIZE_M = 1000
+# Au-delà, une zone (très grand rayon ou proche d'un pôle) est testée pour tous les points
+MAX_CELLS_PER_ZONE = 64
+# Jusqu'à ce nombre de zones, un seul parcours de toutes les zones est plus rapide que la grille
+LINEAR_MAX_ZONES = 32
+INDEX_TTL = 60
+VERSION_CACHE_KEY = 'pointage:geofence:version'
+
+Zone = namedtuple('Zone', ['id', 'name', 'latitude', 'longitude', 'radius_m'])
+Match = namedtuple('Match', ['zone', 'distance', 'inside'])
+
+
+def distance_meters(lat1, lon1, lat2, lon2):
+    """Distance en mètres entre deux points (formule de Haversine)."""
+    R = EARTH_RADIUS_M
+    phi1 = math.radians(float(lat1))
+    phi2 = math.radians(float(lat2))
+    dphi = math.radians(float(lat2 - lat1))
+    dlambda = math.radians(float(lon2 - lon1))
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+
+class ZoneIndex:
+    """Grille des zones (tuples Zone triés par id) pour locate(lat, lng)."""
+
+    def __init__(self, zones, cell_size_m=CELL_SIZE_M):
+        self.zones = sorted(zones, key=lambda zone: zone.id)
+        self.cell_deg = cell_size_m / METERS_PER_DEGREE
+        # Par zone : (latitude rad, longitude rad, cos latitude, rayon) précalculés
+        self._geometry = [
+            (math.radians(z.latitude), math.radians(z.longitude), math.cos(math.radians(z.latitude)), z.radius_m)
+            for z in self.zones
+        ]
+        self._cover = {}
+        self._centers = {}
+        self._everywhere = []
+        for position, zone in enumerate(self.zones):
+            self._centers.setdefault(self._cell(zone.latitude, zone.longitude), []).append(position)
+            cells = self._covered_cells(zone)
+            if cells is None:
+                self._everywhere.append(position)
+                continue
+            for cell in cells:
+                self._cover.setdefault(cell, []).append(position)
+        # Au-delà de ce nombre de cases parcourues, la recherche de la plus proche teste chaque zone
+        self._scan_limit = max(64, len(self.zones))
+        rows = [cell[0] for cell in self._centers]
+        cols = [cell[1] for cell in self._centers]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols)) if rows else None
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def _covered_cells(self, zone):
+        """Cases du rectangle englobant le cercle de la zone (None si trop nombreuses)."""
+        dlat = zone.radius_m / METERS_PER_DEGREE * 1.01
+        cos_lat = math.cos(math.radians(min(90.0, abs(zone.latitude) + dlat)))
+        if cos_lat <= 1e-6:
+            return None
+        dlng = min(180.0, dlat / cos_lat)
+        row_min, col_min = self._cell(zone.latitude - dlat, zone.longitude - dlng)
+        row_max, col_max = self._cell(zone.latitude + dlat, zone.longitude + dlng)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > MAX_CELLS_PER_ZONE:
+            return None
+        return [(row, col) for row in range(row_min, row_max + 1) for col in range(col_min, col_max + 1)]
+
+    def _distance(self, phi, lam, cos_phi, position):
+        z_phi, z_lam, z_cos, _radius = self._geometry[position]
+        a = math.sin((z_phi - phi) / 2) ** 2 + cos_phi * z_cos * math.sin((z_lam - lam) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    def _containing(self, lat, lng, phi, lam, cos_phi):
+        candidates = self._cover.get(self._cell(lat, lng), [])
+        if self._everywhere:
+            candidates = sorted(set(candidates).union(self._everywhere))
+        for position in candidates:
+            distance = self._distance(phi, lam, cos_phi, position)
+            if distance <= self._geometry[position][3]:
+                return position, distance
+        return None, None
+
+    def _nearest(self, lat, lng, phi, lam, cos_phi):
+        row, col = self._cell(lat, lng)
+        row_min, row_max, col_min, col_max = self._bounds
+        max_ring = max(abs(row - row_min), abs(row - row_max), abs(col - col_min), abs(col - col_max))
+        best, best_distance = None, None
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** 2 > self._scan_limit:
+                # Point loin de toutes les zones : moins coûteux de tester chaque zone
+                return self._nearest_scan(phi, lam, cos_phi)
+            if best is not None:
+                # Distance minimale jusqu'aux cases de cet anneau (largeur de case la plus étroite)
+                far_lat = min(90.0, abs(lat) + (ring + 1) * self.cell_deg)
+                spacing = self.cell_deg * METERS_PER_DEGREE * math.cos(math.radians(far_lat))
+                if best_distance < (ring - 1) * spacing:
+                    break
+            for cell in self._ring(row, col, ring):
+                for position in self._centers.get(cell, ()):
+                    distance = self._distance(phi, lam, cos_phi, position)
+                    if best is None or (distance, position) < (best_distance, best):
+                        best, best_distance = position, distance
+        return best, best_distance
+
+    def _scan(self, phi, lam, cos_phi):
+        """Un seul parcours : première zone contenant le point et zone la plus proche."""
+        nearest, nearest_distance = None, None
+        for position in range(len(self.zones)):
+            distance = self._distance(phi, lam, cos_phi, position)
+            if distance <= self._geometry[position][3]:
+                return Match(self.zones[position], distance, True)
+            if nearest is None or distance < nearest_distance:
+                nearest, nearest_distance = position, distance
+        return Match(self.zones[nearest], nearest_distance, False)
+
+    def _nearest_scan(self, phi, lam, cos_phi):
+        return min(
+            ((self._distance(phi, lam, cos_phi, position), position) for position in range(len(self.zones))),
+        )[::-1]
+
+    @staticmethod
+    def _ring(row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def locate(self, lat, lng):
+        """
+        Match(zone, distance, inside) : première zone (par id) contenant le point, sinon la plus
+        proche (inside=False). None s'il n'y a aucune zone.
+        """
+        if not self.zones:
+            return None
+        phi, lam = math.radians(lat), math.radians(lng)
+        cos_phi = math.cos(phi)
+        if len(self.zones) <= LINEAR_MAX_ZONES:
+            return self._scan(phi, lam, cos_phi)
+        position, distance = self._containing(lat, lng, phi, lam, cos_phi)
+        if position is not None:
+            return Match(self.zones[position], distance, True)
+        position, distance = self._nearest(lat, lng, phi, lam, cos_phi)
+        return Match(self.zones[position], distance, False)
+
+
+_index = None
+_index_version = None
+_index_built_at = 0.0
+
+
+def load_zones():
+    """Zones utilisables pour pointer (coordonnées et rayon renseignés), en une requête."""
+    from zones.models import WorkZone
+
+    rows = WorkZone.objects.filter(
+        latitude__isnull=False, longitude__isnull=False, radius_m__isnull=False,
+    ).values_list('id', 'name', 'latitude', 'longitude', 'radius_m')
+    return [Zone(pk, name, float(lat), float(lng), float(radius)) for pk, name, lat, lng, radius in rows]
+
+
+def get_index():
+    """Index des zones, reconstruit si une zone a changé (version du cache) ou après INDEX_TTL."""
+    global _index, _index_version, _index_built_at
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    if _index is None or version != _index_version or time.monotonic() - _index_built_at > INDEX_TTL:
+        _index = ZoneIndex(load_zones())
+        _index_version = version
+        _index_built_at = time.monotonic()
+    return _index
+
+
+def invalidate():
+    """À appeler après modification des zones : index reconstruit à la prochaine recherche."""
+    global _index
+    _index = None
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def locate(lat, lng):
+    """Zone contenant la position, ou la plus proche (voir ZoneIndex.locate)."""
+    return get_index().locate(lat, lng)
@@ -0,0 +1,145 @@
+"""
+Commande : mesure les requêtes de pointage sur un grand volume synthétique (1 000 000 par défaut),
+avant (sans les index (check_type, timestamp) et (user, -timestamp), filtre de dates sur
+timestamp__date) et après (index, filtre en plage [début du jour, début du lendemain)).
+Requêtes : entrées du rapport quotidien (00h00–10h00), liste admin sur une semaine
+(date_after / date_before, première page), liste d'un utilisateur (première page).
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée.
+Usage :
+  python manage.py bench_checkin_queries
+  python manage.py bench_checkin_queries --rows 200000 --users 200 --repeat 5 --explain
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pointage.attendance import day_bounds
+from pointage.models import CheckIn
+
+BENCH_INDEXES = ('checkin_type_timestamp', 'checkin_user_timestamp')
+INSERT_BATCH_SIZE = 5000
+PAGE_SIZE = 50
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare les requêtes de pointage avant/après index et filtre de dates en plage."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Pointages synthétiques (défaut 1 000 000).')
+        parser.add_argument('--users', type=int, default=200, help='Utilisateurs synthétiques (défaut 200).')
+        parser.add_argument('--days', type=int, default=365, help='Période couverte en jours (défaut 365).')
+        parser.add_argument('--repeat', type=int, default=3, help='Mesures par requête (défaut 3, meilleure retenue).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--explain', action='store_true', help='Affiche le plan de chaque requête.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        rng = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self._drop_indexes()
+                user, day = self._populate(rng, options['rows'], max(1, options['users']), max(2, options['days']))
+                queries = self._queries(user, day)
+                before = self._measure(queries, 'old')
+                self._create_indexes()
+                after = self._measure(queries, 'new')
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{options['rows']} pointage(s), meilleure de {options['repeat']} mesure(s) :")
+        self.stdout.write(f"  {'requête':<28} {'avant':>10} {'après':>10}   gain")
+        for name in queries:
+            self.stdout.write(
+                f'  {name:<28} {before[name] * 1000:8.1f} ms {after[name] * 1000:8.1f} ms'
+                f'   x{before[name] / max(after[name], 1e-6):.0f}'
+            )
+
+    def _populate(self, rng, rows, nb_users, days):
+        """Insère les pointages (entrée/sortie par jour et utilisateur) ; retourne (un utilisateur, un jour)."""
+        start = time.perf_counter()
+        users = User.objects.bulk_create([
+            User(username=f'bench_checkin_{i}', password='!') for i in range(nb_users)
+        ])
+        end = timezone.now().replace(microsecond=0)
+        first = end - timedelta(days=days)
+        batch = []
+        for i in range(rows):
+            moment = first + timedelta(seconds=rng.randrange(days * 86400))
+            batch.append(CheckIn(
+                user_id=users[i % nb_users].pk,
+                check_type='entree' if i % 2 == 0 else 'sortie',
+                timestamp=moment,
+            ))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                CheckIn.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            CheckIn.objects.bulk_create(batch)
+        self._analyze()
+        self.stdout.write(f'{rows} pointage(s) insérés en {time.perf_counter() - start:.1f} s.')
+        return users[0], timezone.localdate(first + timedelta(days=days // 2))
+
+    def _queries(self, user, day):
+        """{nom: (ancien queryset, nouveau queryset)} : mêmes résultats attendus."""
+        report_start, _ = day_bounds(day)
+        report_end = report_start + timedelta(hours=10)
+        week_end = day + timedelta(days=6)
+        return {
+            'rapport quotidien (entrées)': (
+                CheckIn.objects.filter(check_type='entree', timestamp__gte=report_start, timestamp__lt=report_end)
+                .order_by('timestamp'),
+            ) * 2,
+            'liste admin, une semaine': (
+                CheckIn.objects.filter(timestamp__date__gte=day, timestamp__date__lte=week_end)
+                .order_by('-timestamp', '-id')[:PAGE_SIZE],
+                CheckIn.objects.filter(timestamp__gte=day_bounds(day)[0], timestamp__lt=day_bounds(week_end)[1])
+                .order_by('-timestamp', '-id')[:PAGE_SIZE],
+            ),
+            'liste utilisateur': (
+                CheckIn.objects.filter(user=user).order_by('-timestamp', '-id')[:PAGE_SIZE],
+            ) * 2,
+        }
+
+    def _measure(self, queries, variant):
+        timings = {}
+        for name, (old, new) in queries.items():
+            queryset = new if variant == 'new' else old
+            if self.options['explain']:
+                self.stdout.write(f'[{variant}] {name} :\n{queryset.explain()}')
+            best = None
+            for _ in range(max(1, self.options['repeat'])):
+                start = time.perf_counter()
+                list(queryset.values_list('id', flat=True))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+        return timings
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(CheckIn._meta.db_table)}')
+
+    def _drop_indexes(self):
+        """Supprime les index de pointage (annulé avec la transaction) pour mesurer l'état précédent."""
+        with connection.cursor() as cursor:
+            for name in BENCH_INDEXES:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def _create_indexes(self):
+        """Recrée les index de pointage (tels que définis dans CheckIn.Meta.indexes)."""
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for index in CheckIn._meta.indexes:
+                if index.name in BENCH_INDEXES:
+                    cursor.execute(str(index.create_sql(CheckIn, editor)))
+        self._analyze()
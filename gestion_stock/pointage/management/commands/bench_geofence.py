@@ -0,0 +1,116 @@
+"""
+Commande : mesure la recherche de zone au pointage pour 10, 1 000 et 50 000 zones,
+ancien parcours (toutes les zones en Decimal, second parcours pour la plus proche) contre
+l'index en grille (pointage.geofence). Zones et positions synthétiques (Sénégal), sans base.
+L'égalité des résultats des deux méthodes est vérifiée par pointage.tests.ZoneIndexTests.
+Usage :
+  python manage.py bench_geofence
+  python manage.py bench_geofence --zones 10 1000 50000 --lookups 2000 --seed 1
+"""
+import math
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from pointage.geofence import METERS_PER_DEGREE, Zone, ZoneIndex, distance_meters
+
+# Emprise des zones synthétiques (Sénégal)
+LAT_RANGE = (12.3, 16.7)
+LNG_RANGE = (-17.5, -11.4)
+
+
+class _LegacyZone:
+    """Zone comme lue par l'ancien code (valeurs Decimal du modèle)."""
+
+    def __init__(self, zone):
+        self.id = zone.id
+        self.latitude = Decimal(str(round(zone.latitude, 8)))
+        self.longitude = Decimal(str(round(zone.longitude, 8)))
+        self.radius_m = Decimal(str(round(zone.radius_m, 2)))
+
+
+def _legacy_locate(zones, lat, lng):
+    """Ancien algorithme de CheckInViewSet.create : (id de zone, contenue ?)."""
+    for zone in zones:
+        if distance_meters(lat, lng, float(zone.latitude), float(zone.longitude)) <= float(zone.radius_m):
+            return zone.id, True
+    nearest, nearest_dist = None, None
+    for zone in zones:
+        d = distance_meters(lat, lng, float(zone.latitude), float(zone.longitude))
+        if nearest_dist is None or d < nearest_dist:
+            nearest, nearest_dist = zone, d
+    return (nearest.id, False) if nearest else (None, False)
+
+
+def _synthetic_zones(count, rng):
+    zones = []
+    for pk in range(1, count + 1):
+        zones.append(Zone(
+            pk, f'Zone {pk}',
+            round(rng.uniform(*LAT_RANGE), 8), round(rng.uniform(*LNG_RANGE), 8),
+            round(rng.uniform(50, 500), 2),
+        ))
+    return zones
+
+
+def _positions(zones, count, rng):
+    """Moitié près d'une zone (souvent dedans), moitié au hasard (le plus souvent hors zone)."""
+    positions = []
+    for i in range(count):
+        if i % 2 == 0:
+            zone = rng.choice(zones)
+            offset = zone.radius_m * 1.5 / METERS_PER_DEGREE
+            positions.append((
+                zone.latitude + rng.uniform(-offset, offset),
+                zone.longitude + rng.uniform(-offset, offset) / math.cos(math.radians(zone.latitude)),
+            ))
+        else:
+            positions.append((rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)))
+    return positions
+
+
+class Command(BaseCommand):
+    help = "Compare l'ancienne recherche de zone de pointage et l'index en grille."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zones', type=int, nargs='+', default=[10, 1000, 50000], help='Nombres de zones.')
+        parser.add_argument('--lookups', type=int, default=2000, help='Positions recherchées (défaut 2000).')
+        parser.add_argument(
+            '--legacy-max',
+            type=int,
+            default=200,
+            help="Positions mesurées au maximum avec l'ancien parcours (lent pour beaucoup de zones).",
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        lookups = max(1, options['lookups'])
+        self.stdout.write(
+            f"{'zones':>7} {'construction':>13} {'index µs/pos.':>14} {'ancien µs/pos.':>15} {'gain':>8}"
+        )
+        for count in options['zones']:
+            zones = _synthetic_zones(max(1, count), rng)
+            positions = _positions(zones, lookups, rng)
+
+            started = time.perf_counter()
+            index = ZoneIndex(zones)
+            build = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for lat, lng in positions:
+                index.locate(lat, lng)
+            indexed = (time.perf_counter() - started) / len(positions)
+
+            legacy_zones = [_LegacyZone(zone) for zone in sorted(zones, key=lambda zone: zone.id)]
+            sample = positions[:max(1, min(len(positions), options['legacy_max']))]
+            started = time.perf_counter()
+            for lat, lng in sample:
+                _legacy_locate(legacy_zones, lat, lng)
+            legacy = (time.perf_counter() - started) / len(sample)
+            self.stdout.write(
+                f"{count:>7} {build * 1000:>10.1f} ms {indexed * 1e6:>14.1f} {legacy * 1e6:>15.1f} "
+                f"{legacy / indexed:>7.0f}x"
+            )
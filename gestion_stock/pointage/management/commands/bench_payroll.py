@@ -0,0 +1,71 @@
+"""
+Commande : mesure le calcul des présences du mois pour la paie (pointage.payroll.compute)
+sur des pointages synthétiques (500 employés × 31 jours par défaut, puis ×2 et ×4 employés),
+sans base : le temps par pointage doit rester constant (coût linéaire).
+Mélange : journées normales, retards, postes de nuit, sorties manquantes et sorties sans entrée.
+Usage :
+  python manage.py bench_payroll
+  python manage.py bench_payroll --employees 500 --scales 1 2 4 8 --repeat 3 --seed 1
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pointage.payroll import compute, month_bounds
+
+
+def _synthetic_rows(employees, start_date, end_date, rng):
+    """(user_id, timestamp, check_type) triés par utilisateur puis heure, comme checkin_rows."""
+    rows = []
+    days = (end_date - start_date).days + 1
+    for user_id in range(1, employees + 1):
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            kind = rng.random()
+            if kind < 0.05:
+                continue  # absent
+            if kind < 0.10:
+                start = datetime.combine(day, datetime.min.time()) + timedelta(hours=21, minutes=rng.randrange(60))
+                length = timedelta(hours=8)  # poste de nuit
+            else:
+                start = datetime.combine(day, datetime.min.time()) + timedelta(hours=7, minutes=rng.randrange(180))
+                length = timedelta(hours=rng.uniform(6, 10))
+            start = timezone.make_aware(start)
+            rows.append((user_id, start, 'entree'))
+            if kind < 0.97:  # sinon sortie manquante
+                rows.append((user_id, start + length, 'sortie'))
+            if kind > 0.99:
+                rows.append((user_id, start + length + timedelta(minutes=5), 'sortie'))  # sortie sans entrée
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Mesure le calcul mensuel des présences (paie) et vérifie que son coût est linéaire."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500, help='Employés à l\'échelle 1 (défaut 500).')
+        parser.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4], help='Multiplicateurs du nombre d\'employés.')
+        parser.add_argument('--repeat', type=int, default=3, help='Mesures par échelle (défaut 3, meilleure retenue).')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start_date, end_date = month_bounds(2026, 1)
+        self.stdout.write(f"{'employés':>9} {'pointages':>10} {'calcul':>10} {'µs/pointage':>12}")
+        for scale in options['scales']:
+            employees = max(1, options['employees'] * scale)
+            rows = _synthetic_rows(employees, start_date, end_date, rng)
+            best = None
+            for _ in range(max(1, options['repeat'])):
+                start = time.perf_counter()
+                totals = compute(iter(rows), start_date, end_date)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            if len(totals) != employees:
+                raise RuntimeError(f'{len(totals)} employé(s) calculé(s) au lieu de {employees}')
+            self.stdout.write(
+                f'{employees:>9} {len(rows):>10} {best * 1000:8.1f} ms {best / len(rows) * 1e6:12.2f}'
+            )
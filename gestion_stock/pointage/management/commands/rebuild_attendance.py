@@ -0,0 +1,50 @@
+"""
+Commande : reconstruit les présences journalières (AttendanceDay) depuis les pointages.
+À lancer une fois après la migration (historique), puis en cas de correction de pointages.
+Usage :
+  python manage.py rebuild_attendance                       # tout l'historique
+  python manage.py rebuild_attendance --days=31             # les 31 derniers jours
+  python manage.py rebuild_attendance --start=2026-01-01 --end=2026-01-31
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from pointage.attendance import rebuild
+from pointage.models import CheckIn
+
+
+def _parse_date(value, option):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"{option} invalide : {value}. Utilisez YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les présences journalières (rapports de pointage) depuis les pointages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, default=None, help='Premier jour (YYYY-MM-DD). Par défaut : premier pointage.')
+        parser.add_argument('--end', type=str, default=None, help='Dernier jour inclus (YYYY-MM-DD). Par défaut : aujourd\'hui.')
+        parser.add_argument('--days', type=int, default=None, help='Les N derniers jours (remplace --start).')
+
+    def handle(self, *args, **options):
+        end = _parse_date(options['end'], '--end') if options['end'] else timezone.localdate()
+        if options['days']:
+            start = end - timedelta(days=options['days'] - 1)
+        elif options['start']:
+            start = _parse_date(options['start'], '--start')
+        else:
+            first = CheckIn.objects.aggregate(first=Min('timestamp'))['first']
+            if first is None:
+                self.stdout.write("Aucun pointage : rien à reconstruire.")
+                return
+            start = timezone.localdate(first)
+        if start > end:
+            raise CommandError("--start doit précéder --end.")
+
+        count = rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Présences du {start} au {end} reconstruites : {count} ligne(s)."))
@@ -6,32 +6,19 @@ Usage :
   python manage.py send_pointage_weekly_report --week=2026-W08
   python manage.py send_pointage_weekly_report --dry-run
 """
-from datetime import datetime, time
-from datetime import timezone as dt_timezone
+from datetime import datetime
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
-from pointage.models import CheckIn
 from pointage.report_email import (
     _week_start_end,
-    _compute_weekly_rows,
+    get_weekly_rows,
     build_weekly_report_text,
     send_pointage_weekly_report,
 )
 
 
-def get_checkins_for_week(week_start, week_end):
-    """Tous les pointages (entrée + sortie) entre le lundi 00:00 et le dimanche 23:59:59 (UTC)."""
-    start = timezone.make_aware(datetime.combine(week_start, time.min), dt_timezone.utc)
-    end = timezone.make_aware(datetime.combine(week_end, time(23, 59, 59)), dt_timezone.utc)
-    return (
-        CheckIn.objects.filter(timestamp__gte=start, timestamp__lte=end)
-        .select_related('user', 'work_zone')
-        .order_by('timestamp')
-    )
-
-
 class Command(BaseCommand):
     help = (
         "Génère et envoie le rapport hebdomadaire de pointage (lundi–dimanche) "
@@ -72,8 +59,8 @@ class Command(BaseCommand):
             today = timezone.now().date()
             week_start, week_end = _week_start_end(today)
 
-        checkins = list(get_checkins_for_week(week_start, week_end))
-        weekly_rows = _compute_weekly_rows(checkins)
+        # Présences journalières de la semaine (une ligne par agent et par jour)
+        weekly_rows = get_weekly_rows(week_start, week_end)
 
         if dry_run:
             text = build_weekly_report_text(week_start, week_end, weekly_rows)
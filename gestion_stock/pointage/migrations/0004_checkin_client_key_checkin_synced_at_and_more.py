@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:14
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pointage', '0003_checkin_latitude_longitude'),
+        ('zones', '0002_add_default_zones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkin',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name="Clé de l'appareil"),
+        ),
+        migrations.AddField(
+            model_name='checkin',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Synchronisé le (hors ligne)'),
+        ),
+        migrations.AlterField(
+            model_name='checkin',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date et heure'),
+        ),
+        migrations.AddConstraint(
+            model_name='checkin',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_key__isnull', False)), fields=('user', 'client_key'), name='checkin_unique_client_key'),
+        ),
+    ]
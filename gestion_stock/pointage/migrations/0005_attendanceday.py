@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pointage', '0004_checkin_client_key_checkin_synced_at_and_more'),
+        ('zones', '0002_add_default_zones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('first_in', models.DateTimeField(blank=True, null=True, verbose_name='Première entrée')),
+                ('last_out', models.DateTimeField(blank=True, null=True, verbose_name='Dernière sortie')),
+                ('worked_minutes', models.PositiveIntegerField(default=0, verbose_name='Minutes travaillées')),
+                ('status', models.CharField(choices=[('present', 'Présent'), ('retard', 'Retard'), ('sans_entree', 'Sans entrée')], max_length=20, verbose_name='Statut')),
+                ('note', models.CharField(blank=True, max_length=255, null=True, verbose_name='Note (justificatif)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presences', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('zone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='presences', to='zones.workzone', verbose_name='Zone de travail')),
+            ],
+            options={
+                'verbose_name': 'Présence',
+                'verbose_name_plural': 'Présences',
+                'ordering': ['-date', 'user_id'],
+                'indexes': [models.Index(fields=['date', 'status'], name='attendance_day_date_status')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='attendance_day_unique_user_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pointage', '0005_attendanceday'),
+        ('zones', '0002_add_default_zones'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['check_type', 'timestamp'], name='checkin_type_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['user', '-timestamp'], name='checkin_user_timestamp'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class CheckIn(models.Model):
@@ -31,15 +32,85 @@ class CheckIn(models.Model):
         choices=TYPE_CHOICES,
         verbose_name='Type',
     )
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name='Date et heure')
+    # Heure du pointage : heure de réception, ou heure de l'appareil pour un pointage hors ligne (lot)
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name='Date et heure')
     note = models.CharField(max_length=255, blank=True, null=True, verbose_name='Note')
     latitude = models.FloatField(blank=True, null=True, verbose_name='Latitude au pointage')
     longitude = models.FloatField(blank=True, null=True, verbose_name='Longitude au pointage')
+    # Clé d'idempotence fournie par l'appareil : un pointage hors ligne renvoyé n'est enregistré qu'une fois
+    client_key = models.CharField(max_length=64, blank=True, null=True, verbose_name="Clé de l'appareil")
+    synced_at = models.DateTimeField(blank=True, null=True, verbose_name='Synchronisé le (hors ligne)')
 
     class Meta:
         verbose_name = 'Pointage'
         verbose_name_plural = 'Pointages'
         ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'client_key'],
+                condition=models.Q(client_key__isnull=False),
+                name='checkin_unique_client_key',
+            ),
+        ]
+        indexes = [
+            # Rapports : entrées (ou sorties) sur une plage horaire
+            models.Index(fields=['check_type', 'timestamp'], name='checkin_type_timestamp'),
+            # Liste d'un utilisateur, plus récents d'abord
+            models.Index(fields=['user', '-timestamp'], name='checkin_user_timestamp'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.get_check_type_display()} - {self.timestamp}"
+
+
+class AttendanceDay(models.Model):
+    """
+    Présence d'un utilisateur pour un jour (date locale, TIME_ZONE) : résumé de ses pointages.
+    Tenue à jour à chaque pointage (voir pointage/attendance.py) ; reconstruite par
+    `manage.py rebuild_attendance`. Lue par les rapports (quotidien, hebdomadaire, mensuel).
+    """
+    STATUS_PRESENT = 'present'
+    STATUS_RETARD = 'retard'
+    STATUS_SANS_ENTREE = 'sans_entree'
+    STATUS_CHOICES = [
+        (STATUS_PRESENT, 'Présent'),
+        (STATUS_RETARD, 'Retard'),
+        (STATUS_SANS_ENTREE, 'Sans entrée'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='presences',
+        verbose_name='Utilisateur',
+    )
+    date = models.DateField(verbose_name='Date')
+    first_in = models.DateTimeField(blank=True, null=True, verbose_name='Première entrée')
+    last_out = models.DateTimeField(blank=True, null=True, verbose_name='Dernière sortie')
+    worked_minutes = models.PositiveIntegerField(default=0, verbose_name='Minutes travaillées')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name='Statut')
+    # Zone et note de la première entrée (à défaut, de la dernière sortie)
+    zone = models.ForeignKey(
+        'zones.WorkZone',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='presences',
+        verbose_name='Zone de travail',
+    )
+    note = models.CharField(max_length=255, blank=True, null=True, verbose_name='Note (justificatif)')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')
+
+    class Meta:
+        verbose_name = 'Présence'
+        verbose_name_plural = 'Présences'
+        ordering = ['-date', 'user_id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='attendance_day_unique_user_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'status'], name='attendance_day_date_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.get_status_display()}"
@@ -0,0 +1,191 @@
+"""
+Présences du mois pour la paie : heures travaillées, retards et anomalies par employé.
+
+Les pointages sont lus une seule fois, triés par utilisateur puis par heure (iterator, par
+blocs) ; compute() les parcourt en un seul passage sans les garder en mémoire :
+- chaque sortie ferme l'entrée ouverte de l'utilisateur : poste (entrée, sortie) compté pour
+  le jour de l'entrée, même s'il finit le lendemain (poste de nuit) ;
+- une entrée suivie d'une autre entrée, ou d'une sortie plus de MAX_SHIFT après, ou sans
+  sortie à la fin du mois : sortie manquante (poste non compté) ;
+- une sortie sans entrée ouverte : sortie sans entrée ;
+- retard : minutes entre HEURE_LIMITE_RETARD et la première entrée du jour (heure locale),
+  compté à la clôture du poste : pas de retard pour un poste de nuit (sortie le lendemain) ;
+  une sortie manquante garde le retard, un poste encore en cours n'en a pas encore.
+Les pointages sont lus de MAX_SHIFT avant le mois à MAX_SHIFT après : un poste commencé la
+veille du mois n'est pas compté, un poste commencé le dernier soir du mois l'est.
+Coût linéaire en nombre de pointages, mémoire proportionnelle au nombre d'employés.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .attendance import day_bounds
+from .report_email import HEURE_LIMITE_RETARD, _user_display_name, get_personnel_queryset
+
+MAX_SHIFT = timedelta(hours=16)
+CHUNK_SIZE = 5000
+
+EXPORT_HEADERS = [
+    'Employé', 'Identifiant', 'Jours travaillés', 'Heures travaillées', 'Jours de retard',
+    'Minutes de retard', 'Sorties manquantes', 'Sorties sans entrée', 'Postes de nuit',
+]
+
+
+class EmployeeMonth:
+    """Totaux du mois d'un employé."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.days_worked = 0
+        self.worked_seconds = 0
+        self.late_days = 0
+        self.late_minutes = 0
+        self.missing_out = 0
+        self.orphan_out = 0
+        self.night_shifts = 0
+
+    @property
+    def worked_minutes(self):
+        return int(self.worked_seconds // 60)
+
+    def as_dict(self):
+        return {
+            'user_id': self.user_id,
+            'jours_travailles': self.days_worked,
+            'minutes_travaillees': self.worked_minutes,
+            'heures_travaillees': round(self.worked_seconds / 3600, 2),
+            'jours_retard': self.late_days,
+            'minutes_retard': self.late_minutes,
+            'sorties_manquantes': self.missing_out,
+            'sorties_sans_entree': self.orphan_out,
+            'postes_de_nuit': self.night_shifts,
+        }
+
+
+def month_bounds(year, month):
+    """(premier jour, dernier jour) du mois."""
+    first = datetime(year, month, 1).date()
+    return first, (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def compute(rows, start_date, end_date, now=None):
+    """
+    Totaux par employé {user_id: EmployeeMonth} du start_date au end_date inclus (jours locaux).
+    rows : (user_id, timestamp, check_type) triés par utilisateur puis par heure, couvrant
+    la période élargie de MAX_SHIFT de chaque côté. Une entrée encore ouverte depuis moins de
+    MAX_SHIFT à now (poste en cours) n'est pas comptée comme sortie manquante.
+    """
+    now = now or timezone.now()
+    limit = time(*HEURE_LIMITE_RETARD)
+    tz = timezone.get_current_timezone()
+    totals = {}
+    current = None
+    open_in = open_day = None
+    last_day = None
+    # Minutes de retard de l'entrée ouverte, en attente de la clôture du poste
+    pending_late = None
+
+    def add_late(minutes):
+        if minutes is not None:
+            current.late_days += 1
+            current.late_minutes += minutes
+
+    def close_missing():
+        if open_in is not None and start_date <= open_day <= end_date:
+            current.missing_out += 1
+            add_late(pending_late)
+
+    def close_user():
+        if current is not None and open_in is not None and now - open_in > MAX_SHIFT:
+            close_missing()
+
+    for user_id, timestamp, check_type in rows:
+        if current is None or user_id != current.user_id:
+            close_user()
+            current = totals[user_id] = EmployeeMonth(user_id)
+            open_in = open_day = last_day = pending_late = None
+        local = timestamp.astimezone(tz)
+        day = local.date()
+        in_month = start_date <= day <= end_date
+
+        if check_type == 'entree':
+            close_missing()
+            open_in, open_day = (timestamp, day) if day <= end_date else (None, None)
+            pending_late = None
+            if in_month and day != last_day:
+                # Première entrée du jour
+                last_day = day
+                current.days_worked += 1
+                if local.time() >= limit:
+                    late = local - local.replace(hour=limit.hour, minute=limit.minute, second=0, microsecond=0)
+                    pending_late = int(late.total_seconds() // 60)
+            continue
+
+        if open_in is None:
+            if in_month:
+                current.orphan_out += 1
+            continue
+        if timestamp - open_in > MAX_SHIFT:
+            close_missing()
+            if in_month:
+                current.orphan_out += 1
+        elif start_date <= open_day <= end_date:
+            current.worked_seconds += (timestamp - open_in).total_seconds()
+            if day != open_day:
+                current.night_shifts += 1
+            else:
+                add_late(pending_late)
+        open_in = open_day = pending_late = None
+
+    close_user()
+    return totals
+
+
+def checkin_rows(start_date, end_date):
+    """Pointages de la période élargie, triés par utilisateur puis heure, lus par blocs."""
+    from .models import CheckIn
+
+    start, _ = day_bounds(start_date)
+    _, end = day_bounds(end_date)
+    return (
+        CheckIn.objects.filter(timestamp__gte=start - MAX_SHIFT, timestamp__lt=end + MAX_SHIFT)
+        .order_by('user_id', 'timestamp', 'id')
+        .values_list('user_id', 'timestamp', 'check_type')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def monthly_attendance(year, month):
+    """
+    Lignes de paie du mois (dicts, triées par employé) : tout le personnel, plus les autres
+    utilisateurs ayant pointé. Ajoute 'agent' et 'username' aux totaux de EmployeeMonth.
+    """
+    from django.contrib.auth import get_user_model
+
+    start_date, end_date = month_bounds(year, month)
+    totals = compute(checkin_rows(start_date, end_date), start_date, end_date)
+    # Utilisateurs ayant pointé hors du mois seulement (marge MAX_SHIFT) : pas de ligne
+    totals = {
+        user_id: employee for user_id, employee in totals.items()
+        if employee.days_worked or employee.orphan_out or employee.missing_out
+    }
+    users = get_user_model().objects.filter(id__in=totals).only('id', 'username', 'first_name', 'last_name')
+    users = list(users) + [user for user in get_personnel_queryset() if user.id not in totals]
+    rows = []
+    for user in users:
+        row = totals.get(user.id, EmployeeMonth(user.id)).as_dict()
+        row['agent'] = _user_display_name(user)
+        row['username'] = user.username
+        rows.append(row)
+    rows.sort(key=lambda row: row['agent'].lower())
+    return rows
+
+
+def export_rows(rows):
+    """Cellules de l'export XLSX (EXPORT_HEADERS) pour les lignes de monthly_attendance."""
+    for row in rows:
+        yield [
+            row['agent'], row['username'], row['jours_travailles'], row['heures_travaillees'],
+            row['jours_retard'], row['minutes_retard'], row['sorties_manquantes'],
+            row['sorties_sans_entree'], row['postes_de_nuit'],
+        ]
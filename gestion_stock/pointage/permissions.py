@@ -18,8 +18,12 @@ def user_is_admin(user):
 class PointagePermission(permissions.BasePermission):
     """
     - GET : tout utilisateur connecté (admin voit tous les pointages, les autres les leurs).
-    - POST : uniquement les non-admin (pour pointer entrée/sortie).
+    - POST : uniquement les non-admin (pour pointer entrée/sortie, un pointage ou un lot).
     """
+    admin_checkin_message = (
+        "Les comptes administrateurs ne pointent pas : pointage (unique ou hors ligne) "
+        "réservé aux agents."
+    )
 
     def has_permission(self, request, view):
         if not request.user or not getattr(request.user, 'is_authenticated', True) is True:
@@ -28,9 +32,12 @@ class PointagePermission(permissions.BasePermission):
             return True
         if request.method == 'POST':
             try:
-                return not user_is_admin(request.user)
+                is_admin = user_is_admin(request.user)
             except Exception:
                 return True  # autoriser le pointage si on ne peut pas déterminer le rôle
+            if is_admin:
+                self.message = self.admin_checkin_message
+            return not is_admin
         return False
 
     def has_object_permission(self, request, view, obj):
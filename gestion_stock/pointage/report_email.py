@@ -2,6 +2,8 @@
 Rapport quotidien de pointage (entrées) : construction du texte/HTML, envoi par email aux responsables.
 Pas de pièce jointe PDF — rapport envoyé en corps d'email (HTML avec repli texte).
 Destinataires : StockNotificationRecipient actifs avec email (même liste que les alertes stock).
+Rapports quotidien, hebdomadaire et mensuel lus depuis les présences journalières (AttendanceDay,
+voir pointage/attendance.py) : une ligne par agent et par jour au lieu de tous les pointages.
 """
 import html
 import logging
@@ -54,44 +56,43 @@ def _user_display_name(user):
     return name
 
 
+def _format_duree(minutes):
+    """Durée en heures à une décimale : 7.5h."""
+    return f'{round(minutes / 6) / 10}h'
+
+
 def _compute_status_rows(entries, present_ids, absent_users):
     """
     Retourne (nb_presents, nb_retards, nb_absents, rows).
+    entries : présences du jour (AttendanceDay) avec une entrée dans la période du rapport.
     Chaque row = (nom, statut, heure_arrivee, heure_sortie, duree, justificatif).
-    Retard = pointage d'entrée après HEURE_LIMITE_RETARD (9h15). Justificatif = note du pointage ou "Non justifié".
+    Retard = première entrée à HEURE_LIMITE_RETARD (9h15) ou après (statut de la présence).
+    Justificatif = note du pointage ou "Non justifié".
     """
-    from datetime import time as dt_time
-    limit = dt_time(*HEURE_LIMITE_RETARD)
-    first_entry_by_user = {}  # user_id -> (timestamp time, CheckIn instance)
-    for c in entries:
-        uid = c.user_id
-        if uid not in first_entry_by_user:
-            t = c.timestamp.time() if hasattr(c.timestamp, 'time') else c.timestamp
-            first_entry_by_user[uid] = (t, c)
+    from .models import AttendanceDay
 
     present_list = []
     retard_list = []
-    for uid in present_ids:
-        val = first_entry_by_user.get(uid)
-        if val is None:
+    for day in entries:
+        if day.user_id not in present_ids:
             continue
-        t, entry = val
-        name = _user_display_name(entry.user)
-        if t is not None and t >= limit:
-            justif = (entry.note or '').strip() or 'Non justifié'
-            retard_list.append((name, t, justif))
+        sortie = _format_heure(day.last_out) if day.last_out else 'N/A'
+        duree = _format_duree(day.worked_minutes) if day.last_out and day.first_in else 'N/A'
+        row = (_user_display_name(day.user), _format_heure(day.first_in), sortie, duree)
+        if day.status == AttendanceDay.STATUS_RETARD:
+            retard_list.append((row, (day.note or '').strip() or 'Non justifié'))
         else:
-            present_list.append((name, t))
+            present_list.append(row)
 
     nb_presents = len(present_list)
     nb_retards = len(retard_list)
     nb_absents = len(absent_users)
 
     rows = []
-    for name, t in present_list:
-        rows.append((name, 'Présent', _format_heure(t) if t else '—', 'N/A', 'N/A', '—'))
-    for name, t, justif in retard_list:
-        rows.append((name, 'Retard', _format_heure(t) if t else '—', 'N/A', 'N/A', justif))
+    for name, heure, sortie, duree in present_list:
+        rows.append((name, 'Présent', heure, sortie, duree, '—'))
+    for (name, heure, sortie, duree), justif in retard_list:
+        rows.append((name, 'Retard', heure, sortie, duree, justif))
     for u in absent_users:
         rows.append((_user_display_name(u), 'Absent', 'N/A', 'N/A', 'N/A', 'Non justifié'))
     return nb_presents, nb_retards, nb_absents, rows
@@ -124,13 +125,13 @@ def build_report_text(date_report, entries, present_ids, absent_users):
     if entries:
         lines.append(f"  {'Utilisateur':<25} {'Heure':<10} {'Zone / Lieu':<30} Note")
         lines.append("  " + "-" * 75)
-        for c in entries:
-            user_label = _user_display_name(c.user)
-            zone_lieu = _zone_lieu(getattr(c, 'work_zone', None))
+        for day in entries:
+            user_label = _user_display_name(day.user)
+            zone_lieu = _zone_lieu(day.zone)
             if len(zone_lieu) > 28:
                 zone_lieu = zone_lieu[:25] + "..."
-            note = (c.note or "")[:25]
-            lines.append(f"  {user_label:<25} {_format_heure(c.timestamp):<10} {zone_lieu:<30} {note}")
+            note = (day.note or "")[:25]
+            lines.append(f"  {user_label:<25} {_format_heure(day.first_in):<10} {zone_lieu:<30} {note}")
     else:
         lines.append("Aucun pointage d'entrée n'a été enregistré sur la période analysée.")
     lines.extend([
@@ -282,11 +283,11 @@ def build_report_pdf(date_report, entries, present_ids, absent_users):
     story.append(Paragraph("ÉTAT DES POINTAGES D'ENTRÉE", heading_style))
     if entries:
         table_data = [["Utilisateur", "Heure", "Zone / Lieu", "Note"]]
-        for c in entries:
-            user_label = _user_display_name(c.user)
-            zone_lieu = _zone_lieu(getattr(c, 'work_zone', None))
-            note = (c.note or "")[:40]
-            table_data.append([user_label, _format_heure(c.timestamp), zone_lieu[:35], note])
+        for day in entries:
+            user_label = _user_display_name(day.user)
+            zone_lieu = _zone_lieu(day.zone)
+            note = (day.note or "")[:40]
+            table_data.append([user_label, _format_heure(day.first_in), zone_lieu[:35], note])
         t = Table(table_data, colWidths=[5*cm, 2.2*cm, 6*cm, 3*cm])
         t.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
@@ -348,15 +349,14 @@ def get_personnel_queryset():
 
 
 def get_entries_for_day(date_obj):
-    """Pointages d'entrée entre 00h00 et 10h00 (exclu) du jour donné, en UTC/GMT."""
+    """Présences (AttendanceDay) du jour dont la première entrée est avant 10h00 (exclu), en UTC/GMT."""
     from datetime import timezone as dt_timezone
-    start = timezone.make_aware(datetime.combine(date_obj, time.min), dt_timezone.utc)
     end = timezone.make_aware(datetime.combine(date_obj, time(10, 0, 0)), dt_timezone.utc)
-    from .models import CheckIn
+    from .models import AttendanceDay
     return (
-        CheckIn.objects.filter(check_type='entree', timestamp__gte=start, timestamp__lt=end)
-        .select_related('user', 'work_zone')
-        .order_by('timestamp')
+        AttendanceDay.objects.filter(date=date_obj, first_in__lt=end)
+        .select_related('user', 'zone')
+        .order_by('first_in')
     )
 
 
@@ -364,6 +364,7 @@ def get_daily_report_data(date_report):
     """
     Retourne les données du rapport quotidien pour une date donnée.
     (entries, present_ids, absent_users, personnel) pour réutilisation (API, commande).
+    entries : présences du jour (AttendanceDay) arrivées avant 10h00.
     """
     entries = list(get_entries_for_day(date_report))
     personnel = list(get_personnel_queryset())
@@ -386,61 +387,82 @@ def _format_date_short(d):
     return d.strftime('%d/%m/%Y')
 
 
-def _compute_weekly_rows(checkins, tz=None):
+def _compute_weekly_rows(days):
     """
-    À partir des pointages de la semaine, construit les lignes quotidiennes (une par jour/agent).
-    Chaque ligne : (date_fmt, agent, type_zone, entree, sortie, duree, lieu, statut).
+    À partir des présences de la semaine (AttendanceDay), construit les lignes quotidiennes (une par jour/agent).
+    Chaque ligne : (date_str, date_fmt, agent, type_zone, entree, sortie, duree, lieu, statut).
     """
-    from collections import defaultdict
-    if tz is None:
-        tz = timezone.get_current_timezone() if timezone.get_current_timezone() else timezone.utc
-
-    by_key = defaultdict(lambda: {
-        'entree': None, 'entree_ts': None, 'sortie': None, 'sortie_ts': None,
-        'lieu': '—', 'type_zone': 'Bureau', 'user': None,
-    })
-    for c in checkins:
-        local_dt = timezone.localtime(c.timestamp, timezone=tz)
-        date_str = local_dt.strftime('%Y-%m-%d')
-        key = (date_str, c.user_id)
-        row = by_key[key]
-        row['user'] = c.user
-        zone = getattr(c, 'work_zone', None)
-        if zone:
-            row['type_zone'] = 'Chantier' if getattr(zone, 'zone_type', None) == 'chantier' else 'Bureau'
-            row['lieu'] = (zone.address or zone.name or '—').strip() or '—'
-        if c.check_type == 'entree':
-            if row['entree_ts'] is None or c.timestamp < row['entree_ts']:
-                row['entree'] = _format_heure(c.timestamp)
-                row['entree_ts'] = c.timestamp
-                if zone:
-                    row['lieu'] = (zone.address or zone.name or '—').strip() or '—'
-        else:
-            if row['sortie_ts'] is None or c.timestamp > row['sortie_ts']:
-                row['sortie'] = _format_heure(c.timestamp)
-                row['sortie_ts'] = c.timestamp
-
     rows = []
-    for (date_str, _), data in by_key.items():
-        d = datetime.strptime(date_str, '%Y-%m-%d').date()
-        date_fmt = _format_date_short(d)
-        entree = data['entree'] or '—'
-        sortie = data['sortie'] or '—'
-        duree = '—'
-        statut = 'En cours'
-        if data['entree_ts'] and data['sortie_ts']:
-            delta = data['sortie_ts'] - data['entree_ts']
-            h = round(delta.total_seconds() / 3600 * 10) / 10
-            duree = f'{h}h'
-            statut = 'Present'
-        agent = _user_display_name(data['user']) if data['user'] else '—'
-        # (date_str pour tri, date_fmt pour affichage, agent, type, entree, sortie, duree, lieu, statut)
-        rows.append((date_str, date_fmt, agent, data['type_zone'], entree, sortie, duree, data['lieu'], statut))
-
+    for day in days:
+        zone = day.zone
+        type_zone = 'Chantier' if zone and zone.zone_type == 'chantier' else 'Bureau'
+        lieu = ((zone.address or zone.name or '—').strip() or '—') if zone else '—'
+        complete = day.first_in is not None and day.last_out is not None
+        rows.append((
+            day.date.strftime('%Y-%m-%d'),
+            _format_date_short(day.date),
+            _user_display_name(day.user),
+            type_zone,
+            _format_heure(day.first_in) if day.first_in else '—',
+            _format_heure(day.last_out) if day.last_out else '—',
+            _format_duree(day.worked_minutes) if complete else '—',
+            lieu,
+            'Present' if complete else 'En cours',
+        ))
     rows.sort(key=lambda r: (r[0], r[2]))  # date puis agent
     return rows
 
 
+def get_attendance_days(start_date, end_date):
+    """Présences du start_date au end_date inclus (une requête, index sur la date)."""
+    from .models import AttendanceDay
+    return (
+        AttendanceDay.objects.filter(date__gte=start_date, date__lte=end_date)
+        .select_related('user', 'zone')
+    )
+
+
+def get_weekly_rows(week_start, week_end):
+    """Lignes du rapport hebdomadaire (voir _compute_weekly_rows)."""
+    return _compute_weekly_rows(get_attendance_days(week_start, week_end))
+
+
+def get_period_summary(start_date, end_date, user_ids=None):
+    """
+    Synthèse par agent sur une période (rapport mensuel) : agrégée par la base sur les présences.
+    Liste de dicts {user_id, agent, jours, retards, jours_complets, minutes, heures}, triée par agent.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count, Q, Sum
+    from .models import AttendanceDay
+
+    queryset = AttendanceDay.objects.filter(date__gte=start_date, date__lte=end_date)
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    totals = queryset.values('user_id').annotate(
+        jours=Count('id'),
+        retards=Count('id', filter=Q(status=AttendanceDay.STATUS_RETARD)),
+        jours_complets=Count('id', filter=Q(first_in__isnull=False, last_out__isnull=False)),
+        minutes=Sum('worked_minutes'),
+    )
+    totals = {row['user_id']: row for row in totals}
+    users = get_user_model().objects.filter(id__in=totals).only('id', 'username', 'first_name', 'last_name')
+    rows = []
+    for user in users:
+        row = totals[user.id]
+        rows.append({
+            'user_id': user.id,
+            'agent': _user_display_name(user),
+            'jours': row['jours'],
+            'retards': row['retards'],
+            'jours_complets': row['jours_complets'],
+            'minutes': row['minutes'] or 0,
+            'heures': round((row['minutes'] or 0) / 6) / 10,
+        })
+    rows.sort(key=lambda r: r['agent'].lower())
+    return rows
+
+
 def build_weekly_report_text(week_start, week_end, weekly_rows):
     """Corps texte du rapport hebdomadaire. weekly_rows: (date_str, date_fmt, agent, type, entree, sortie, duree, lieu, statut)."""
     period_str = f"Semaine du {_format_date_short(week_start)} au {_format_date_short(week_end)}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CheckIn
+from .models import AttendanceDay, CheckIn
 
 
 class CheckInSerializer(serializers.ModelSerializer):
@@ -23,8 +23,10 @@ class CheckInSerializer(serializers.ModelSerializer):
             'note',
             'latitude',
             'longitude',
+            'client_key',
+            'synced_at',
         ]
-        read_only_fields = ['id', 'user', 'timestamp']
+        read_only_fields = ['id', 'user', 'timestamp', 'client_key', 'synced_at']
 
     def get_username(self, obj):
         if obj and getattr(obj, 'user', None):
@@ -58,3 +60,41 @@ class CheckInSerializer(serializers.ModelSerializer):
             'longitude': -17.4677,
             'radius_m': 100,
         }
+
+
+class CheckInBulkItemSerializer(serializers.Serializer):
+    """Un pointage hors ligne d'un lot (heure et position relevées par l'appareil)."""
+    client_key = serializers.CharField(max_length=64)
+    check_type = serializers.ChoiceField(choices=CheckIn.TYPE_CHOICES)
+    timestamp = serializers.DateTimeField()
+    latitude = serializers.FloatField(required=False, allow_null=True)
+    longitude = serializers.FloatField(required=False, allow_null=True)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+
+
+class AttendanceDaySerializer(serializers.ModelSerializer):
+    """Présence journalière (lecture seule)."""
+    username = serializers.CharField(source='user.username', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    zone_name = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = AttendanceDay
+        fields = [
+            'id',
+            'user',
+            'username',
+            'date',
+            'first_in',
+            'last_out',
+            'worked_minutes',
+            'status',
+            'status_display',
+            'zone',
+            'zone_name',
+            'note',
+        ]
+        read_only_fields = fields
+
+    def get_zone_name(self, obj):
+        return obj.zone.name if obj.zone_id else 'Sans zone'
@@ -0,0 +1,23 @@
+"""
+- Index des zones de pointage (pointage.geofence) : reconstruit après modification d'une zone.
+- Présences journalières (pointage.attendance) : jour recalculé après création ou suppression d'un pointage.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from zones.models import WorkZone
+
+from .attendance import record_checkin
+from .geofence import invalidate
+from .models import CheckIn
+
+
+@receiver([post_save, post_delete], sender=WorkZone)
+def invalidate_zone_index(sender, **kwargs):
+    invalidate()
+
+
+@receiver([post_save, post_delete], sender=CheckIn)
+def update_attendance_day(sender, instance, **kwargs):
+    transaction.on_commit(lambda: record_checkin(instance))
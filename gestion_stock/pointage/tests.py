@@ -0,0 +1,353 @@
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gestion_stock.testing import LOCAL_CACHES
+from zones.models import WorkZone
+
+from .attendance import rebuild
+from .geofence import Zone, ZoneIndex
+from .management.commands.bench_geofence import (
+    _LegacyZone, _legacy_locate, _positions, _synthetic_zones,
+)
+from .models import AttendanceDay, CheckIn
+from .payroll import compute
+from .permissions import PointagePermission
+from .views import BULK_MAX_AGE
+
+
+def _at(day, hour, minute=0):
+    return timezone.make_aware(datetime(2026, 1, day, hour, minute))
+
+
+class PayrollComputeTests(SimpleTestCase):
+    """Calcul mensuel de la paie (pointage.payroll.compute) sur des pointages en mémoire."""
+
+    start_date = date(2026, 1, 1)
+    end_date = date(2026, 1, 31)
+    now = timezone.make_aware(datetime(2026, 2, 15, 12, 0))
+
+    def _compute(self, shifts):
+        rows = []
+        for start, end in shifts:
+            rows.append((1, start, 'entree'))
+            if end is not None:
+                rows.append((1, end, 'sortie'))
+        return compute(iter(rows), self.start_date, self.end_date, now=self.now)[1]
+
+    def test_late_day_shift(self):
+        employee = self._compute([(_at(5, 9, 45), _at(5, 17, 0))])
+        self.assertEqual(employee.late_days, 1)
+        self.assertEqual(employee.late_minutes, 30)
+
+    def test_night_shifts_are_not_late(self):
+        employee = self._compute([
+            (_at(day, 22, 0), _at(day, 22, 0) + timedelta(hours=8)) for day in range(5, 10)
+        ])
+        self.assertEqual(employee.night_shifts, 5)
+        self.assertEqual(employee.days_worked, 5)
+        self.assertEqual(employee.worked_minutes, 5 * 8 * 60)
+        self.assertEqual(employee.late_days, 0)
+        self.assertEqual(employee.late_minutes, 0)
+
+    def test_missing_exit_keeps_lateness(self):
+        employee = self._compute([(_at(5, 10, 15), None), (_at(6, 8, 0), _at(6, 16, 0))])
+        self.assertEqual(employee.missing_out, 1)
+        self.assertEqual(employee.late_days, 1)
+        self.assertEqual(employee.late_minutes, 60)
+
+
+class AdminBulkCheckInTests(TestCase):
+    """Lot hors ligne envoyé par un admin : refusé en entier, comme un pointage unique."""
+
+    def test_admin_batch_is_rejected_with_message(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        response = client.post('/api/pointages/bulk/', {'checkins': [
+            {'client_key': 'k1', 'check_type': 'entree', 'timestamp': timezone.now().isoformat()},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['detail'], PointagePermission.admin_checkin_message)
+        self.assertFalse(CheckIn.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class BulkCheckInTests(TestCase):
+    """Lot hors ligne : mêmes règles de zone qu'un pointage unique, renvoi et conflits signalés en doublon."""
+
+    INSIDE = (14.7167, -17.4677)
+    OUTSIDE = (14.7800, -17.4677)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user('agent', password='x')
+        WorkZone.objects.create(
+            name='Bureau', radius_m=Decimal('200'), latitude=Decimal('14.7167'), longitude=Decimal('-17.4677'),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def _item(self, key, position, timestamp=None):
+        latitude, longitude = position
+        return {
+            'client_key': key, 'check_type': 'entree', 'latitude': latitude, 'longitude': longitude,
+            'timestamp': (timestamp or timezone.now()).isoformat(),
+        }
+
+    def _bulk(self, items):
+        response = self.client.post('/api/pointages/bulk/', {'checkins': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_same_positions_as_single_checkin(self):
+        for key, position in (('inside', self.INSIDE), ('outside', self.OUTSIDE)):
+            single = self.client.post('/api/pointages/', {
+                'check_type': 'entree', 'latitude': position[0], 'longitude': position[1],
+            }, format='json')
+            result = self._bulk([self._item(key, position)])['results'][0]
+            if single.status_code == 201:
+                self.assertEqual(result['status'], 'created')
+                self.assertEqual(result['work_zone'], single.json()['work_zone'])
+            else:
+                self.assertEqual(single.status_code, 400)
+                self.assertEqual(result['status'], 'error')
+                self.assertEqual(result['detail'], single.json()['detail'])
+        self.assertEqual(CheckIn.objects.filter(client_key='inside').count(), 1)
+        self.assertFalse(CheckIn.objects.filter(client_key='outside').exists())
+
+    def test_resent_batch_is_duplicate(self):
+        items = [self._item(f'k{i}', self.INSIDE) for i in range(3)]
+        first = self._bulk(items)
+        second = self._bulk(items)
+        self.assertEqual((first['created'], second['created'], second['duplicate']), (3, 0, 3))
+        self.assertEqual(
+            [result['id'] for result in second['results']], [result['id'] for result in first['results']],
+        )
+        self.assertEqual(CheckIn.objects.count(), 3)
+
+    def test_rows_ignored_by_bulk_create_are_duplicate(self):
+        original = CheckIn.objects.bulk_create
+
+        def concurrent_batch(objs, **kwargs):
+            # Même clé insérée par un envoi simultané, après la recherche des clés existantes
+            objs = list(objs)
+            CheckIn.objects.create(
+                user=self.agent, check_type='entree', client_key='k0',
+                synced_at=timezone.now() - timedelta(seconds=1),
+            )
+            return original(objs, **kwargs)
+
+        with mock.patch.object(CheckIn.objects, 'bulk_create', side_effect=concurrent_batch):
+            data = self._bulk([self._item('k0', self.INSIDE), self._item('k1', self.INSIDE)])
+        self.assertEqual([result['status'] for result in data['results']], ['duplicate', 'created'])
+        self.assertEqual(data['results'][0]['id'], CheckIn.objects.get(client_key='k0').pk)
+
+    def test_timestamps_out_of_range(self):
+        now = timezone.now()
+        data = self._bulk([
+            self._item('future', self.INSIDE, now + timedelta(hours=1)),
+            self._item('old', self.INSIDE, now - BULK_MAX_AGE - timedelta(days=1)),
+        ])
+        self.assertEqual(data['error'], 2)
+        self.assertEqual(
+            [result['detail'] for result in data['results']],
+            ['Heure du pointage dans le futur.', 'Pointage trop ancien pour être synchronisé.'],
+        )
+        self.assertFalse(CheckIn.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PointagePaginationTests(TestCase):
+    """Pagination par clé des pointages (-timestamp, -id) et des présences (-date, -id), ex aequo compris."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user('admin', password='x', is_staff=True)
+        agents = [User.objects.create_user(f'agent{i}', password='x') for i in range(4)]
+        moment = timezone.now().replace(microsecond=0)
+        CheckIn.objects.bulk_create([
+            CheckIn(user=agents[i % 4], check_type='entree', timestamp=moment - timedelta(minutes=i // 3))
+            for i in range(15)
+        ])
+        AttendanceDay.objects.bulk_create([
+            AttendanceDay(user=agent, date=date(2026, 3, day), status=AttendanceDay.STATUS_PRESENT)
+            for day in range(1, 5) for agent in agents
+        ])
+        cls.admin = admin
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _walk(self, url, page_size):
+        ids = []
+        params = {'page_size': page_size}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids.extend(row['id'] for row in data['results'])
+            url, params = data['next'], None
+        return ids
+
+    def test_checkins_pages(self):
+        expected = list(CheckIn.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/pointages/', 4), expected)
+
+    def test_attendance_pages(self):
+        expected = list(AttendanceDay.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/pointages/presences/', 5), expected)
+
+    def test_ordering_with_page_is_rejected(self):
+        for url, ordering in (('/api/pointages/', 'timestamp'), ('/api/pointages/presences/', 'date')):
+            response = self.client.get(url, {'page_size': 5, 'ordering': ordering})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('ordering', response.json()['detail'])
+            # Sans page : le tri demandé reste appliqué
+            self.assertEqual(self.client.get(url, {'ordering': ordering}).status_code, 200)
+
+
+class ZoneIndexTests(SimpleTestCase):
+    """ZoneIndex.locate donne la même zone que l'ancien parcours complet (voir bench_geofence)."""
+
+    def _assert_same_as_legacy(self, zones, positions):
+        index = ZoneIndex(zones)
+        legacy_zones = [_LegacyZone(zone) for zone in sorted(zones, key=lambda zone: zone.id)]
+        for lat, lng in positions:
+            match = index.locate(lat, lng)
+            self.assertEqual((match.zone.id, match.inside), _legacy_locate(legacy_zones, lat, lng), (lat, lng))
+
+    def test_random_zones(self):
+        rng = random.Random(1)
+        # Parcours simple (<= LINEAR_MAX_ZONES) puis grille
+        for count in (10, 300, 2000):
+            zones = _synthetic_zones(count, rng)
+            self._assert_same_as_legacy(zones, _positions(zones, 200, rng))
+
+    def test_overlapping_zones_first_by_id(self):
+        # Zones superposées sur la même case : la plus petite id l'emporte, comme l'ancien parcours
+        zones = [Zone(pk, f'Zone {pk}', 14.7167, -17.4677, 300.0) for pk in range(60, 20, -1)]
+        self.assertEqual(ZoneIndex(zones).locate(14.7168, -17.4676).zone.id, 21)
+        self._assert_same_as_legacy(zones, [(14.7167, -17.4677), (14.72, -17.47), (15.0, -16.0)])
+
+    def test_large_and_polar_zones(self):
+        rng = random.Random(2)
+        zones = _synthetic_zones(100, rng) + [
+            Zone(1000, 'Région', 14.5, -15.0, 150000.0),
+            Zone(1001, 'Pôle', 89.99, 0.0, 5000.0),
+        ]
+        positions = _positions(zones, 100, rng) + [(14.5, -14.0), (89.995, 120.0), (-30.0, 40.0)]
+        self._assert_same_as_legacy(zones, positions)
+
+    def test_no_zone(self):
+        self.assertIsNone(ZoneIndex([]).locate(14.7, -17.4))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AttendanceDayTests(TestCase):
+    """Présences tenues par les signaux de CheckIn, identiques à une reconstruction (rebuild)."""
+
+    MONDAY = date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user('agent', password='x')
+
+    def _checkin(self, day, hour, minute, check_type):
+        moment = timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+        with self.captureOnCommitCallbacks(execute=True):
+            return CheckIn.objects.create(user=self.agent, check_type=check_type, timestamp=moment)
+
+    def _days(self):
+        return {
+            day.date: (day.status, day.worked_minutes, day.first_in is not None, day.last_out is not None)
+            for day in AttendanceDay.objects.filter(user=self.agent)
+        }
+
+    def test_signal_and_rebuild(self):
+        tuesday, wednesday = self.MONDAY + timedelta(days=1), self.MONDAY + timedelta(days=2)
+        entree = self._checkin(self.MONDAY, 8, 0, 'entree')
+        self._checkin(self.MONDAY, 12, 0, 'sortie')
+        self._checkin(self.MONDAY, 17, 30, 'sortie')
+        self._checkin(tuesday, 9, 15, 'entree')
+        self._checkin(wednesday, 18, 0, 'sortie')
+        expected = {
+            self.MONDAY: (AttendanceDay.STATUS_PRESENT, 570, True, True),
+            tuesday: (AttendanceDay.STATUS_RETARD, 0, True, False),
+            wednesday: (AttendanceDay.STATUS_SANS_ENTREE, 0, False, True),
+        }
+        self.assertEqual(self._days(), expected)
+
+        AttendanceDay.objects.filter(date=tuesday).update(status=AttendanceDay.STATUS_PRESENT, worked_minutes=99)
+        AttendanceDay.objects.filter(date=wednesday).delete()
+        self.assertEqual(rebuild(self.MONDAY, wednesday, chunk_days=2), 3)
+        self.assertEqual(self._days(), expected)
+
+        # Suppression d'un pointage : jour recalculé, puis supprimé sans pointage restant
+        with self.captureOnCommitCallbacks(execute=True):
+            entree.delete()
+        self.assertEqual(self._days()[self.MONDAY], (AttendanceDay.STATUS_SANS_ENTREE, 0, False, True))
+        with self.captureOnCommitCallbacks(execute=True):
+            CheckIn.objects.get(timestamp__date=tuesday).delete()
+        self.assertNotIn(tuesday, self._days())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CheckInDateFilterTests(TestCase):
+    """date_after / date_before : jours locaux inclus, bornes à minuit, comme l'ancien filtre sur __date."""
+
+    DAY = date(2026, 3, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        agent = User.objects.create_user('agent', password='x')
+        moments = [
+            datetime(2026, 3, 9, 23, 59, 59, 999999),
+            datetime(2026, 3, 10, 0, 0),
+            datetime(2026, 3, 10, 23, 59, 59, 999999),
+            datetime(2026, 3, 11, 0, 0),
+            datetime(2026, 3, 12, 12, 0),
+        ]
+        cls.checkins = CheckIn.objects.bulk_create([
+            CheckIn(user=agent, check_type='entree', timestamp=timezone.make_aware(moment)) for moment in moments
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _ids(self, **params):
+        response = self.client.get('/api/pointages/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(checkin['id'] for checkin in response.json())
+
+    def _legacy_ids(self, after=None, before=None):
+        queryset = CheckIn.objects.all()
+        if after:
+            queryset = queryset.filter(timestamp__date__gte=after)
+        if before:
+            queryset = queryset.filter(timestamp__date__lte=before)
+        return sorted(queryset.values_list('id', flat=True))
+
+    def test_boundaries(self):
+        ids = [checkin.pk for checkin in self.checkins]
+        self.assertEqual(self._ids(date_after=self.DAY, date_before=self.DAY), ids[1:3])
+        self.assertEqual(self._ids(date_after=self.DAY), ids[1:])
+        self.assertEqual(self._ids(date_before=self.DAY), ids[:3])
+        self.assertEqual(self._ids(date_after='2026-03-11', date_before='2026-03-11'), ids[3:4])
+
+    def test_same_as_legacy_lookup(self):
+        days = [date(2026, 3, 9) + timedelta(days=offset) for offset in range(5)]
+        for after in [None] + days:
+            for before in [None] + days:
+                params = {key: value for key, value in (('date_after', after), ('date_before', before)) if value}
+                self.assertEqual(self._ids(**params), self._legacy_ids(after, before), params)
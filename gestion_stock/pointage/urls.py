@@ -1,11 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CheckInViewSet, RapportQuotidienAPIView
+from .views import (
+    AttendanceDayViewSet,
+    CheckInViewSet,
+    PaieMensuelleAPIView,
+    PaieMensuelleExcelAPIView,
+    RapportQuotidienAPIView,
+)
 
 router = DefaultRouter()
+# Avant pointages : pointages/presences/ ne doit pas être lu comme le détail d'un pointage
+router.register(r'pointages/presences', AttendanceDayViewSet, basename='presence')
 router.register(r'pointages', CheckInViewSet, basename='pointage')
 
 urlpatterns = [
     path('pointages/rapport-quotidien/', RapportQuotidienAPIView.as_view(), name='pointage-rapport-quotidien'),
+    path('pointages/paie-mensuelle/', PaieMensuelleAPIView.as_view(), name='pointage-paie-mensuelle'),
+    path(
+        'pointages/paie-mensuelle/export-excel/', PaieMensuelleExcelAPIView.as_view(),
+        name='pointage-paie-mensuelle-excel',
+    ),
     path('', include(router.urls)),
 ]
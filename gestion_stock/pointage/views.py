@@ -1,34 +1,69 @@
-import math
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 
-from .models import CheckIn
-from .serializers import CheckInSerializer
+from .attendance import refresh_days as refresh_attendance_days
+from .models import AttendanceDay, CheckIn
+from .serializers import AttendanceDaySerializer, CheckInBulkItemSerializer, CheckInSerializer
 from .permissions import PointagePermission, user_is_admin
-from .filters import CheckInFilter
+from .filters import AttendanceDayFilter, CheckInFilter
+from .report_email import HEURE_LIMITE_RETARD
+from .geofence import distance_meters, get_index as get_zone_index, locate as locate_zone
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
 from zones.models import WorkZone
 
 
-def distance_meters(lat1, lon1, lat2, lon2):
-    """Distance en mètres entre deux points (formule de Haversine)."""
-    R = 6371000
-    phi1 = math.radians(float(lat1))
-    phi2 = math.radians(float(lat2))
-    dphi = math.radians(float(lat2 - lat1))
-    dlambda = math.radians(float(lon2 - lon1))
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+# Lot de pointages hors ligne : taille maximale, avance d'horloge tolérée, ancienneté maximale
+BULK_MAX_CHECKINS = 1000
+BULK_CLOCK_SKEW = timedelta(minutes=5)
+BULK_MAX_AGE = timedelta(days=31)
+# Rapport quotidien mis en cache (clé : date + version des présences du jour)
+REPORT_CACHE_TTL = 60
+REPORT_CACHE_KEY = 'pointage:rapport-quotidien:{date}:{version}'
+# Période maximale de la synthèse des présences
+SUMMARY_MAX_DAYS = 366
 
 
-class CheckInViewSet(viewsets.ModelViewSet):
+def _parse_position(lat_in, lng_in):
+    try:
+        lat = float(lat_in) if lat_in is not None else None
+        lng = float(lng_in) if lng_in is not None else None
+    except (TypeError, ValueError):
+        lat = lng = None
+    return lat, lng
+
+
+def zone_for_position(lat, lng, locate=locate_zone):
+    """
+    Zone de pointage d'un non-admin : la zone contenant la position (recherche locate).
+    Lève ValueError avec le message à renvoyer si la position manque ou est hors zone.
+    """
+    if lat is None or lng is None:
+        raise ValueError('Position requise pour pointer. Autorisez la géolocalisation.')
+    match = locate(lat, lng)
+    if match is None:
+        raise ValueError('Aucune zone de travail configurée. Vous ne pouvez pas pointer.')
+    if not match.inside:
+        raise ValueError(
+            f'Vous n\'êtes pas dans la zone créée. '
+            f'Zone la plus proche : {match.zone.name}. '
+            f'Distance : {int(match.distance)} m (rayon autorisé : {int(match.zone.radius_m)} m).'
+        )
+    return match.zone
+
+
+class CheckInViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Pointage (entrée/sortie).
     - Admin : peut voir tous les pointages (GET), filtrer par user, work_zone, check_type, date.
@@ -40,6 +75,15 @@ class CheckInViewSet(viewsets.ModelViewSet):
     filterset_class = CheckInFilter
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
+    # Pagination par curseur (?page_size=) : pas de created_at sur CheckIn
+    keyset_ordering = ('-timestamp', '-id')
+    export_filename = 'pointages'
+    export_sheet_title = 'Pointages'
+    export_columns = [
+        ('ID', 'id'), ('Date et heure', 'timestamp'), ('Utilisateur', 'user__username'),
+        ('Prénom', 'user__first_name'), ('Nom', 'user__last_name'), ('Zone', 'work_zone__name'),
+        ('Type', 'check_type'), ('Latitude', 'latitude'), ('Longitude', 'longitude'), ('Note', 'note'),
+    ]
     http_method_names = ['get', 'post', 'head', 'options']
 
     def get_queryset(self):
@@ -54,6 +98,8 @@ class CheckInViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         try:
             return super().list(request, *args, **kwargs)
+        except APIException:
+            raise
         except Exception as e:
             if settings.DEBUG:
                 return Response(
@@ -69,57 +115,13 @@ class CheckInViewSet(viewsets.ModelViewSet):
         is_admin = user_is_admin(request.user)
 
         if not is_admin:
-            # Utilisateur non-admin : position obligatoire, zone déterminée par le serveur (pas de choix de zone)
-            try:
-                lat = float(lat_in) if lat_in is not None else None
-                lng = float(lng_in) if lng_in is not None else None
-            except (TypeError, ValueError):
-                lat = lng = None
-            if lat is None or lng is None:
-                return Response(
-                    {'detail': 'Position requise pour pointer. Autorisez la géolocalisation.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            # Utilisateur non-admin : position obligatoire, zone déterminée par le serveur (pas de choix de zone).
             # Seules les zones de travail créées (avec coordonnées et rayon) permettent de pointer
-            zones_with_coords = WorkZone.objects.filter(
-                latitude__isnull=False, longitude__isnull=False, radius_m__isnull=False
-            ).order_by('id')
-            work_zone = None
-            for zone in zones_with_coords:
-                z_lat = float(zone.latitude)
-                z_lng = float(zone.longitude)
-                z_radius = float(zone.radius_m)
-                dist = distance_meters(lat, lng, z_lat, z_lng)
-                if dist <= z_radius:
-                    work_zone = zone
-                    break
-            if work_zone is None:
-                # Trouver la zone la plus proche pour le message d'erreur
-                nearest_zone = None
-                nearest_dist = None
-                for zone in zones_with_coords:
-                    z_lat = float(zone.latitude)
-                    z_lng = float(zone.longitude)
-                    z_radius = float(zone.radius_m)
-                    d = distance_meters(lat, lng, z_lat, z_lng)
-                    if nearest_dist is None or d < nearest_dist:
-                        nearest_dist = d
-                        nearest_zone = zone
-                if nearest_zone:
-                    return Response(
-                        {
-                            'detail': (
-                                f'Vous n\'êtes pas dans la zone créée. '
-                                f'Zone la plus proche : {nearest_zone.name}. '
-                                f'Distance : {int(nearest_dist)} m (rayon autorisé : {int(nearest_zone.radius_m)} m).'
-                            )
-                        },
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                return Response(
-                    {'detail': 'Aucune zone de travail configurée. Vous ne pouvez pas pointer.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            lat, lng = _parse_position(lat_in, lng_in)
+            try:
+                work_zone = zone_for_position(lat, lng)
+            except ValueError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             # work_zone est la zone dans laquelle l'utilisateur est (première trouvée)
             data_for_serializer = {k: data[k] for k in ('check_type', 'note') if k in data}
             data_for_serializer['work_zone'] = work_zone.id
@@ -138,11 +140,7 @@ class CheckInViewSet(viewsets.ModelViewSet):
                     )
                 z_lat, z_lng, z_radius = zone.latitude, zone.longitude, zone.radius_m
                 if z_lat is not None and z_lng is not None and z_radius is not None:
-                    try:
-                        lat = float(lat_in) if lat_in is not None else None
-                        lng = float(lng_in) if lng_in is not None else None
-                    except (TypeError, ValueError):
-                        lat = lng = None
+                    lat, lng = _parse_position(lat_in, lng_in)
                     if lat is not None and lng is not None:
                         dist = distance_meters(lat, lng, float(z_lat), float(z_lng))
                         if dist > float(z_radius):
@@ -167,17 +165,186 @@ class CheckInViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Enregistre un lot de pointages faits hors ligne (au plus BULK_MAX_CHECKINS).
+        Corps : {"checkins": [{client_key, check_type, timestamp, latitude, longitude, note?}, ...]}
+        ou directement la liste. client_key : identifiant unique fourni par l'appareil ; un pointage
+        déjà reçu avec la même clé n'est pas recréé (renvoi du lot sans risque).
+        Chaque pointage est validé comme un pointage unique (position dans une zone) ; les refusés
+        n'empêchent pas l'enregistrement des autres. Réponse : un résultat par pointage, dans l'ordre.
+        Comme pour un pointage unique, un lot envoyé par un admin est refusé en entier (403).
+        """
+        items = request.data if isinstance(request.data, list) else request.data.get('checkins')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Liste de pointages attendue ("checkins").'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > BULK_MAX_CHECKINS:
+            return Response(
+                {'error': f'Au plus {BULK_MAX_CHECKINS} pointages par lot.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user
+        if user_is_admin(user):
+            # PointagePermission refuse déjà les POST des admins ; refus explicite si elle change
+            return Response(
+                {'error': PointagePermission.admin_checkin_message},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        now = timezone.now()
+        results = [None] * len(items)
+        valid = []
+        for position, item in enumerate(items):
+            serializer = CheckInBulkItemSerializer(data=item)
+            if not serializer.is_valid():
+                results[position] = {'status': 'error', 'errors': serializer.errors}
+                continue
+            checkin = serializer.validated_data
+            key = checkin['client_key']
+            if checkin['timestamp'] > now + BULK_CLOCK_SKEW:
+                results[position] = {'status': 'error', 'client_key': key, 'detail': 'Heure du pointage dans le futur.'}
+            elif checkin['timestamp'] < now - BULK_MAX_AGE:
+                results[position] = {
+                    'status': 'error', 'client_key': key, 'detail': 'Pointage trop ancien pour être synchronisé.',
+                }
+            else:
+                valid.append((position, checkin))
+
+        # Clés déjà reçues (renvoi d'un lot) : une requête pour tout le lot
+        existing = dict(
+            CheckIn.objects.filter(user=user, client_key__in={c['client_key'] for _, c in valid})
+            .values_list('client_key', 'id')
+        )
+        # Un seul index des zones pour tout le lot
+        index = get_zone_index()
+        pending = {}
+        for position, checkin in valid:
+            key = checkin['client_key']
+            if key in existing or key in pending:
+                results[position] = {'status': 'duplicate', 'client_key': key}
+                continue
+            try:
+                zone = zone_for_position(checkin.get('latitude'), checkin.get('longitude'), index.locate)
+            except ValueError as e:
+                results[position] = {'status': 'error', 'client_key': key, 'detail': str(e)}
+                continue
+            pending[key] = CheckIn(
+                user=user,
+                work_zone_id=zone.id,
+                check_type=checkin['check_type'],
+                timestamp=checkin['timestamp'],
+                note=checkin.get('note'),
+                latitude=checkin.get('latitude'),
+                longitude=checkin.get('longitude'),
+                client_key=key,
+                synced_at=now,
+            )
+            results[position] = {'status': 'created', 'client_key': key, 'work_zone': zone.id}
+
+        with transaction.atomic():
+            # Conflit possible avec un envoi simultané du même lot : la ligne existante est conservée
+            CheckIn.objects.bulk_create(pending.values(), ignore_conflicts=True)
+        # Lignes ignorées par bulk_create (déjà insérées par l'autre envoi) : synced_at n'est pas celui de ce lot
+        rows = list(
+            CheckIn.objects.filter(user=user, client_key__in=set(existing) | set(pending))
+            .values_list('client_key', 'id', 'synced_at')
+        )
+        inserted = {key for key, _, synced_at in rows if key in pending and synced_at == now}
+        ids = {key: pk for key, pk, _ in rows}
+        ids.update(existing)
+        # bulk_create n'envoie pas post_save : présences des jours concernés recalculées en une fois
+        refresh_attendance_days({(user.id, timezone.localdate(pending[key].timestamp)) for key in inserted})
+        for position, result in enumerate(results):
+            key = result.get('client_key')
+            if result['status'] == 'error' or key is None:
+                continue
+            if result['status'] == 'created' and key not in inserted:
+                results[position] = result = {'status': 'duplicate', 'client_key': key}
+            result['id'] = ids.get(key)
+        counts = {'created': 0, 'duplicate': 0, 'error': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({**counts, 'results': results}, status=status.HTTP_200_OK)
+
+
+class AttendanceDayViewSet(ExportMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Présences journalières (une ligne par agent et par jour pointé), lecture seule.
+    - Admin : toutes les présences ; autres : les leurs.
+    - Période : ?date_after=YYYY-MM-DD&date_before=YYYY-MM-DD ; filtres user, zone, status.
+    - synthese/ : totaux par agent sur un mois (?month=YYYY-MM) ou une période.
+    """
+    serializer_class = AttendanceDaySerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = AttendanceDayFilter
+    ordering_fields = ['date', 'first_in', 'worked_minutes']
+    ordering = ['-date', 'user_id']
+    keyset_ordering = ('-date', '-id')
+    export_filename = 'presences'
+    export_sheet_title = 'Présences'
+    export_columns = [
+        ('Date', 'date'), ('Utilisateur', 'user__username'), ('Prénom', 'user__first_name'),
+        ('Nom', 'user__last_name'), ('Statut', 'status'), ('Première entrée', 'first_in'),
+        ('Dernière sortie', 'last_out'), ('Minutes travaillées', 'worked_minutes'),
+        ('Zone', 'zone__name'), ('Note', 'note'),
+    ]
+
+    def get_queryset(self):
+        qs = AttendanceDay.objects.select_related('user', 'zone')
+        if user_is_admin(self.request.user):
+            return qs
+        return qs.filter(user=self.request.user)
+
+    @action(detail=False, methods=['get'], url_path='synthese')
+    def synthese(self, request):
+        """Jours pointés, retards, jours complets et heures par agent (?month=YYYY-MM ou date_after/date_before)."""
+        from .report_email import get_period_summary
+
+        month = request.query_params.get('month')
+        try:
+            if month:
+                start = datetime.strptime(month, '%Y-%m').date()
+                end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            else:
+                start = datetime.strptime(request.query_params.get('date_after', ''), '%Y-%m-%d').date()
+                end = datetime.strptime(request.query_params.get('date_before', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'Préciser month=YYYY-MM ou date_after et date_before (YYYY-MM-DD).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end or (end - start).days >= SUMMARY_MAX_DAYS:
+            return Response(
+                {'error': f'Période invalide (au plus {SUMMARY_MAX_DAYS} jours).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        user_ids = None if user_is_admin(request.user) else [request.user.id]
+        return Response({
+            'date_after': start.isoformat(),
+            'date_before': end.isoformat(),
+            'rows': get_period_summary(start, end, user_ids),
+        })
+
 
 class RapportQuotidienAPIView(APIView):
     """
     Rapport quotidien de pointage (entrées 00h00–10h00).
     Réservé aux admins. GET ?date=YYYY-MM-DD (défaut : aujourd'hui).
+    Lu depuis les présences journalières ; réponse mise en cache jusqu'au prochain pointage du jour.
+    Avec ?async=1 : calcul par le worker de tâches, réponse 202 (suivi par /api/jobs/{id}/).
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         if not user_is_admin(request.user):
             return Response({'detail': 'Accès réservé aux administrateurs.'}, status=status.HTTP_403_FORBIDDEN)
+        from jobs.background import enqueue_request, wants_background
+        from .attendance import report_version
         from .report_email import (
             get_daily_report_data,
             _compute_status_rows,
@@ -191,6 +358,12 @@ class RapportQuotidienAPIView(APIView):
                 return Response({'detail': 'Date invalide. Utilisez YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
         else:
             date_report = timezone.now().date()
+        if wants_background(request):
+            return enqueue_request(request, 'pointage_report')
+        cache_key = REPORT_CACHE_KEY.format(date=date_report.isoformat(), version=report_version(date_report))
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return Response(payload)
 
         entries, present_ids, absent_users, _ = get_daily_report_data(date_report)
         nb_presents, nb_retards, nb_absents, rows = _compute_status_rows(entries, present_ids, absent_users)
@@ -208,7 +381,7 @@ class RapportQuotidienAPIView(APIView):
             for r in rows
         ]
         html = build_report_html(date_report, entries, present_ids, absent_users)
-        return Response({
+        payload = {
             'date': date_report.isoformat(),
             'date_formatted': date_report.strftime('%d/%m/%Y'),
             'period': '00h00 — 10h00 (GMT)',
@@ -220,4 +393,62 @@ class RapportQuotidienAPIView(APIView):
             },
             'rows': rows_data,
             'html': html,
+        }
+        cache.set(cache_key, payload, REPORT_CACHE_TTL)
+        return Response(payload)
+
+
+def _parse_month(request):
+    """(année, mois) de ?month=YYYY-MM (défaut : mois courant) ; ValueError si invalide."""
+    value = request.query_params.get('month')
+    if not value:
+        today = timezone.localdate()
+        return today.year, today.month
+    month = datetime.strptime(value, '%Y-%m')
+    return month.year, month.month
+
+
+class PaieMensuelleAPIView(APIView):
+    """
+    Présences du mois pour la paie, par employé : jours et heures travaillés (postes entrée/sortie,
+    postes de nuit compris), jours et minutes de retard, sorties manquantes ou sans entrée.
+    Réservé aux admins. GET ?month=YYYY-MM (défaut : mois courant). Calcul dans pointage/payroll.py.
+    Avec ?async=1 : calcul par le worker de tâches, réponse 202 (suivi par /api/jobs/{id}/).
+    """
+    permission_classes = [IsAuthenticated]
+    background_kind = 'pointage_payroll'
+
+    def get(self, request):
+        if not user_is_admin(request.user):
+            return Response({'detail': 'Accès réservé aux administrateurs.'}, status=status.HTTP_403_FORBIDDEN)
+        from jobs.background import enqueue_request, wants_background
+        try:
+            year, month = _parse_month(request)
+        except ValueError:
+            return Response({'detail': 'Mois invalide. Utilisez YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
+        if wants_background(request):
+            return enqueue_request(request, self.background_kind)
+        return self.render(year, month)
+
+    def render(self, year, month):
+        from .payroll import monthly_attendance
+
+        return Response({
+            'month': f'{year:04d}-{month:02d}',
+            'limite_retard': '%02d:%02d' % HEURE_LIMITE_RETARD,
+            'rows': monthly_attendance(year, month),
         })
+
+
+class PaieMensuelleExcelAPIView(PaieMensuelleAPIView):
+    """Même contenu que PaieMensuelleAPIView, en fichier Excel (une ligne par employé)."""
+    background_kind = 'export'
+
+    def render(self, year, month):
+        from gestion_stock.exports import xlsx_response
+        from .payroll import EXPORT_HEADERS, export_rows, monthly_attendance
+
+        return xlsx_response(
+            export_rows(monthly_attendance(year, month)), EXPORT_HEADERS,
+            f'presences-paie-{year:04d}-{month:02d}.xlsx', 'Présences',
+        )
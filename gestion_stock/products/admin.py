@@ -23,3 +23,10 @@ class ProductAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def save_model(self, request, obj, form, change):
+        """Quantité modifiée : appliquée par stock.ledger (Product.save n'écrit pas quantity)."""
+        super().save_model(request, obj, form, change)
+        if change and 'quantity' in form.changed_data:
+            from stock.ledger import set_stock_level
+            obj.quantity = set_stock_level(obj.pk, form.cleaned_data['quantity'])
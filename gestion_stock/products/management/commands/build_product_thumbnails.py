@@ -0,0 +1,31 @@
+"""
+Commande : génère les miniatures des photos produit (listes compactes de l'API).
+Par défaut, seuls les produits avec photo et sans miniature sont traités.
+Usage :
+  python manage.py build_product_thumbnails
+  python manage.py build_product_thumbnails --all   # régénère toutes les miniatures
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from products.models import Product
+from products.thumbnails import build_thumbnail
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures manquantes des photos produit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Régénère aussi les miniatures existantes.')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(photo='').exclude(photo__isnull=True)
+        if not options['all']:
+            products = products.filter(Q(thumbnail__isnull=True) | Q(thumbnail=''))
+        built = failed = 0
+        for product in products.only('id', 'photo', 'thumbnail').iterator():
+            if build_thumbnail(product):
+                built += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'{built} miniature(s) générée(s), {failed} photo(s) illisible(s).'))
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='total_sold',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Quantité vendue (total)'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['total_sold'], name='products_pr_total_s_d8d633_idx'),
+        ),
+    ]
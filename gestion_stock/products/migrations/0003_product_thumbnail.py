@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_total_sold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='products/thumbs/', verbose_name='Miniature'),
+        ),
+    ]
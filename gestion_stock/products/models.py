@@ -1,9 +1,21 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 
+# Champs maintenus par des UPDATE ... SET x = x + n, exclus des sauvegardes complètes.
+# quantity n'est modifiée que par stock.ledger (mouvements, ventes, saisie explicite via set_stock_level).
+COUNTER_FIELDS = ('total_sold', 'quantity')
+
+# Champs transmis aux receveurs de products.signals.product_state_changed (tableau de bord)
+STATE_FIELDS = ('name', 'quantity', 'alert_threshold', 'purchase_price', 'is_active', 'deleted_at')
+
+
+def _state(product):
+    return {name: getattr(product, name) for name in STATE_FIELDS}
+
+
 class Product(models.Model):
     """
     Modèle pour les produits avec gestion du stock et des prix
@@ -39,13 +51,35 @@ class Product(models.Model):
         null=True,
         verbose_name="Photo du produit"
     )
+    # Miniature JPEG de la photo (products.thumbnails), régénérée quand la photo change
+    thumbnail = models.ImageField(
+        upload_to='products/thumbs/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Miniature"
+    )
     is_active = models.BooleanField(default=True, verbose_name="Actif")
+    # Compteur dénormalisé, tenu à jour par stock.sales (ne jamais l'écrire via save())
+    total_sold = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Quantité vendue (total)"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Date de suppression")
 
     def __str__(self):
         return f"{self.name} - {self.quantity} en stock"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Photo chargée, pour ne régénérer la miniature que si elle change
+        if 'photo' in instance.__dict__:
+            instance._loaded_photo = instance.__dict__['photo'] or None
+        return instance
         
     def clean(self):
         """Validation personnalisée"""
@@ -56,10 +90,41 @@ class Product(models.Model):
                     'sale_price': "Le prix de vente doit être supérieur ou égal au prix d'achat"
                 })
             
+    def _locked_state_row(self):
+        """Champs de STATE_FIELDS tels qu'enregistrés, ligne verrouillée jusqu'à la fin de la transaction."""
+        if self._state.adding or not self.pk:
+            return None
+        return Product.objects.select_for_update().only(*STATE_FIELDS).filter(pk=self.pk).first()
+
     def save(self, *args, **kwargs):
-        """Sauvegarde avec validation"""
+        """Sauvegarde avec validation ; signale l'ancien et le nouvel état (product_state_changed)."""
+        from .signals import product_state_changed
         self.full_clean()
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Ne pas écraser les compteurs mis à jour en F() depuis le chargement de l'objet
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in COUNTER_FIELDS
+            ]
+        with transaction.atomic():
+            # Ancien état relu en base sous verrou (pas l'instance, qui peut être périmée)
+            stored = self._locked_state_row()
+            old_state = _state(stored) if stored else None
+            super().save(*args, **kwargs)
+            if stored is not None:
+                # Champs non écrits (dont quantity) : leur valeur en base reste celle qui compte
+                for name in set(kwargs['update_fields']) & set(STATE_FIELDS):
+                    setattr(stored, name, getattr(self, name))
+                new_state = _state(stored)
+            else:
+                new_state = _state(self)
+            product_state_changed.send(sender=Product, product_id=self.pk, old=old_state, new=new_state)
+        photo_name = self.photo.name if self.photo else None
+        loaded = getattr(self, '_loaded_photo', None)
+        if photo_name != loaded:
+            from .thumbnails import build_thumbnail
+            build_thumbnail(self)
+            self._loaded_photo = photo_name
 
     class Meta:
         verbose_name = "Produit"
@@ -69,6 +134,7 @@ class Product(models.Model):
             models.Index(fields=['name']),
             models.Index(fields=['category']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['total_sold']),
         ]
 
     def __str__(self):
@@ -78,6 +144,17 @@ class Product(models.Model):
         """Vérifie si le stock est en dessous du seuil d'alerte"""
         return self.quantity <= self.alert_threshold
 
+    def delete(self, *args, **kwargs):
+        """Suppression définitive : signale la disparition du produit (product_state_changed)."""
+        from .signals import product_state_changed
+        with transaction.atomic():
+            stored = self._locked_state_row()
+            product_id = self.pk
+            result = super().delete(*args, **kwargs)
+            if stored is not None:
+                product_state_changed.send(sender=Product, product_id=product_id, old=_state(stored), new=None)
+            return result
+
     def soft_delete(self):
         """Soft delete du produit"""
         self.deleted_at = timezone.now()
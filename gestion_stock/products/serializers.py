@@ -76,16 +76,41 @@ class ProductSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Le prix de vente doit être supérieur ou égal au prix d'achat"
             )
-        
+
         return data
 
+    def update(self, instance, validated_data):
+        """
+        Product.save n'écrit jamais quantity : une quantité modifiée par rapport à la valeur chargée
+        est appliquée par stock.ledger.set_stock_level (écart sur la ligne verrouillée).
+        """
+        from stock.ledger import set_stock_level
+
+        quantity = validated_data.pop('quantity', None)
+        loaded_quantity = instance.quantity
+        instance = super().update(instance, validated_data)
+        if quantity is not None and quantity != loaded_quantity:
+            instance.quantity = set_stock_level(instance.pk, quantity)
+        else:
+            instance.refresh_from_db(fields=['quantity'])
+        return instance
+
 
 class ProductListSerializer(serializers.ModelSerializer):
     """
-    Serializer simplifié pour la liste des produits
+    Serializer simplifié pour la liste des produits (?compact=1) :
+    sans description ni dates, avec l'URL de la miniature (à défaut celle de la photo).
     """
     is_low_stock = serializers.BooleanField(read_only=True)
     total_sold = serializers.IntegerField(read_only=True, default=0)
+    thumbnail_url = serializers.SerializerMethodField()
+
+    def get_thumbnail_url(self, obj):
+        image = obj.thumbnail or obj.photo
+        if not image:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(image.url) if request else image.url
 
     class Meta:
         model = Product
@@ -97,8 +122,20 @@ class ProductListSerializer(serializers.ModelSerializer):
             'purchase_price',
             'sale_price',
             'alert_threshold',
-            'photo',
+            'thumbnail_url',
             'is_low_stock',
             'total_sold',
             'is_active',
         ]
+
+
+class ProductSummarySerializer(serializers.ModelSerializer):
+    """
+    Représentation réduite d'un produit imbriqué (lignes de facture) : aucun champ calculé par requête
+    """
+    is_low_stock = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'category', 'quantity', 'sale_price', 'alert_threshold', 'is_low_stock']
+        read_only_fields = fields
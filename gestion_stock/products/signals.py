@@ -0,0 +1,8 @@
+"""
+Signaux des produits.
+"""
+from django.dispatch import Signal
+
+# Envoyé par Product.save / Product.delete dans leur transaction (kwargs : product_id, old, new).
+# old / new : {champ de STATE_FIELDS: valeur} tels qu'enregistrés avant / après l'écriture, None si absent.
+product_state_changed = Signal()
@@ -1,3 +1,129 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from gestion_stock.pagination import KeysetPagination
+from gestion_stock.testing import run_concurrently
+from stock.ledger import apply_stock_delta
+
+from .models import Product
+from .serializers import ProductSerializer
+
+PRODUCTS = 60
+
+
+class KeysetPaginationTests(TestCase):
+    """Pagination par clé des listes (gestion_stock.pagination.KeysetPagination) sur /api/products/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        Product.objects.bulk_create([
+            Product(name=f'Produit {i:02d}', purchase_price=10, sale_price=20, quantity=i)
+            for i in range(PRODUCTS)
+        ])
+        # Ordre attendu : (created_at, id) décroissants
+        cls.expected_ids = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, params):
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_without_parameters_returns_full_list(self):
+        data = self._get({})
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), PRODUCTS)
+
+    def test_default_page_size(self):
+        data = self._get({'cursor': ''})
+        self.assertEqual(data['page_size'], KeysetPagination.page_size)
+        self.assertEqual(len(data['results']), KeysetPagination.page_size)
+        self.assertIsNotNone(data['next'])
+
+    def test_page_size_is_capped(self):
+        data = self._get({'page_size': 10000})
+        self.assertEqual(data['page_size'], KeysetPagination.max_page_size)
+        self.assertEqual(len(data['results']), PRODUCTS)
+        self.assertIsNone(data['next'])
+
+    def test_invalid_page_size(self):
+        self.assertEqual(self._get({'page_size': 'abc'})['page_size'], KeysetPagination.page_size)
+        self.assertEqual(self._get({'page_size': '0'})['page_size'], 1)
+        self.assertEqual(self._get({'page_size': '-5'})['page_size'], 1)
+
+    def test_cursor_round_trip(self):
+        ids = []
+        url, params = '/api/products/', {'page_size': 7}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 7)
+            ids.extend(product['id'] for product in data['results'])
+            url, params = data['next'], None
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/products/', {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_compact_list_has_thumbnail_url_only(self):
+        data = self._get({'compact': 1, 'page_size': 5})
+        product = data['results'][0]
+        self.assertIn('thumbnail_url', product)
+        self.assertNotIn('photo', product)
+
+
+class ProductEditDuringStockOutTests(TransactionTestCase):
+    """Modification d'un produit pendant qu'une sortie est validée : la quantité n'est jamais écrasée."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=10)
+
+    def test_stale_save_keeps_quantity(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        apply_stock_delta(self.product.pk, -3)
+        stale.name = 'Routeur 4G'
+        stale.save()
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.quantity), ('Routeur 4G', 7))
+
+    def test_serializer_routes_explicit_quantity_through_ledger(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        apply_stock_delta(self.product.pk, -3)
+        serializer = ProductSerializer(stale, data={'name': 'Routeur 4G', 'quantity': 10}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 7)
+
+        serializer = ProductSerializer(self.product, data={'quantity': 25}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().quantity, 25)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 25)
+
+    def test_concurrent_edits_and_sorties(self):
+        turn = iter(range(20))
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                index = next(turn)
+            if index % 2:
+                return apply_stock_delta(self.product.pk, -1)
+            product = Product.objects.get(pk=self.product.pk)
+            product.description = f'Modification {index}'
+            product.save()
+
+        results = run_concurrently(work, 20)
+        self.assertEqual([result for result in results if isinstance(result, Exception)], [])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
@@ -0,0 +1,50 @@
+"""
+Miniatures des photos produit (listes compactes de l'API).
+JPEG de THUMBNAIL_SIZE px de côté au plus, générée à l'enregistrement d'une nouvelle photo
+et, pour l'existant, par `python manage.py build_product_thumbnails`.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 200
+
+
+def build_thumbnail(product):
+    """
+    Génère la miniature de product.photo et l'enregistre (fichier + colonne thumbnail, sans save()).
+    Retourne True si une miniature a été écrite ; une photo absente ou illisible efface la miniature.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    from .models import Product
+
+    old_name = product.thumbnail.name if product.thumbnail else None
+    name = None
+    if product.photo:
+        try:
+            with product.photo.open('rb') as source, Image.open(source) as image:
+                image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                if image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                buffer = BytesIO()
+                image.save(buffer, format='JPEG', quality=80, optimize=True)
+        except (OSError, UnidentifiedImageError, ValueError) as e:
+            logger.warning("Miniature impossible pour le produit %s: %s", product.pk, e)
+        else:
+            base = os.path.splitext(os.path.basename(product.photo.name))[0]
+            field = product.thumbnail.field
+            name = field.storage.save(
+                field.generate_filename(product, f"{product.pk}_{base}.jpg"),
+                ContentFile(buffer.getvalue()),
+            )
+
+    Product.objects.filter(pk=product.pk).update(thumbnail=name)
+    product.thumbnail.name = name
+    if old_name and old_name != name:
+        product.thumbnail.storage.delete(old_name)
+    return name is not None
@@ -10,11 +10,13 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Product
 from .serializers import ProductSerializer, ProductListSerializer
 from .permissions import IsAdminUser
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
 
 logger = logging.getLogger(__name__)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des produits
     """
@@ -26,6 +28,14 @@ class ProductViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'category', 'description']
     ordering_fields = ['name', 'category', 'quantity', 'sale_price', 'created_at']
     ordering = ['-created_at']
+    export_filename = 'produits'
+    export_sheet_title = 'Produits'
+    export_columns = [
+        ('ID', 'id'), ('Nom', 'name'), ('Catégorie', 'category'), ('Description', 'description'),
+        ('Quantité', 'quantity'), ("Prix d'achat", 'purchase_price'), ('Prix de vente', 'sale_price'),
+        ("Seuil d'alerte", 'alert_threshold'), ('Actif', 'is_active'), ('Total vendu', 'total_sold'),
+        ('Créé le', 'created_at'),
+    ]
     
     def create(self, request, *args, **kwargs):
         """
@@ -254,7 +264,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
     def get_serializer_class(self):
-        """Utilise ProductSerializer pour toutes les actions pour inclure photo_url"""
+        """ProductSerializer pour toutes les actions ; liste compacte avec ?compact=1"""
+        if self.action == 'list' and self.request.query_params.get('compact') in ('1', 'true'):
+            return ProductListSerializer
         return ProductSerializer
 
     def get_serializer_context(self):
@@ -1,10 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from products.models import Product
 from accounts.models import Client
-from decimal import Decimal
-import uuid
 
 
 class Quote(models.Model):
@@ -104,21 +102,18 @@ class Quote(models.Model):
         return f"Devis {self.quote_number} - {client_display}"
 
     def generate_quote_number(self):
-        """Génère un numéro de devis unique"""
+        """Attribue le numéro suivant de la société (DEV[-SOCIÉTÉ]-AAAAMMJJ-NNNN), dans la transaction de save()"""
+        from numbering.sequences import next_number
         if not self.quote_number:
-            # Format: DEV-YYYYMMDD-UUID
-            date_str = timezone.now().strftime('%Y%m%d')
-            unique_id = str(uuid.uuid4())[:8].upper()
-            self.quote_number = f"DEV-{date_str}-{unique_id}"
+            self.quote_number = next_number('quote', self.company)
         return self.quote_number
 
     def calculate_totals(self):
-        """Calcule les totaux HT et TTC à partir des items"""
-        items = self.quote_items.filter(deleted_at__isnull=True)
-        self.total_ht = sum(item.subtotal for item in items)
-        # TTC = HT + TVA (18%)
-        self.total_ttc = self.total_ht * Decimal('1.18')
-        self.save()
+        """Calcule les totaux HT et TTC à partir des items (une agrégation, une mise à jour)"""
+        from gestion_stock.totals import VAT_MULTIPLIER, lines_total_ht
+        self.total_ht = lines_total_ht(self.quote_items.all())
+        self.total_ttc = self.total_ht * VAT_MULTIPLIER
+        self.save(update_fields=['total_ht', 'total_ttc', 'updated_at'])
 
     def is_expired(self):
         """Vérifie si le devis est expiré (selon la date d'expiration)"""
@@ -137,10 +132,11 @@ class Quote(models.Model):
         self.save()
 
     def save(self, *args, **kwargs):
-        """Génère le numéro de devis si nécessaire"""
-        if not self.quote_number:
-            self.generate_quote_number()
-        super().save(*args, **kwargs)
+        """Génère le numéro de devis si nécessaire (même transaction que l'enregistrement)"""
+        with transaction.atomic():
+            if not self.quote_number:
+                self.generate_quote_number()
+            super().save(*args, **kwargs)
 
 
 class QuoteItem(models.Model):
@@ -185,20 +181,38 @@ class QuoteItem(models.Model):
     def __str__(self):
         return f"{self.quote.quote_number} - {self.product.name}"
 
+    def compute_subtotal(self):
+        self.subtotal = self.quantity * self.unit_price
+        return self.subtotal
+
     def save(self, *args, **kwargs):
         """Calcule le sous-total automatiquement"""
-        self.subtotal = self.quantity * self.unit_price
+        from gestion_stock.totals import schedule_totals
+        self.compute_subtotal()
         super().save(*args, **kwargs)
-        # Recalculer les totaux du devis
-        if self.quote:
-            self.quote.calculate_totals()
+        # Recalculer les totaux du devis (différé dans deferred_totals)
+        if self.quote_id:
+            schedule_totals(self.quote)
 
     def soft_delete(self):
         """Soft delete de l'item"""
         self.deleted_at = timezone.now()
         self.save()
-        if self.quote:
-            self.quote.calculate_totals()
+
+    @classmethod
+    def bulk_create_lines(cls, quote, lines):
+        """
+        Crée les lignes en une requête (sous-totaux calculés ici, save() n'étant pas appelé)
+        puis recalcule les totaux du devis une seule fois.
+        lines : dicts de champs (product, quantity, unit_price...).
+        """
+        from gestion_stock.totals import schedule_totals
+        items = [cls(quote=quote, **line) for line in lines]
+        for item in items:
+            item.compute_subtotal()
+        cls.objects.bulk_create(items, batch_size=500)
+        schedule_totals(quote)
+        return items
 
     def restore(self):
         """Restaure un item supprimé"""
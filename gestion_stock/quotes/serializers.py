@@ -166,12 +166,8 @@ class QuoteCreateSerializer(serializers.ModelSerializer):
         
         quote = Quote.objects.create(**validated_data)
         
-        # Créer les items (pas de vérification de stock pour les devis)
-        for item_data in items_data:
-            QuoteItem.objects.create(quote=quote, **item_data)
-        
-        # Calculer les totaux
-        quote.calculate_totals()
+        # Créer les items en une requête (pas de vérification de stock pour les devis) et calculer les totaux
+        QuoteItem.bulk_create_lines(quote, items_data)
         
         return quote
 
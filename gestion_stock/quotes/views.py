@@ -1,6 +1,7 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Quote, QuoteItem
 from .serializers import (
@@ -12,9 +13,11 @@ from .serializers import (
 )
 from products.permissions import IsAdminUser
 from .permissions import IsAdminOrCommercial
+from stock.ledger import InsufficientStock
+from gestion_stock.pagination import SparseFieldsMixin
 
 
-class QuoteViewSet(viewsets.ModelViewSet):
+class QuoteViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des devis
     """
@@ -61,52 +64,26 @@ class QuoteViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            from invoices.models import Invoice, InvoiceItem
-            from stock.models import StockMovement
-            
-            # Créer la facture (société = celle du devis)
-            invoice = Invoice.objects.create(
-                client=quote.client,
-                client_name=quote.client_name,
-                company=quote.company,
-                is_proforma=False
-            )
-            
-            # Créer les items de facture et vérifier le stock
-            for quote_item in quote.quote_items.filter(deleted_at__isnull=True):
-                product = quote_item.product
-                quantity = quote_item.quantity
-                
-                # Vérifier le stock
-                if product.quantity < quantity:
-                    invoice.delete()
-                    return Response(
-                        {
-                            'error': f"Stock insuffisant pour le produit {product.name}. "
-                                    f"Stock disponible: {product.quantity}, demandé: {quantity}"
-                        },
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                InvoiceItem.objects.create(
-                    invoice=invoice,
-                    product=product,
-                    quantity=quantity,
-                    unit_price=quote_item.unit_price
-                )
-                
-                StockMovement.objects.create(
-                    product=product,
-                    movement_type='SORTIE',
-                    quantity=quantity,
-                    comment=f"Sortie pour facture {invoice.invoice_number} (convertie depuis devis {quote.quote_number})"
+            from invoices.pipeline import create_invoice
+
+            # Tout ou rien : une rupture sur une ligne annule la facture et les sorties
+            with transaction.atomic():
+                # Facture (société = celle du devis), lignes et sorties de stock en lot
+                invoice = create_invoice(
+                    [
+                        {'product': item.product, 'quantity': item.quantity, 'unit_price': item.unit_price}
+                        for item in quote.quote_items.filter(deleted_at__isnull=True).select_related('product')
+                    ],
+                    comment=f"Sortie pour facture {{number}} (convertie depuis devis {quote.quote_number})",
+                    client=quote.client,
+                    client_name=quote.client_name,
+                    company=quote.company,
+                    is_proforma=False,
                 )
-            
-            invoice.calculate_totals()
-            
-            quote.converted_invoice = invoice
-            quote.save(update_fields=['converted_invoice'])
-            
+
+                quote.converted_invoice = invoice
+                quote.save(update_fields=['converted_invoice'])
+
             from invoices.serializers import InvoiceSerializer
             invoice_serializer = InvoiceSerializer(invoice)
             
@@ -114,7 +91,15 @@ class QuoteViewSet(viewsets.ModelViewSet):
                 'message': 'Devis converti en facture avec succès',
                 'invoice': invoice_serializer.data
             }, status=status.HTTP_201_CREATED)
-            
+
+        except InsufficientStock as e:
+            return Response(
+                {
+                    'error': f"Stock insuffisant pour le produit {e.product_name}. "
+                            f"Stock disponible: {e.available}, demandé: {e.requested}"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -141,9 +126,8 @@ class QuoteViewSet(viewsets.ModelViewSet):
         elif request.method == 'POST':
             serializer = QuoteItemCreateSerializer(data=request.data)
             if serializer.is_valid():
+                # Totaux recalculés par QuoteItem.save
                 serializer.save(quote=quote)
-                # Recalculer les totaux
-                quote.calculate_totals()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -153,7 +137,6 @@ class QuoteViewSet(viewsets.ModelViewSet):
                 try:
                     item = quote.quote_items.get(id=item_id, deleted_at__isnull=True)
                     item.soft_delete()
-                    quote.calculate_totals()
                     return Response({'status': 'Item supprimé'}, status=status.HTTP_200_OK)
                 except QuoteItem.DoesNotExist:
                     return Response(
@@ -197,4 +180,3 @@ class QuoteItemViewSet(viewsets.ModelViewSet):
         if quote_id:
             quote = Quote.objects.get(id=quote_id)
             serializer.save(quote=quote)
-            quote.calculate_totals()
@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import ScheduledRun, SchedulerLock
+
+
+@admin.register(ScheduledRun)
+class ScheduledRunAdmin(admin.ModelAdmin):
+    list_display = ['task', 'scheduled_for', 'status', 'started_at', 'duration', 'host']
+    list_filter = ['status', 'task']
+    date_hierarchy = 'scheduled_for'
+    readonly_fields = [
+        'task', 'scheduled_for', 'status', 'started_at', 'finished_at', 'duration', 'output', 'error', 'host',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SchedulerLock)
+class SchedulerLockAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'expires_at']
+    readonly_fields = ['name', 'owner', 'expires_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,134 @@
+"""
+Commande : planificateur intégré. Exécute les tâches de settings.SCHEDULED_TASKS (rapports de
+pointage, rappels stock et paiement) dans ce processus, sans relancer Django à chaque tâche.
+Un seul planificateur actif à la fois (verrou en base), échéances manquées rattrapées,
+historique et durées dans l'admin (Historique du planificateur).
+Usage :
+  python manage.py run_scheduler                 # boucle continue (Ctrl+C pour arrêter)
+  python manage.py run_scheduler --once          # un passage (planificateur Windows / cron)
+  python manage.py run_scheduler --list          # tâches, prochaines échéances, dernières exécutions
+  python manage.py run_scheduler --run rapport_pointage_quotidien   # exécuter une tâche maintenant
+"""
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Avg
+from django.utils import timezone
+
+from scheduler.models import ScheduledRun
+from scheduler.runner import acquire_lock, cleanup, execute, owner_id, release_lock, run_due
+from scheduler.schedule import get_tasks, next_slot
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = "Planificateur intégré : exécute les tâches planifiées (SCHEDULED_TASKS) à leurs échéances."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exécuter les tâches dues puis quitter.')
+        parser.add_argument('--list', action='store_true', help='Afficher les tâches et leur historique.')
+        parser.add_argument('--run', metavar='TACHE', help='Exécuter tout de suite la tâche indiquée.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30.0,
+            help='Secondes entre deux vérifications des échéances (défaut 30).',
+        )
+        parser.add_argument(
+            '--lock-ttl',
+            type=int,
+            default=300,
+            help='Durée du verrou en secondes : reprise par un autre planificateur après ce délai (défaut 300).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tasks = get_tasks()
+        except ValueError as e:
+            raise CommandError(str(e))
+        owner = owner_id()
+        if options['list']:
+            self._list(tasks)
+            return
+        if options['run']:
+            self._run_now(tasks, options['run'], owner)
+            return
+
+        ttl = timedelta(seconds=max(options['lock_ttl'], int(options['interval']) * 2))
+        if options['once']:
+            if not acquire_lock(owner, ttl):
+                self.stdout.write('Un autre planificateur est actif. Rien à faire.')
+                return
+            try:
+                cleanup()
+                self._report(run_due(owner))
+            finally:
+                release_lock(owner)
+            return
+
+        self.stdout.write(f"Planificateur démarré ({len(tasks)} tâche(s), Ctrl+C pour arrêter).")
+        # Arrêt du service (SIGTERM) comme Ctrl+C : le verrou est libéré tout de suite
+        signal.signal(signal.SIGTERM, _stop)
+        leader = False
+        try:
+            while True:
+                close_old_connections()
+                if acquire_lock(owner, ttl):
+                    if not leader:
+                        self.stdout.write('Planificateur actif (verrou obtenu).')
+                        leader = True
+                    cleanup()
+                    self._report(run_due(owner))
+                elif leader:
+                    self.stdout.write('Verrou repris par un autre planificateur : mise en attente.')
+                    leader = False
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Planificateur arrêté.')
+        finally:
+            release_lock(owner)
+
+    def _report(self, runs):
+        for run in runs:
+            line = f'{run.task} ({timezone.localtime(run.scheduled_for):%Y-%m-%d %H:%M}) : ' \
+                   f'{run.get_status_display()} en {run.duration.total_seconds():.1f} s'
+            if run.status == ScheduledRun.STATUS_SUCCEEDED:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(self.style.ERROR(f"{line}\n{run.error.splitlines()[0] if run.error else ''}"))
+
+    def _run_now(self, tasks, name, owner):
+        if name not in tasks:
+            raise CommandError(f"Tâche inconnue : {name}. Tâches : {', '.join(tasks) or 'aucune'}.")
+        # Échéance à la minute : deux lancements manuels dans la même minute ne s'exécutent qu'une fois
+        slot = timezone.now().replace(second=0, microsecond=0)
+        run = execute(name, tasks[name], slot, owner)
+        if run is None:
+            self.stdout.write('Tâche déjà exécutée pour cette minute.')
+            return
+        self._report([run])
+
+    def _list(self, tasks):
+        now = timezone.now()
+        for name, task in tasks.items():
+            runs = ScheduledRun.objects.filter(task=name)
+            last = runs.order_by('-scheduled_for').first()
+            average = runs.filter(status=ScheduledRun.STATUS_SUCCEEDED).aggregate(avg=Avg('duration'))['avg']
+            upcoming = next_slot(name, task, now)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  prochaine échéance : {timezone.localtime(upcoming):%Y-%m-%d %H:%M}")
+            if last:
+                self.stdout.write(
+                    f"  dernière exécution : {timezone.localtime(last.scheduled_for):%Y-%m-%d %H:%M} "
+                    f"({last.get_status_display()}, {last.duration.total_seconds() if last.duration else 0:.1f} s)"
+                )
+            else:
+                self.stdout.write('  dernière exécution : jamais')
+            if average is not None:
+                self.stdout.write(f"  durée moyenne : {average.total_seconds():.1f} s")
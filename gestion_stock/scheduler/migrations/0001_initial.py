@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLock',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Nom')),
+                ('owner', models.CharField(blank=True, default='', max_length=255, verbose_name='Détenteur')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expire le')),
+            ],
+            options={
+                'verbose_name': 'Verrou du planificateur',
+                'verbose_name_plural': 'Verrous du planificateur',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=100, verbose_name='Tâche')),
+                ('scheduled_for', models.DateTimeField(verbose_name='Échéance')),
+                ('status', models.CharField(choices=[('RUNNING', 'En cours'), ('SUCCEEDED', 'Terminée'), ('FAILED', 'Échec')], default='RUNNING', max_length=20, verbose_name='Statut')),
+                ('started_at', models.DateTimeField(verbose_name='Démarrée le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+                ('duration', models.DurationField(blank=True, null=True, verbose_name='Durée')),
+                ('output', models.TextField(blank=True, default='', verbose_name='Sortie')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Erreur')),
+                ('host', models.CharField(blank=True, default='', max_length=255, verbose_name='Exécutée par')),
+            ],
+            options={
+                'verbose_name': 'Exécution planifiée',
+                'verbose_name_plural': 'Historique du planificateur',
+                'ordering': ['-scheduled_for', 'task'],
+                'indexes': [models.Index(fields=['started_at'], name='scheduler_s_started_447a8d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'scheduled_for'), name='scheduledrun_unique_slot')],
+            },
+        ),
+    ]
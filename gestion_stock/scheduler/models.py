@@ -0,0 +1,63 @@
+from django.db import models
+
+
+class ScheduledRun(models.Model):
+    """
+    Exécution d'une tâche planifiée (SCHEDULED_TASKS) pour une échéance donnée.
+    Une seule ligne par (tâche, échéance) : deux planificateurs ne peuvent pas exécuter
+    la même échéance, même après une perte du verrou.
+    """
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCEEDED = 'SUCCEEDED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_SUCCEEDED, 'Terminée'),
+        (STATUS_FAILED, 'Échec'),
+    ]
+
+    task = models.CharField(max_length=100, verbose_name="Tâche")
+    scheduled_for = models.DateTimeField(verbose_name="Échéance")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_RUNNING,
+        verbose_name="Statut"
+    )
+    started_at = models.DateTimeField(verbose_name="Démarrée le")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminée le")
+    duration = models.DurationField(null=True, blank=True, verbose_name="Durée")
+    output = models.TextField(blank=True, default='', verbose_name="Sortie")
+    error = models.TextField(blank=True, default='', verbose_name="Erreur")
+    host = models.CharField(max_length=255, blank=True, default='', verbose_name="Exécutée par")
+
+    class Meta:
+        verbose_name = "Exécution planifiée"
+        verbose_name_plural = "Historique du planificateur"
+        ordering = ['-scheduled_for', 'task']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'scheduled_for'], name='scheduledrun_unique_slot'),
+        ]
+        indexes = [
+            models.Index(fields=['started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} {self.scheduled_for:%Y-%m-%d %H:%M} ({self.get_status_display()})"
+
+
+class SchedulerLock(models.Model):
+    """
+    Verrou du planificateur : un seul processus (toutes machines confondues) exécute les tâches.
+    Pris ou prolongé par UPDATE conditionnel (détenteur actuel ou verrou expiré).
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Nom")
+    owner = models.CharField(max_length=255, blank=True, default='', verbose_name="Détenteur")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Expire le")
+
+    class Meta:
+        verbose_name = "Verrou du planificateur"
+        verbose_name_plural = "Verrous du planificateur"
+
+    def __str__(self):
+        return f"{self.name} ({self.owner or 'libre'})"
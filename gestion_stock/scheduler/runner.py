@@ -0,0 +1,135 @@
+"""
+Exécution des tâches planifiées par `manage.py run_scheduler`.
+
+- acquire_lock : un seul planificateur actif (verrou SchedulerLock pris ou prolongé par
+  UPDATE conditionnel, expiré au bout de ttl si son détenteur s'arrête) ;
+- run_due : exécute, dans le processus courant, chaque tâche dont la dernière échéance
+  n'a pas encore d'exécution (et n'est pas plus ancienne que son délai de rattrapage) ;
+- chaque exécution est d'abord réservée par l'insertion de sa ligne ScheduledRun
+  (unique par tâche et échéance) : jamais deux envois pour la même échéance ;
+- durée, sortie et erreur sont enregistrées dans l'historique.
+"""
+import io
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ScheduledRun, SchedulerLock
+from .schedule import catch_up, get_tasks, previous_slot
+
+LOCK_NAME = 'scheduler'
+LOCK_TTL = timedelta(minutes=5)
+# Une exécution encore « en cours » après ce délai est considérée interrompue
+STALE_AFTER = timedelta(hours=6)
+HISTORY_RETENTION = timedelta(days=90)
+MAX_OUTPUT_LENGTH = 10000
+
+
+def owner_id():
+    """Identifiant du processus courant pour le verrou (machine:pid)."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lock(owner, ttl=LOCK_TTL):
+    """Prend ou prolonge le verrou du planificateur. Retourne True si owner le détient."""
+    now = timezone.now()
+    if not SchedulerLock.objects.filter(name=LOCK_NAME).exists():
+        try:
+            with transaction.atomic():
+                SchedulerLock.objects.create(name=LOCK_NAME)
+        except IntegrityError:
+            pass
+    return bool(
+        SchedulerLock.objects.filter(name=LOCK_NAME)
+        .filter(Q(owner=owner) | Q(owner='') | Q(expires_at__isnull=True) | Q(expires_at__lt=now))
+        .update(owner=owner, expires_at=now + ttl)
+    )
+
+
+def release_lock(owner):
+    SchedulerLock.objects.filter(name=LOCK_NAME, owner=owner).update(owner='', expires_at=None)
+
+
+def _reserve(name, slot, owner):
+    """Insère la ligne de l'exécution (RUNNING) ; None si l'échéance est déjà prise."""
+    try:
+        with transaction.atomic():
+            return ScheduledRun.objects.create(
+                task=name, scheduled_for=slot, started_at=timezone.now(), host=owner,
+            )
+    except IntegrityError:
+        return None
+
+
+def _call(task, slot):
+    """Lance la tâche et retourne sa sortie texte."""
+    if 'command' in task:
+        local_slot = timezone.localtime(slot)
+        name, *args = task['command']
+        args = [arg.format(slot=local_slot) for arg in args]
+        out = io.StringIO()
+        call_command(name, *args, stdout=out, stderr=out)
+        return out.getvalue()
+    result = import_string(task['callable'])(**task.get('kwargs', {}))
+    return '' if result is None else str(result)
+
+
+def execute(name, task, slot, owner):
+    """Exécute une échéance de la tâche (si elle n'est pas déjà prise) et retourne le ScheduledRun."""
+    run = _reserve(name, slot, owner)
+    if run is None:
+        return None
+    try:
+        run.output = _call(task, slot)[-MAX_OUTPUT_LENGTH:]
+        run.status = ScheduledRun.STATUS_SUCCEEDED
+    except Exception as e:
+        run.status = ScheduledRun.STATUS_FAILED
+        run.error = (str(e) or e.__class__.__name__) + '\n' + traceback.format_exc()[-MAX_OUTPUT_LENGTH:]
+    run.finished_at = timezone.now()
+    run.duration = run.finished_at - run.started_at
+    run.save(update_fields=['status', 'output', 'error', 'finished_at', 'duration'])
+    return run
+
+
+def due_tasks(now=None, tasks=None):
+    """[(nom, définition, échéance)] des tâches dont la dernière échéance reste à exécuter."""
+    now = now or timezone.now()
+    tasks = get_tasks() if tasks is None else tasks
+    slots = {}
+    for name, task in tasks.items():
+        slot = previous_slot(name, task, now)
+        if slot is not None and now - slot <= catch_up(task):
+            slots[name] = slot
+    if not slots:
+        return []
+    done = set(
+        ScheduledRun.objects.filter(task__in=slots, scheduled_for__in=set(slots.values()))
+        .values_list('task', 'scheduled_for')
+    )
+    return [(name, tasks[name], slot) for name, slot in slots.items() if (name, slot) not in done]
+
+
+def run_due(owner, now=None):
+    """Exécute les tâches dues l'une après l'autre. Retourne la liste des ScheduledRun exécutés."""
+    runs = []
+    for name, task, slot in due_tasks(now):
+        run = execute(name, task, slot, owner)
+        if run is not None:
+            runs.append(run)
+    return runs
+
+
+def cleanup(now=None):
+    """Passe en échec les exécutions interrompues et supprime l'historique ancien."""
+    now = now or timezone.now()
+    ScheduledRun.objects.filter(
+        status=ScheduledRun.STATUS_RUNNING, started_at__lt=now - STALE_AFTER,
+    ).update(status=ScheduledRun.STATUS_FAILED, error='Exécution interrompue (planificateur arrêté).')
+    ScheduledRun.objects.filter(started_at__lt=now - HISTORY_RETENTION).delete()
@@ -0,0 +1,87 @@
+"""
+Table des tâches planifiées (settings.SCHEDULED_TASKS) et calcul des échéances.
+
+Chaque entrée {nom: définition} précise :
+- ce qu'il faut lancer : 'command' = [commande, arguments...] (call_command, dans le processus)
+  ou 'callable' = chemin pointé d'une fonction (+ 'kwargs' facultatif) ;
+- quand : 'at' = 'HH:MM' (heure locale, TIME_ZONE), chaque jour ou seulement les jours
+  'weekdays' (0 = lundi ... 6 = dimanche), ou 'every' = timedelta (échéances alignées) ;
+- 'catch_up' (facultatif) : délai pendant lequel une échéance manquée (planificateur arrêté)
+  est encore exécutée ; par défaut 1 jour pour 'at', une période pour 'every'.
+  Seule la dernière échéance manquée est rattrapée.
+
+Les arguments de commande peuvent utiliser l'échéance : '--date={slot:%Y-%m-%d}'.
+"""
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_CATCH_UP = timedelta(days=1)
+
+
+def get_tasks():
+    """Tâches planifiées validées : {nom: définition}."""
+    tasks = getattr(settings, 'SCHEDULED_TASKS', {})
+    for name, task in tasks.items():
+        validate_task(name, task)
+    return tasks
+
+
+def validate_task(name, task):
+    """Lève ValueError si la définition de la tâche est incomplète ou incohérente."""
+    if ('command' in task) == ('callable' in task):
+        raise ValueError(f"Tâche planifiée {name} : préciser 'command' ou 'callable' (un seul).")
+    if ('at' in task) == ('every' in task):
+        raise ValueError(f"Tâche planifiée {name} : préciser 'at' ou 'every' (un seul).")
+    if 'every' in task and task['every'].total_seconds() < 60:
+        raise ValueError(f"Tâche planifiée {name} : 'every' doit être d'au moins une minute.")
+    if 'at' in task:
+        _parse_at(name, task['at'])
+
+
+def _parse_at(name, value):
+    try:
+        hour, minute = (int(part) for part in value.split(':'))
+        return time(hour, minute)
+    except (ValueError, AttributeError):
+        raise ValueError(f"Tâche planifiée {name} : heure invalide '{value}' (format HH:MM).")
+
+
+def catch_up(task):
+    """Délai de rattrapage d'une échéance manquée."""
+    if 'catch_up' in task:
+        return task['catch_up']
+    return task['every'] if 'every' in task else DEFAULT_CATCH_UP
+
+
+def _daily_slots(name, task, start_day, step):
+    at = _parse_at(name, task['at'])
+    weekdays = task.get('weekdays')
+    for offset in range(8):
+        day = start_day + timedelta(days=offset * step)
+        if weekdays is None or day.weekday() in weekdays:
+            yield timezone.make_aware(datetime.combine(day, at))
+
+
+def previous_slot(name, task, now):
+    """Dernière échéance <= now (None si aucune dans la semaine écoulée)."""
+    if 'every' in task:
+        step = int(task['every'].total_seconds())
+        seconds = int(now.timestamp())
+        return datetime.fromtimestamp(seconds - seconds % step, tz=dt_timezone.utc)
+    for slot in _daily_slots(name, task, timezone.localdate(now), -1):
+        if slot <= now:
+            return slot
+    return None
+
+
+def next_slot(name, task, now):
+    """Première échéance > now."""
+    if 'every' in task:
+        return previous_slot(name, task, now) + task['every']
+    for slot in _daily_slots(name, task, timezone.localdate(now), 1):
+        if slot > now:
+            return slot
+    return None
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .models import ScheduledRun
+from .runner import _reserve, due_tasks, run_due
+from .schedule import previous_slot
+
+CALLS = []
+
+
+def record_call():
+    CALLS.append(1)
+
+
+def _utc(day, hour, minute=0):
+    return datetime(2026, 3, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+DAILY = {'callable': 'scheduler.tests.record_call', 'at': '10:00', 'catch_up': timedelta(hours=12)}
+WEEKLY = {'callable': 'scheduler.tests.record_call', 'at': '20:00', 'weekdays': [6]}
+HOURLY = {'callable': 'scheduler.tests.record_call', 'every': timedelta(hours=1)}
+
+
+@override_settings(TIME_ZONE='UTC')
+class PreviousSlotTests(SimpleTestCase):
+    """Dernière échéance d'une tâche (scheduler.schedule.previous_slot)."""
+
+    def test_daily(self):
+        self.assertEqual(previous_slot('t', DAILY, _utc(4, 9, 59)), _utc(3, 10))
+        self.assertEqual(previous_slot('t', DAILY, _utc(4, 10)), _utc(4, 10))
+        self.assertEqual(previous_slot('t', DAILY, _utc(4, 23, 30)), _utc(4, 10))
+
+    def test_weekdays(self):
+        # 4 mars 2026 : mercredi ; dimanche précédent : 1er mars
+        self.assertEqual(previous_slot('t', WEEKLY, _utc(4, 12)), _utc(1, 20))
+        self.assertEqual(previous_slot('t', WEEKLY, _utc(8, 20, 5)), _utc(8, 20))
+
+    def test_every(self):
+        self.assertEqual(previous_slot('t', HOURLY, _utc(4, 10, 37)), _utc(4, 10))
+
+
+@override_settings(TIME_ZONE='UTC')
+class DueTasksTests(TestCase):
+    """Tâches dues, rattrapage et réservation unique de chaque échéance."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_due_until_run(self):
+        tasks = {'quotidien': DAILY, 'horaire': HOURLY}
+        now = _utc(4, 10, 30)
+        self.assertEqual(
+            sorted((name, slot) for name, _, slot in due_tasks(now, tasks)),
+            [('horaire', _utc(4, 10)), ('quotidien', _utc(4, 10))],
+        )
+        ScheduledRun.objects.create(task='quotidien', scheduled_for=_utc(4, 10), started_at=now)
+        self.assertEqual([name for name, _, _ in due_tasks(now, tasks)], ['horaire'])
+
+    def test_catch_up(self):
+        tasks = {'quotidien': DAILY}
+        self.assertEqual(len(due_tasks(_utc(4, 21, 59), tasks)), 1)
+        self.assertEqual(due_tasks(_utc(4, 22, 1), tasks), [])
+        # Sans 'catch_up' : rattrapage pendant une journée
+        default = {key: value for key, value in DAILY.items() if key != 'catch_up'}
+        self.assertEqual(len(due_tasks(_utc(5, 9, 59), {'quotidien': default})), 1)
+
+    def test_slot_reserved_once(self):
+        self.assertIsNotNone(_reserve('quotidien', _utc(4, 10), 'a'))
+        self.assertIsNone(_reserve('quotidien', _utc(4, 10), 'b'))
+
+    def test_run_due_executes_each_slot_once(self):
+        with self.settings(SCHEDULED_TASKS={'quotidien': DAILY}):
+            runs = run_due('a', now=_utc(4, 10, 1))
+            self.assertEqual([run.status for run in runs], [ScheduledRun.STATUS_SUCCEEDED])
+            self.assertEqual(run_due('b', now=_utc(4, 10, 2)), [])
+        self.assertEqual(len(CALLS), 1)
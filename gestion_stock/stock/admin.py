@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StockMovement, StockNotificationRecipient, StockAlertSettings
+from .models import StockMovement, StockNotificationRecipient, StockAlertSettings, ProductSalesDay
 
 
 @admin.register(StockNotificationRecipient)
@@ -12,7 +12,10 @@ class StockNotificationRecipientAdmin(admin.ModelAdmin):
 
 @admin.register(StockAlertSettings)
 class StockAlertSettingsAdmin(admin.ModelAdmin):
-    list_display = ['alert_threshold', 'reminder_interval_days', 'last_reminder_sent_at', 'updated_at']
+    list_display = [
+        'alert_threshold', 'reminder_interval_days', 'notification_digest_minutes',
+        'last_reminder_sent_at', 'updated_at',
+    ]
 
 
 @admin.register(StockMovement)
@@ -22,3 +25,11 @@ class StockMovementAdmin(admin.ModelAdmin):
     search_fields = ['product__name', 'comment']
     readonly_fields = ['created_at']
     date_hierarchy = 'date'
+
+
+@admin.register(ProductSalesDay)
+class ProductSalesDayAdmin(admin.ModelAdmin):
+    list_display = ['product', 'day', 'quantity']
+    list_filter = ['day']
+    search_fields = ['product__name']
+    date_hierarchy = 'day'
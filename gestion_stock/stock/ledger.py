@@ -0,0 +1,190 @@
+"""
+Registre de stock : applique les variations de quantité produit de façon atomique.
+
+Chaque variation est un UPDATE conditionnel unique
+(UPDATE ... SET quantity = quantity - n WHERE id = ... AND quantity >= n),
+sans lecture-modification-écriture en Python ni Product.full_clean(). Deux sorties
+concurrentes ne peuvent donc pas vendre le même stock : sur PostgreSQL la seconde
+attend le verrou de ligne puis réévalue la condition, sur SQLite les écritures sont sérialisées.
+Un lot de variations (apply_stock_deltas) est appliqué en un seul UPDATE ... CASE par tranche de produits.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .signals import stock_level_changed
+
+
+class InsufficientStock(ValueError):
+    """Stock insuffisant pour appliquer une sortie."""
+
+    def __init__(self, product_id, available, requested, product_name=None, message=None):
+        self.product_id = product_id
+        self.available = available
+        self.requested = requested
+        self.product_name = product_name
+        super().__init__(
+            message or f"Stock insuffisant. Stock disponible: {available}, demandé: {requested}"
+        )
+
+
+def movement_delta(movement_type, quantity):
+    """Variation de stock d'un mouvement : +quantité pour une entrée, -quantité pour une sortie."""
+    if movement_type == 'ENTREE':
+        return quantity
+    if movement_type == 'SORTIE':
+        return -quantity
+    return 0
+
+
+def apply_stock_delta(product_id, delta):
+    """
+    Ajoute delta (négatif pour une sortie) à la quantité du produit.
+    Retourne le nouveau solde. Lève InsufficientStock si le stock deviendrait négatif.
+    """
+    from products.models import Product
+
+    with transaction.atomic():
+        qs = Product.objects.filter(pk=product_id)
+        if delta < 0:
+            updated = qs.filter(quantity__gte=-delta).update(
+                quantity=F('quantity') + delta,
+                updated_at=timezone.now(),
+            )
+        elif delta > 0:
+            updated = qs.update(quantity=F('quantity') + delta, updated_at=timezone.now())
+        else:
+            updated = None
+        row = qs.values_list('quantity', 'name').first()
+        if row is None:
+            raise Product.DoesNotExist(f"Produit {product_id} introuvable")
+        balance, name = row
+        if updated == 0:
+            raise InsufficientStock(product_id, balance, -delta, product_name=name)
+        if updated:
+            stock_level_changed.send(sender=Product, product_ids=[product_id], deltas={product_id: delta})
+        return balance
+
+
+def set_stock_level(product_id, quantity):
+    """
+    Corrige la quantité du produit à une valeur absolue (saisie explicite, inventaire) :
+    ligne verrouillée, écart appliqué par apply_stock_delta. Retourne le nouveau solde.
+    """
+    from products.models import Product
+
+    with transaction.atomic():
+        current = (
+            Product.objects.select_for_update().filter(pk=product_id).values_list('quantity', flat=True).first()
+        )
+        if current is None:
+            raise Product.DoesNotExist(f"Produit {product_id} introuvable")
+        if quantity == current:
+            return current
+        return apply_stock_delta(product_id, quantity - current)
+
+
+# Produits par requête pour les mises à jour groupées (taille des CASE et des IN)
+BULK_UPDATE_BATCH = 500
+
+
+def _increments_case(increments):
+    return Case(
+        *[When(pk=pk, then=Value(increment)) for pk, increment in increments],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def bulk_increment(model, field, increments, guard_negative=False, **values):
+    """
+    Ajoute increments[pk] au champ entier `field` de chaque ligne, un UPDATE ... CASE par tranche
+    de BULK_UPDATE_BATCH lignes. guard_negative : une ligne ne passe jamais sous zéro (non modifiée).
+    values : autres champs à écrire. Retourne le nombre de lignes modifiées.
+    """
+    items = sorted((pk, increment) for pk, increment in increments.items() if increment)
+    updated = 0
+    for start in range(0, len(items), BULK_UPDATE_BATCH):
+        chunk = items[start:start + BULK_UPDATE_BATCH]
+        qs = model.objects.filter(pk__in=[pk for pk, _ in chunk])
+        if guard_negative:
+            qs = qs.filter(**{f'{field}__gte': _increments_case([(pk, -increment) for pk, increment in chunk])})
+        updated += qs.update(**{field: F(field) + _increments_case(chunk)}, **values)
+    return updated
+
+
+def apply_stock_deltas(deltas):
+    """
+    Applique plusieurs variations {product_id: delta} en une transaction (tout ou rien) :
+    produits verrouillés une fois (SELECT ... FOR UPDATE par identifiant croissant, sans interblocage),
+    stock vérifié pour tous, puis un UPDATE conditionnel groupé et une lecture des soldes.
+    Retourne {product_id: nouveau solde}. Lève InsufficientStock sur le premier produit en rupture.
+    """
+    from products.models import Product
+
+    if not deltas:
+        return {}
+    with transaction.atomic():
+        locked = {
+            pk: (quantity, name)
+            for pk, quantity, name in Product.objects.select_for_update()
+            .filter(pk__in=list(deltas)).order_by('pk').values_list('pk', 'quantity', 'name')
+        }
+        for product_id in sorted(deltas):
+            if product_id not in locked:
+                raise Product.DoesNotExist(f"Produit {product_id} introuvable")
+            available, name = locked[product_id]
+            if available + deltas[product_id] < 0:
+                raise InsufficientStock(product_id, available, -deltas[product_id], product_name=name)
+
+        changed = {pk: delta for pk, delta in deltas.items() if delta}
+        updated = bulk_increment(Product, 'quantity', changed, guard_negative=True, updated_at=timezone.now())
+        balances = dict(Product.objects.filter(pk__in=list(deltas)).values_list('pk', 'quantity'))
+        if updated != len(changed):
+            # Stock modifié entre la vérification et l'écriture (base sans verrou de ligne) : tout annuler
+            short = [pk for pk in sorted(changed) if changed[pk] < 0 and balances[pk] < -changed[pk]]
+            product_id = short[0] if short else min(changed)
+            raise InsufficientStock(
+                product_id, balances[product_id], -changed[product_id], product_name=locked[product_id][1],
+            )
+        if changed:
+            stock_level_changed.send(sender=Product, product_ids=sorted(changed), deltas=changed)
+    return balances
+
+
+def apply_movement(product, movement_type, quantity):
+    """
+    Applique un mouvement (ENTREE/SORTIE) au produit et met à jour product.quantity
+    avec le solde retourné par la base. Retourne le nouveau solde.
+    """
+    balance = apply_stock_delta(product.pk, movement_delta(movement_type, quantity))
+    product.quantity = balance
+    return balance
+
+
+def record_movements(movements):
+    """
+    Enregistre une liste de StockMovement non sauvegardés en une transaction :
+    une variation agrégée par produit (apply_stock_deltas, UPDATE groupé), un bulk_create des mouvements
+    et la mise à jour groupée du journal des ventes. Ni save() ni post_save ne sont appelés :
+    les notifications sont à la charge de l'appelant.
+    Retourne {product_id: solde après le lot}. Lève InsufficientStock si un produit passerait sous zéro.
+    """
+    from .models import StockMovement
+    from .sales import record_sales, sale_day
+
+    deltas = {}
+    sales = {}
+    for movement in movements:
+        deltas[movement.product_id] = deltas.get(movement.product_id, 0) + movement_delta(
+            movement.movement_type, movement.quantity
+        )
+        if movement.movement_type == 'SORTIE':
+            key = (movement.product_id, sale_day(movement.date))
+            sales[key] = sales.get(key, 0) + movement.quantity
+
+    with transaction.atomic():
+        balances = apply_stock_deltas(deltas)
+        StockMovement.objects.bulk_create(movements, batch_size=500)
+        record_sales(sales)
+    return balances
@@ -0,0 +1,115 @@
+"""
+Commande : mesure le débit de création des mouvements de stock,
+endpoint ligne par ligne (POST /api/stock-movements/) contre endpoint en lot
+(POST /api/stock-movements/bulk/).
+Tout est exécuté dans une transaction annulée à la fin : la base n'est pas modifiée.
+Les notifications SMS/email sont désactivées pendant la mesure.
+Usage :
+  python manage.py bench_stock_movements
+  python manage.py bench_stock_movements --lines 1000 --products 20 --repeat 3
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.signals import post_save
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from products.models import Product
+from stock.models import StockMovement
+from stock.signals import on_stock_movement_created
+from stock.views import StockMovementViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare le débit de l'endpoint mouvements ligne par ligne et de l'endpoint en lot."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=1000, help='Nombre de lignes par lot (défaut 1000).')
+        parser.add_argument('--products', type=int, default=20, help='Nombre de produits distincts (défaut 20).')
+        parser.add_argument('--repeat', type=int, default=1, help='Nombre de mesures par mode (défaut 1).')
+
+    def handle(self, *args, **options):
+        lines = max(1, options['lines'])
+        nb_products = max(1, options['products'])
+        repeat = max(1, options['repeat'])
+
+        post_save.disconnect(on_stock_movement_created, sender='stock.StockMovement')
+        results = {'ligne par ligne': [], 'lot': []}
+        try:
+            with transaction.atomic():
+                for _ in range(repeat):
+                    results['ligne par ligne'].append(self._run(self._per_line, lines, nb_products))
+                    results['lot'].append(self._run(self._bulk, lines, nb_products))
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            post_save.connect(on_stock_movement_created, sender='stock.StockMovement')
+
+        self.stdout.write(f'{lines} ligne(s) sur {nb_products} produit(s), {repeat} mesure(s) :')
+        best = {}
+        for mode, timings in results.items():
+            best[mode] = min(timings)
+            self.stdout.write(
+                f'  {mode:<16} {best[mode]:8.3f} s  ({lines / best[mode]:10.0f} lignes/s)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Gain du lot : x{best['ligne par ligne'] / best['lot']:.1f}"
+        ))
+
+    def _run(self, runner, lines, nb_products):
+        """Exécute un mode dans un point de sauvegarde annulé et retourne la durée (s)."""
+        sid = transaction.savepoint()
+        try:
+            user = User.objects.create(username='bench_stock_movements', is_staff=True)
+            products = Product.objects.bulk_create([
+                Product(
+                    name=f'Bench {i}',
+                    quantity=lines,
+                    purchase_price=1,
+                    sale_price=2,
+                )
+                for i in range(nb_products)
+            ])
+            payload = [
+                {
+                    'product': products[i % nb_products].pk,
+                    'movement_type': 'SORTIE' if i % 3 else 'ENTREE',
+                    'quantity': 1,
+                    'comment': 'bench',
+                }
+                for i in range(lines)
+            ]
+            start = time.perf_counter()
+            runner(user, payload)
+            elapsed = time.perf_counter() - start
+            created = StockMovement.objects.filter(product__in=products).count()
+            if created != lines:
+                raise RuntimeError(f'{created} mouvement(s) créé(s) au lieu de {lines}')
+            return elapsed
+        finally:
+            transaction.savepoint_rollback(sid)
+
+    def _per_line(self, user, payload):
+        view = StockMovementViewSet.as_view({'post': 'create'})
+        factory = APIRequestFactory()
+        for line in payload:
+            request = factory.post('/api/stock-movements/', line, format='json')
+            force_authenticate(request, user=user)
+            response = view(request)
+            if response.status_code != 201:
+                raise RuntimeError(f'Création refusée: {response.data}')
+
+    def _bulk(self, user, payload):
+        view = StockMovementViewSet.as_view({'post': 'bulk'})
+        request = APIRequestFactory().post('/api/stock-movements/bulk/', {'movements': payload}, format='json')
+        force_authenticate(request, user=user)
+        response = view(request)
+        if response.status_code != 201:
+            raise RuntimeError(f'Lot refusé: {response.data}')
@@ -0,0 +1,17 @@
+"""
+Commande : reconstruit les compteurs de ventes (Product.total_sold et journal ProductSalesDay)
+à partir des mouvements de stock.
+Usage :
+  python manage.py rebuild_sales_counters
+"""
+from django.core.management.base import BaseCommand
+
+from stock.sales import rebuild_sales_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les quantités vendues par produit (total et journal quotidien) depuis les sorties de stock."
+
+    def handle(self, *args, **options):
+        count = rebuild_sales_counters()
+        self.stdout.write(self.style.SUCCESS(f'Compteurs de ventes reconstruits ({count} ligne(s) de journal).'))
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_sales_counters(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('stock', 'StockMovement')
+    ProductSalesDay = apps.get_model('stock', 'ProductSalesDay')
+    sorties = StockMovement.objects.filter(movement_type='SORTIE', deleted_at__isnull=True)
+    daily = (
+        sorties.annotate(day=TruncDate('date'))
+        .values('product_id', 'day')
+        .annotate(sold=Sum('quantity'))
+    )
+    ProductSalesDay.objects.bulk_create(
+        [ProductSalesDay(product_id=row['product_id'], day=row['day'], quantity=row['sold']) for row in daily],
+        batch_size=500,
+    )
+    sold = (
+        sorties.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(sold=Sum('quantity'))
+        .values('sold')
+    )
+    Product.objects.update(total_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_total_sold'),
+        ('stock', '0004_add_reminder_interval_days'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Quantité sortie')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='products.product', verbose_name='Produit')),
+            ],
+            options={
+                'verbose_name': 'Ventes journalières produit',
+                'verbose_name_plural': 'Ventes journalières produits',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'product'], name='stock_produ_day_5682d3_idx')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_sales_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0005_productsalesday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockalertsettings',
+            name='notification_digest_minutes',
+            field=models.PositiveIntegerField(default=0, help_text='0 = un SMS/email par mouvement. Sinon, un seul SMS et un seul email par responsable toutes les X minutes, regroupant les mouvements par document et par produit.', verbose_name='Regroupement des notifications (minutes)'),
+        ),
+    ]
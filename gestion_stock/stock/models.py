@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from products.models import Product
+from .ledger import InsufficientStock, apply_movement, apply_stock_delta, movement_delta
+from .sales import record_sale
 
 
 class StockNotificationRecipient(models.Model):
@@ -45,6 +47,13 @@ class StockAlertSettings(models.Model):
         blank=True,
         verbose_name="Dernier rappel envoyé le",
     )
+    # Regroupement des notifications de mouvements : 0 = un message par mouvement
+    notification_digest_minutes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Regroupement des notifications (minutes)",
+        help_text="0 = un SMS/email par mouvement. Sinon, un seul SMS et un seul email par responsable "
+                  "toutes les X minutes, regroupant les mouvements par document et par produit.",
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -104,33 +113,28 @@ class StockMovement(models.Model):
     def save(self, *args, **kwargs):
         """
         Met à jour automatiquement la quantité du produit lors de la sauvegarde
+        (UPDATE conditionnel via stock.ledger, dans la même transaction que le mouvement).
         """
-        if not self.pk:  # Nouveau mouvement
-            if self.movement_type == 'ENTREE':
-                self.product.quantity += self.quantity
-            elif self.movement_type == 'SORTIE':
-                if self.product.quantity < self.quantity:
-                    raise ValueError(
-                        f"Stock insuffisant. Stock disponible: {self.product.quantity}, "
-                        f"demandé: {self.quantity}"
-                    )
-                self.product.quantity -= self.quantity
-            self.product.save()
-        super().save(*args, **kwargs)
+        is_new = self._state.adding
+        with transaction.atomic():
+            if is_new:  # Nouveau mouvement
+                apply_movement(self.product, self.movement_type, self.quantity)
+            super().save(*args, **kwargs)
+            if is_new and self.movement_type == 'SORTIE':
+                record_sale(self.product_id, self.date, self.quantity)
 
     def delete(self, *args, **kwargs):
         """
         Soft delete avec rollback de la quantité
         """
         if not self.deleted_at:
-            # Rollback de la quantité
-            if self.movement_type == 'ENTREE':
-                self.product.quantity -= self.quantity
-            elif self.movement_type == 'SORTIE':
-                self.product.quantity += self.quantity
-            self.product.save()
-            self.deleted_at = timezone.now()
-            self.save()
+            with transaction.atomic():
+                # Rollback de la quantité
+                apply_stock_delta(self.product_id, -movement_delta(self.movement_type, self.quantity))
+                self.deleted_at = timezone.now()
+                self.save()
+                if self.movement_type == 'SORTIE':
+                    record_sale(self.product_id, self.date, -self.quantity)
 
     def soft_delete(self):
         """Soft delete du mouvement"""
@@ -139,13 +143,44 @@ class StockMovement(models.Model):
     def restore(self):
         """Restaure un mouvement supprimé"""
         if self.deleted_at:
-            # Re-appliquer le mouvement
-            if self.movement_type == 'ENTREE':
-                self.product.quantity += self.quantity
-            elif self.movement_type == 'SORTIE':
-                if self.product.quantity < self.quantity:
-                    raise ValueError("Stock insuffisant pour restaurer ce mouvement")
-                self.product.quantity -= self.quantity
-            self.product.save()
-            self.deleted_at = None
-            self.save()
+            with transaction.atomic():
+                # Re-appliquer le mouvement
+                try:
+                    apply_movement(self.product, self.movement_type, self.quantity)
+                except InsufficientStock as e:
+                    raise InsufficientStock(
+                        e.product_id, e.available, e.requested,
+                        message="Stock insuffisant pour restaurer ce mouvement",
+                    )
+                self.deleted_at = None
+                self.save()
+                if self.movement_type == 'SORTIE':
+                    record_sale(self.product_id, self.date, self.quantity)
+
+
+class ProductSalesDay(models.Model):
+    """
+    Journal compact des ventes : quantité sortie par produit et par jour.
+    Alimenté par StockMovement (sorties uniquement), sert aux classements
+    des meilleures ventes sur 30/90 jours sans parcourir tous les mouvements.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='sales_days',
+        verbose_name="Produit"
+    )
+    day = models.DateField(verbose_name="Jour")
+    quantity = models.IntegerField(default=0, verbose_name="Quantité sortie")
+
+    class Meta:
+        verbose_name = "Ventes journalières produit"
+        verbose_name_plural = "Ventes journalières produits"
+        ordering = ['-day']
+        unique_together = ['product', 'day']
+        indexes = [
+            models.Index(fields=['day', 'product']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.day} : {self.quantity}"
@@ -1,69 +1,118 @@
 """
 Notifications SMS et email envoyées aux responsables lors des mouvements de stock (entrées/sorties).
-- SMS : API Orange si configurée.
-- Email : Django send_mail (EMAIL_BACKEND / SMTP selon configuration).
+- Les mouvements ne notifient pas directement : ils ajoutent une ligne à la file d'envoi
+  (outbox.NotificationOutbox) avec un contenu figé (queue_stock_movement / queue_stock_movements_batch).
+- `manage.py run_notification_worker` envoie ensuite les messages via deliver_* :
+  SMS par l'API Orange si configurée, emails sur une seule connexion (get_connection / send_messages).
+- Si StockAlertSettings.notification_digest_minutes > 0, les mouvements sont regroupés par fenêtre :
+  un seul SMS et un seul email par responsable, mouvements classés par document puis par produit.
 """
 import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
 from django.conf import settings
-from django.core.mail import send_mail
-from gestion_stock.sms_backend import send_sms, normalize_phone as _normalize_phone
+from django.core.mail import EmailMessage, get_connection
+from gestion_stock.sms_backend import send_sms, send_sms_many, normalize_phone as _normalize_phone
 
 logger = logging.getLogger(__name__)
 
 
-def _build_sms_entree(movement):
+def movement_payload(movement, stock_after=None):
+    """Contenu figé d'une notification de mouvement (stock après mouvement inclus)."""
+    return {
+        'movement_id': movement.pk,
+        'movement_type': movement.movement_type,
+        'product_id': movement.product_id,
+        'product_name': movement.product.name,
+        'quantity': movement.quantity,
+        'stock_after': movement.product.quantity if stock_after is None else stock_after,
+        'comment': movement.comment or '',
+        'date': movement.date,
+    }
+
+
+_INVOICE_RE = re.compile(r'facture\s+(\S+)', re.IGNORECASE)
+
+
+def movement_document(comment):
+    """Document d'origine d'un mouvement : « Facture N° » si cité, sinon le début du commentaire."""
+    comment = (comment or '').strip()
+    if not comment:
+        return "Sans document"
+    match = _INVOICE_RE.search(comment)
+    if match:
+        return f"Facture {match.group(1)}"
+    return re.split(r'\s[(:\-]|[(:]', comment, maxsplit=1)[0].strip()[:40] or comment[:40]
+
+
+def _digest_minutes():
+    """Fenêtre de regroupement configurée (0 = désactivée), sans créer les paramètres."""
+    from .models import StockAlertSettings
+
+    return StockAlertSettings.objects.values_list('notification_digest_minutes', flat=True).first() or 0
+
+
+def _digest_window_end(minutes):
+    """Fin de la fenêtre courante : tous les mouvements d'une fenêtre ont la même échéance."""
+    window = minutes * 60
+    now = datetime.now(dt_timezone.utc).timestamp()
+    return datetime.fromtimestamp((now // window + 1) * window, tz=dt_timezone.utc)
+
+
+def _build_sms_entree(m):
     """Message SMS pour entrée de stock."""
     lines = [
         "ENTREE DE STOCK",
-        f"Article: {movement.product.name}",
-        f"Qté entree: {movement.quantity}",
-        f"Stock actuel: {movement.product.quantity}",
+        f"Article: {m['product_name']}",
+        f"Qté entree: {m['quantity']}",
+        f"Stock actuel: {m['stock_after']}",
     ]
-    if movement.comment:
-        lines.append(f"Raison: {movement.comment[:50]}")
+    if m['comment']:
+        lines.append(f"Raison: {m['comment'][:50]}")
     return "\n".join(lines)
 
 
-def _build_sms_sortie(movement):
+def _build_sms_sortie(m):
     """Message SMS pour sortie de stock."""
     lines = [
         "SORTIE DE STOCK",
-        f"Article: {movement.product.name}",
-        f"Qté sortie: {movement.quantity}",
-        f"Reste: {movement.product.quantity}",
+        f"Article: {m['product_name']}",
+        f"Qté sortie: {m['quantity']}",
+        f"Reste: {m['stock_after']}",
     ]
-    if movement.comment:
-        lines.append(f"Raison: {movement.comment[:50]}")
+    if m['comment']:
+        lines.append(f"Raison: {m['comment'][:50]}")
     return "\n".join(lines)
 
 
-def _build_email_subject(movement):
+def _build_email_subject(m):
     """Sujet de l'email selon le type de mouvement."""
-    if movement.movement_type == 'ENTREE':
-        return f"[Stock] Entrée - {movement.product.name} (+{movement.quantity})"
-    return f"[Stock] Sortie - {movement.product.name} (-{movement.quantity})"
+    if m['movement_type'] == 'ENTREE':
+        return f"[Stock] Entrée - {m['product_name']} (+{m['quantity']})"
+    return f"[Stock] Sortie - {m['product_name']} (-{m['quantity']})"
 
 
-def _build_email_body(movement):
+def _build_email_body(m):
     """Corps de l'email pour un mouvement de stock."""
-    if movement.movement_type == 'ENTREE':
+    if m['movement_type'] == 'ENTREE':
         lines = [
             "Entrée de stock",
             "",
-            f"Article : {movement.product.name}",
-            f"Quantité entrée : {movement.quantity}",
-            f"Stock actuel : {movement.product.quantity}",
+            f"Article : {m['product_name']}",
+            f"Quantité entrée : {m['quantity']}",
+            f"Stock actuel : {m['stock_after']}",
         ]
     else:
         lines = [
             "Sortie de stock",
             "",
-            f"Article : {movement.product.name}",
-            f"Quantité sortie : {movement.quantity}",
-            f"Reste en stock : {movement.product.quantity}",
+            f"Article : {m['product_name']}",
+            f"Quantité sortie : {m['quantity']}",
+            f"Reste en stock : {m['stock_after']}",
         ]
-    if movement.comment:
-        lines.extend(["", "Commentaire :", movement.comment])
+    if m['comment']:
+        lines.extend(["", "Commentaire :", m['comment']])
     lines.extend(["", "—", "Gestion Stock"])
     return "\n".join(lines)
 
@@ -73,95 +122,233 @@ def _send_sms(to_phone, body):
     return send_sms(to_phone, body)
 
 
-def send_stock_movement_sms(movement):
+def _deliver(sent_to, sms_body, subject, email_body):
     """
-    Envoie un SMS à tous les responsables configurés (avec numéro) pour un mouvement de stock.
-    Ne lève pas d'exception: les erreurs sont loguées.
+    Envoie un SMS et un email à chaque responsable actif, en sautant ceux déjà servis
+    (sent_to, complété au fur et à mesure). Les SMS partent en parallèle (send_sms_many),
+    les emails partagent une seule connexion.
+    Lève DeliveryError si un envoi a échoué.
     """
+    from outbox.dispatch import DeliveryError
     from .models import StockNotificationRecipient
 
-    if movement.movement_type not in ('ENTREE', 'SORTIE'):
-        return
-
-    if movement.movement_type == 'ENTREE':
-        body = _build_sms_entree(movement)
-    else:
-        body = _build_sms_sortie(movement)
-
     recipients = list(StockNotificationRecipient.objects.filter(is_active=True))
     if not recipients:
-        logger.warning("SMS stock: aucun responsable configuré.")
+        logger.warning("Notifications stock: aucun responsable configuré.")
         return
 
+    errors = []
     client_id = getattr(settings, 'ORANGE_CLIENT_ID', '') or ''
     client_secret = getattr(settings, 'ORANGE_CLIENT_SECRET', '') or ''
-    if not (client_id and client_secret):
+    if client_id and client_secret:
+        phones = []
+        for r in recipients:
+            if not (r.phone or '').strip():
+                continue
+            phone = _normalize_phone(r.phone)
+            if not phone:
+                logger.warning("SMS stock: numéro invalide pour %s: %s", r.name, r.phone)
+                continue
+            if f"sms:{phone}" not in sent_to and phone not in phones:
+                phones.append(phone)
+        for result in send_sms_many([(phone, sms_body) for phone in phones]):
+            if result.ok:
+                sent_to.append(f"sms:{result.to}")
+            else:
+                errors.append(f"SMS {result.to}: {result.error or result.status_code}")
+    else:
         logger.warning(
             "SMS stock: API Orange non configurée (ORANGE_CLIENT_ID, ORANGE_CLIENT_SECRET)."
         )
-        return
 
-    sent = 0
+    emails = []
     for r in recipients:
-        if not (r.phone or '').strip():
-            continue
-        phone = _normalize_phone(r.phone)
-        if phone:
-            if _send_sms(phone, body):
-                sent += 1
-        else:
-            logger.warning("SMS stock: numéro invalide pour %s: %s", r.name, r.phone)
-    if sent > 0:
-        logger.info("SMS stock: %d alerte(s) envoyée(s) pour mouvement %s", sent, movement.pk)
+        email = (r.email or '').strip()
+        if email and f"email:{email}" not in sent_to and email not in emails:
+            emails.append(email)
+    if emails:
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@gestion-stock.local')
+        try:
+            with get_connection() as connection:
+                for email in emails:
+                    message = EmailMessage(subject, email_body, from_email, [email], connection=connection)
+                    try:
+                        message.send()
+                        sent_to.append(f"email:{email}")
+                    except Exception as e:
+                        errors.append(f"email {email}: {e}")
+        except Exception as e:
+            # Connexion SMTP impossible
+            errors.append(f"email: {e}")
 
+    if errors:
+        raise DeliveryError("; ".join(errors))
 
-def send_stock_movement_emails(movement):
+
+def queue_stock_movement(movement):
     """
-    Envoie un email à tous les responsables configurés (avec adresse email) pour un mouvement de stock.
-    Ne lève pas d'exception: les erreurs sont loguées.
+    Ajoute la notification d'un mouvement à la file d'envoi (une INSERT), pour envoi immédiat
+    ou, si le regroupement est activé, à la fin de la fenêtre en cours.
     """
-    from .models import StockNotificationRecipient
+    from outbox.dispatch import enqueue
 
     if movement.movement_type not in ('ENTREE', 'SORTIE'):
-        return
+        return None
+    minutes = _digest_minutes()
+    if minutes:
+        return enqueue('stock_movement_digest', movement_payload(movement), send_at=_digest_window_end(minutes))
+    return enqueue('stock_movement', movement_payload(movement))
 
-    subject = _build_email_subject(movement)
-    body = _build_email_body(movement)
-    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@gestion-stock.local')
 
-    recipients = list(
-        StockNotificationRecipient.objects.filter(is_active=True).exclude(email__isnull=True).exclude(email='')
-    )
-    if not recipients:
-        logger.debug("Email stock: aucun responsable avec email configuré.")
-        return
+def deliver_stock_movement(entry):
+    """Gestionnaire outbox : SMS et email pour un mouvement de stock."""
+    m = entry.payload
+    sms_body = _build_sms_entree(m) if m['movement_type'] == 'ENTREE' else _build_sms_sortie(m)
+    _deliver(entry.sent_to, sms_body, _build_email_subject(m), _build_email_body(m))
 
-    recipient_list = [r.email.strip() for r in recipients if (r.email or '').strip()]
-    if not recipient_list:
-        return
 
-    backend = getattr(settings, 'EMAIL_BACKEND', '')
-    is_console = 'console' in (backend or '')
-    if is_console:
-        logger.info(
-            "Email stock: envoi à %s (backend CONSOLE → le contenu s'affiche dans le terminal runserver, pas en boîte mail)",
-            recipient_list,
-        )
-    try:
-        send_mail(
-            subject=subject,
-            message=body,
-            from_email=from_email,
-            recipient_list=recipient_list,
-            fail_silently=True,
-        )
-        logger.info(
-            "Email stock: alerte envoyée à %d destinataire(s) pour mouvement %s",
-            len(recipient_list),
-            movement.pk,
+def _group_digest(payloads):
+    """
+    Regroupe les mouvements d'une fenêtre : [(document, [[produit, entrées, sorties, stock après]])],
+    le stock retenu étant celui du dernier mouvement du produit.
+    """
+    payloads = sorted(payloads, key=lambda m: (str(m['date']), m['movement_id'] or 0))
+    last_stock = {}
+    documents = {}
+    for m in payloads:
+        last_stock[m['product_id']] = m['stock_after']
+        products = documents.setdefault(movement_document(m['comment']), {})
+        row = products.setdefault(m['product_id'], [m['product_name'], 0, 0])
+        if m['movement_type'] == 'ENTREE':
+            row[1] += m['quantity']
+        else:
+            row[2] += m['quantity']
+    return [
+        (document, [
+            [name, entrees, sorties, last_stock[pid]]
+            for pid, (name, entrees, sorties) in sorted(products.items(), key=lambda item: item[1][0])
+        ])
+        for document, products in sorted(documents.items())
+    ]
+
+
+def _build_sms_digest(groups, count):
+    """Message SMS récapitulatif d'une fenêtre de mouvements."""
+    lines = [f"MOUVEMENTS DE STOCK ({count})"]
+    shown = 0
+    for document, rows in groups:
+        if shown >= 15:
+            break
+        lines.append(f"[{document}]")
+        for name, entrees, sorties, stock in rows:
+            if shown >= 15:
+                break
+            parts = []
+            if entrees:
+                parts.append(f"+{entrees}")
+            if sorties:
+                parts.append(f"-{sorties}")
+            lines.append(f"- {name}: {' '.join(parts)} (stock {stock})")
+            shown += 1
+    total = sum(len(rows) for _, rows in groups)
+    if total > shown:
+        lines.append(f"... et {total - shown} autre(s)")
+    return "\n".join(lines)
+
+
+def _build_email_digest(groups, count):
+    """Sujet et corps email récapitulatifs d'une fenêtre de mouvements."""
+    subject = f"[Stock] Récapitulatif : {count} mouvement(s), {len(groups)} document(s)"
+    lines = ["Mouvements de stock de la période", ""]
+    for document, rows in groups:
+        lines.append(document)
+        for name, entrees, sorties, stock in rows:
+            lines.append(f"  - {name} : entrées {entrees}, sorties {sorties}, stock actuel {stock}")
+        lines.append("")
+    lines.extend(["—", "Gestion Stock"])
+    return subject, "\n".join(lines)
+
+
+def deliver_stock_movement_digest(entries, sent_to):
+    """Gestionnaire outbox (groupé) : un SMS et un email par responsable pour toute la fenêtre."""
+    payloads = [entry.payload for entry in entries]
+    groups = _group_digest(payloads)
+    subject, email_body = _build_email_digest(groups, len(payloads))
+    _deliver(sent_to, _build_sms_digest(groups, len(payloads)), subject, email_body)
+
+
+def _summarize_movements(movements, balances):
+    """Regroupe un lot de mouvements par produit : [[nom, entrées, sorties, stock après]]."""
+    rows = {}
+    for m in movements:
+        row = rows.setdefault(m.product_id, [m.product.name, 0, 0])
+        if m.movement_type == 'ENTREE':
+            row[1] += m.quantity
+        else:
+            row[2] += m.quantity
+    return [
+        [name, entrees, sorties, balances.get(pid, 0)]
+        for pid, (name, entrees, sorties) in sorted(rows.items(), key=lambda item: item[1][0])
+    ]
+
+
+def _build_sms_movements_summary(summary, count):
+    """Message SMS récapitulatif d'un lot de mouvements."""
+    lines = [f"MOUVEMENTS DE STOCK ({count})"]
+    for name, entrees, sorties, stock in summary[:15]:
+        parts = []
+        if entrees:
+            parts.append(f"+{entrees}")
+        if sorties:
+            parts.append(f"-{sorties}")
+        lines.append(f"- {name}: {' '.join(parts)} (stock {stock})")
+    if len(summary) > 15:
+        lines.append(f"... et {len(summary) - 15} autre(s)")
+    return "\n".join(lines)
+
+
+def _build_email_movements_summary(summary, count):
+    """Sujet et corps email récapitulatifs d'un lot de mouvements."""
+    subject = f"[Stock] {count} mouvement(s) sur {len(summary)} produit(s)"
+    lines = ["Mouvements de stock enregistrés en lot", ""]
+    for name, entrees, sorties, stock in summary[:200]:
+        lines.append(f"  - {name} : entrées {entrees}, sorties {sorties}, stock actuel {stock}")
+    if len(summary) > 200:
+        lines.append(f"  ... et {len(summary) - 200} autre(s) produit(s)")
+    lines.extend(["", "—", "Gestion Stock"])
+    return subject, "\n".join(lines)
+
+
+def queue_stock_movements_batch(movements, balances):
+    """
+    Ajoute une seule notification récapitulative pour un lot de mouvements, ou, si le
+    regroupement est activé, ajoute les mouvements à la fenêtre en cours (une INSERT groupée).
+    balances : {product_id: stock après le lot}.
+    """
+    from outbox.dispatch import enqueue, enqueue_many
+
+    movements = [m for m in movements if m.movement_type in ('ENTREE', 'SORTIE')]
+    if not movements:
+        return None
+    minutes = _digest_minutes()
+    if minutes:
+        return enqueue_many(
+            'stock_movement_digest',
+            [movement_payload(m, stock_after=balances.get(m.product_id, 0)) for m in movements],
+            send_at=_digest_window_end(minutes),
         )
-    except Exception as e:
-        logger.exception("Erreur envoi email stock: %s", e)
+    return enqueue('stock_movements_batch', {
+        'count': len(movements),
+        'products': _summarize_movements(movements, balances),
+    })
+
+
+def deliver_stock_movements_batch(entry):
+    """Gestionnaire outbox : SMS et email récapitulatifs d'un lot de mouvements."""
+    summary = entry.payload['products']
+    count = entry.payload['count']
+    subject, email_body = _build_email_movements_summary(summary, count)
+    _deliver(entry.sent_to, _build_sms_movements_summary(summary, count), subject, email_body)
 
 
 def _build_sms_low_stock_reminder(products_list):
@@ -228,34 +415,37 @@ def send_low_stock_reminders(products_list):
     nb_sms = 0
     nb_emails = 0
 
-    # SMS
+    # SMS : envois parallèles sur le client Orange partagé (send_sms_many)
     body_sms = _build_sms_low_stock_reminder(products_list)
     client_id = getattr(settings, 'ORANGE_CLIENT_ID', '') or ''
     client_secret = getattr(settings, 'ORANGE_CLIENT_SECRET', '') or ''
     if client_id and client_secret:
+        phones = []
         for r in recipients:
-            if not (r.phone or '').strip():
-                continue
-            phone = _normalize_phone(r.phone)
-            if phone and _send_sms(phone, body_sms):
-                nb_sms += 1
+            phone = _normalize_phone(r.phone) if (r.phone or '').strip() else None
+            if phone and phone not in phones:
+                phones.append(phone)
+        try:
+            nb_sms = sum(1 for result in send_sms_many([(phone, body_sms) for phone in phones]) if result.ok)
+        except Exception as e:
+            logger.exception("Erreur envoi SMS rappels stock faible: %s", e)
     else:
         logger.debug("Rappels stock faible SMS: API Orange non configurée.")
 
-    # Email
+    # Email : un message par destinataire, une seule connexion
     subject, body_email = _build_email_low_stock_reminder(products_list)
     from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@gestion-stock.local')
-    recipient_emails = [r.email.strip() for r in recipients if (r.email or '').strip()]
+    recipient_emails = []
+    for r in recipients:
+        email = (r.email or '').strip()
+        if email and email not in recipient_emails:
+            recipient_emails.append(email)
     if recipient_emails:
         try:
-            send_mail(
-                subject=subject,
-                message=body_email,
-                from_email=from_email,
-                recipient_list=recipient_emails,
-                fail_silently=True,
-            )
-            nb_emails = len(recipient_emails)
+            with get_connection(fail_silently=True) as connection:
+                nb_emails = connection.send_messages([
+                    EmailMessage(subject, body_email, from_email, [email]) for email in recipient_emails
+                ]) or 0
             logger.info("Rappels stock faible: email envoyé à %d destinataire(s)", nb_emails)
         except Exception as e:
             logger.exception("Erreur envoi email rappels stock faible: %s", e)
@@ -0,0 +1,157 @@
+"""
+Compteurs de ventes par produit.
+- Product.total_sold : total des sorties de stock (non supprimées), dénormalisé.
+- ProductSalesDay : quantités sorties par produit et par jour, pour les cumuls glissants 30/90 jours.
+Les deux sont mis à jour en F() par StockMovement et reconstruits par `manage.py rebuild_sales_counters`.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def sale_day(value):
+    """Jour (fuseau courant) d'un mouvement."""
+    if hasattr(value, 'hour'):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def record_sales(deltas):
+    """
+    Applique des variations de ventes. deltas : {(product_id, jour): quantité}, quantité négative
+    pour annuler une sortie. Requêtes groupées quel que soit le nombre de produits : lecture des jours
+    existants, un UPDATE groupé du journal, un bulk_create des jours nouveaux, un UPDATE groupé de total_sold.
+    """
+    from products.models import Product
+    from .ledger import bulk_increment
+    from .models import ProductSalesDay
+
+    deltas = {key: quantity for key, quantity in deltas.items() if quantity}
+    if not deltas:
+        return
+    per_product = {}
+    for (product_id, _), quantity in deltas.items():
+        per_product[product_id] = per_product.get(product_id, 0) + quantity
+
+    with transaction.atomic():
+        existing = {
+            (product_id, day): pk
+            for pk, product_id, day in ProductSalesDay.objects.filter(
+                product_id__in=list(per_product),
+                day__in={day for _, day in deltas},
+            ).values_list('pk', 'product_id', 'day')
+        }
+        bulk_increment(ProductSalesDay, 'quantity', {
+            pk: deltas[key] for key, pk in existing.items() if key in deltas
+        })
+        missing = [key for key in deltas if key not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    ProductSalesDay.objects.bulk_create([
+                        ProductSalesDay(product_id=product_id, day=day, quantity=deltas[(product_id, day)])
+                        for product_id, day in missing
+                    ], batch_size=500)
+            except IntegrityError:
+                # Jour créé entre-temps par une autre transaction : ligne par ligne
+                for product_id, day in missing:
+                    _add_sales_day(product_id, day, deltas[(product_id, day)])
+        bulk_increment(Product, 'total_sold', per_product)
+
+
+def _add_sales_day(product_id, day, quantity):
+    from .models import ProductSalesDay
+
+    if ProductSalesDay.objects.filter(product_id=product_id, day=day).update(quantity=F('quantity') + quantity):
+        return
+    try:
+        with transaction.atomic():
+            ProductSalesDay.objects.create(product_id=product_id, day=day, quantity=quantity)
+    except IntegrityError:
+        ProductSalesDay.objects.filter(product_id=product_id, day=day).update(quantity=F('quantity') + quantity)
+
+
+def record_sale(product_id, date, quantity):
+    """Enregistre une sortie de stock (quantity > 0) ou son annulation (quantity < 0)."""
+    record_sales({(product_id, sale_day(date)): quantity})
+
+
+def sold_since(days, product_ids=None):
+    """Quantités vendues sur les `days` derniers jours : {product_id: quantité}."""
+    from .models import ProductSalesDay
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    qs = ProductSalesDay.objects.filter(day__gte=start)
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=product_ids)
+    return {
+        row['product_id']: row['sold']
+        for row in qs.values('product_id').annotate(sold=Sum('quantity'))
+    }
+
+
+def top_sellers(limit=5, days=None):
+    """
+    Produits actifs les plus vendus, avec l'attribut total_sold renseigné.
+    days=None : depuis toujours (Product.total_sold, indexé) ; sinon sur les `days` derniers jours.
+    """
+    from products.models import Product
+    from .models import ProductSalesDay
+
+    products = Product.objects.filter(deleted_at__isnull=True, is_active=True)
+    if days is None:
+        return list(products.order_by('-total_sold')[:limit])
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    ranking = list(
+        ProductSalesDay.objects.filter(
+            day__gte=start,
+            product__deleted_at__isnull=True,
+            product__is_active=True,
+        )
+        .values('product_id')
+        .annotate(sold=Sum('quantity'))
+        .filter(sold__gt=0)
+        .order_by('-sold')[:limit]
+    )
+    by_id = products.in_bulk([row['product_id'] for row in ranking])
+    result = []
+    for row in ranking:
+        product = by_id.get(row['product_id'])
+        if product:
+            product.total_sold = row['sold']
+            result.append(product)
+    return result
+
+
+@transaction.atomic
+def rebuild_sales_counters():
+    """Reconstruit le journal des ventes et Product.total_sold depuis les mouvements de stock."""
+    from products.models import Product
+    from .models import ProductSalesDay, StockMovement
+
+    sorties = StockMovement.objects.filter(movement_type='SORTIE', deleted_at__isnull=True)
+    daily = (
+        sorties.annotate(day=TruncDate('date'))
+        .values('product_id', 'day')
+        .annotate(sold=Sum('quantity'))
+    )
+    ProductSalesDay.objects.all().delete()
+    ProductSalesDay.objects.bulk_create(
+        [ProductSalesDay(product_id=row['product_id'], day=row['day'], quantity=row['sold']) for row in daily],
+        batch_size=500,
+    )
+
+    sold = (
+        sorties.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(sold=Sum('quantity'))
+        .values('sold')
+    )
+    Product.objects.update(total_sold=Coalesce(Subquery(sold), 0))
+    return ProductSalesDay.objects.count()
@@ -26,6 +26,7 @@ class StockAlertSettingsSerializer(serializers.ModelSerializer):
             'alert_threshold',
             'reminder_interval_days',
             'last_reminder_sent_at',
+            'notification_digest_minutes',
             'updated_at',
         ]
 
@@ -102,3 +103,56 @@ class StockMovementCreateSerializer(serializers.ModelSerializer):
                 )
         return data
 
+
+
+class StockMovementBulkLineSerializer(serializers.Serializer):
+    """Une ligne d'un lot de mouvements (produit désigné par son identifiant)."""
+    product = serializers.IntegerField()
+    movement_type = serializers.ChoiceField(choices=StockMovement.MOVEMENT_TYPE_CHOICES)
+    quantity = serializers.IntegerField(min_value=1)
+    date = serializers.DateTimeField(required=False)
+    comment = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class StockMovementBulkSerializer(serializers.Serializer):
+    """
+    Lot de mouvements de stock, validé entièrement avant toute écriture :
+    produits chargés en une requête, stock vérifié sur le total net par produit.
+    """
+    MAX_LINES = 5000
+
+    movements = StockMovementBulkLineSerializer(many=True, allow_empty=False, max_length=MAX_LINES)
+
+    def validate(self, data):
+        from products.models import Product
+        from .ledger import movement_delta
+
+        lines = data['movements']
+        products = Product.objects.filter(deleted_at__isnull=True).in_bulk(
+            {line['product'] for line in lines}
+        )
+        errors = {}
+        deltas = {}
+        for index, line in enumerate(lines):
+            product = products.get(line['product'])
+            if product is None:
+                errors[index] = {'product': f"Produit {line['product']} introuvable"}
+                continue
+            line['product'] = product
+            deltas[product.pk] = deltas.get(product.pk, 0) + movement_delta(
+                line['movement_type'], line['quantity']
+            )
+        for index, line in enumerate(lines):
+            if index in errors:
+                continue
+            product = line['product']
+            if product.quantity + deltas[product.pk] < 0:
+                errors[index] = {
+                    'quantity': f"Stock insuffisant pour {product.name}. Stock disponible: "
+                                f"{product.quantity}, sorties nettes du lot: {-deltas[product.pk]}"
+                }
+        if errors:
+            raise serializers.ValidationError({
+                'movements': [errors.get(index, {}) for index in range(len(lines))]
+            })
+        return data
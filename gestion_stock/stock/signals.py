@@ -1,26 +1,33 @@
 """
 Signaux pour les notifications SMS et email lors des mouvements de stock.
+Les notifications sont mises en file (outbox) dans la transaction du mouvement ;
+l'envoi est fait par `manage.py run_notification_worker`.
 """
 import logging
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.db.utils import OperationalError
-from django.dispatch import receiver
-
-from .models import StockMovement
-from .notifications import send_stock_movement_sms, send_stock_movement_emails
+from django.dispatch import Signal, receiver
 
 logger = logging.getLogger(__name__)
 
+# Envoyé par stock.ledger après chaque UPDATE de quantité
+# (kwargs : product_ids, deltas = {product_id: variation appliquée}).
+# Ces UPDATE ne passent pas par Product.save() et ne déclenchent donc pas post_save.
+stock_level_changed = Signal()
+
 
-@receiver(post_save, sender=StockMovement)
+@receiver(post_save, sender='stock.StockMovement')
 def on_stock_movement_created(sender, instance, created, **kwargs):
-    """Envoie SMS et emails aux responsables après création d'un mouvement de stock."""
+    """Met en file la notification (SMS et emails aux responsables) d'un nouveau mouvement de stock."""
+    from .notifications import queue_stock_movement
+
     if created and not instance.deleted_at:
         try:
-            send_stock_movement_sms(instance)
-            send_stock_movement_emails(instance)
+            with transaction.atomic():
+                queue_stock_movement(instance)
         except OperationalError as e:
             logger.warning(
-                "Notifications stock ignorées (tables manquantes): %s. Exécutez: python manage.py migrate stock",
+                "Notifications stock ignorées (tables manquantes): %s. Exécutez: python manage.py migrate outbox",
                 e,
             )
@@ -1,3 +1,190 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gestion_stock.testing import run_concurrently
+from outbox.dispatch import run_once
+from outbox.models import NotificationOutbox
+from products.models import Product
+
+from .ledger import InsufficientStock, apply_stock_delta, record_movements
+from .models import ProductSalesDay, StockAlertSettings, StockMovement, StockNotificationRecipient
+from .notifications import _group_digest, send_low_stock_reminders
+from .sales import rebuild_sales_counters, sold_since, top_sellers
+
+
+class ConcurrentStockOutTests(TransactionTestCase):
+    """Sorties concurrentes via apply_stock_delta : jamais de stock négatif."""
+
+    def test_concurrent_sorties_never_oversell(self):
+        product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=10)
+
+        results = run_concurrently(lambda: apply_stock_delta(product.pk, -1), 25)
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        self.assertTrue(all(isinstance(error, InsufficientStock) for error in errors), errors)
+        balances = [result for result in results if not isinstance(result, Exception)]
+        self.assertEqual(len(balances), 10)
+        self.assertTrue(all(balance >= 0 for balance in balances))
+        product.refresh_from_db()
+        self.assertEqual(product.quantity, 0)
+
+
+@override_settings(ORANGE_CLIENT_ID='id', ORANGE_CLIENT_SECRET='secret')
+class LowStockReminderTests(TestCase):
+    """Rappels de stock faible : SMS groupés et emails sur une seule connexion."""
+
+    def test_reminders_are_batched(self):
+        StockNotificationRecipient.objects.create(name='A', phone='771234567', email='a@example.com')
+        StockNotificationRecipient.objects.create(name='B', phone='+221771234567', email='b@example.com')
+        StockNotificationRecipient.objects.create(name='C', phone='781234567', is_active=False)
+        product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=1)
+
+        def fake_send_many(messages):
+            return [SimpleNamespace(to=phone, ok=True) for phone, _ in messages]
+
+        with mock.patch('stock.notifications.send_sms_many', side_effect=fake_send_many) as send_many, \
+                mock.patch('stock.notifications.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_low_stock_reminders([product]), (1, 2))
+
+        send_many.assert_called_once()
+        self.assertEqual([phone for phone, _ in send_many.call_args.args[0]], ['+221771234567'])
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['a@example.com', 'b@example.com'])
+
+
+class SalesCountersTests(TestCase):
+    """total_sold et ProductSalesDay suivent les sorties : vente, annulation (suppression) et restauration."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=50)
+
+    def _counters(self):
+        self.product.refresh_from_db()
+        days = list(ProductSalesDay.objects.filter(product=self.product).values_list('day', 'quantity'))
+        return self.product.total_sold, days
+
+    def test_sale_cancel_restore(self):
+        today = timezone.localdate()
+        StockMovement.objects.create(product=self.product, movement_type='ENTREE', quantity=5)
+        sale = StockMovement.objects.create(product=self.product, movement_type='SORTIE', quantity=4)
+        StockMovement.objects.create(
+            product=self.product, movement_type='SORTIE', quantity=3, date=timezone.now() - timedelta(days=40),
+        )
+        self.assertEqual(self._counters()[0], 7)
+        self.assertEqual(sold_since(30), {self.product.pk: 4})
+        self.assertEqual(sold_since(90), {self.product.pk: 7})
+
+        sale.delete()
+        total_sold, days = self._counters()
+        self.assertEqual(total_sold, 3)
+        self.assertIn((today, 0), days)
+        self.assertEqual(top_sellers(days=30), [])
+
+        sale.restore()
+        self.assertEqual(self._counters()[0], 7)
+        self.assertEqual([(p.pk, p.total_sold) for p in top_sellers(days=30)], [(self.product.pk, 4)])
+
+        # Les compteurs tenus en F() égalent la reconstruction depuis les mouvements
+        before = self._counters()
+        rebuild_sales_counters()
+        self.assertEqual(self._counters()[0], before[0])
+        self.assertEqual(sold_since(90), {self.product.pk: 7})
+
+
+class BulkStockMovementTests(TestCase):
+    """POST /api/stock-movements/bulk/ : tout ou rien quand un produit manque de stock."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        self.router = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=10)
+        self.cable = Product.objects.create(name='Câble', purchase_price=1, sale_price=2, quantity=3)
+
+    def _unchanged(self):
+        self.router.refresh_from_db()
+        self.cable.refresh_from_db()
+        self.assertEqual((self.router.quantity, self.cable.quantity), (10, 3))
+        self.assertEqual((self.router.total_sold, self.cable.total_sold), (0, 0))
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertFalse(ProductSalesDay.objects.exists())
+
+    def test_batch(self):
+        response = self.client.post('/api/stock-movements/bulk/', [
+            {'product': self.router.pk, 'movement_type': 'SORTIE', 'quantity': 4},
+            {'product': self.cable.pk, 'movement_type': 'ENTREE', 'quantity': 2},
+            {'product': self.cable.pk, 'movement_type': 'SORTIE', 'quantity': 5},
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['products'], [
+            {'id': self.router.pk, 'quantity': 6}, {'id': self.cable.pk, 'quantity': 0},
+        ])
+        self.assertEqual(StockMovement.objects.count(), 3)
+        self.cable.refresh_from_db()
+        self.assertEqual(self.cable.total_sold, 5)
+
+    def test_insufficient_line_rejects_whole_batch(self):
+        response = self.client.post('/api/stock-movements/bulk/', {'movements': [
+            {'product': self.router.pk, 'movement_type': 'SORTIE', 'quantity': 4},
+            {'product': self.cable.pk, 'movement_type': 'SORTIE', 'quantity': 2},
+            {'product': self.cable.pk, 'movement_type': 'SORTIE', 'quantity': 2},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['movements']
+        self.assertEqual(errors[0], {})
+        self.assertTrue(errors[2])
+        self._unchanged()
+
+    def test_stock_changed_after_validation_rolls_back(self):
+        # Stock consommé entre la validation et l'écriture : record_movements annule tout le lot
+        movements = [
+            StockMovement(product=self.router, movement_type='SORTIE', quantity=4),
+            StockMovement(product=self.cable, movement_type='SORTIE', quantity=4),
+        ]
+        with self.assertRaises(InsufficientStock) as raised:
+            record_movements(movements)
+        self.assertEqual(raised.exception.product_id, self.cable.pk)
+        self._unchanged()
+
+
+class MovementDigestTests(TestCase):
+    """Fenêtre de regroupement : une échéance commune, un seul envoi classé par document puis produit."""
+
+    def setUp(self):
+        StockAlertSettings.objects.create(alert_threshold=10, notification_digest_minutes=15)
+        self.router = Product.objects.create(name='Routeur', purchase_price=10, sale_price=20, quantity=10)
+        self.cable = Product.objects.create(name='Câble', purchase_price=1, sale_price=2, quantity=10)
+
+    def test_window_is_delivered_once(self):
+        StockMovement.objects.create(product=self.router, movement_type='ENTREE', quantity=5, comment='Réception')
+        StockMovement.objects.create(
+            product=self.router, movement_type='SORTIE', quantity=2, comment='Facture FAC-001 (client)',
+        )
+        StockMovement.objects.create(product=self.cable, movement_type='SORTIE', quantity=3, comment='Facture FAC-001')
+        StockMovement.objects.create(product=self.router, movement_type='SORTIE', quantity=1, comment='Facture FAC-001')
+
+        entries = NotificationOutbox.objects.filter(kind='stock_movement_digest')
+        send_at = set(entries.values_list('next_attempt_at', flat=True))
+        self.assertEqual(entries.count(), 4)
+        self.assertEqual(len(send_at), 1)
+        delay = (send_at.pop() - timezone.now()).total_seconds()
+        self.assertTrue(0 < delay <= 15 * 60, delay)
+        self.assertEqual(run_once(), (0, 0))
+
+        self.assertEqual(_group_digest([entry.payload for entry in entries]), [
+            ('Facture FAC-001', [['Câble', 0, 3, 7], ['Routeur', 0, 3, 12]]),
+            ('Réception', [['Routeur', 5, 0, 12]]),
+        ])
+
+        entries.update(next_attempt_at=timezone.now())
+        with mock.patch('stock.notifications._deliver') as deliver:
+            self.assertEqual(run_once(), (4, 0))
+        deliver.assert_called_once()
+        self.assertIn('MOUVEMENTS DE STOCK (4)', deliver.call_args.args[1])
+        self.assertFalse(entries.exclude(status=NotificationOutbox.STATUS_SENT).exists())
@@ -2,20 +2,31 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import F
+from django.utils import timezone
 from .models import StockMovement, StockNotificationRecipient, StockAlertSettings
 from .serializers import (
     StockMovementSerializer,
     StockMovementCreateSerializer,
+    StockMovementBulkSerializer,
     StockNotificationRecipientSerializer,
     StockAlertSettingsSerializer,
 )
-from .notifications import _normalize_phone, _send_sms, send_low_stock_reminders
+from .ledger import InsufficientStock, record_movements
+from .notifications import (
+    _normalize_phone,
+    _send_sms,
+    send_low_stock_reminders,
+    queue_stock_movements_batch,
+)
 from products.permissions import IsAdminUser as ProductsIsAdminUser
 from products.models import Product
+from gestion_stock.exports import ExportMixin
+from gestion_stock.pagination import SparseFieldsMixin
 
 
-class StockMovementViewSet(viewsets.ModelViewSet):
+class StockMovementViewSet(ExportMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des mouvements de stock
     """
@@ -26,11 +37,20 @@ class StockMovementViewSet(viewsets.ModelViewSet):
     search_fields = ['product__name', 'comment']
     ordering_fields = ['date', 'created_at']
     ordering = ['-date', '-created_at']
+    export_filename = 'mouvements_stock'
+    export_sheet_title = 'Mouvements'
+    export_columns = [
+        ('ID', 'id'), ('Date', 'date'), ('Produit', 'product__name'), ('Catégorie', 'product__category'),
+        ('Type', 'movement_type'), ('Quantité', 'quantity'), ('Commentaire', 'comment'),
+        ('Créé le', 'created_at'),
+    ]
 
     def get_serializer_class(self):
         """Utilise un serializer différent pour la création"""
         if self.action == 'create':
             return StockMovementCreateSerializer
+        if self.action == 'bulk':
+            return StockMovementBulkSerializer
         return StockMovementSerializer
 
     def get_queryset(self):
@@ -44,6 +64,52 @@ class StockMovementViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Crée un lot de mouvements en une transaction (tout ou rien).
+        Corps : {"movements": [{product, movement_type, quantity, date?, comment?}, ...]}
+        ou directement la liste. Toutes les lignes sont validées avant écriture ; le stock
+        est mis à jour par une seule requête par produit et une seule notification est mise en file.
+        """
+        data = request.data
+        if isinstance(data, list):
+            data = {'movements': data}
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        now = timezone.now()
+        movements = [
+            StockMovement(
+                product=line['product'],
+                movement_type=line['movement_type'],
+                quantity=line['quantity'],
+                date=line.get('date') or now,
+                comment=line.get('comment'),
+            )
+            for line in serializer.validated_data['movements']
+        ]
+        try:
+            with transaction.atomic():
+                balances = record_movements(movements)
+                queue_stock_movements_batch(movements, balances)
+        except InsufficientStock as e:
+            # Stock modifié entre la validation et l'écriture
+            return Response(
+                {'error': f"{e.product_name}: {e}" if e.product_name else str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            {
+                'created': len(movements),
+                'products': [
+                    {'id': product_id, 'quantity': quantity}
+                    for product_id, quantity in sorted(balances.items())
+                ],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=True, methods=['post'])
     def soft_delete(self, request, pk=None):
         """Soft delete d'un mouvement (rollback du stock)"""